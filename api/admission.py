@@ -0,0 +1,350 @@
+import asyncio
+import contextlib
+import ipaddress
+import logging
+import math
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Mapping, Optional, Sequence
+
+from src.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+ADMISSION_DECISIONS = REGISTRY.counter(
+    "contract_admission_total", "분석 요청 수락/대기/거절 건수"
+)
+ADMISSION_WAIT_SECONDS = REGISTRY.histogram(
+    "contract_admission_wait_seconds", "분석 요청 수락까지 대기 시간(초)"
+)
+
+
+class AdmissionRejected(Exception):
+    """처리 한도를 넘어 요청을 거절 (429 + Retry-After로 응답)"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"요청이 많아 처리할 수 없습니다 ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    __slots__ = ("client_id", "cost", "granted", "notify")
+
+    def __init__(self, client_id: str, cost: int, notify: Callable[[], None]):
+        self.client_id = client_id
+        self.cost = cost
+        self.granted = False
+        self.notify = notify
+
+
+class _ClientUsage:
+    __slots__ = ("in_flight", "tokens", "queued")
+
+    def __init__(self):
+        self.in_flight = 0
+        self.tokens = 0
+        self.queued = 0
+
+
+class AdmissionController:
+    """
+    /analyze_contract 수락 제어.
+    요청 비용(예상 LLM 토큰 = 분석할 조항 수와 페이지 수로 추정)을 기준으로
+    전체/클라이언트별 동시 처리 수와 토큰 예산을 넘지 않도록 하고,
+    넘는 요청은 제한된 길이의 FIFO 대기열에서 max_wait_s까지 기다리게 합니다.
+    대기열이 가득 차거나 대기 시간을 넘기면 AdmissionRejected를 던집니다.
+
+    예산보다 큰 요청 하나는 예산 크기로 잘라 계산하므로 다른 요청이 없을 때 단독으로 실행됩니다.
+    스레드(Flask)와 asyncio(ASGI) 양쪽에서 사용할 수 있습니다.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 4,
+        token_budget: int = 400_000,
+        per_client_concurrent: int = 2,
+        per_client_token_budget: int = 200_000,
+        max_queue: int = 16,
+        per_client_queue: int = 4,
+        max_wait_s: float = 30.0,
+        tokens_per_clause: int = 2500,
+        tokens_per_page: int = 500,
+        initial_service_s: float = 20.0,
+    ):
+        self.max_concurrent = max(1, max_concurrent)
+        self.token_budget = token_budget
+        self.per_client_concurrent = max(1, per_client_concurrent)
+        self.per_client_token_budget = min(per_client_token_budget, token_budget)
+        self.max_queue = max_queue
+        self.per_client_queue = per_client_queue
+        self.max_wait_s = max_wait_s
+        self.tokens_per_clause = tokens_per_clause
+        self.tokens_per_page = tokens_per_page
+
+        self._lock = threading.Lock()
+        self._queue: "deque[_Waiter]" = deque()
+        self._clients: Dict[str, _ClientUsage] = {}
+        self._in_flight = 0
+        self._tokens = 0
+        # 수락된 요청의 평균 처리 시간 (Retry-After 계산용, 지수 이동 평균)
+        self._avg_service_s = initial_service_s
+
+    def estimate(self, pages: int, clauses: int) -> int:
+        """요청 비용(예상 LLM 토큰) 추정"""
+        cost = clauses * self.tokens_per_clause + pages * self.tokens_per_page
+        return max(1, min(cost, self.per_client_token_budget))
+
+    # 상태 확인
+    def _client(self, client_id: str) -> _ClientUsage:
+        usage = self._clients.get(client_id)
+        if usage is None:
+            usage = self._clients[client_id] = _ClientUsage()
+        return usage
+
+    def _global_fits(self, cost: int) -> bool:
+        return self._in_flight < self.max_concurrent and self._tokens + cost <= self.token_budget
+
+    def _client_fits(self, client_id: str, cost: int) -> bool:
+        usage = self._clients.get(client_id)
+        if usage is None:
+            return True
+        return (
+            usage.in_flight < self.per_client_concurrent
+            and usage.tokens + cost <= self.per_client_token_budget
+        )
+
+    def retry_after(self) -> int:
+        """대기열이 빠지는 데 걸릴 예상 시간(초)"""
+        with self._lock:
+            waiting = len(self._queue) + 1
+        seconds = self._avg_service_s * waiting / self.max_concurrent
+        return int(min(max(1, math.ceil(seconds)), 300))
+
+    def check(self, client_id: str) -> None:
+        """PDF 파싱 전에 대기열이 이미 가득 찼으면 바로 거절 (파싱 비용도 아끼기 위해)"""
+        with self._lock:
+            reason = self._queue_full_reason(client_id)
+        if reason:
+            self._reject(reason)
+
+    def _queue_full_reason(self, client_id: str) -> Optional[str]:
+        if len(self._queue) >= self.max_queue:
+            return "queue_full"
+        usage = self._clients.get(client_id)
+        if usage is not None and usage.queued >= self.per_client_queue:
+            return "client_queue_full"
+        return None
+
+    def _reject(self, reason: str) -> None:
+        ADMISSION_DECISIONS.inc(decision="rejected", reason=reason)
+        retry_after = self.retry_after()
+        logger.warning(f"분석 요청 거절: {reason} (Retry-After {retry_after}초)")
+        raise AdmissionRejected(reason, retry_after)
+
+    # 수락/반납
+    def _enqueue(self, client_id: str, cost: int, notify: Callable[[], None]) -> _Waiter:
+        waiter = _Waiter(client_id, cost, notify)
+        granted = []
+        with self._lock:
+            reason = self._queue_full_reason(client_id)
+            if reason is None:
+                self._queue.append(waiter)
+                self._client(client_id).queued += 1
+                granted = self._grant_locked()
+        if reason:
+            self._reject(reason)
+        for other in granted:
+            if other is not waiter:
+                other.notify()
+        ADMISSION_DECISIONS.inc(
+            decision="admitted" if waiter.granted else "queued", reason="none"
+        )
+        return waiter
+
+    def _grant_locked(self):
+        """대기열 앞에서부터 예산 안에 들어오는 요청을 수락 (클라이언트 한도에 걸린 요청은 건너뜀)"""
+        granted = []
+        for waiter in list(self._queue):
+            if not self._global_fits(waiter.cost):
+                # 큰 요청이 계속 밀리지 않도록 전체 예산은 순서대로 배정
+                break
+            if not self._client_fits(waiter.client_id, waiter.cost):
+                continue
+            self._queue.remove(waiter)
+            usage = self._client(waiter.client_id)
+            usage.queued -= 1
+            usage.in_flight += 1
+            usage.tokens += waiter.cost
+            self._in_flight += 1
+            self._tokens += waiter.cost
+            waiter.granted = True
+            granted.append(waiter)
+        return granted
+
+    def _settle(self, waiter: _Waiter) -> bool:
+        """대기를 마친 요청의 수락 여부 확정. 수락되지 않았으면 대기열에서 제거"""
+        with self._lock:
+            if waiter.granted:
+                return True
+            self._queue.remove(waiter)
+            usage = self._client(waiter.client_id)
+            usage.queued -= 1
+            self._drop_idle_client(waiter.client_id)
+            return False
+
+    def _release(self, waiter: _Waiter, service_s: float) -> None:
+        with self._lock:
+            usage = self._client(waiter.client_id)
+            usage.in_flight -= 1
+            usage.tokens -= waiter.cost
+            self._in_flight -= 1
+            self._tokens -= waiter.cost
+            self._avg_service_s = 0.8 * self._avg_service_s + 0.2 * service_s
+            self._drop_idle_client(waiter.client_id)
+            granted = self._grant_locked()
+        for other in granted:
+            other.notify()
+
+    def _drop_idle_client(self, client_id: str) -> None:
+        usage = self._clients.get(client_id)
+        if usage is not None and not (usage.in_flight or usage.queued):
+            del self._clients[client_id]
+
+    @contextlib.contextmanager
+    def admit(self, client_id: str, cost: int):
+        """수락될 때까지(최대 max_wait_s) 기다렸다가 블록 실행 후 예산 반납 (스레드용)"""
+        event = threading.Event()
+        started = time.monotonic()
+        waiter = self._enqueue(client_id, cost, event.set)
+        if not waiter.granted:
+            event.wait(self.max_wait_s)
+            if not self._settle(waiter):
+                self._reject("timeout")
+        ADMISSION_WAIT_SECONDS.observe(time.monotonic() - started)
+
+        admitted_at = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(waiter, time.monotonic() - admitted_at)
+
+    @contextlib.asynccontextmanager
+    async def aadmit(self, client_id: str, cost: int):
+        """admit의 asyncio 버전 (대기 중 이벤트 루프를 막지 않음)"""
+        loop = asyncio.get_running_loop()
+        granted = loop.create_future()
+
+        def notify():
+            loop.call_soon_threadsafe(lambda: granted.done() or granted.set_result(True))
+
+        started = time.monotonic()
+        waiter = self._enqueue(client_id, cost, notify)
+        if not waiter.granted:
+            try:
+                await asyncio.wait_for(asyncio.shield(granted), self.max_wait_s)
+            except asyncio.TimeoutError:
+                pass
+            except BaseException:
+                # 요청이 취소되면 대기열에서 빼고, 그 사이 수락됐다면 바로 반납
+                if self._settle(waiter):
+                    self._release(waiter, 0.0)
+                raise
+            if not self._settle(waiter):
+                self._reject("timeout")
+        ADMISSION_WAIT_SECONDS.observe(time.monotonic() - started)
+
+        admitted_at = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(waiter, time.monotonic() - admitted_at)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "in_flight": self._in_flight,
+                "tokens_in_flight": self._tokens,
+                "queued": len(self._queue),
+                "clients": len(self._clients),
+                "avg_service_s": self._avg_service_s,
+            }
+
+    def metrics(self):
+        """REGISTRY.register_collector용 gauge"""
+        stats = self.snapshot()
+        help_text = "분석 요청 수락 제어 현재 상태"
+        for field in ("in_flight", "tokens_in_flight", "queued", "clients"):
+            yield "contract_admission_state", help_text, {"kind": field}, stats[field]
+
+
+class ClientIdentifier:
+    """
+    수락 제어 예산을 나눌 클라이언트 ID.
+    요청 헤더는 누구나 바꿔 보낼 수 있으므로 접속 주소가 trusted_proxies(IP/CIDR)일 때만
+    프록시가 넣은 클라이언트 헤더와 X-Forwarded-For를 믿고, 그 밖에는 접속 주소를 사용합니다.
+    """
+
+    def __init__(
+        self,
+        trusted_proxies: Sequence[str] = (),
+        client_header: str = "X-Client-ID",
+        forwarded_header: str = "X-Forwarded-For",
+    ):
+        self.trusted_proxies = [ipaddress.ip_network(p, strict=False) for p in trusted_proxies]
+        self.client_header = client_header
+        self.forwarded_header = forwarded_header
+
+    def is_trusted(self, address: str) -> bool:
+        try:
+            ip = ipaddress.ip_address(address)
+        except ValueError:
+            return False
+        return any(ip in network for network in self.trusted_proxies)
+
+    def __call__(self, remote_addr: Optional[str], headers: Mapping[str, str]) -> str:
+        if not remote_addr:
+            return "anonymous"
+        if not self.is_trusted(remote_addr):
+            return remote_addr
+        header = (headers.get(self.client_header) or "").strip()
+        if header:
+            return header
+        # 신뢰하는 프록시를 뒤에서부터 건너뛰고 처음 나오는 주소가 실제 클라이언트
+        forwarded = [
+            address.strip()
+            for address in (headers.get(self.forwarded_header) or "").split(",")
+            if address.strip()
+        ]
+        for address in reversed(forwarded):
+            if not self.is_trusted(address):
+                return address
+        return forwarded[0] if forwarded else remote_addr
+
+
+def create_client_identifier(config: Dict) -> ClientIdentifier:
+    """ADMISSION_CONFIG로 클라이언트 ID 판별기 생성"""
+    return ClientIdentifier(
+        trusted_proxies=config["TRUSTED_PROXIES"],
+        client_header=config["CLIENT_HEADER"],
+    )
+
+
+def create_admission_controller(config: Dict) -> Optional[AdmissionController]:
+    """ADMISSION_CONFIG로 수락 제어기 생성 (ENABLED가 아니면 None)"""
+    if not config.get("ENABLED"):
+        return None
+    controller = AdmissionController(
+        max_concurrent=config["MAX_CONCURRENT"],
+        token_budget=config["TOKEN_BUDGET"],
+        per_client_concurrent=config["PER_CLIENT_CONCURRENT"],
+        per_client_token_budget=config["PER_CLIENT_TOKEN_BUDGET"],
+        max_queue=config["MAX_QUEUE"],
+        per_client_queue=config["PER_CLIENT_QUEUE"],
+        max_wait_s=config["MAX_WAIT_S"],
+        tokens_per_clause=config["TOKENS_PER_CLAUSE"],
+        tokens_per_page=config["TOKENS_PER_PAGE"],
+    )
+    REGISTRY.register_collector(controller.metrics)
+    return controller
@@ -0,0 +1,432 @@
+import contextlib
+import json
+import logging
+import multiprocessing
+import sys
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+#######
+# 계약서 분석 API (ASGI 모드)
+# python api/asgi.py  또는  uvicorn api.asgi:app --host 0.0.0.0 --port 5003
+#
+# api/main.py(Flask)와 같은 /health, /vector_stores, /analyze_contract,
+# /get_cached_result 엔드포인트와, 위반 조항을 찾는 대로 NDJSON으로 보내는
+# /analyze_contract/stream 엔드포인트를 제공합니다.
+# LLM/임베딩 호출은 이벤트 루프에서 await 하고, PDF 파싱은 프로세스 풀로 넘기므로
+# 워커 하나로 여러 업로드를 동시에 처리할 수 있습니다.
+#########
+
+# 프로젝트 루트 경로를 Python 경로에 추가
+project_root = str(Path(__file__).parents[1])
+sys.path.append(project_root)
+
+from api.admission import (
+    AdmissionRejected,
+    create_admission_controller,
+    create_client_identifier,
+)
+from api.warmup import Warmup
+from src.metrics import REGISTRY, collect_request_timings, timed, timings_breakdown
+from src.profiler import ProfileStore
+
+from config import (
+    ADMISSION_CONFIG,
+    API_CONFIG,
+    ASGI_CONFIG,
+    RISK_SCHEDULE_CONFIG,
+    request_id_var,
+    setup_logging,
+)
+
+# 로깅은 lifespan에서 config.setup_logging()으로 큐 기반 설정 (서버 프로세스에서만)
+logger = logging.getLogger(__name__)
+
+
+class RequestIdMiddleware(BaseHTTPMiddleware):
+    """요청 ID를 정해 로그 레코드와 응답 메타데이터에 사용"""
+
+    async def dispatch(self, request: Request, call_next):
+        request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex
+        try:
+            ProfileStore.validate_id(request_id)
+        except ValueError:
+            request_id = uuid.uuid4().hex
+        request_id_var.set(request_id)
+
+        response = await call_next(request)
+        response.headers["X-Request-ID"] = request_id
+        return response
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app: Starlette):
+    """로깅 설정, 분석기 워밍업과 PDF 파싱용 프로세스 풀을 시작하고 종료 시 정리"""
+    setup_logging()
+
+    def initialize_analyzer():
+        # langchain/torch/faiss import와 모델 로드 모두 워밍업 스레드에서 수행
+        from api.contract_analyzer import build_analyzer
+
+        return build_analyzer()
+
+    # 모델 로드를 기다리지 않고 바로 요청을 받을 수 있도록 백그라운드에서 초기화
+    warmup = Warmup(initialize_analyzer).start()
+    REGISTRY.register_collector(warmup.metrics)
+
+    pdf_executor = None
+    if ASGI_CONFIG["PDF_WORKERS"] > 0:
+        # 로깅/배처 스레드가 있는 프로세스를 fork하지 않도록 spawn 사용
+        # (워커는 app.log를 따로 회전시키지 않도록 콘솔 로그만 사용)
+        pdf_executor = ProcessPoolExecutor(
+            max_workers=ASGI_CONFIG["PDF_WORKERS"],
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=setup_logging,
+            initargs=(None, False),
+        )
+
+    app.state.warmup = warmup
+    app.state.pdf_executor = pdf_executor
+    # 동시 분석 수/예상 토큰 예산 제한 (초과 시 대기 후 429)
+    app.state.admission = create_admission_controller(ADMISSION_CONFIG)
+    logger.info(
+        f"ASGI 서버 시작 (PDF 워커 {ASGI_CONFIG['PDF_WORKERS']}개, "
+        f"조항 동시 분석 {ASGI_CONFIG['CLAUSE_CONCURRENCY']}개)"
+    )
+    try:
+        yield
+    finally:
+        if pdf_executor is not None:
+            pdf_executor.shutdown(wait=False, cancel_futures=True)
+        if warmup.ready:
+            await warmup.value.rag_chain.async_client.aclose()
+
+
+def get_analyzer(request: Request):
+    """워밍업이 끝난 분석기 (준비 전이면 None)"""
+    warmup = request.app.state.warmup
+    return warmup.value if warmup.ready else None
+
+
+def not_ready_response(request: Request) -> JSONResponse:
+    """분석기 준비 전 요청에 대한 503 응답"""
+    return JSONResponse(
+        {"error": "분석기를 준비 중입니다", **request.app.state.warmup.status()},
+        status_code=503,
+        headers={"Retry-After": "5"},
+    )
+
+
+identify_client = create_client_identifier(ADMISSION_CONFIG)
+
+
+def client_id(request: Request) -> str:
+    """클라이언트별 예산 구분용 ID (헤더는 신뢰하는 프록시에서 온 요청만 사용)"""
+    return identify_client(request.client.host if request.client else None, request.headers)
+
+
+def analysis_deadline(request: Request, form) -> Optional[float]:
+    """조항 분석 전체 마감 시간(초): 요청의 deadline 값, 없으면 설정 기본값"""
+    value = request.query_params.get("deadline") or form.get("deadline")
+    if not value:
+        return RISK_SCHEDULE_CONFIG["ANALYSIS_DEADLINE"]
+    deadline = float(value)
+    if not 0 < deadline <= RISK_SCHEDULE_CONFIG["MAX_DEADLINE"]:
+        raise ValueError
+    return deadline
+
+
+def upload_error(request: Request, form) -> Optional[JSONResponse]:
+    """업로드 파일/파라미터 검증 (문제가 있으면 오류 응답, 없으면 None)"""
+    file = form.get("file")
+    if file is None or isinstance(file, str):
+        return JSONResponse({"error": "PDF 파일이 필요합니다"}, status_code=400)
+    if not (file.filename or "").endswith(".pdf"):
+        return JSONResponse({"error": "PDF 파일만 지원됩니다"}, status_code=400)
+
+    # 프로파일링은 동기 서버(api/main.py)에서만 지원
+    if request.query_params.get("profile") or form.get("profile"):
+        return JSONResponse(
+            {"error": "프로파일링은 Flask 서버(api/main.py)에서만 지원합니다"},
+            status_code=400,
+        )
+
+    if file.size and file.size > API_CONFIG["MAX_UPLOAD_MB"] * 1024 * 1024:
+        return JSONResponse(
+            {"error": f"파일 크기는 {API_CONFIG['MAX_UPLOAD_MB']}MB 이하여야 합니다"},
+            status_code=413,
+        )
+
+    try:
+        analysis_deadline(request, form)
+    except ValueError:
+        return JSONResponse(
+            {"error": f"deadline은 0초 초과 {RISK_SCHEDULE_CONFIG['MAX_DEADLINE']}초 이하여야 합니다"},
+            status_code=400,
+        )
+    return None
+
+
+def too_many_requests_response(error: AdmissionRejected) -> JSONResponse:
+    """처리 한도 초과 요청에 대한 429 응답"""
+    return JSONResponse(
+        {"error": str(error), "reason": error.reason, "retry_after": error.retry_after},
+        status_code=429,
+        headers={"Retry-After": str(error.retry_after)},
+    )
+
+
+async def health_check(request: Request):
+    """헬스 체크(liveness) 엔드포인트: 프로세스가 요청을 받을 수 있는지만 확인"""
+    return JSONResponse({"status": "healthy"})
+
+
+async def readiness_check(request: Request):
+    """준비 상태(readiness) 엔드포인트: 모델/벡터 스토어 로드가 끝났는지 확인"""
+    warmup = request.app.state.warmup
+    return JSONResponse(warmup.status(), status_code=200 if warmup.ready else 503)
+
+
+async def list_vector_stores(request: Request):
+    """사용 가능한 벡터 스토어 목록 조회"""
+    analyzer = get_analyzer(request)
+    if analyzer is None:
+        return not_ready_response(request)
+    stores = {
+        store_id: {
+            "model_type": info["metadata"]["model_type"],
+            "embedding_model": info["metadata"]["embedding_model"],
+            "document_count": info["metadata"]["document_count"],
+            "created_at": info["metadata"]["created_at"],
+        }
+        for store_id, info in analyzer.vector_stores.items()
+    }
+    return JSONResponse(stores)
+
+
+async def analyze_contract(request: Request):
+    """계약서 분석 엔드포인트"""
+    analyzer = get_analyzer(request)
+    if analyzer is None:
+        return not_ready_response(request)
+    form = None
+    try:
+        form = await request.form()
+        error = upload_error(request, form)
+        if error is not None:
+            return error
+        file = form["file"]
+
+        # 벡터 스토어 ID 가져오기 (선택사항)
+        vector_store_id = form.get("vector_store_id")
+
+        # 대기열이 이미 가득 찼으면 PDF 파싱 전에 거절
+        admission = request.app.state.admission
+        if admission is not None:
+            admission.check(client_id(request))
+
+        # 업로드는 SpooledTemporaryFile에 있으므로 스레드 파싱 시에는 그대로 넘기고,
+        # 프로세스 풀로 보낼 때만 bytes로 읽음 (프로세스 간 전달용)
+        pdf_executor = request.app.state.pdf_executor
+        pdf_source = await file.read() if pdf_executor is not None else file.file
+
+        # 계약서 분석 실행 (단계별 소요 시간을 함께 수집)
+        with collect_request_timings() as timings:
+            with timed("request"):
+                results = await analyzer.aanalyze_contract(
+                    pdf_source,
+                    vector_store_id,
+                    pdf_executor=pdf_executor,
+                    source_name=file.filename,
+                    clause_concurrency=ASGI_CONFIG["CLAUSE_CONCURRENCY"],
+                    clause_deadline=ASGI_CONFIG["CLAUSE_DEADLINE"],
+                    admission=admission,
+                    client_id=client_id(request),
+                    analysis_deadline=analysis_deadline(request, form),
+                )
+        results["metadata"] = {
+            "request_id": request_id_var.get(),
+            "timings": timings_breakdown(timings),
+        }
+        return JSONResponse(results)
+
+    except AdmissionRejected as e:
+        return too_many_requests_response(e)
+
+    except Exception as e:
+        logger.error(f"API 요청 처리 중 오류 발생: {str(e)}")
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+    finally:
+        # 디스크로 넘어간 업로드도 여기서 닫히며 바로 삭제됨
+        if form is not None:
+            await form.close()
+
+
+async def analyze_contract_stream(request: Request):
+    """
+    계약서 분석 스트리밍 엔드포인트 (application/x-ndjson, 한 줄에 이벤트 하나)
+    plan -> violation(위험도 높은 조항부터 분석하며 발견되는 대로) -> result(/analyze_contract와 같은 결과)
+    분석 도중 오류는 error 이벤트로 보냅니다.
+    """
+    analyzer = get_analyzer(request)
+    if analyzer is None:
+        return not_ready_response(request)
+    form = None
+    try:
+        form = await request.form()
+        error = upload_error(request, form)
+        if error is not None:
+            return error
+        file = form["file"]
+        vector_store_id = form.get("vector_store_id")
+        deadline = analysis_deadline(request, form)
+
+        # 대기열이 이미 가득 찼으면 PDF 파싱 전에 거절 (응답 시작 후에는 429를 보낼 수 없음)
+        admission = request.app.state.admission
+        if admission is not None:
+            admission.check(client_id(request))
+
+        # 응답 본문을 보내기 전에 폼이 닫히므로 업로드 내용은 미리 읽어 둠
+        pdf_source = await file.read()
+        source_name = file.filename
+
+    except AdmissionRejected as e:
+        return too_many_requests_response(e)
+
+    except Exception as e:
+        logger.error(f"API 요청 처리 중 오류 발생: {str(e)}")
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+    finally:
+        if form is not None:
+            await form.close()
+
+    request_id = request_id_var.get()
+    requester = client_id(request)
+
+    async def events():
+        result = None
+        try:
+            with collect_request_timings() as timings:
+                with timed("request"):
+                    async with contextlib.aclosing(
+                        analyzer.astream_contract(
+                            pdf_source,
+                            vector_store_id,
+                            pdf_executor=request.app.state.pdf_executor,
+                            source_name=source_name,
+                            clause_concurrency=ASGI_CONFIG["CLAUSE_CONCURRENCY"],
+                            clause_deadline=ASGI_CONFIG["CLAUSE_DEADLINE"],
+                            admission=admission,
+                            client_id=requester,
+                            analysis_deadline=deadline,
+                        )
+                    ) as stream:
+                        async for event in stream:
+                            if event["event"] == "result":
+                                result = event
+                                continue
+                            yield ndjson(event)
+            result["metadata"] = {
+                "request_id": request_id,
+                "timings": timings_breakdown(timings),
+            }
+            yield ndjson(result)
+
+        except AdmissionRejected as e:
+            yield ndjson(
+                {
+                    "event": "error",
+                    "error": str(e),
+                    "reason": e.reason,
+                    "retry_after": e.retry_after,
+                }
+            )
+
+        except Exception as e:
+            logger.error(f"스트리밍 분석 중 오류 발생: {str(e)}")
+            yield ndjson({"event": "error", "error": str(e)})
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+def ndjson(event: dict) -> bytes:
+    return (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+async def metrics(request: Request):
+    """Prometheus 텍스트 형식 메트릭"""
+    return PlainTextResponse(
+        REGISTRY.render(), media_type="text/plain; version=0.0.4"
+    )
+
+
+async def get_cached_result(request: Request):
+    """캐시된 분석 결과 조회"""
+    analyzer = get_analyzer(request)
+    if analyzer is None:
+        return not_ready_response(request)
+    section_number = request.path_params["section_number"]
+    result = analyzer.cache_manager.get_result(section_number)
+    if result:
+        return JSONResponse(result)
+    return JSONResponse({"error": "결과를 찾을 수 없습니다"}, status_code=404)
+
+
+app = Starlette(
+    debug=API_CONFIG["DEBUG"],
+    routes=[
+        Route("/health", health_check, methods=["GET"]),
+        Route("/ready", readiness_check, methods=["GET"]),
+        Route("/vector_stores", list_vector_stores, methods=["GET"]),
+        Route("/analyze_contract", analyze_contract, methods=["POST"]),
+        Route("/analyze_contract/stream", analyze_contract_stream, methods=["POST"]),
+        Route("/metrics", metrics, methods=["GET"]),
+        Route(
+            "/get_cached_result/{section_number:int}",
+            get_cached_result,
+            methods=["GET"],
+        ),
+    ],
+    middleware=[
+        # 모든 도메인에서의 요청 허용
+        Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"]),
+        Middleware(RequestIdMiddleware),
+    ],
+    lifespan=lifespan,
+)
+
+
+if __name__ == "__main__":
+    # log_config=None: uvicorn이 config.setup_logging()의 핸들러를 덮어쓰지 않도록 함
+    uvicorn.run(
+        app,
+        host=API_CONFIG["HOST"],
+        port=ASGI_CONFIG["PORT"],
+        log_config=None,
+    )
+
+"""
+API 사용 예시 (Flask 서버와 동일):
+
+curl -X POST \
+  -F "file=@data/contract_test.pdf" \
+  http://localhost:5003/analyze_contract
+
+위반 조항을 찾는 대로 받기 (NDJSON, deadline초 안에 시작하지 못한 조항은 deferred_sections):
+curl -N -X POST \
+  -F "file=@data/contract_test.pdf" -F "deadline=30" \
+  http://localhost:5003/analyze_contract/stream
+"""
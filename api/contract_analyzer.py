@@ -0,0 +1,894 @@
+import asyncio
+import contextlib
+import json
+import logging
+import os
+from concurrent.futures import Executor
+from datetime import datetime
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from src import (
+    DocumentProcessor,
+    Embedder,
+    VectorStore,
+    KoreanSentenceSplitter,
+    RAGChain,
+    CacheManager,
+)
+from src.clause import Clause, split_into_clauses
+from src.clause_clustering import ClauseClusterer
+from src.document_processor import load_pdf_bytes
+from src.lexical_index import LEXICAL_INDEX_FILE
+from src.metrics import REGISTRY, timed
+from src.risk_scheduler import ClauseSchedule, RiskScorer
+from src.segment_store import VERSIONED_STORE_DIR, SegmentStore
+from src.semantic_cache import SemanticVerdictCache
+from src.sharded_store import ShardedVectorStore
+
+from config import (
+    DEFAULT_CONFIG,
+    LLM_CLIENT_CONFIG,
+    LLM_GOVERNOR_CONFIG,
+    CASCADE_CONFIG,
+    CLUSTER_CONFIG,
+    CONTEXT_CONFIG,
+    LOG_CONFIG,
+    RETRIEVAL_CONFIG,
+    RISK_SCHEDULE_CONFIG,
+    SEMANTIC_CACHE_CONFIG,
+    SHARD_CONFIG,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def create_rag_chain() -> RAGChain:
+    """설정(config.py)대로 RAG 체인 생성 (서버와 벤치마크가 같은 구성을 쓰도록 공용)"""
+    return RAGChain(
+        async_client_config=LLM_CLIENT_CONFIG,
+        structured_output=DEFAULT_CONFIG.get("LLM_STRUCTURED_OUTPUT", True),
+        stream_verdicts=DEFAULT_CONFIG.get("LLM_STREAM_VERDICTS", True),
+        model=DEFAULT_CONFIG.get("LLM_MODEL", "openai/gpt-4o"),
+        normalize_model=DEFAULT_CONFIG.get(
+            "LLM_NORMALIZE_MODEL", "openai/gpt-4o-mini"
+        ),
+        cascade_config=(
+            {
+                "small_model": CASCADE_CONFIG["SMALL_MODEL"],
+                "confidence_threshold": CASCADE_CONFIG["CONFIDENCE_THRESHOLD"],
+                "audit_rate": CASCADE_CONFIG["AUDIT_RATE"],
+            }
+            if CASCADE_CONFIG.get("ENABLED")
+            else None
+        ),
+        context_config=(
+            {
+                "token_budget": CONTEXT_CONFIG["TOKEN_BUDGET"],
+                "dedup_threshold": CONTEXT_CONFIG["DEDUP_THRESHOLD"],
+                "cache_control": CONTEXT_CONFIG["CACHE_CONTROL"],
+                "measure_raw_tokens": CONTEXT_CONFIG["MEASURE_RAW_TOKENS"],
+            }
+            if CONTEXT_CONFIG.get("ENABLED")
+            else None
+        ),
+        rate_governor_config=(
+            LLM_GOVERNOR_CONFIG if DEFAULT_CONFIG.get("LLM_RATE_GOVERNOR") else None
+        ),
+    )
+
+
+def create_retriever(vector_store: VectorStore, hybrid: bool):
+    """설정(config.py)대로 스토어의 retriever 생성"""
+    return vector_store.get_retriever(
+        search_kwargs={"k": DEFAULT_CONFIG.get("RETRIEVER_K", 4)},
+        hybrid=hybrid,
+        fetch_k=RETRIEVAL_CONFIG["FETCH_K"],
+        rrf_k=RETRIEVAL_CONFIG["RRF_K"],
+        vector_weight=RETRIEVAL_CONFIG["VECTOR_WEIGHT"],
+        lexical_weight=RETRIEVAL_CONFIG["LEXICAL_WEIGHT"],
+    )
+
+
+class ContractAnalyzer:
+    def __init__(self, vector_stores_path: str):
+        """
+        계약서 분석기 초기화
+        Args:
+            vector_stores_path: FAISS 벡터 저장소들이 있는 디렉토리 경로
+        """
+        self.document_processor = DocumentProcessor(verbose=LOG_CONFIG["VERBOSE"])
+        self.text_splitter = KoreanSentenceSplitter()
+        self.rag_chain = create_rag_chain()
+        self.cache_manager = CacheManager()
+
+        # 거의 같은 조항은 대표 하나만 LLM으로 분석
+        self.clusterer = (
+            ClauseClusterer(
+                threshold=CLUSTER_CONFIG["THRESHOLD"],
+                num_perm=CLUSTER_CONFIG["NUM_PERM"],
+                bands=CLUSTER_CONFIG["BANDS"],
+                min_chars=CLUSTER_CONFIG["MIN_CHARS"],
+                normalize_digits=CLUSTER_CONFIG["NORMALIZE_DIGITS"],
+                spot_check_rate=CLUSTER_CONFIG["SPOT_CHECK_RATE"],
+            )
+            if CLUSTER_CONFIG.get("ENABLED")
+            else None
+        )
+
+        # 위반 가능성이 높은 조항부터 LLM으로 분석
+        self.risk_scorer = (
+            RiskScorer(
+                keywords=RISK_SCHEDULE_CONFIG["KEYWORDS"],
+                similarity_weight=RISK_SCHEDULE_CONFIG["SIMILARITY_WEIGHT"],
+                keyword_weight=RISK_SCHEDULE_CONFIG["KEYWORD_WEIGHT"],
+                keyword_saturation=RISK_SCHEDULE_CONFIG["KEYWORD_SATURATION"],
+            )
+            if RISK_SCHEDULE_CONFIG.get("ENABLED")
+            else None
+        )
+
+        # 벡터 스토어 초기화
+        self.vector_stores = {}
+        self.load_vector_stores(vector_stores_path)
+
+        logger.info("계약서 분석기 초기화 완료")
+
+    def load_vector_stores(self, vector_stores_path: str):
+        """가장 최근 벡터 스토어만 로드 (store_ 디렉토리와 버전 스토어의 활성 버전 중)"""
+        try:
+            logger.info(f"벡터 스토어 로드 시작: {vector_stores_path}")
+
+            # store_ 로 시작하는 모든 디렉토리 찾기 (metadata.json이 없으면 생성 중이거나 불완전한 것)
+            store_dirs = []
+            for d in Path(vector_stores_path).iterdir():
+                if d.is_dir() and d.name.startswith("store_"):
+                    if not (d / "metadata.json").exists():
+                        logger.warning(f"메타데이터가 없는 벡터 스토어 디렉토리 건너뜀: {d.name}")
+                        continue
+                    try:
+                        # store_modeltype_modelname[_jobid]_YYYYMMDD_HHMMSS 형식 파싱
+                        timestamp_str = (
+                            d.name.split("_")[-2] + "_" + d.name.split("_")[-1]
+                        )
+                        timestamp = datetime.strptime(timestamp_str, "%Y%m%d_%H%M%S")
+                        store_dirs.append((d, timestamp))
+                    except (IndexError, ValueError):
+                        logger.warning(f"잘못된 방식의 벡터 스토어 디렉토리: {d.name}")
+                        continue
+
+            # 버전 스토어(vector_stores/versioned)의 이름별 활성 버전
+            segment_store = SegmentStore(os.path.join(vector_stores_path, VERSIONED_STORE_DIR))
+            versioned = []
+            for name in segment_store.names():
+                try:
+                    manifest = segment_store.read_manifest(name)
+                    versioned.append((manifest, datetime.fromisoformat(manifest["created_at"])))
+                except (OSError, ValueError, KeyError) as e:
+                    logger.warning(f"버전 스토어 매니페스트를 읽을 수 없습니다: {name} ({e})")
+
+            if not store_dirs and not versioned:
+                raise ValueError(
+                    f"사용 가능한 벡터 스토어가 없습니다: {vector_stores_path}"
+                )
+
+            latest_dir = max(store_dirs, key=lambda x: x[1]) if store_dirs else None
+            latest_version = max(versioned, key=lambda x: x[1]) if versioned else None
+            if latest_version and (latest_dir is None or latest_version[1] >= latest_dir[1]):
+                self._load_versioned_store(segment_store, *latest_version)
+            else:
+                self._load_store_dir(*latest_dir)
+
+        except Exception as e:
+            logger.error(f"벡터 스토어 로드 중 오류: {str(e)}")
+            raise
+
+    def _load_store_dir(self, store_dir: Path, created_at: datetime):
+        """store_ 디렉토리(faiss_store + metadata.json) 로드"""
+        metadata_path = store_dir / "metadata.json"
+        if not metadata_path.exists():
+            raise ValueError(f"메타데이터 파일이 없습니다: {metadata_path}")
+
+        with open(metadata_path, "r", encoding="utf-8") as f:
+            metadata = json.load(f)
+
+        # 벡터 스토어 로드
+        store_path = store_dir / "faiss_store"
+        if not store_path.exists():
+            raise ValueError(f"벡터 스토어 파일이 없습니다: {store_path}")
+
+        # Embedder를 직접 넘겨 retriever의 쿼리 임베딩이 마이크로 배처를 거치도록 함
+        embedder = self._create_embedder(metadata)
+        if ShardedVectorStore.is_sharded(str(store_path)):
+            # 샤드 스토어는 모든 샤드를 검색해 결과를 합침 (어휘 색인 없음)
+            vector_store = ShardedVectorStore(
+                embedder,
+                workers=SHARD_CONFIG["WORKERS"],
+                search_timeout=SHARD_CONFIG["SEARCH_TIMEOUT_S"],
+            )
+        else:
+            vector_store = VectorStore(embedder)
+
+        vector_store.load_local(str(store_path))
+
+        # 어휘 색인이 함께 저장되어 있으면 하이브리드 검색 사용
+        hybrid = RETRIEVAL_CONFIG.get("HYBRID", False) and vector_store.load_lexical_index(
+            str(store_dir / LEXICAL_INDEX_FILE)
+        )
+        self._register_store(store_dir.name, vector_store, metadata, hybrid, created_at)
+
+    def _load_versioned_store(
+        self, segment_store: SegmentStore, manifest: Dict, created_at: datetime
+    ):
+        """버전 스토어의 세그먼트(문서 + 저장된 임베딩)로 인덱스를 구성 (임베딩 재계산 없음)"""
+        documents, vectors, manifest = segment_store.load_version(
+            manifest["name"], manifest["version"]
+        )
+        vector_store = VectorStore(self._create_embedder(manifest))
+        index_options = manifest.get("index_options", {})
+        vector_store.initialize_from_vectors(
+            documents,
+            vectors,
+            pca_dimensions=index_options.get("pca_dimensions"),
+            quantization=index_options.get("quantization"),
+        )
+        hybrid = RETRIEVAL_CONFIG.get("HYBRID", False)
+        if hybrid:
+            vector_store.build_lexical_index(RETRIEVAL_CONFIG["NGRAM_SIZES"])
+        store_id = f"{manifest['name']}@{manifest['version']}"
+        self._register_store(store_id, vector_store, manifest, hybrid, created_at)
+
+    @staticmethod
+    def _create_embedder(metadata: Dict) -> Embedder:
+        # 스토어 생성 시 적용한 차원 축소를 쿼리 임베딩에도 똑같이 적용
+        return Embedder.from_store_metadata(
+            metadata,
+            enable_batching=DEFAULT_CONFIG.get("EMBED_BATCHING", False),
+            max_batch_size=DEFAULT_CONFIG.get("EMBED_BATCH_MAX_SIZE", 32),
+            max_wait_ms=DEFAULT_CONFIG.get("EMBED_BATCH_MAX_WAIT_MS", 5),
+            snapshot_dir=DEFAULT_CONFIG.get("EMBED_SNAPSHOT_DIR"),
+            query_cache_size=DEFAULT_CONFIG.get("EMBED_QUERY_CACHE_SIZE", 0),
+        )
+
+    def _register_store(
+        self,
+        store_id: str,
+        vector_store: VectorStore,
+        metadata: Dict,
+        hybrid: bool,
+        created_at: datetime,
+    ):
+        self.vector_stores[store_id] = {
+            "store": vector_store,
+            "metadata": metadata,
+            "retriever": create_retriever(vector_store, hybrid),
+            "created_at": created_at.isoformat(),
+            # 임베딩 공간이 스토어마다 다르므로 의미 캐시도 스토어별로 둠
+            "verdict_cache": (
+                SemanticVerdictCache(
+                    vector_store.embeddings,
+                    threshold=SEMANTIC_CACHE_CONFIG["THRESHOLD"],
+                    max_entries=SEMANTIC_CACHE_CONFIG["MAX_ENTRIES"],
+                    candidates=SEMANTIC_CACHE_CONFIG["CANDIDATES"],
+                    min_context_overlap=SEMANTIC_CACHE_CONFIG["MIN_CONTEXT_OVERLAP"],
+                )
+                if SEMANTIC_CACHE_CONFIG.get("ENABLED")
+                else None
+            ),
+        }
+        logger.info(f"가장 최근 벡터 스토어 로드 완료: {store_id} (생성일시: {created_at})")
+
+    def warm_up(self) -> None:
+        """임베딩 모델과 검색 경로를 한 번씩 실행해 첫 요청 지연을 줄임"""
+        for store_id, info in self.vector_stores.items():
+            info["store"].embeddings.warm_up()
+            info["store"].similarity_search("계약서 조항 워밍업", k=1)
+            logger.info(f"벡터 스토어 워밍업 완료: {store_id}")
+
+    def select_store(self, vector_store_id: Optional[str] = None) -> Dict:
+        """벡터 스토어 선택 (ID가 없으면 가장 최근 것 사용)"""
+        if not vector_store_id:
+            # 생성 시간 기준으로 가장 최근 벡터 스토어 선택
+            try:
+                vector_store_id = max(
+                    self.vector_stores.keys(),
+                    key=lambda k: datetime.fromisoformat(
+                        self.vector_stores[k]["created_at"]
+                    ),
+                )
+                logger.info(f"가장 최근 벡터 스토어 선택: {vector_store_id}")
+                logger.info(
+                    f"생성 시간: {self.vector_stores[vector_store_id]['created_at']}"
+                )
+            except ValueError as e:
+                logger.error(f"벡터 스토어 선택 중 오류: {str(e)}")
+                raise ValueError("사용 가능한 벡터 스토어가 없습니다.")
+        else:
+            logger.info(f"지정된 벡터 스토어 사용: {vector_store_id}")
+
+        if vector_store_id not in self.vector_stores:
+            available_stores = list(self.vector_stores.keys())
+            raise ValueError(
+                f"벡터 스토어를 찾을 수 없습니다: {vector_store_id}\n"
+                f"사용 가능한 벡터 스토어: {available_stores}"
+            )
+
+        selected_store = self.vector_stores[vector_store_id]
+
+        logger.info(f"선택된 벡터 스토어 정보:")
+        logger.info(f"- ID: {vector_store_id}")
+        logger.info(f"- 모델: {selected_store['metadata']['embedding_model']}")
+        logger.info(f"- 생성일시: {selected_store['created_at']}")
+        return selected_store
+
+    def split_clauses(self, docs: List) -> List[Clause]:
+        """문서를 넘버링 기준 조항으로 분할하고 불필요한 따옴표 제거"""
+        # logger.info("문서 문장 분할 시작")
+        # split_docs = self.text_splitter.split_documents(docs)
+
+        logger.info("문서 넘버링으로 분할 시작")
+        with timed("split"):
+            # 조항은 페이지 본문의 위치만 보관 (따옴표는 페이지당 한 번 제거)
+            clauses = split_into_clauses(docs, strip_quotes=True)
+
+        logger.info(f"분할된 문장 수: {len(clauses)}")
+        return clauses
+
+    def plan_clauses(
+        self, clauses: List[Clause]
+    ) -> Tuple[List[Clause], Dict[int, Tuple[Clause, float]]]:
+        """LLM으로 분석할 조항과 대표 판정을 복사할 조항 매핑 (클러스터링 미사용 시 전체 분석)"""
+        if self.clusterer is None:
+            return list(clauses), {}
+        with timed("cluster"):
+            return self.clusterer.plan(clauses)
+
+    def schedule_clauses(
+        self, to_analyze: List[Clause], store: Dict, deadline: Optional[float] = None
+    ) -> ClauseSchedule:
+        """분석할 조항을 위험도 순으로 정렬 (위험도 계산 미사용 시 문서 순서)"""
+        if self.risk_scorer is None:
+            return ClauseSchedule(list(to_analyze), deadline=deadline)
+        return self.risk_scorer.schedule(
+            to_analyze,
+            store["store"],
+            deadline=deadline,
+            skip_below=RISK_SCHEDULE_CONFIG["SKIP_BELOW"],
+        )
+
+    @staticmethod
+    def projected_members(
+        clauses: List[Clause],
+        to_analyze: List[Clause],
+        projections: Dict[int, Tuple[Clause, float]],
+    ) -> Dict[int, List[Clause]]:
+        """대표 조항 id별로 대표 판정을 그대로 적용받는 (직접 분석하지 않는) 구성원"""
+        analyzed = {clause.id for clause in to_analyze}
+        members: Dict[int, List[Clause]] = {}
+        for clause in clauses:
+            projection = projections.get(clause.id)
+            if projection is not None and clause.id not in analyzed:
+                members.setdefault(projection[0].id, []).append(clause)
+        return members
+
+    def clause_violations(
+        self,
+        clause: Clause,
+        result: Dict,
+        members: Iterable[Clause],
+        projections: Dict[int, Tuple[Clause, float]],
+    ) -> Dict:
+        """조항 하나의 결과에서 위반 조항만 모음 (대표 판정을 적용받는 구성원 포함, 스트리밍용)"""
+        group = [clause, *members]
+        results = {clause.id: result}
+        if self.clusterer is not None and len(group) > 1:
+            # 최종 결과에서 전체를 다시 resolve하므로 여기서는 통계를 기록하지 않음
+            results = self.clusterer.resolve(group, results, projections, record_stats=False)
+        violations = {}
+        for member in group:
+            if member.id in results:
+                self.collect_violation(member, results[member.id], violations)
+        return violations
+
+    @staticmethod
+    def deferred_sections(
+        clauses: List[Clause],
+        deferred_ids: Set[int],
+        results: Dict[int, Dict],
+        projections: Dict[int, Tuple[Clause, float]],
+    ) -> List[Dict]:
+        """마감 시간으로 분석하지 못한 조항(대표가 미뤄진 구성원 포함)의 페이지/섹션 번호"""
+        sections = []
+        for clause in clauses:
+            projection = projections.get(clause.id)
+            if clause.id in deferred_ids or (
+                clause.id not in results
+                and projection is not None
+                and projection[0].id in deferred_ids
+            ):
+                sections.append(
+                    {
+                        "key": clause.key,
+                        "page_number": clause.page,
+                        "section_number": clause.section_number,
+                    }
+                )
+        return sections
+
+    def build_response(
+        self,
+        clauses: List[Clause],
+        results: Dict[int, Dict],
+        projections: Dict[int, Tuple[Clause, float]],
+        deferred_ids: Set[int],
+    ) -> Dict:
+        analysis_results = self.collect_results(clauses, results, projections)
+        return {
+            "total_sections": len(clauses),
+            "violation_count": len(analysis_results),
+            "violations": analysis_results,
+            "deferred_sections": self.deferred_sections(
+                clauses, deferred_ids, results, projections
+            ),
+        }
+
+    def collect_results(
+        self,
+        clauses: List[Clause],
+        results: Dict[int, Dict],
+        projections: Dict[int, Tuple[Clause, float]],
+    ) -> Dict:
+        """조항 id별 분석 결과(대표 판정 적용 포함)에서 위반 조항만 모음"""
+        if self.clusterer is not None:
+            results = self.clusterer.resolve(clauses, results, projections)
+        analysis_results = {}
+        for clause in clauses:
+            result = results.get(clause.id)
+            if result is not None:
+                self.collect_violation(clause, result, analysis_results)
+        return analysis_results
+
+    @staticmethod
+    def collect_violation(clause: Clause, result: Dict, analysis_results: Dict) -> None:
+        """
+        조항 분석 결과가 위반(Y)이면 "페이지-섹션" 키(clause.key)로 analysis_results에 저장
+        (section_number는 페이지마다 다시 매기므로 section_number만으로는 다른 페이지 조항과 겹침)
+        """
+        # response 데이터 추출
+        response_data = result.get("response", {})
+        if not isinstance(response_data, dict):
+            response_data = {}
+
+        # 위반 여부 확인
+        violation_status = response_data.get("detection_flag", "N")
+        logger.debug(
+            "분석 결과 (페이지 %s 섹션 %s): %s",
+            clause.page,
+            clause.section_number,
+            result,
+            extra={"sampled": True},
+        )
+        if violation_status != "Y":
+            return
+
+        try:
+            # 위반여부가 Y인 경우에만 결과 저장
+            # 응답 직전에만 dict로 변환
+            result_data = {
+                "key": clause.key,
+                "section_number": clause.section_number,  # 분할 시 부여한 section_number (페이지별)
+                "page_number": clause.page,
+                "content": clause.text,
+                "analysis": response_data,
+                "timestamp": datetime.now().isoformat(),
+            }
+
+            # section_number가 있는 경우에만 저장
+            if result_data["section_number"] is not None:
+                analysis_results[clause.key] = result_data
+                logger.debug(
+                    "위반사항 발견: 페이지 %s 섹션 %s",
+                    clause.page,
+                    result_data["section_number"],
+                    extra={"sampled": True},
+                )
+            else:
+                logger.warning("섹션 번호가 없는위반사항 발견")
+
+        except Exception as e:
+            logger.error(f"결과 저장 중 오류: {str(e)}")
+            logger.error(f"조항 데이터: {clause!r}")
+
+    @staticmethod
+    def is_violation(result: Dict) -> bool:
+        response = result.get("response") if isinstance(result, dict) else None
+        return isinstance(response, dict) and response.get("detection_flag") == "Y"
+
+    @staticmethod
+    def estimate_cost(admission, docs: List, to_analyze: List[Clause]) -> int:
+        """수락 제어용 요청 비용 (페이지 수, LLM으로 분석할 조항 수)"""
+        return admission.estimate(pages=len(docs), clauses=len(to_analyze))
+
+    def analyze_contract(
+        self,
+        pdf_file,
+        vector_store_id: str = None,
+        admission=None,
+        client_id: str = "anonymous",
+        analysis_deadline: Optional[float] = None,
+    ) -> dict:
+        """
+        계약서 PDF 파일 분석
+        Args:
+            pdf_file: PDF 파일 객체
+            vector_store_id: 사용할 벡터 스토어 ID (없으면 가장 최근 것 사용)
+            admission: AdmissionController. 주어지면 조항 분석(LLM 호출) 전에 예산을 배정받음
+            client_id: 클라이언트별 예산 구분용 ID
+            analysis_deadline: 조항 분석 전체 마감 시간(초). 지나면 남은 조항은 deferred_sections로 응답
+        Returns:
+            분석 결과 딕셔너리
+        """
+        try:
+            store = self.select_store(vector_store_id)
+            retriever, verdict_cache = store["retriever"], store["verdict_cache"]
+
+            # 1. PDF 문서 로드 (업로드 스트림을 임시 파일 없이 바로 파싱)
+            logger.info("PDF 문서 로드 시작")
+            with timed("load_pdf"):
+                docs = self.document_processor.load_pdf(
+                    pdf_file.stream, source_name=pdf_file.filename
+                )
+
+            # 2. 문장 분할
+            clauses = self.split_clauses(docs)
+            to_analyze, projections = self.plan_clauses(clauses)
+            # 위반 가능성이 높은 조항부터 분석
+            schedule = self.schedule_clauses(to_analyze, store, analysis_deadline)
+
+            # 문서 분석 실행 (수락 제어 사용 시 예산을 배정받을 때까지 대기, 초과 시 AdmissionRejected)
+            results, deferred = {}, set()
+            with (
+                admission.admit(client_id, self.estimate_cost(admission, docs, to_analyze))
+                if admission is not None
+                else contextlib.nullcontext()
+            ):
+                schedule.start()
+                for clause in schedule.ordered:
+                    if schedule.should_defer(clause):
+                        deferred.add(clause.id)
+                        schedule.record(deferred=True)
+                        continue
+                    try:
+                        # 문서 분석 실행
+                        with timed("analyze_clause"):
+                            results[clause.id] = self.rag_chain.analyze_documents(
+                                clause.text, retriever, verdict_cache=verdict_cache
+                            )
+                        schedule.record(
+                            deferred=False, violation=self.is_violation(results[clause.id])
+                        )
+
+                    except Exception as e:
+                        logger.error(f"문서 분석 중 오류:{str(e)}")
+                        continue
+
+            if deferred:
+                logger.warning(f"마감 시간으로 분석하지 못한 조항: {len(deferred)}개")
+            return self.build_response(clauses, results, projections, deferred)
+
+        except Exception as e:
+            logger.error(f"계약서 분석 중 오류 발생: {str(e)}")
+            raise
+
+    async def _aload_pdf(
+        self,
+        pdf_source: Union[bytes, BinaryIO],
+        pdf_executor: Optional[Executor],
+        source_name: Optional[str],
+    ) -> List:
+        """PDF 문서 로드 (CPU 작업이므로 이벤트 루프 밖에서 실행)"""
+        logger.info("PDF 문서 로드 시작")
+        with timed("load_pdf"):
+            if pdf_executor is not None:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(
+                    pdf_executor,
+                    load_pdf_bytes,
+                    pdf_source,
+                    LOG_CONFIG["VERBOSE"],
+                    source_name,
+                )
+            return await asyncio.to_thread(
+                self.document_processor.load_pdf, pdf_source, source_name
+            )
+
+    async def _aanalyze_scheduled(
+        self,
+        schedule: ClauseSchedule,
+        retriever,
+        verdict_cache: Optional[SemanticVerdictCache],
+        clause_concurrency: int,
+        clause_deadline: Optional[float],
+    ) -> AsyncIterator[Tuple[Clause, Union[Dict, Exception, None]]]:
+        """
+        schedule 순서대로 조항을 동시에 분석하고 끝나는 대로 (조항, 결과)를 반환.
+        마감으로 미룬 조항의 결과는 None, 분석 중 예외는 예외 객체
+        """
+        pending = iter(schedule.ordered)
+        finished: asyncio.Queue = asyncio.Queue()
+
+        async def worker():
+            # 작업자들이 같은 iterator에서 꺼내므로 항상 위험도 높은 조항부터 시작됨
+            for clause in pending:
+                if schedule.should_defer(clause):
+                    finished.put_nowait((clause, None))
+                    continue
+                try:
+                    with timed("analyze_clause"):
+                        outcome = await self.rag_chain.aanalyze_documents(
+                            clause.text,
+                            retriever,
+                            deadline=schedule.clause_budget(clause_deadline),
+                            verdict_cache=verdict_cache,
+                        )
+                except Exception as e:
+                    outcome = e
+                finished.put_nowait((clause, outcome))
+
+        workers = [
+            asyncio.create_task(worker())
+            for _ in range(min(max(1, clause_concurrency), len(schedule)))
+        ]
+        try:
+            for _ in range(len(schedule)):
+                yield await finished.get()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def astream_contract(
+        self,
+        pdf_source: Union[bytes, BinaryIO],
+        vector_store_id: str = None,
+        pdf_executor: Optional[Executor] = None,
+        clause_concurrency: int = 16,
+        clause_deadline: Optional[float] = None,
+        source_name: Optional[str] = None,
+        admission=None,
+        client_id: str = "anonymous",
+        analysis_deadline: Optional[float] = None,
+    ) -> AsyncIterator[Dict]:
+        """
+        계약서 PDF 비동기 분석. 위반 조항을 찾는 대로 이벤트로 반환합니다.
+        이벤트 순서: plan(분석 계획) -> violation(위험도 순으로 분석하며 발견되는 대로)
+        -> result(analyze_contract와 같은 형식의 최종 결과)
+        인자는 aanalyze_contract와 같습니다.
+        """
+        store = self.select_store(vector_store_id)
+        retriever, verdict_cache = store["retriever"], store["verdict_cache"]
+
+        # 1. PDF 문서 로드
+        docs = await self._aload_pdf(pdf_source, pdf_executor, source_name)
+
+        # 2. 문장 분할과 위험도 순 정렬 (조항 임베딩은 검색 단계와 쿼리 캐시를 공유)
+        clauses = self.split_clauses(docs)
+        to_analyze, projections = self.plan_clauses(clauses)
+        schedule = await asyncio.to_thread(
+            self.schedule_clauses, to_analyze, store, analysis_deadline
+        )
+        members = self.projected_members(clauses, to_analyze, projections)
+        yield {
+            "event": "plan",
+            "total_sections": len(clauses),
+            "to_analyze": len(to_analyze),
+            "deadline": analysis_deadline,
+        }
+
+        # 3. 조항별 분석을 동시에 실행 (LLM/임베딩 호출은 await)
+        results, deferred = {}, set()
+        async with (
+            admission.aadmit(client_id, self.estimate_cost(admission, docs, to_analyze))
+            if admission is not None
+            else contextlib.nullcontext()
+        ):
+            schedule.start()
+            async with contextlib.aclosing(
+                self._aanalyze_scheduled(
+                    schedule, retriever, verdict_cache, clause_concurrency, clause_deadline
+                )
+            ) as outcomes:
+                async for clause, outcome in outcomes:
+                    if outcome is None:
+                        deferred.add(clause.id)
+                        schedule.record(deferred=True)
+                        continue
+                    if isinstance(outcome, Exception):
+                        logger.error(f"문서 분석 중 오류:{str(outcome)}")
+                        continue
+                    results[clause.id] = outcome
+                    violations = self.clause_violations(
+                        clause, outcome, members.get(clause.id, ()), projections
+                    )
+                    schedule.record(deferred=False, violation=bool(violations))
+                    risk = schedule.risk(clause)
+                    for violation in violations.values():
+                        yield {
+                            "event": "violation",
+                            **violation,
+                            "risk": risk.to_dict() if risk is not None else None,
+                        }
+
+        if deferred:
+            logger.warning(f"마감 시간으로 분석하지 못한 조항: {len(deferred)}개")
+        yield {"event": "result", **self.build_response(clauses, results, projections, deferred)}
+
+    async def aanalyze_contract(
+        self,
+        pdf_source: Union[bytes, BinaryIO],
+        vector_store_id: str = None,
+        pdf_executor: Optional[Executor] = None,
+        clause_concurrency: int = 16,
+        clause_deadline: Optional[float] = None,
+        source_name: Optional[str] = None,
+        admission=None,
+        client_id: str = "anonymous",
+        analysis_deadline: Optional[float] = None,
+    ) -> dict:
+        """
+        계약서 PDF 비동기 분석 (ASGI 모드)
+        Args:
+            pdf_source: 업로드된 PDF 내용 (프로세스 풀 사용 시 bytes, 아니면 스트림도 가능)
+            vector_store_id: 사용할 벡터 스토어 ID (없으면 가장 최근 것 사용)
+            pdf_executor: PDF 파싱을 넘길 프로세스 풀 (없으면 스레드에서 실행)
+            clause_concurrency: 한 요청 안에서 동시에 분석할 조항 수
+            clause_deadline: 조항별 LLM 호출 마감 시간(초)
+            source_name: 메타데이터에 기록할 업로드 파일 이름
+            admission: AdmissionController. 주어지면 조항 분석 전에 예산을 배정받음
+            client_id: 클라이언트별 예산 구분용 ID
+            analysis_deadline: 조항 분석 전체 마감 시간(초). 지나면 남은 조항은 deferred_sections로 응답
+        Returns:
+            analyze_contract와 같은 형식의 분석 결과 딕셔너리
+        """
+        try:
+            result = None
+            async with contextlib.aclosing(
+                self.astream_contract(
+                    pdf_source,
+                    vector_store_id,
+                    pdf_executor=pdf_executor,
+                    clause_concurrency=clause_concurrency,
+                    clause_deadline=clause_deadline,
+                    source_name=source_name,
+                    admission=admission,
+                    client_id=client_id,
+                    analysis_deadline=analysis_deadline,
+                )
+            ) as events:
+                async for event in events:
+                    if event["event"] == "result":
+                        result = event
+            result.pop("event")
+            return result
+
+        except Exception as e:
+            logger.error(f"계약서 분석 중 오류 발생: {str(e)}")
+            raise
+
+
+def register_metrics_collectors(contract_analyzer: "ContractAnalyzer"):
+    """컴포넌트 내부 통계를 /metrics 스크레이프 시점에 읽어오도록 등록"""
+    rag_chain = contract_analyzer.rag_chain
+
+    def llm_client_stats():
+        help_text = "비동기 LLM 클라이언트 재시도/헤징 누적 횟수"
+        for field, value in rag_chain.async_client.metrics.snapshot().items():
+            yield "contract_llm_client_events", help_text, {"event": field}, value
+
+    def cascade_stats():
+        if not rag_chain.cascade:
+            return
+        stats = rag_chain.cascade.stats.snapshot()
+        yield (
+            "contract_cascade_small_answers",
+            "소형 모델이 확정한 응답 수",
+            {},
+            stats["small_only"],
+        )
+        for reason, value in stats["escalated"].items():
+            yield (
+                "contract_cascade_escalations",
+                "대형 모델로 넘긴 사유별 건수",
+                {"reason": reason},
+                value,
+            )
+        yield (
+            "contract_cascade_agreement_ratio",
+            "소형/대형 모델 판정 일치율",
+            {},
+            stats["agreement_rate"],
+        )
+
+    def context_stats():
+        if not rag_chain.context_builder:
+            return
+        stats = rag_chain.context_builder.stats()
+        help_text = "컨텍스트 토큰 수 누적"
+        if "tokens_raw" in stats:
+            yield "contract_context_tokens", help_text, {"kind": "raw"}, stats["tokens_raw"]
+        yield "contract_context_tokens", help_text, {"kind": "compacted"}, stats["tokens_out"]
+
+    def cluster_stats():
+        if not contract_analyzer.clusterer:
+            return
+        stats = contract_analyzer.clusterer.stats.snapshot()
+        help_text = "조항 클러스터링 누적 건수"
+        for field in ("clauses", "clusters", "projected", "spot_checks", "spot_check_disagreements"):
+            yield "contract_clause_clustering", help_text, {"kind": field}, stats[field]
+
+    def semantic_cache_stats():
+        for store_id, info in contract_analyzer.vector_stores.items():
+            verdict_cache = info.get("verdict_cache")
+            if verdict_cache is None:
+                continue
+            stats = verdict_cache.stats.snapshot()
+            for field in ("hits", "misses", "context_mismatches", "evictions", "invalidations"):
+                yield (
+                    "contract_semantic_cache_events",
+                    "의미 기반 판정 캐시 누적 건수",
+                    {"store": store_id, "event": field},
+                    stats[field],
+                )
+            yield (
+                "contract_semantic_cache_hit_ratio",
+                "의미 기반 판정 캐시 적중률",
+                {"store": store_id},
+                stats["hit_rate"],
+            )
+            yield (
+                "contract_semantic_cache_entries",
+                "의미 기반 판정 캐시 항목 수",
+                {"store": store_id},
+                len(verdict_cache),
+            )
+
+    def rate_governor_stats():
+        if not rag_chain.rate_governor:
+            return
+        help_text = "LLM 호출 제한기 누적 건수 (이 프로세스)"
+        for field, value in rag_chain.rate_governor.snapshot().items():
+            yield "contract_llm_governor_events", help_text, {"event": field}, value
+        state = rag_chain.rate_governor.state()
+        help_text = "LLM 호출 제한기 공유 한도 (모든 프로세스)"
+        for field, value in state.items():
+            yield "contract_llm_governor_limit", help_text, {"kind": field}, value
+
+    def embedding_batch_stats():
+        help_text = "쿼리 임베딩 평균 배치 크기"
+        for store_id, info in contract_analyzer.vector_stores.items():
+            batcher = getattr(info["store"].embeddings, "batcher", None)
+            if batcher:
+                avg = batcher.stats()["avg_batch_size"]
+                yield "contract_embedding_avg_batch_size", help_text, {"store": store_id}, avg
+
+    for collector in (
+        llm_client_stats,
+        cascade_stats,
+        context_stats,
+        cluster_stats,
+        semantic_cache_stats,
+        rate_governor_stats,
+        embedding_batch_stats,
+    ):
+        REGISTRY.register_collector(collector)
+
+
+def build_analyzer(vector_stores_path: Optional[str] = None) -> ContractAnalyzer:
+    """분석기를 만들고 워밍업한 뒤 메트릭 수집기를 등록"""
+    vector_stores_path = vector_stores_path or os.getenv(
+        "VECTOR_STORES_PATH", "vector_stores"
+    )
+    contract_analyzer = ContractAnalyzer(vector_stores_path)
+    contract_analyzer.warm_up()
+    register_metrics_collectors(contract_analyzer)
+    return contract_analyzer
@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, send_file
 from flask_cors import CORS
 from datetime import datetime
 import logging
@@ -6,266 +6,173 @@ import os, sys
 from pathlib import Path
 import re
 import json
+import hmac
+import threading
+import uuid
 
 # 프로젝트 루트 경로를 Python 경로에 추가
 project_root = str(Path(__file__).parents[1])
 sys.path.append(project_root)
 
-from src import (
-    DocumentProcessor,
-    Embedder,
-    VectorStore,
-    KoreanSentenceSplitter,
-    RAGChain,
-    CacheManager,
+from api.admission import (
+    AdmissionRejected,
+    create_admission_controller,
+    create_client_identifier,
 )
-
-from config import API_CONFIG, DEFAULT_CONFIG
-import tempfile
-
-# 로깅 설정
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+from api.uploads import configure_uploads
+from api.warmup import Warmup
+from src.metrics import (
+    REGISTRY,
+    collect_request_timings,
+    timed,
+    timings_breakdown,
+)
+from src.profiler import PROFILE_MODES, ProfileStore, run_profiled
+
+from config import (
+    ADMISSION_CONFIG,
+    API_CONFIG,
+    PROFILER_CONFIG,
+    RISK_SCHEDULE_CONFIG,
+    request_id_var,
+    setup_logging,
 )
+
+# 로깅은 서버 시작 시 config.setup_logging()으로 큐 기반 설정 (start_server)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 app.json.ensure_ascii = False
 CORS(app)  # 모든 도메인에서의 요청 허용
+configure_uploads(app)  # 업로드는 메모리에서 처리하고 큰 파일만 디스크로 넘김
 
+profile_store = ProfileStore(PROFILER_CONFIG["DIR"], PROFILER_CONFIG["MAX_PROFILES"])
+# 동시 분석 수/예상 토큰 예산 제한 (초과 시 대기 후 429)
+admission = create_admission_controller(ADMISSION_CONFIG)
+identify_client = create_client_identifier(ADMISSION_CONFIG)
 
-class ContractAnalyzer:
-    def __init__(self, vector_stores_path: str):
-        """
-        계약서 분석기 초기화
-        Args:
-            vector_stores_path: FAISS 벡터 저장소들이 있는 디렉토리 경로
-        """
-        self.document_processor = DocumentProcessor()
-        self.text_splitter = KoreanSentenceSplitter()
-        self.rag_chain = RAGChain()
-        self.cache_manager = CacheManager()
 
-        # 벡터 스토어 초기화
-        self.vector_stores = {}
-        self.load_vector_stores(vector_stores_path)
+@app.before_request
+def assign_request_id():
+    """요청 ID를 정해 로그 레코드와 응답 메타데이터에 사용"""
+    request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex
+    try:
+        ProfileStore.validate_id(request_id)
+    except ValueError:
+        request_id = uuid.uuid4().hex
+    request_id_var.set(request_id)
 
-        logger.info("계약서 분석기 초기화 완료")
 
-    def load_vector_stores(self, vector_stores_path: str):
-        """가장 최근 벡터 스토어만 로드"""
-        try:
-            logger.info(f"벡터 스토어 로드 시작: {vector_stores_path}")
-
-            # store_ 로 시작하는 모든 디렉토리 찾기
-            store_dirs = []
-            for d in Path(vector_stores_path).iterdir():
-                if d.is_dir() and d.name.startswith("store_"):
-                    try:
-                        # store_modeltype_modelname_YYYYMMDD_HHMMSS 형식 파싱
-                        timestamp_str = (
-                            d.name.split("_")[-2] + "_" + d.name.split("_")[-1]
-                        )
-                        timestamp = datetime.strptime(timestamp_str, "%Y%m%d_%H%M%S")
-                        store_dirs.append((d, timestamp))
-                    except (IndexError, ValueError):
-                        logger.warning(f"잘못된 방식의 벡터 스토어 디렉토리: {d.name}")
-                        continue
-
-            if not store_dirs:
-                raise ValueError(
-                    f"사용 가능한 벡터 스토어가 없습니다: {vector_stores_path}"
-                )
-
-            # 타임스탬프 기준으로 정렬하고 가장 최근 것만 선택
-            latest_store_dir, latest_timestamp = max(store_dirs, key=lambda x: x[1])
-
-            # 메타데이터 로드
-            metadata_path = latest_store_dir / "metadata.json"
-            if not metadata_path.exists():
-                raise ValueError(f"메타데이터 파일이 없습니다: {metadata_path}")
-
-            with open(metadata_path, "r", encoding="utf-8") as f:
-                metadata = json.load(f)
-
-            # 임베더 및 벡터 스토어 초기화
-            embedder = Embedder(
-                model_type=metadata["model_type"],
-                model_name=metadata["embedding_model"],
-            )
-            vector_store = VectorStore(embedder.embeddings)
-
-            # 벡터 스토어 로드
-            store_path = latest_store_dir / "faiss_store"
-            if not store_path.exists():
-                raise ValueError(f"벡터 스토어 파일이 없습니다: {store_path}")
-
-            vector_store.load_local(str(store_path))
-            self.vector_stores[latest_store_dir.name] = {
-                "store": vector_store,
-                "metadata": metadata,
-                "retriever": vector_store.get_retriever(
-                    search_kwargs={"k": DEFAULT_CONFIG.get("RETRIEVER_K", 4)}
-                ),
-                "created_at": latest_timestamp.isoformat(),
-            }
+@app.after_request
+def add_request_id_header(response):
+    response.headers["X-Request-ID"] = request_id_var.get()
+    return response
 
-            logger.info(
-                f"가장 최근 벡터 스토어 로드 완료: {latest_store_dir.name} (생성일시: {latest_timestamp})"
-            )
-
-        except Exception as e:
-            logger.error(f"벡터 스토어 로드 중 오류: {str(e)}")
-            raise
-
-    def analyze_contract(self, pdf_file, vector_store_id: str = None) -> dict:
-        """
-        계약서 PDF 파일 분석
-        Args:
-            pdf_file: PDF 파일 객체
-            vector_store_id: 사용할 벡터 스토어 ID (없으면 가장 최근 것 사용)
-        Returns:
-            분석 결과 딕셔너리
-        """
-        try:
-            # 벡터 스토어 선택
-            if not vector_store_id:
-                # 생성 시간 기준으로 가장 최근 벡터 스토어 선택
-                try:
-                    vector_store_id = max(
-                        self.vector_stores.keys(),
-                        key=lambda k: datetime.fromisoformat(
-                            self.vector_stores[k]["created_at"]
-                        ),
-                    )
-                    logger.info(f"가장 최근 벡터 스토어 선택: {vector_store_id}")
-                    logger.info(
-                        f"생성 시간: {self.vector_stores[vector_store_id]['created_at']}"
-                    )
-                except ValueError as e:
-                    logger.error(f"벡터 스토어 선택 중 오류: {str(e)}")
-                    raise ValueError("사용 가능한 벡터 스토어가 없습니다.")
-            else:
-                logger.info(f"지정된 벡터 스토어 사용: {vector_store_id}")
-
-            if vector_store_id not in self.vector_stores:
-                available_stores = list(self.vector_stores.keys())
-                raise ValueError(
-                    f"벡터 스토어를 찾을 수 없습니다: {vector_store_id}\n"
-                    f"사용 가능한 벡터 스토어: {available_stores}"
-                )
-
-            selected_store = self.vector_stores[vector_store_id]
-            retriever = selected_store["retriever"]
-
-            logger.info(f"선택된 벡터 스토어 정보:")
-            logger.info(f"- ID: {vector_store_id}")
-            logger.info(f"- 모델: {selected_store['metadata']['embedding_model']}")
-            logger.info(f"- 생성일시: {selected_store['created_at']}")
-
-            # PDF를 임시 파일로 저장
-            with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp_file:
-                pdf_file.save(tmp_file.name)
-
-                # 1. PDF 문서 로드
-                logger.info("PDF 문서 로드 시작")
-                docs = self.document_processor.load_pdf(tmp_file.name)
-
-            # 임시 파일 삭제
-            os.unlink(tmp_file.name)
-
-            # 2. 문장 분할
-            # logger.info("문서 문장 분할 시작")
-            # split_docs = self.text_splitter.split_documents(docs)
-
-            logger.info("문서 넘버링으로 분할 시작")
-            split_docs = self.text_splitter.split_by_numbering(docs)
-
-            # 문장 내의 불필요한 따옴표 제거
-            for doc in split_docs:
-                doc["content"] = doc["content"].replace('"', "").replace("'", "")
-
-            logger.info(f"분할된 문장 수: {len(split_docs)}")
-
-            # 문서 분석 실행
-            analysis_results = {}
-            for doc in split_docs:
-                try:
-                    # 문서 분석 실행
-                    result = self.rag_chain.analyze_documents(doc.page_content, retriever)
-                    logger.info(f"########분석 결과: {result}")
-                    
-                    # response 데이터 추출
-                    response_data = result.get('response', {})
-                    logger.info(f"########응답: {response_data}")
-                    
-                    # 위반 여부 확인
-                    violation_status = response_data.get('detection_flag','N')
-                    logger.info(f"########응답 데이터1: {violation_status}")
-                    
-                    if violation_status == "Y":
-                        try:
-                            # 위반여부가 Y인 경우에만 결과 저장
-                            result_data = {
-                                "section_number": result.get('section_number'),  #분석 결과에서 section_number 가져오기
-                                "page_number": doc.metadata.get("page_number",1),
-                                "content": doc.page_content,
-                                "analysis": response_data,
-                                "timestamp": datetime.now().isoformat(),
-                            }
-                            
-                            # section_number가 있는 경우에만 저장
-                            if result_data["section_number"] is not None:
-                                analysis_results[result_data["section_number"]] = result_data
-                                logger.info(f"위반사항 발견: 섹션 {result_data['section_number']}")
-                            else:
-                                logger.warning("섹션 번호가 없는위반사항 발견")
-                                
-                        except Exception as e:
-                            logger.error(f"결과 저장 중 오류: {str(e)}")
-                            logger.error(f"문서 데이터: {doc.metadata}")
-                            continue
-
-                except Exception as e:
-                    logger.error(f"문서 분석 중 오류:{str(e)}")
-                    continue
-
-            return {
-                "total_sections": len(split_docs),
-                "violation_count": len(analysis_results),
-                "violations": analysis_results
-            }
 
-        except Exception as e:
-            logger.error(f"계약서 분석 중 오류 발생: {str(e)}")
-            raise
+def is_admin_request() -> bool:
+    """X-Admin-Token 헤더가 설정된 관리자 토큰과 일치하는지 확인"""
+    admin_token = API_CONFIG.get("ADMIN_TOKEN")
+    provided = request.headers.get("X-Admin-Token", "")
+    return bool(admin_token) and hmac.compare_digest(provided, admin_token)
 
 
-# 글로벌 분석기 인스턴스
+# 글로벌 분석기 인스턴스 (워밍업 완료 전에는 None)
 analyzer = None
 
 
 def initialize_analyzer():
-    """서버 시작 시 분석기 초기화"""
+    """분석기 초기화 (워밍업 스레드에서 실행)"""
     global analyzer
-    vector_stores_path = os.getenv("VECTOR_STORES_PATH", "vector_stores")
-    analyzer = ContractAnalyzer(vector_stores_path)
+    # langchain/torch/faiss import와 모델 로드 모두 워밍업 스레드에서 수행
+    from api.contract_analyzer import build_analyzer
+
+    analyzer = build_analyzer()
+    return analyzer
+
+
+# 모델 로드를 기다리지 않고 바로 요청을 받을 수 있도록 백그라운드에서 초기화.
+# import만으로는 시작하지 않음: 이 모듈을 다시 import하는 프로세스(멀티프로세싱 워커 등)가
+# 모델과 벡터 스토어를 또 로드하거나 로그 파일을 따로 열지 않도록 __main__ 또는 첫 요청에서 시작
+warmup = Warmup(initialize_analyzer)
+REGISTRY.register_collector(warmup.metrics)
+
+
+_start_lock = threading.Lock()
+
+
+def start_server(log_file: bool = True):
+    """
+    서버 프로세스에서만: 로깅 설정과 분석기 워밍업 시작 (여러 번 호출해도 한 번만 실행)
+    Args:
+        log_file: 회전 파일(app.log)에도 기록할지. WSGI 워커는 프로세스마다 파일을 따로 열어
+            회전이 엉키므로 False (파일 로그는 gunicorn 로그 설정에 맡김)
+    """
+    with _start_lock:
+        if warmup.started:
+            return
+        setup_logging(log_file=log_file)
+        warmup.start()
+
+
+@app.before_request
+def start_warmup():
+    """WSGI 서버(gunicorn 등)로 실행된 경우 첫 요청에서 시작 (콘솔 로그만)"""
+    if not warmup.started:
+        start_server(log_file=False)
+
+
+def client_id() -> str:
+    """클라이언트별 예산 구분용 ID (헤더는 신뢰하는 프록시에서 온 요청만 사용)"""
+    return identify_client(request.remote_addr, request.headers)
+
 
+def analysis_deadline():
+    """조항 분석 전체 마감 시간(초): 요청의 deadline 값, 없으면 설정 기본값"""
+    value = request.values.get("deadline")
+    if not value:
+        return RISK_SCHEDULE_CONFIG["ANALYSIS_DEADLINE"]
+    deadline = float(value)
+    if not 0 < deadline <= RISK_SCHEDULE_CONFIG["MAX_DEADLINE"]:
+        raise ValueError
+    return deadline
 
-# Flask 2.3.0+ 방식으로 초기화
-with app.app_context():
-    initialize_analyzer()
+
+def too_many_requests_response(error: AdmissionRejected):
+    """처리 한도 초과 요청에 대한 429 응답"""
+    response = jsonify(
+        {"error": str(error), "reason": error.reason, "retry_after": error.retry_after}
+    )
+    response.status_code = 429
+    response.headers["Retry-After"] = str(error.retry_after)
+    return response
+
+
+def not_ready_response():
+    """분석기 준비 전 요청에 대한 503 응답"""
+    response = jsonify({"error": "분석기를 준비 중입니다", **warmup.status()})
+    response.status_code = 503
+    response.headers["Retry-After"] = "5"
+    return response
 
 
 @app.route("/health", methods=["GET"])
 def health_check():
-    """헬스 체크 엔드포인트"""
+    """헬스 체크(liveness) 엔드포인트: 프로세스가 요청을 받을 수 있는지만 확인"""
     return jsonify({"status": "healthy"})
 
 
+@app.route("/ready", methods=["GET"])
+def readiness_check():
+    """준비 상태(readiness) 엔드포인트: 모델/벡터 스토어 로드가 끝났는지 확인"""
+    status = warmup.status()
+    return jsonify(status), (200 if warmup.ready else 503)
+
+
 @app.route("/vector_stores", methods=["GET"])
 def list_vector_stores():
     """사용 가능한 벡터 스토어 목록 조회"""
+    if analyzer is None:
+        return not_ready_response()
     stores = {
         store_id: {
             "model_type": info["metadata"]["model_type"],
@@ -281,6 +188,8 @@ def list_vector_stores():
 @app.route("/analyze_contract", methods=["POST"])
 def analyze_contract():
     """계약서 분석 엔드포인트"""
+    if analyzer is None:
+        return not_ready_response()
     try:
         if "file" not in request.files:
             return jsonify({"error": "PDF 파일이 필요합니다"}), 400
@@ -292,19 +201,113 @@ def analyze_contract():
         # 벡터 스토어 ID 가져오기 (선택사항)
         vector_store_id = request.form.get("vector_store_id")
 
-        # 계약서 분석 실행
-        results = analyzer.analyze_contract(file, vector_store_id)
+        request_id = request_id_var.get()
+
+        # 프로파일링 요청 (관리자 전용)
+        profile = request.values.get("profile", "").lower() in ("1", "true", "yes")
+        profile_mode = request.values.get("profile_mode", PROFILER_CONFIG["DEFAULT_MODE"])
+        if profile and not is_admin_request():
+            return jsonify({"error": "프로파일링은 관리자만 사용할 수 있습니다"}), 403
+        if profile and profile_mode not in PROFILE_MODES:
+            return jsonify({"error": f"지원하지 않는 프로파일 모드입니다: {profile_mode}"}), 400
+
+        try:
+            deadline = analysis_deadline()
+        except ValueError:
+            return jsonify(
+                {"error": f"deadline은 0초 초과 {RISK_SCHEDULE_CONFIG['MAX_DEADLINE']}초 이하여야 합니다"}
+            ), 400
+
+        # 대기열이 이미 가득 찼으면 PDF 파싱 전에 거절
+        if admission is not None:
+            admission.check(client_id())
+
+        # 계약서 분석 실행 (단계별 소요 시간을 함께 수집)
+        with collect_request_timings() as timings:
+            with timed("request"):
+                if profile:
+                    results = run_profiled(
+                        profile_store,
+                        request_id,
+                        profile_mode,
+                        analyzer.analyze_contract,
+                        file,
+                        vector_store_id,
+                        admission=admission,
+                        client_id=client_id(),
+                        analysis_deadline=deadline,
+                        sampling_interval_ms=PROFILER_CONFIG["SAMPLING_INTERVAL_MS"],
+                    )
+                else:
+                    results = analyzer.analyze_contract(
+                        file,
+                        vector_store_id,
+                        admission=admission,
+                        client_id=client_id(),
+                        analysis_deadline=deadline,
+                    )
+        results["metadata"] = {
+            "request_id": request_id,
+            "timings": timings_breakdown(timings),
+        }
+        if profile:
+            results["metadata"]["profile"] = {
+                "mode": profile_mode,
+                "url": f"/profiles/{request_id}",
+            }
 
         return jsonify(results)
 
+    except AdmissionRejected as e:
+        return too_many_requests_response(e)
+
     except Exception as e:
         logger.error(f"API 요청 처리 중 오류 발생: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Prometheus 텍스트 형식 메트릭"""
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/profiles", methods=["GET"])
+def list_profiles():
+    """저장된 프로파일 목록 (관리자 전용)"""
+    if not is_admin_request():
+        return jsonify({"error": "관리자 권한이 필요합니다"}), 403
+    return jsonify({"profiles": profile_store.list()})
+
+
+@app.route("/profiles/<request_id>", methods=["GET"])
+def get_profile(request_id: str):
+    """
+    요청 ID의 프로파일 다운로드 (관리자 전용)
+    format: pstats(cProfile 바이너리) | text(누적 시간 요약) | speedscope(샘플링 결과)
+    """
+    if not is_admin_request():
+        return jsonify({"error": "관리자 권한이 필요합니다"}), 403
+
+    fmt = request.args.get("format")
+    try:
+        formats = [fmt] if fmt else ["speedscope", "text", "pstats"]
+        path = next(
+            (p for p in (profile_store.get(request_id, f) for f in formats) if p), None
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if not path:
+        return jsonify({"error": "프로파일을 찾을 수 없습니다"}), 404
+    return send_file(os.path.abspath(path), as_attachment=path.endswith(".prof"))
+
+
 @app.route("/get_cached_result/<int:section_number>", methods=["GET"])
 def get_cached_result(section_number: int):
     """캐시된 분석 결과 조회"""
+    if analyzer is None:
+        return not_ready_response()
     result = analyzer.cache_manager.get_result(section_number)
     if result:
         return jsonify(result)
@@ -312,6 +315,7 @@ def get_cached_result(section_number: int):
 
 
 if __name__ == "__main__":
+    start_server()
     app.run(host=API_CONFIG["HOST"], port=API_CONFIG["PORT"], debug=API_CONFIG["DEBUG"])
 
 """
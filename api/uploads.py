@@ -0,0 +1,30 @@
+import tempfile
+from typing import IO, Optional
+
+from flask import Request
+
+from config import API_CONFIG
+
+
+class SpooledUploadRequest(Request):
+    """
+    업로드 파일을 메모리에 두었다가 UPLOAD_SPOOL_MAX_MB를 넘을 때만 디스크로 넘기는 요청 클래스.
+    SpooledTemporaryFile은 이름 없는 임시 파일을 쓰므로 파싱 중 예외가 나도 /tmp에 남지 않습니다.
+    """
+
+    def _get_file_stream(
+        self,
+        total_content_length: Optional[int],
+        content_type: Optional[str],
+        filename: Optional[str] = None,
+        content_length: Optional[int] = None,
+    ) -> IO[bytes]:
+        return tempfile.SpooledTemporaryFile(
+            max_size=API_CONFIG["UPLOAD_SPOOL_MAX_MB"] * 1024 * 1024
+        )
+
+
+def configure_uploads(app) -> None:
+    """Flask 앱에 업로드 스풀링과 최대 업로드 크기를 적용"""
+    app.request_class = SpooledUploadRequest
+    app.config["MAX_CONTENT_LENGTH"] = API_CONFIG["MAX_UPLOAD_MB"] * 1024 * 1024
@@ -3,14 +3,13 @@ from datetime import datetime
 import logging
 import os
 from pathlib import Path
-import tempfile
 import json
+import shutil
 import sys
+import tempfile
+from typing import IO
 
-# 로깅 설정
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
+# 로깅은 서버 시작 시 config.setup_logging()으로 큐 기반 설정
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
@@ -19,64 +18,51 @@ app = Flask(__name__)
 project_root = str(Path(__file__).parents[1])
 sys.path.append(project_root)
 
-from src import DocumentProcessor, Embedder, VectorStore
-from config import API_CONFIG, DEFAULT_CONFIG
-
-
-class VectorStoreCreator:
-    def __init__(
-        self, csv_path: str, output_dir: str, model_type: str, model_name: str = None
-    ):
-        self.csv_path = csv_path
-        self.output_dir = output_dir
-        self.model_type = model_type
-        self.model_name = model_name or DEFAULT_CONFIG["EMBEDDING_MODEL"]
+from api.uploads import configure_uploads
+from src.csv_ingest import CSVIngester
+from src.segment_store import VERSIONED_STORE_DIR
+from src.store_builder import StoreBuildService, new_job_id
+from config import (
+    API_CONFIG,
+    CSV_INGEST_CONFIG,
+    DEFAULT_CONFIG,
+    RETRIEVAL_CONFIG,
+    STORE_BUILD_CONFIG,
+    setup_logging,
+)
 
-        # 컴포넌트 초기화
-        self.document_processor = DocumentProcessor()
-        self.embedder = Embedder(model_type=model_type, model_name=self.model_name)
-        self.vector_store = VectorStore(self.embedder.embeddings)
+configure_uploads(app)  # 업로드는 메모리에서 처리하고 큰 파일만 디스크로 넘김
 
-        # 출력 디렉토리 생성
-        os.makedirs(output_dir, exist_ok=True)
 
-    def process(self):
-        """CSV 파일을 처리하고 벡터 저장소 생성"""
-        try:
-            # 1. CSV 파일 로드
-            logger.info(f"CSV 파일 로딩 시작: {self.csv_path}")
-            documents = self.document_processor.load_csv(self.csv_path)
-            logger.info(f"로드된 문서 수: {len(documents)}")
-
-            # 2. 벡터 저장소 초기화 및 문서 저장
-            logger.info(
-                f"{self.model_type} 모델({self.model_name})을 사용하여 벡터 저장소 초기화 및 문서 임베딩 시작"
-            )
-            self.vector_store.initialize_store(documents)
-
-            # 3. 벡터 저장소 저장
-            store_path = os.path.join(self.output_dir, "faiss_store")
-            self.vector_store.save_local(store_path)
-            logger.info(f"벡터 스토어 저장 완료: {store_path}")
+# 임베딩 모델을 작업 간에 상주시키고 생성은 백그라운드 작업으로 실행
+build_service = StoreBuildService(
+    max_workers=STORE_BUILD_CONFIG["MAX_WORKERS"],
+    max_models=STORE_BUILD_CONFIG["MAX_RESIDENT_MODELS"],
+    snapshot_dir=DEFAULT_CONFIG.get("EMBED_SNAPSHOT_DIR"),
+    history=STORE_BUILD_CONFIG["JOB_HISTORY"],
+)
 
-            # 4. 메타데이터 저장
-            metadata = {
-                "document_count": len(documents),
-                "embedding_model": self.model_name,
-                "model_type": self.model_type,
-                "created_at": datetime.now().isoformat(),
-            }
 
-            metadata_path = os.path.join(self.output_dir, "metadata.json")
-            with open(metadata_path, "w", encoding="utf-8") as f:
-                json.dump(metadata, f, ensure_ascii=False, indent=2)
-            logger.info(f"메타데이터 저장 완료: {metadata_path}")
+def build_ingester() -> CSVIngester:
+    return CSVIngester(
+        content_columns=CSV_INGEST_CONFIG["CONTENT_COLUMNS"],
+        metadata_columns=CSV_INGEST_CONFIG["METADATA_COLUMNS"],
+        chunk_size=CSV_INGEST_CONFIG["CHUNK_SIZE"],
+        dedup=CSV_INGEST_CONFIG["DEDUP"],
+    )
 
-            return True
 
-        except Exception as e:
-            logger.error(f"처리 중 오류 발생: {str(e)}")
-            raise
+def copy_upload(file) -> IO[bytes]:
+    """
+    요청이 끝나면 업로드 스트림이 닫히므로 작업용 스풀 파일로 복사
+    (UPLOAD_SPOOL_MAX_MB까지는 메모리, 넘으면 이름 없는 임시 파일)
+    """
+    spool = tempfile.SpooledTemporaryFile(
+        max_size=API_CONFIG["UPLOAD_SPOOL_MAX_MB"] * 1024 * 1024
+    )
+    shutil.copyfileobj(file.stream, spool)
+    spool.seek(0)
+    return spool
 
 
 @app.route("/health", methods=["GET"])
@@ -87,7 +73,14 @@ def health_check():
 
 @app.route("/create_vector_store", methods=["POST"])
 def create_vector_store():
-    """CSV 파일을 업로드하여 벡터 스토어 생성"""
+    """
+    CSV 파일을 업로드하여 벡터 스토어 생성 작업 등록 (202 + job_id)
+    선택 form 값:
+        wait=true: 작업이 끝날 때까지(최대 STORE_BUILD_CONFIG["WAIT_TIMEOUT_S"]초) 기다렸다가 결과 반환.
+            시간 안에 끝나지 않으면 wait 없이 호출한 것처럼 202 + job_id 반환
+        versioned=true, store_name: 버전 스토어로 저장
+        shards: 샤드 수 (2 이상이면 샤드 스토어로 저장)
+    """
     try:
         if "file" not in request.files:
             return jsonify({"error": "CSV 파일이 필요합니다"}), 400
@@ -98,41 +91,108 @@ def create_vector_store():
 
         model_type = request.form.get("model_type", "huggingface")
         model_name = request.form.get("model_name", DEFAULT_CONFIG["EMBEDDING_MODEL"])
-
-        # 임시 파일로 CSV 저장
-        with tempfile.NamedTemporaryFile(suffix=".csv", delete=False) as tmp_file:
-            file.save(tmp_file.name)
-            csv_path = tmp_file.name
-
+        wait = request.form.get("wait", "false").lower() == "true"
         try:
-            # 벡터 스토어 생성
+            shards = int(request.form.get("shards", 1))
+        except ValueError:
+            return jsonify({"error": "shards는 정수여야 합니다"}), 400
+        if shards < 1:
+            return jsonify({"error": "shards는 1 이상이어야 합니다"}), 400
+        model_name_short = model_name.split("/")[-1] if model_name else "default"
+
+        versioned_name = None
+        job_id = new_job_id()
+        if request.form.get("versioned", "false").lower() == "true":
+            versioned_name = request.form.get("store_name") or f"{model_type}_{model_name_short}"
+            output_dir = os.path.join("vector_stores", VERSIONED_STORE_DIR)
+        else:
+            # 같은 초에 등록된 작업끼리 겹치지 않도록 작업 ID를 타임스탬프 앞에 넣음
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            model_name_short = model_name.split("/")[-1] if model_name else "default"
             output_dir = os.path.join(
-                "vector_stores", f"store_{model_type}_{model_name_short}_{timestamp}"
+                "vector_stores", f"store_{model_type}_{model_name_short}_{job_id}_{timestamp}"
             )
 
-            creator = VectorStoreCreator(csv_path, output_dir, model_type, model_name)
-            creator.process()
-
+        try:
+            source = copy_upload(file)
+        finally:
+            # 디스크로 넘어간 업로드도 닫히면서 바로 삭제됨
+            file.close()
+
+        job = build_service.submit(
+            source,
+            output_dir,
+            model_type,
+            model_name,
+            close_source=True,
+            job_id=job_id,
+            source_name=file.filename,
+            versioned_name=versioned_name,
+            ngram_sizes=RETRIEVAL_CONFIG["NGRAM_SIZES"],
+            shards=shards,
+            ingester=build_ingester(),
+        )
+
+        # wait=true도 워커를 작업 내내 잡고 있지 않도록 WAIT_TIMEOUT_S까지만 기다림
+        if wait and job.done.wait(STORE_BUILD_CONFIG["WAIT_TIMEOUT_S"]):
+            if job.status != "succeeded":
+                return jsonify(job.to_dict()), 500
             return jsonify(
                 {
                     "status": "success",
+                    "job_id": job.id,
                     "output_dir": output_dir,
                     "model_type": model_type,
                     "model_name": model_name,
+                    "result": job.result,
                 }
             )
 
-        finally:
-            # 임시 파일 삭제
-            os.unlink(csv_path)
+        return (
+            jsonify(
+                {
+                    "status": "accepted",
+                    "job_id": job.id,
+                    "output_dir": output_dir,
+                    "status_url": f"/build_jobs/{job.id}",
+                }
+            ),
+            202,
+        )
 
     except Exception as e:
         logger.error(f"벡터 스토어 생성 중 오류 발생: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/build_jobs", methods=["GET"])
+def list_build_jobs():
+    """생성 작업 목록과 상주 모델 현황"""
+    return jsonify(
+        {
+            "jobs": [job.to_dict() for job in build_service.jobs()],
+            **build_service.stats(),
+        }
+    )
+
+
+@app.route("/build_jobs/<job_id>", methods=["GET"])
+def get_build_job(job_id):
+    """생성 작업 상태/진행률/처리량 조회"""
+    job = build_service.get(job_id)
+    if job is None:
+        return jsonify({"error": "작업을 찾을 수 없습니다"}), 404
+    return jsonify(job.to_dict())
+
+
+@app.route("/build_jobs/<job_id>", methods=["DELETE"])
+def cancel_build_job(job_id):
+    """생성 작업 취소 (실행 중이면 다음 배치 전에 중단)"""
+    job = build_service.cancel(job_id)
+    if job is None:
+        return jsonify({"error": "작업을 찾을 수 없습니다"}), 404
+    return jsonify(job.to_dict()), (202 if not job.finished else 200)
+
+
 @app.route("/list_vector_stores", methods=["GET"])
 def list_vector_stores():
     """생성된 벡터 스토어 목록 조회"""
@@ -160,6 +220,7 @@ def list_vector_stores():
 
 
 if __name__ == "__main__":
+    setup_logging()
     # 기본 포트와 다르게 설정 (메인 API와 충돌 방지)
     app.run(
         host=API_CONFIG.get("HOST", "0.0.0.0"),
@@ -185,7 +246,9 @@ curl -X POST \
   -F "model_name=BAAI/bge-m3" \
   http://localhost:5001/create_vector_store 
   
-  
+  생성은 백그라운드 작업으로 실행되고 바로 202 + job_id를 반환 (-F "wait=true"면 완료까지 최대 60초 대기)
+  작업 상태/처리량 조회: curl http://localhost:5001/build_jobs/<job_id>
+  작업 취소: curl -X DELETE http://localhost:5001/build_jobs/<job_id>
   
   벡터 스토어 목록 조회:
   curl http://localhost:5001/list_vector_stores
@@ -0,0 +1,81 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Warmup:
+    """
+    무거운 초기화(모델/FAISS 로드)를 백그라운드 스레드에서 실행하고 준비 상태를 제공합니다.
+    서버는 바로 요청을 받을 수 있고(/health), 준비 여부는 /ready로 확인합니다.
+    """
+
+    def __init__(self, factory: Callable[[], Any], name: str = "analyzer-warmup"):
+        self.factory = factory
+        self.name = name
+        self.value: Any = None
+        self.error: Optional[str] = None
+        self._done = threading.Event()
+        self._started = 0.0
+        self._elapsed: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def start(self) -> "Warmup":
+        """초기화 스레드 시작 (여러 번 호출해도 한 번만 실행)"""
+        with self._start_lock:
+            if self._thread is None:
+                self._started = time.perf_counter()
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        try:
+            self.value = self.factory()
+            logger.info(f"워밍업 완료 ({time.perf_counter() - self._started:.1f}초)")
+        except Exception as e:
+            self.error = str(e)
+            logger.error(f"워밍업 중 오류: {str(e)}")
+        finally:
+            self._elapsed = time.perf_counter() - self._started
+            self._done.set()
+
+    @property
+    def started(self) -> bool:
+        return self._thread is not None
+
+    @property
+    def ready(self) -> bool:
+        return self._done.is_set() and self.error is None
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """초기화가 끝날 때까지 대기. 성공했으면 True"""
+        self._done.wait(timeout)
+        return self.ready
+
+    def status(self) -> Dict[str, Any]:
+        if not self._done.is_set():
+            state = "starting"
+        else:
+            state = "ready" if self.error is None else "failed"
+        elapsed = self._elapsed
+        if elapsed is None:
+            elapsed = time.perf_counter() - self._started if self._started else 0.0
+        status = {"status": state, "elapsed_s": round(elapsed, 2)}
+        if self.error:
+            status["error"] = self.error
+        return status
+
+    def metrics(self):
+        """REGISTRY.register_collector용 (준비 여부, 초기화 소요 시간)"""
+        yield "contract_analyzer_ready", "분석기 준비 여부 (1=준비됨)", {}, int(self.ready)
+        if self._elapsed is not None:
+            yield (
+                "contract_analyzer_startup_seconds",
+                "분석기 초기화 소요 시간(초)",
+                {},
+                self._elapsed,
+            )
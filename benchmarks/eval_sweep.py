@@ -0,0 +1,495 @@
+import argparse
+import csv
+import itertools
+import json
+import logging
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+#######
+# 설정 조합별 위반 검출 품질/비용 오프라인 평가
+# python benchmarks/eval_sweep.py --k 2,4,8 --models openai/gpt-4o,openai/gpt-4o-mini \
+#     --embeddings huggingface:BAAI/bge-m3,openai:text-embedding-3-large:256 \
+#     --indexes flat,int8,pca256 --context on,off --hybrid on,off --folds 5 --output sweep.json
+#
+# - 서버(ContractAnalyzer)와 같은 설정으로 평가: CSV는 CSV_INGEST_CONFIG로 읽고, RAGChain은
+#   config의 컨텍스트 압축/캐스케이드/structured output 설정을, 리트리버는 RETRIEVAL_CONFIG의
+#   하이브리드(벡터 + BM25) 검색을 사용. --context/--hybrid로 켜고 끈 조합도 비교 가능
+#   (기본값은 config 설정 그대로)
+# - 정답: data/poc.csv의 위반 문장(양성) + 생성한 비위반 조항(음성)
+# - 위반 문장을 폴드로 나눠 평가하는 폴드의 문장은 벡터 스토어와 어휘 색인에서 제외 (교차 검증)
+# - 설정 조합마다 precision/recall/F1, 조항당 지연 시간, 토큰, LLM 호출 수를 측정하고
+#   첫 번째 조합(기준) 대비 품질이 유지되는 조합을 표시합니다.
+#
+# LLM 응답 (--llm):
+#   mock    모의 LLM 서버의 결정적 판정 (--mock_mode keywords | context)
+#   record  실제 LLM(--upstream, 키는 OPENROUTER_API_KEY)으로 받고 --recordings에 녹화
+#   replay  --recordings의 녹화 응답만 사용 (녹화에 없는 요청은 모의 판정으로 대체하고 개수 보고)
+#########
+
+project_root = str(Path(__file__).parents[1])
+sys.path.append(project_root)
+
+from benchmarks.mock_llm_server import MockLLMServer
+from benchmarks.run_pipeline import git_commit, summarize
+from benchmarks.synthetic_contract import generate_compliant_clauses, normalize_sentence
+from config import (
+    CASCADE_CONFIG,
+    CONTEXT_CONFIG,
+    CSV_INGEST_CONFIG,
+    DEFAULT_CONFIG,
+    LLM_CLIENT_CONFIG,
+    RETRIEVAL_CONFIG,
+    setup_logging,
+)
+
+setup_logging(log_file=False)
+logger = logging.getLogger(__name__)
+
+
+def parse_embedding(spec: str) -> Dict:
+    """'model_type:model_name[:dimensions]' 형식의 임베딩 설정"""
+    parts = spec.split(":")
+    if len(parts) not in (2, 3):
+        raise ValueError(f"잘못된 임베딩 설정입니다: {spec}")
+    return {
+        "model_type": parts[0],
+        "model_name": parts[1],
+        "dimensions": int(parts[2]) if len(parts) == 3 else None,
+    }
+
+
+def parse_index(spec: str) -> Dict:
+    """'flat' | 'fp16' | 'int8' | 'pca256' (+로 조합, 예: pca256+int8) 형식의 인덱스 설정"""
+    options = {"pca_dimensions": None, "quantization": None}
+    for part in spec.split("+"):
+        if part == "flat":
+            continue
+        if part in ("fp16", "int8"):
+            options["quantization"] = part
+        elif part.startswith("pca") and part[3:].isdigit():
+            options["pca_dimensions"] = int(part[3:])
+        else:
+            raise ValueError(f"잘못된 인덱스 설정입니다: {spec}")
+    return options
+
+
+def parse_switch(spec: str) -> bool:
+    """'on' | 'off' 형식의 설정 축"""
+    if spec not in ("on", "off"):
+        raise ValueError(f"on 또는 off만 지정할 수 있습니다: {spec}")
+    return spec == "on"
+
+
+def _switch(enabled: bool) -> str:
+    return "on" if enabled else "off"
+
+
+class EvalDataset:
+    """
+    위반 사례 문서(스토어용)와 평가 조항(양성/음성)을 폴드로 나눈 데이터셋.
+    같은 위반 문장에서 나온 문서는 같은 폴드로 묶어 평가 문장이 스토어에 남지 않게 합니다.
+    """
+
+    def __init__(self, csv_path: str, folds: int, negatives: Optional[int], seed: int):
+        from src.csv_ingest import CSVIngester
+
+        # 서버 스토어와 같은 형식의 문서 (CSV_INGEST_CONFIG의 컬럼 선택/중복 제거 적용)
+        self.documents = CSVIngester(
+            content_columns=CSV_INGEST_CONFIG["CONTENT_COLUMNS"],
+            metadata_columns=CSV_INGEST_CONFIG["METADATA_COLUMNS"],
+            chunk_size=CSV_INGEST_CONFIG["CHUNK_SIZE"],
+            dedup=CSV_INGEST_CONFIG["DEDUP"],
+        ).load(csv_path)
+        with open(csv_path, "r", encoding="utf-8-sig", newline="") as f:
+            sentences = [normalize_sentence(row["위반문장 원문"]) for row in csv.DictReader(f)]
+        # 문서 메타데이터의 row(CSV 행 위치)로 원래 위반 문장을 찾음
+        self.doc_groups = [sentences[doc.metadata["row"]] for doc in self.documents]
+
+        rng = random.Random(seed)
+        positives = [s for s in dict.fromkeys(sentences) if s]
+        rng.shuffle(positives)
+        negative_clauses = generate_compliant_clauses(
+            negatives if negatives is not None else len(positives), seed
+        )
+        rng.shuffle(negative_clauses)
+
+        self.folds = max(2, folds)
+        # 폴드별 (조항, 정답) 목록
+        self.fold_items: List[List[Tuple[str, bool]]] = [[] for _ in range(self.folds)]
+        self.fold_of: Dict[str, int] = {}
+        for i, sentence in enumerate(positives):
+            self.fold_of[sentence] = i % self.folds
+            self.fold_items[i % self.folds].append((sentence, True))
+        for i, clause in enumerate(negative_clauses):
+            self.fold_items[i % self.folds].append((clause, False))
+
+        self.positives = len(positives)
+        self.negatives = len(negative_clauses)
+
+    def train_indices(self, fold: int) -> List[int]:
+        """fold를 평가할 때 스토어에 넣을 문서 위치"""
+        return [
+            i for i, group in enumerate(self.doc_groups) if self.fold_of.get(group) != fold
+        ]
+
+    def all_clauses(self) -> List[str]:
+        return [clause for items in self.fold_items for clause, _ in items]
+
+
+class EvalSweep:
+    def __init__(self, dataset: EvalDataset, server: MockLLMServer, concurrency: int = 1):
+        # RAGChain이 환경 변수에서 OpenRouter 설정을 읽으므로 모의(녹화) 서버로 지정
+        os.environ["OPENROUTER_API_KEY"] = "benchmark"
+        os.environ["OPENROUTER_API_BASE"] = server.base_url
+        # 평가 요청을 LangSmith로 보내지 않음
+        os.environ["LANGCHAIN_TRACING_V2"] = "false"
+
+        self.dataset = dataset
+        self.server = server
+        self.concurrency = concurrency
+        self._chains = {}
+
+    def chain(self, model: str, context: bool):
+        """ContractAnalyzer와 같은 설정의 RAGChain (모델과 컨텍스트 압축 사용 여부만 바꿈)"""
+        from src import RAGChain
+
+        key = (model, context)
+        if key not in self._chains:
+            self._chains[key] = RAGChain(
+                async_client_config=LLM_CLIENT_CONFIG,
+                structured_output=DEFAULT_CONFIG.get("LLM_STRUCTURED_OUTPUT", True),
+                stream_verdicts=DEFAULT_CONFIG.get("LLM_STREAM_VERDICTS", True),
+                model=model,
+                cascade_config=(
+                    {
+                        "small_model": CASCADE_CONFIG["SMALL_MODEL"],
+                        "confidence_threshold": CASCADE_CONFIG["CONFIDENCE_THRESHOLD"],
+                        "audit_rate": CASCADE_CONFIG["AUDIT_RATE"],
+                    }
+                    if CASCADE_CONFIG.get("ENABLED")
+                    else None
+                ),
+                context_config=(
+                    {
+                        "token_budget": CONTEXT_CONFIG["TOKEN_BUDGET"],
+                        "dedup_threshold": CONTEXT_CONFIG["DEDUP_THRESHOLD"],
+                        "cache_control": CONTEXT_CONFIG["CACHE_CONTROL"],
+                        "measure_raw_tokens": CONTEXT_CONFIG["MEASURE_RAW_TOKENS"],
+                    }
+                    if context
+                    else None
+                ),
+            )
+        return self._chains[key]
+
+    def prepare_embedding(self, spec: Dict):
+        """문서/평가 조항 임베딩을 한 번만 계산 (조항 임베딩은 쿼리 캐시에 넣어 검색 시 재사용)"""
+        from src import Embedder
+
+        clauses = self.dataset.all_clauses()
+        embedder = Embedder(
+            model_type=spec["model_type"],
+            model_name=spec["model_name"],
+            dimensions=spec["dimensions"],
+            query_cache_size=len(clauses) + 1,
+        )
+        started = time.perf_counter()
+        vectors = np.asarray(
+            embedder.embed_documents([doc.page_content for doc in self.dataset.documents]),
+            dtype=np.float32,
+        )
+        logger.info(
+            f"문서 임베딩 완료: {spec['model_name']} {len(vectors)}개 "
+            f"({time.perf_counter() - started:.1f}초)"
+        )
+        started = time.perf_counter()
+        embedder.embed_queries(clauses)
+        embed_ms = (time.perf_counter() - started) / max(1, len(clauses)) * 1000
+        return embedder, vectors, embed_ms
+
+    def build_store(self, embedder, vectors: np.ndarray, index: Dict, fold: int, lexical: bool):
+        """폴드의 학습 문서로 인덱스를 만들고, lexical이면 같은 문서로 어휘 색인도 생성"""
+        from src import VectorStore
+
+        indices = self.dataset.train_indices(fold)
+        store = VectorStore(embedder)
+        store.initialize_from_vectors(
+            [self.dataset.documents[i] for i in indices],
+            vectors[indices],
+            pca_dimensions=index["pca_dimensions"],
+            quantization=index["quantization"],
+        )
+        if lexical:
+            store.build_lexical_index(RETRIEVAL_CONFIG["NGRAM_SIZES"])
+        return store
+
+    @staticmethod
+    def retriever(store, k: int, hybrid: bool):
+        """ContractAnalyzer와 같은 리트리버 (hybrid면 벡터 + BM25 RRF)"""
+        return store.get_retriever(
+            search_kwargs={"k": k},
+            hybrid=hybrid,
+            fetch_k=RETRIEVAL_CONFIG["FETCH_K"],
+            rrf_k=RETRIEVAL_CONFIG["RRF_K"],
+            vector_weight=RETRIEVAL_CONFIG["VECTOR_WEIGHT"],
+            lexical_weight=RETRIEVAL_CONFIG["LEXICAL_WEIGHT"],
+        )
+
+    def evaluate(
+        self, retriever, model: str, context: bool, items: List[Tuple[str, bool]]
+    ) -> Dict:
+        """한 폴드의 조항을 분석하고 혼동 행렬, 지연 시간, 토큰, 호출 수 집계"""
+        from src.metrics import LLM_TOKENS
+
+        chain = self.chain(model, context)
+        tokens_before = sum(
+            LLM_TOKENS.value(model=model, kind=kind) for kind in ("prompt", "completion")
+        )
+        calls_before = self.server.request_count
+
+        def analyze(item: Tuple[str, bool]):
+            clause, label = item
+            started = time.perf_counter()
+            result = chain.analyze_documents(clause, retriever)
+            latency = time.perf_counter() - started
+            response = result.get("response")
+            if not isinstance(response, dict):
+                return label, False, latency, True
+            return label, response.get("detection_flag") == "Y", latency, False
+
+        if self.concurrency > 1:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+                outcomes = list(pool.map(analyze, items))
+        else:
+            outcomes = [analyze(item) for item in items]
+
+        counts = {"tp": 0, "fp": 0, "fn": 0, "tn": 0, "errors": 0}
+        for label, predicted, _, error in outcomes:
+            # 오류 응답은 미검출(N)로 집계
+            key = ("t" if predicted == label else "f") + ("p" if predicted else "n")
+            counts[key] += 1
+            counts["errors"] += error
+        tokens_after = sum(
+            LLM_TOKENS.value(model=model, kind=kind) for kind in ("prompt", "completion")
+        )
+        return {
+            **counts,
+            "latencies": [latency for _, _, latency, _ in outcomes],
+            "tokens": tokens_after - tokens_before,
+            "calls": self.server.request_count - calls_before,
+        }
+
+    def run(
+        self,
+        embeddings: List[str],
+        indexes: List[str],
+        ks: List[int],
+        models: List[str],
+        contexts: List[bool],
+        hybrids: List[bool],
+    ) -> List[Dict]:
+        results = []
+        for embedding_spec in embeddings:
+            embedder, vectors, embed_ms = self.prepare_embedding(parse_embedding(embedding_spec))
+            for index_spec in indexes:
+                index = parse_index(index_spec)
+                combos = list(itertools.product(hybrids, ks, models, contexts))
+                totals = {combo: [] for combo in combos}
+                for fold in range(self.dataset.folds):
+                    store = self.build_store(embedder, vectors, index, fold, any(hybrids))
+                    items = self.dataset.fold_items[fold]
+                    for hybrid, k, model, context in combos:
+                        retriever = self.retriever(store, k, hybrid)
+                        totals[(hybrid, k, model, context)].append(
+                            self.evaluate(retriever, model, context, items)
+                        )
+
+                for (hybrid, k, model, context), folds in totals.items():
+                    config = {
+                        "embedding": embedding_spec,
+                        "index": index_spec,
+                        "hybrid": _switch(hybrid),
+                        "k": k,
+                        "model": model,
+                        "context": _switch(context),
+                    }
+                    results.append(score_config(config, folds, embed_ms))
+                    logger.info(format_row(results[-1]))
+        return results
+
+
+def _ratio(num: float, den: float) -> float:
+    return num / den if den else 0.0
+
+
+def score_config(config: Dict, folds: List[Dict], embed_ms: float) -> Dict:
+    """폴드 결과를 합산(micro)해 품질/비용 지표 계산"""
+    total = {key: sum(f[key] for f in folds) for key in ("tp", "fp", "fn", "tn", "errors")}
+    precision = _ratio(total["tp"], total["tp"] + total["fp"])
+    recall = _ratio(total["tp"], total["tp"] + total["fn"])
+    clauses = sum(total[key] for key in ("tp", "fp", "fn", "tn"))
+    fold_f1 = []
+    for f in folds:
+        p = _ratio(f["tp"], f["tp"] + f["fp"])
+        r = _ratio(f["tp"], f["tp"] + f["fn"])
+        fold_f1.append(_ratio(2 * p * r, p + r))
+    return {
+        "config": config,
+        "precision": precision,
+        "recall": recall,
+        "f1": _ratio(2 * precision * recall, precision + recall),
+        "f1_std": float(np.std(fold_f1)),
+        "confusion": total,
+        "latency": summarize([latency for f in folds for latency in f["latencies"]]),
+        "embed_ms_per_clause": embed_ms,
+        "tokens_per_clause": _ratio(sum(f["tokens"] for f in folds), clauses),
+        "calls_per_clause": _ratio(sum(f["calls"] for f in folds), clauses),
+    }
+
+
+def mark_quality(results: List[Dict], tolerance: float) -> None:
+    """첫 번째 조합을 기준으로 precision/recall이 tolerance 이상 떨어지지 않은 조합 표시"""
+    if not results:
+        return
+    baseline = results[0]
+    for result in results:
+        result["keeps_quality"] = (
+            result["recall"] >= baseline["recall"] - tolerance
+            and result["precision"] >= baseline["precision"] - tolerance
+        )
+        result["tokens_vs_baseline"] = _ratio(
+            result["tokens_per_clause"], baseline["tokens_per_clause"]
+        )
+        result["p50_vs_baseline"] = _ratio(
+            result["latency"].get("p50_ms", 0.0), baseline["latency"].get("p50_ms", 0.0)
+        )
+
+
+def format_row(result: Dict) -> str:
+    config = result["config"]
+    marker = {True: "O", False: "X"}.get(result.get("keeps_quality"), " ")
+    return (
+        f"{marker} {config['embedding']:<40} {config['index']:<10} "
+        f"hybrid={config['hybrid']:<3} k={config['k']:<3} {config['model']:<28} "
+        f"context={config['context']:<3} P {result['precision']:.3f} R {result['recall']:.3f} "
+        f"F1 {result['f1']:.3f} p50 {result['latency'].get('p50_ms', 0.0):8.1f}ms "
+        f"토큰 {result['tokens_per_clause']:7.0f} 호출 {result['calls_per_clause']:.2f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="설정 조합별 위반 검출 품질/비용 평가")
+    parser.add_argument("--csv_path", default="data/poc.csv")
+    parser.add_argument("--k", default="4", help="RETRIEVER_K 후보 (쉼표 구분, 첫 값이 기준)")
+    parser.add_argument("--models", default="openai/gpt-4o", help="LLM 모델 후보 (쉼표 구분)")
+    parser.add_argument(
+        "--embeddings",
+        default="huggingface:BAAI/bge-m3",
+        help="임베딩 후보 model_type:model_name[:dimensions] (쉼표 구분)",
+    )
+    parser.add_argument(
+        "--indexes", default="flat", help="인덱스 후보 flat|fp16|int8|pcaN (+로 조합, 쉼표 구분)"
+    )
+    parser.add_argument(
+        "--context",
+        default=_switch(CONTEXT_CONFIG.get("ENABLED", False)),
+        help="컨텍스트 압축(ContextBuilder) on|off 후보 (쉼표 구분, 기본: config 설정)",
+    )
+    parser.add_argument(
+        "--hybrid",
+        default=_switch(RETRIEVAL_CONFIG.get("HYBRID", False)),
+        help="하이브리드 검색 on|off 후보 (쉼표 구분, 기본: config 설정)",
+    )
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--negatives", type=int, help="비위반 조항 수 (기본: 위반 문장 수)")
+    parser.add_argument("--concurrency", type=int, default=4, help="조항 분석 동시 실행 수")
+    parser.add_argument("--llm", choices=["mock", "record", "replay"], default="mock")
+    parser.add_argument("--mock_mode", choices=["keywords", "context"], default="context")
+    parser.add_argument(
+        "--mock_threshold", type=float, default=0.3, help="context 모드의 Y 판정 최소 유사도"
+    )
+    parser.add_argument("--mock_latency_ms", type=float, default=0)
+    parser.add_argument("--recordings", help="녹화 응답 JSONL 경로 (record/replay)")
+    parser.add_argument("--upstream", default="https://openrouter.ai/api/v1")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.02, help="기준 대비 허용 precision/recall 하락폭"
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    if args.llm != "mock" and not args.recordings:
+        parser.error("--llm record/replay에는 --recordings가 필요합니다")
+    upstream_key = os.getenv("OPENROUTER_API_KEY")
+    if args.llm == "record" and not upstream_key:
+        parser.error("--llm record에는 OPENROUTER_API_KEY 환경 변수가 필요합니다")
+
+    server = MockLLMServer(
+        latency_ms=args.mock_latency_ms,
+        jitter_ms=0,
+        token_delay_ms=0,
+        seed=args.seed,
+        mode=args.mock_mode,
+        context_threshold=args.mock_threshold,
+        recordings_path=args.recordings if args.llm != "mock" else None,
+        upstream=args.upstream if args.llm == "record" else None,
+        upstream_key=upstream_key,
+    ).start()
+
+    try:
+        dataset = EvalDataset(args.csv_path, args.folds, args.negatives, args.seed)
+        logger.info(
+            f"평가 데이터: 위반 {dataset.positives}개, 비위반 {dataset.negatives}개, "
+            f"{dataset.folds}개 폴드"
+        )
+        sweep = EvalSweep(dataset, server, args.concurrency)
+        results = sweep.run(
+            args.embeddings.split(","),
+            args.indexes.split(","),
+            [int(k) for k in args.k.split(",")],
+            args.models.split(","),
+            [parse_switch(v) for v in args.context.split(",")],
+            [parse_switch(v) for v in args.hybrid.split(",")],
+        )
+    finally:
+        server.stop()
+
+    mark_quality(results, args.tolerance)
+    print("\n기준: " + format_row(results[0]) if results else "결과 없음")
+    for result in sorted(results, key=lambda r: (not r["keeps_quality"], r["tokens_per_clause"])):
+        print(format_row(result))
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(),
+            "args": vars(args),
+            "positives": dataset.positives,
+            "negatives": dataset.negatives,
+            "llm_responses": {
+                "replayed": server.replayed,
+                "recorded": server.recorded,
+                "synthesized": server.synthesized,
+            },
+        },
+        "results": results,
+    }
+    if args.llm == "replay" and server.synthesized:
+        logger.warning(f"녹화에 없는 요청 {server.synthesized}개는 모의 판정으로 대체했습니다")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        logger.info(f"평가 결과 저장: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
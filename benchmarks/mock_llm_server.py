@@ -0,0 +1,366 @@
+import argparse
+import hashlib
+import json
+import logging
+import random
+import re
+import os
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+#######
+# 벤치마크용 OpenAI 호환 모의 LLM 서버
+# python benchmarks/mock_llm_server.py --port 8900 --latency_ms 300 --jitter_ms 100
+#
+# - POST /chat/completions, /v1/chat/completions 지원 (stream=true 포함)
+# - 같은 프롬프트에는 항상 같은 판정을 반환 (프롬프트 해시 기반)
+# - 지연 시간은 seed 고정 난수로 재현 가능
+# - --mode context: 참고 자료의 위반 사례와 문자 3-gram 유사도가 높을 때 Y (검색 품질이 판정에 반영됨)
+# - --recordings: 녹화된 실제 LLM 응답을 재생 (--upstream 지정 시 없는 응답은 실제 LLM으로 받아 녹화)
+#########
+
+logger = logging.getLogger(__name__)
+
+# 위반 문장에 자주 등장하는 표현. 포함되면 Y 판정
+VIOLATION_HINTS = ("부담", "일체", "모든 비용", "포함하여 견적", "책임", "민원")
+
+
+def _last_user_text(messages) -> str:
+    for message in reversed(messages):
+        if message.get("role") == "user":
+            content = message.get("content")
+            if isinstance(content, list):
+                return " ".join(part.get("text", "") for part in content)
+            return content or ""
+    return ""
+
+
+def _question(prompt: str) -> str:
+    """프롬프트에서 사용자 문장 부분만 추출"""
+    match = re.search(
+        r"(?:QUESTION is as follows:|# 사용자 문장)\s*(.*?)\s*(?:#|$)", prompt, re.S
+    )
+    return match.group(1).strip() if match else prompt[:200]
+
+
+def _all_text(messages) -> str:
+    parts = []
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, list):
+            parts.extend(part.get("text", "") for part in content)
+        else:
+            parts.append(content or "")
+    return "\n".join(parts)
+
+
+def _ngrams(text: str, n: int = 3) -> set:
+    compact = re.sub(r"\s+", "", text)
+    return {compact[i : i + n] for i in range(max(1, len(compact) - n + 1))}
+
+
+VIOLATION_COLUMN = "위반문장 원문"
+_ROW_RE = re.compile(r"^\[\d+\]\s*(.*)$")
+
+
+def _context_sentences(messages):
+    """
+    참고 자료의 위반 사례 문장.
+    - 원본 행: "위반문장 원문: ..." 줄
+    - ContextBuilder 압축 형식: "열: a | b | c" 헤더 뒤 "[n] 값 | 값 | 값" 행,
+      또는 헤더 없이 "[n] 열: 값 | 열: 값" 행
+    """
+    header = None
+    for line in _all_text(messages).splitlines():
+        line = line.strip()
+        if line.startswith("열: "):
+            header = [column.strip() for column in line[len("열: ") :].split(" | ")]
+            continue
+        row = _ROW_RE.match(line)
+        if row:
+            values = row.group(1).split(" | ")
+            if header is not None:
+                if VIOLATION_COLUMN in header and header.index(VIOLATION_COLUMN) < len(values):
+                    yield values[header.index(VIOLATION_COLUMN)]
+                continue
+            for value in values:
+                if value.startswith(f"{VIOLATION_COLUMN}:"):
+                    yield value.split(":", 1)[1]
+            continue
+        if line.startswith(f"{VIOLATION_COLUMN}:"):
+            yield line.split(":", 1)[1]
+
+
+def context_similarity(question: str, messages) -> float:
+    """질문과 참고 자료의 위반 사례 문장 사이 최대 문자 3-gram 자카드 유사도"""
+    grams = _ngrams(question)
+    best = 0.0
+    for sentence in _context_sentences(messages):
+        other = _ngrams(sentence)
+        best = max(best, len(grams & other) / len(grams | other))
+    return best
+
+
+def recording_key(body: dict) -> str:
+    """녹화 응답 조회 키 (모델과 프롬프트가 같으면 같은 응답)"""
+    payload = {k: body.get(k) for k in ("model", "messages", "response_format")}
+    return hashlib.sha256(
+        json.dumps(payload, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+
+
+def deterministic_completion(
+    body: dict, mode: str = "keywords", context_threshold: float = 0.5
+) -> str:
+    prompt = _last_user_text(body.get("messages", []))
+    question = _question(prompt)
+    digest = int(hashlib.sha256(question.encode("utf-8")).hexdigest(), 16)
+    if mode == "context":
+        similar = context_similarity(question, body.get("messages", []))
+        flag = "Y" if similar >= context_threshold else "N"
+    else:
+        flag = "Y" if any(hint in question for hint in VIOLATION_HINTS) else "N"
+
+    # 1차 분류(캐스케이드) 요청은 확신도만 반환
+    if "confidence" in prompt:
+        return json.dumps(
+            {"detection_flag": flag, "confidence": 0.5 + (digest % 50) / 100},
+            ensure_ascii=False,
+        )
+
+    verdict = {
+        "asis_sentence": question,
+        "detection_flag": flag,
+        "comments": "수급사업자에게 비용을 부당하게 전가하는 약정" if flag == "Y" else "",
+        "tobe_sentence": f"{question} (삭제)" if flag == "Y" else "",
+    }
+    return json.dumps(verdict, ensure_ascii=False) + "\n\n**Source**\n- poc.csv"
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    server_version = "MockLLM/1.0"
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def _delay(self) -> None:
+        server = self.server
+        with server.rng_lock:
+            jitter = server.rng.uniform(-server.jitter, server.jitter)
+        time.sleep(max(0.0, server.latency + jitter))
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_error(404)
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        self.server.request_count += 1
+        self._delay()
+
+        try:
+            content = self.server.complete(body)
+        except Exception as e:
+            logger.error(f"응답 생성 실패: {str(e)}")
+            self.send_error(502)
+            return
+        model = body.get("model", "mock")
+        prompt_tokens = len(_last_user_text(body.get("messages", []))) // 2
+        completion_tokens = len(content) // 2
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+        if body.get("stream"):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            try:
+                for i in range(0, len(content), 16):
+                    chunk = {
+                        "id": "mock",
+                        "object": "chat.completion.chunk",
+                        "created": int(time.time()),
+                        "model": model,
+                        "choices": [
+                            {
+                                "index": 0,
+                                "delta": {"content": content[i : i + 16]},
+                                "finish_reason": None,
+                            }
+                        ],
+                    }
+                    self.wfile.write(
+                        f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8")
+                    )
+                    time.sleep(self.server.token_delay)
+                self.wfile.write(b"data: [DONE]\n\n")
+            except (BrokenPipeError, ConnectionResetError):
+                # 클라이언트가 판정 객체를 받은 뒤 연결을 끊은 경우
+                pass
+            return
+
+        payload = {
+            "id": "mock",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": usage,
+        }
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class MockLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: float = 200,
+        jitter_ms: float = 50,
+        token_delay_ms: float = 2,
+        seed: int = 42,
+        mode: str = "keywords",
+        context_threshold: float = 0.5,
+        recordings_path: Optional[str] = None,
+        upstream: Optional[str] = None,
+        upstream_key: Optional[str] = None,
+    ):
+        """
+        Args:
+            mode: 녹화 응답이 없을 때의 판정 방식 (keywords | context)
+            context_threshold: context 모드에서 Y로 판정할 최소 유사도
+            recordings_path: 녹화 응답 JSONL 경로 (있으면 재생)
+            upstream: 실제 OpenAI 호환 API 주소. 지정하면 녹화에 없는 요청을 전달하고 응답을 녹화
+            upstream_key: upstream API 키
+        """
+        super().__init__((host, port), MockLLMHandler)
+        self.latency = latency_ms / 1000.0
+        self.jitter = jitter_ms / 1000.0
+        self.token_delay = token_delay_ms / 1000.0
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self.request_count = 0
+        self.mode = mode
+        self.context_threshold = context_threshold
+        self.recordings_path = recordings_path
+        self.upstream = upstream.rstrip("/") if upstream else None
+        self.upstream_key = upstream_key
+        self.recordings: Dict[str, str] = {}
+        self.recordings_lock = threading.Lock()
+        self.replayed = 0
+        self.recorded = 0
+        self.synthesized = 0
+        if recordings_path and os.path.exists(recordings_path):
+            with open(recordings_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        item = json.loads(line)
+                        self.recordings[item["key"]] = item["content"]
+            logger.info(f"녹화 응답 {len(self.recordings)}개 로드: {recordings_path}")
+        self._thread = None
+
+    def complete(self, body: dict) -> str:
+        """녹화 응답 -> (upstream 지정 시) 실제 LLM 응답 녹화 -> 결정적 모의 응답 순으로 사용"""
+        key = recording_key(body)
+        with self.recordings_lock:
+            content = self.recordings.get(key)
+            if content is not None:
+                self.replayed += 1
+                return content
+        if self.upstream:
+            content = self._forward(body)
+            with self.recordings_lock:
+                self.recordings[key] = content
+                self.recorded += 1
+                if self.recordings_path:
+                    with open(self.recordings_path, "a", encoding="utf-8") as f:
+                        f.write(json.dumps({"key": key, "content": content}, ensure_ascii=False) + "\n")
+            return content
+        with self.recordings_lock:
+            self.synthesized += 1
+        return deterministic_completion(body, self.mode, self.context_threshold)
+
+    def _forward(self, body: dict) -> str:
+        request = urllib.request.Request(
+            f"{self.upstream}/chat/completions",
+            data=json.dumps({**body, "stream": False}).encode("utf-8"),
+            headers={
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {self.upstream_key}",
+            },
+        )
+        with urllib.request.urlopen(request, timeout=60) as response:
+            payload = json.loads(response.read())
+        return payload["choices"][0]["message"]["content"]
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "MockLLMServer":
+        """백그라운드 스레드에서 서버 실행"""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="벤치마크용 모의 LLM 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency_ms", type=float, default=200)
+    parser.add_argument("--jitter_ms", type=float, default=50)
+    parser.add_argument("--token_delay_ms", type=float, default=2)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--mode", choices=["keywords", "context"], default="keywords")
+    parser.add_argument("--recordings", help="녹화 응답 JSONL 경로")
+    parser.add_argument("--upstream", help="녹화할 실제 LLM API 주소 (키는 OPENROUTER_API_KEY)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    server = MockLLMServer(
+        args.host,
+        args.port,
+        args.latency_ms,
+        args.jitter_ms,
+        args.token_delay_ms,
+        args.seed,
+        mode=args.mode,
+        recordings_path=args.recordings,
+        upstream=args.upstream,
+        upstream_key=os.getenv("OPENROUTER_API_KEY"),
+    )
+    logger.info(f"모의 LLM 서버 실행: {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+#######
+# 계약서 분석 파이프라인 벤치마크
+# python benchmarks/run_pipeline.py --sizes 20,100,400 --output bench.json
+# python benchmarks/run_pipeline.py --sizes 20,100 --compare bench.json --threshold 0.15
+#
+# 단계별(load_pdf, split_by_numbering, split_text, embed, retrieve, rag) p50/p95/p99,
+# 처리량, 최대 RSS를 측정하고 JSON으로 저장합니다. rag 단계는 검색을 제외한 컨텍스트 구성과 LLM 호출 시간입니다.
+# RAG 단계는 모의 LLM 서버(benchmarks/mock_llm_server.py)를 사용하므로 네트워크가 필요 없습니다.
+#########
+
+project_root = str(Path(__file__).parents[1])
+sys.path.append(project_root)
+
+from benchmarks.mock_llm_server import MockLLMServer
+from benchmarks.synthetic_contract import write_contract_pdf
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+STAGES = ("load_pdf", "split_by_numbering", "split_text", "embed", "retrieve", "rag")
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """선형 보간 백분위수"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """초 단위 측정값을 ms 단위 요약 통계로 변환"""
+    if not samples:
+        return {"count": 0}
+    return {
+        "count": len(samples),
+        "mean_ms": sum(samples) / len(samples) * 1000,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+        "total_s": sum(samples),
+    }
+
+
+def peak_rss_mb() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux는 KB, macOS는 byte 단위
+    return usage / (1024 * 1024) if sys.platform == "darwin" else usage / 1024
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=project_root, text=True
+        ).strip()
+    except Exception:
+        return "unknown"
+
+
+def latest_store_dir(vector_stores_path: str) -> Path:
+    dirs = [
+        d
+        for d in Path(vector_stores_path).iterdir()
+        if d.is_dir() and d.name.startswith("store_") and (d / "metadata.json").exists()
+    ]
+    if not dirs:
+        raise ValueError(f"사용 가능한 벡터 스토어가 없습니다: {vector_stores_path}")
+    # store_modeltype_modelname_YYYYMMDD_HHMMSS 형식의 타임스탬프 기준
+    return max(dirs, key=lambda d: "_".join(d.name.split("_")[-2:]))
+
+
+class PrefetchedRetriever:
+    """이미 검색한 문서를 그대로 돌려주는 retriever (rag 단계에서 검색을 반복하지 않도록)"""
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    def invoke(self, query: str):
+        return self.docs
+
+
+class PipelineBenchmark:
+    def __init__(self, store_dir: Path, mock_base_url: str, concurrency: int = 1):
+        # RAGChain이 환경 변수에서 OpenRouter 설정을 읽으므로 모의 서버로 지정
+        os.environ["OPENROUTER_API_KEY"] = "benchmark"
+        os.environ["OPENROUTER_API_BASE"] = mock_base_url
+
+        from api.contract_analyzer import create_rag_chain, create_retriever
+        from src import DocumentProcessor, Embedder, KoreanSentenceSplitter, VectorStore
+        from src.lexical_index import LEXICAL_INDEX_FILE
+        from config import RETRIEVAL_CONFIG
+
+        with open(store_dir / "metadata.json", "r", encoding="utf-8") as f:
+            metadata = json.load(f)
+
+        self.document_processor = DocumentProcessor()
+        self.text_splitter = KoreanSentenceSplitter()
+        self.embedder = Embedder.from_store_metadata(
+            metadata, enable_batching=concurrency > 1
+        )
+        self.vector_store = VectorStore(self.embedder)
+        self.vector_store.load_local(str(store_dir / "faiss_store"))
+        # 서버(build_analyzer)와 같은 설정으로 retriever와 RAG 체인을 구성해야 수치가 배포 파이프라인을 반영함
+        hybrid = RETRIEVAL_CONFIG.get("HYBRID", False) and self.vector_store.load_lexical_index(
+            str(store_dir / LEXICAL_INDEX_FILE)
+        )
+        self.retriever = create_retriever(self.vector_store, hybrid)
+        self.rag_chain = create_rag_chain()
+        # 벤치마크 결과를 LangSmith로 보내지 않음
+        os.environ["LANGCHAIN_TRACING_V2"] = "false"
+
+        self.concurrency = concurrency
+        self.store_id = store_dir.name
+
+    def _timed(self, samples: Dict[str, List[float]], stage: str, fn, *args):
+        started = time.perf_counter()
+        result = fn(*args)
+        samples[stage].append(time.perf_counter() - started)
+        return result
+
+    def run_contract(self, pdf_path: str, samples: Dict[str, List[float]]) -> Dict:
+        started = time.perf_counter()
+        docs = self._timed(samples, "load_pdf", self.document_processor.load_pdf, pdf_path)
+        clauses = self._timed(
+            samples, "split_by_numbering", self.text_splitter.split_by_numbering, docs
+        )
+        for doc in docs:
+            self._timed(samples, "split_text", self.text_splitter.split_text, doc.page_content)
+
+        texts = [clause.page_content for clause in clauses]
+        if texts:
+            self._timed(samples, "embed", self.embedder.embed_documents, texts)
+
+        def analyze(text: str) -> Dict:
+            retrieved = self._timed(samples, "retrieve", self.retriever.invoke, text)
+            # 검색 결과를 그대로 넘겨 rag 단계에는 컨텍스트 구성과 LLM 호출만 포함
+            return self._timed(
+                samples,
+                "rag",
+                self.rag_chain.analyze_documents,
+                text,
+                PrefetchedRetriever(retrieved),
+            )
+
+        analysis_started = time.perf_counter()
+        if self.concurrency > 1:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+                results = list(pool.map(analyze, texts))
+        else:
+            results = [analyze(text) for text in texts]
+        analysis_elapsed = time.perf_counter() - analysis_started
+
+        violations = sum(
+            1
+            for r in results
+            if isinstance(r.get("response"), dict)
+            and r["response"].get("detection_flag") == "Y"
+        )
+        return {
+            "clauses": len(texts),
+            "violations": violations,
+            "analysis_s": analysis_elapsed,
+            "end_to_end_s": time.perf_counter() - started,
+        }
+
+
+def run(args) -> Dict:
+    sizes = [int(size) for size in args.sizes.split(",")]
+    server = MockLLMServer(
+        latency_ms=args.mock_latency_ms,
+        jitter_ms=args.mock_jitter_ms,
+        seed=args.seed,
+    ).start()
+    logger.info(f"모의 LLM 서버 시작: {server.base_url}")
+
+    try:
+        store_dir = (
+            Path(args.vector_store)
+            if args.vector_store
+            else latest_store_dir(args.vector_stores_path)
+        )
+        bench = PipelineBenchmark(store_dir, server.base_url, args.concurrency)
+
+        report = {
+            "meta": {
+                "commit": git_commit(),
+                "timestamp": datetime.now().isoformat(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "vector_store": bench.store_id,
+                "args": vars(args),
+            },
+            "results": {},
+        }
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for size in sizes:
+                pdf_path = write_contract_pdf(
+                    os.path.join(tmp_dir, f"contract_{size}.pdf"),
+                    size,
+                    csv_path=args.csv_path,
+                    seed=args.seed,
+                )
+                samples = {stage: [] for stage in STAGES}
+                runs = []
+                for repeat in range(args.warmup + args.repeat):
+                    run_samples = {stage: [] for stage in STAGES}
+                    outcome = bench.run_contract(pdf_path, run_samples)
+                    if repeat < args.warmup:
+                        continue
+                    runs.append(outcome)
+                    for stage in STAGES:
+                        samples[stage].extend(run_samples[stage])
+
+                clauses = sum(r["clauses"] for r in runs)
+                analysis_s = sum(r["analysis_s"] for r in runs)
+                report["results"][str(size)] = {
+                    "stages": {stage: summarize(samples[stage]) for stage in STAGES},
+                    "clauses_per_contract": runs[0]["clauses"] if runs else 0,
+                    "violations_per_contract": runs[0]["violations"] if runs else 0,
+                    "throughput_clauses_per_s": clauses / analysis_s if analysis_s else 0.0,
+                    "end_to_end": summarize([r["end_to_end_s"] for r in runs]),
+                }
+                logger.info(
+                    f"크기 {size}: 조항 {report['results'][str(size)]['clauses_per_contract']}개, "
+                    f"처리량 {report['results'][str(size)]['throughput_clauses_per_s']:.2f} 조항/초"
+                )
+
+        report["peak_rss_mb"] = peak_rss_mb()
+        report["mock_llm_requests"] = server.request_count
+        return report
+
+    finally:
+        server.stop()
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """기준 결과 대비 p95가 threshold 비율 이상 느려진 단계 목록"""
+    regressions = []
+    for size, result in current["results"].items():
+        base = baseline.get("results", {}).get(size)
+        if not base:
+            continue
+        for stage, stats in result["stages"].items():
+            base_stats = base["stages"].get(stage, {})
+            if not stats.get("count") or not base_stats.get("count"):
+                continue
+            change = stats["p95_ms"] / base_stats["p95_ms"] - 1 if base_stats["p95_ms"] else 0.0
+            line = (
+                f"[{size}] {stage:<20} p95 {base_stats['p95_ms']:9.2f}ms -> "
+                f"{stats['p95_ms']:9.2f}ms ({change:+.1%})"
+            )
+            print(line)
+            if change > threshold:
+                regressions.append(line)
+
+        base_tp = base.get("throughput_clauses_per_s", 0.0)
+        if base_tp and result["throughput_clauses_per_s"] < base_tp * (1 - threshold):
+            regressions.append(
+                f"[{size}] throughput {base_tp:.2f} -> {result['throughput_clauses_per_s']:.2f} 조항/초"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="계약서 분석 파이프라인 벤치마크")
+    parser.add_argument("--sizes", default="20,100,400", help="합성 계약서 조항 수 (쉼표 구분)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=1, help="조항 분석 동시 실행 수")
+    parser.add_argument("--csv_path", default="data/poc.csv")
+    parser.add_argument("--vector_store", help="사용할 벡터 스토어 디렉토리 (기본: 가장 최근)")
+    parser.add_argument("--vector_stores_path", default="vector_stores")
+    parser.add_argument("--mock_latency_ms", type=float, default=200)
+    parser.add_argument("--mock_jitter_ms", type=float, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    parser.add_argument("--compare", help="비교할 기준 결과 JSON 경로")
+    parser.add_argument(
+        "--threshold", type=float, default=0.1, help="회귀로 판단할 p95 증가 비율"
+    )
+    args = parser.parse_args()
+
+    report = run(args)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        logger.info(f"벤치마크 결과 저장: {args.output}")
+    else:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            logger.error("성능 회귀 감지:\n" + "\n".join(regressions))
+            sys.exit(1)
+        logger.info("성능 회귀 없음")
+
+
+if __name__ == "__main__":
+    main()
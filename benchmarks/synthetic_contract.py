@@ -0,0 +1,129 @@
+import csv
+import random
+from pathlib import Path
+from typing import List
+
+import fitz  # PyMuPDF
+
+# 위반 사례 외에 섞어 넣을 일반(비위반) 조항
+NEUTRAL_CLAUSES = [
+    "공사 착수 전 현장대리인은 작업계획서를 제출하여 승인을 받는다.",
+    "현장 내 안전모 및 안전화 착용을 의무화한다.",
+    "자재 반입 시 감독원의 검수를 받아야 한다.",
+    "공정회의는 매주 월요일 오전에 실시한다.",
+    "작업 종료 후 주변 정리정돈을 실시한다.",
+    "설계도서 간 상이한 내용이 있을 경우 감독원과 협의하여 결정한다.",
+    "기성 청구는 매월 말일 기준으로 한다.",
+    "현장 출입 인원은 출입 명부에 기록한다.",
+]
+
+# 평가용 비위반 조항 생성 템플릿 (주체 + 시기 + 의무)
+_COMPLIANT_SUBJECTS = ["수급사업자는", "원사업자는", "현장대리인은", "감독원은", "양 당사자는"]
+_COMPLIANT_TIMINGS = ["", "공사 착수 전 ", "매월 ", "작업 종료 후 ", "준공 시 ", "필요한 경우 "]
+_COMPLIANT_DUTIES = [
+    "작업 일정을 상호 협의하여 정한다.",
+    "안전관리계획서를 작성하여 제출한다.",
+    "자재 검수 결과를 서면으로 통보한다.",
+    "공정 현황을 공정회의에서 보고한다.",
+    "설계변경 사항을 서면으로 합의한 후 시행한다.",
+    "현장 안전점검을 실시하고 결과를 기록한다.",
+    "하도급대금을 법정 기한 내에 지급한다.",
+    "작업자 안전교육을 실시한다.",
+    "폐기물을 관련 법령에 따라 처리한다.",
+    "기성 검사 결과를 7일 이내에 통지한다.",
+]
+# 위반 문장에 자주 나오는 표현이 들어 있지만 공정한 조항 (오탐 측정용)
+HARD_NEGATIVES = [
+    "원사업자의 귀책사유로 발생한 추가 비용은 원사업자가 부담한다.",
+    "설계변경으로 공사비가 증가한 경우 원사업자는 증액된 금액을 지급한다.",
+    "수급사업자의 고의 또는 과실로 발생한 손해는 수급사업자가 배상한다.",
+    "각 당사자는 자신의 귀책사유로 인한 손해에 대하여 책임을 진다.",
+    "관계 법령에 따른 하자담보책임기간은 준공일로부터 기산한다.",
+]
+
+
+def normalize_sentence(text: str) -> str:
+    """공백을 정리하고 앞 번호를 제거"""
+    return " ".join(text.split()).lstrip("0123456789.)） ")
+
+
+def load_violation_sentences(csv_path: str) -> List[str]:
+    """poc.csv의 위반문장 원문에서 앞 번호를 제거한 문장 목록"""
+    with open(csv_path, "r", encoding="utf-8") as f:
+        rows = csv.DictReader(f)
+        sentences = []
+        for row in rows:
+            text = normalize_sentence(row["위반문장 원문"])
+            if text:
+                sentences.append(text)
+    return list(dict.fromkeys(sentences))
+
+
+def generate_compliant_clauses(count: int, seed: int = 42) -> List[str]:
+    """평가용 비위반 조항 (일반 조항 + 오탐 유도 조항 + 템플릿 조합, 중복 없음)"""
+    rng = random.Random(seed)
+    combos = [
+        f"{subject} {timing}{duty}"
+        for subject in _COMPLIANT_SUBJECTS
+        for timing in _COMPLIANT_TIMINGS
+        for duty in _COMPLIANT_DUTIES
+    ]
+    rng.shuffle(combos)
+    clauses = list(dict.fromkeys(NEUTRAL_CLAUSES + HARD_NEGATIVES + combos))
+    return clauses[:count]
+
+
+def build_clauses(count: int, csv_path: str, violation_ratio: float, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    violations = load_violation_sentences(csv_path)
+    clauses = []
+    for _ in range(count):
+        pool = violations if rng.random() < violation_ratio else NEUTRAL_CLAUSES
+        clauses.append(rng.choice(pool))
+    return clauses
+
+
+def write_contract_pdf(
+    output_path: str,
+    clause_count: int,
+    csv_path: str = "data/poc.csv",
+    violation_ratio: float = 0.3,
+    seed: int = 42,
+) -> str:
+    """
+    DocumentProcessor.load_pdf가 인식하는 구조(목차의 '6.0 특기사항', 본문 '6.0 특기사항' ~ '7.')로
+    번호가 매겨진 조항을 가진 계약서 PDF를 생성합니다.
+    """
+    clauses = build_clauses(clause_count, csv_path, violation_ratio, seed)
+    doc = fitz.open()
+    rect = fitz.Rect(40, 40, 555, 800)
+
+    def write_pages(lines: List[str]) -> None:
+        # insert_textbox는 넘치면 아무것도 쓰지 않으므로 들어가는 줄 수만큼 나눠서 기록
+        while lines:
+            page = doc.new_page(width=595, height=842)
+            count = len(lines)
+            while (
+                count > 1
+                and page.insert_textbox(
+                    rect, "\n".join(lines[:count]), fontname="korea", fontsize=9
+                )
+                < 0
+            ):
+                count = max(1, count * 3 // 4)
+            if count == 1:
+                page.insert_textbox(rect, lines[0], fontname="korea", fontsize=9)
+            lines = lines[count:]
+
+    # 목차 (load_pdf는 첫 번째 '6.0 특기' 매칭을 목차로 보고 건너뜀)
+    write_pages(["목 차", "1. 총칙", "6.0 특기사항", "7. 기타"])
+    write_pages(
+        ["6.0 특기사항"]
+        + [f"{idx}) {clause}" for idx, clause in enumerate(clauses, 1)]
+        + ["7. 기타사항"]
+    )
+
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    doc.save(output_path)
+    doc.close()
+    return output_path
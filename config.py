@@ -1,6 +1,14 @@
 import os
 from dotenv import load_dotenv
-import logging.config
+from datetime import datetime
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import threading
 
 # 환경 변수 로드
 load_dotenv()
@@ -13,36 +21,278 @@ DEFAULT_CONFIG = {
     "LOG_LEVEL": "INFO",
     "RETRIEVER_K": 4,
     "OPENAI_MODEL": "text-embedding-3-large",
+    # 동시 쿼리 임베딩 마이크로 배칭
+    "EMBED_BATCHING": True,
+    "EMBED_BATCH_MAX_SIZE": 32,
+    "EMBED_BATCH_MAX_WAIT_MS": 5,
+    "EMBED_QUERY_CACHE_SIZE": 1024,  # 최근 쿼리 임베딩 LRU 크기 (0이면 사용 안 함)
+    # scripts/prewarm_model.py로 저장한 HuggingFace 모델 스냅샷 디렉토리
+    "EMBED_SNAPSHOT_DIR": os.getenv("EMBED_SNAPSHOT_DIR", "models"),
+    # LLM 판정 응답 형식
+    "LLM_STRUCTURED_OUTPUT": True,  # response_format JSON 스키마 사용
+    "LLM_STREAM_VERDICTS": True,  # 판정 JSON이 닫히면 생성 중단
+    "LLM_MODEL": "openai/gpt-4o",  # 최종 판정 모델
+    "LLM_NORMALIZE_MODEL": "openai/gpt-4o-mini",  # 텍스트 정규화 모델
+    # 여러 API 워커/스크립트가 LLM 호출 한도를 공유 (LLM_GOVERNOR_CONFIG)
+    "LLM_RATE_GOVERNOR": os.getenv("LLM_RATE_GOVERNOR", "true").lower() == "true",
+}
+
+# 프롬프트 컨텍스트 압축 설정
+CONTEXT_CONFIG = {
+    "ENABLED": True,
+    "TOKEN_BUDGET": 1500,  # 검색 문서 컨텍스트 최대 토큰 수
+    "DEDUP_THRESHOLD": 0.9,  # 문자 3-gram 자카드 유사도 기준 중복 제거
+    "CACHE_CONTROL": False,  # 고정 접두부에 cache_control 표시 (Anthropic 모델 사용 시)
+    # 압축 전 원문 토큰 수 집계 (요청마다 원문을 한 번 더 토큰화하므로 압축률 확인 시에만)
+    "MEASURE_RAW_TOKENS": os.getenv("CONTEXT_MEASURE_RAW_TOKENS", "false").lower() == "true",
+}
+
+# 하이브리드 검색 설정 (벡터 + 문자 n-gram BM25, RRF로 결합)
+# store 디렉토리에 lexical_index.json이 있을 때만 적용
+RETRIEVAL_CONFIG = {
+    "HYBRID": True,
+    "FETCH_K": 20,  # 각 검색기에서 가져올 후보 수
+    "RRF_K": 60,
+    "VECTOR_WEIGHT": 1.0,
+    "LEXICAL_WEIGHT": 1.0,
+    "NGRAM_SIZES": (2, 3),
+}
+
+# 벡터 스토어 생성 시 CSV 적재 설정 (src/csv_ingest.py)
+# 위반 조항 컬럼만 임베딩하고 대안/사유는 메타데이터로 저장해 검색 시 LLM 컨텍스트에 함께 넣음
+CSV_INGEST_CONFIG = {
+    "CONTENT_COLUMNS": ["위반문장 원문"],  # None이면 METADATA_COLUMNS를 뺀 모든 컬럼
+    "METADATA_COLUMNS": ["대안제시", "부당특약 사유"],
+    "CHUNK_SIZE": 256,  # 한 번에 읽고 임베딩하는 행 수
+    "DEDUP": True,  # 같은 내용의 행은 한 번만 저장
+}
+
+# 샤드 스토어(scripts/create_vector_store.py --shards N) 검색 방식
+# thread: API 프로세스 안에서 샤드별 스레드로 검색 (FAISS 검색은 GIL을 놓고 실행)
+# process: 샤드마다 워커 프로세스가 인덱스를 들고 검색 (큰 코퍼스에서 코어를 나눠 사용)
+SHARD_CONFIG = {
+    "WORKERS": os.getenv("SHARD_WORKERS", "thread"),
+    # 샤드 하나의 검색 응답을 기다리는 최대 시간(초)
+    "SEARCH_TIMEOUT_S": float(os.getenv("SHARD_SEARCH_TIMEOUT_S", "30")),
+}
+
+# 벡터 스토어 API(api/vector_store_api.py)의 백그라운드 생성 작업 설정
+STORE_BUILD_CONFIG = {
+    "MAX_WORKERS": int(os.getenv("STORE_BUILD_WORKERS", "1")),  # 동시에 실행할 생성 작업 수
+    "MAX_RESIDENT_MODELS": 2,  # 작업 간에 메모리에 유지할 임베딩 모델 수
+    "JOB_HISTORY": 100,  # 조회용으로 남겨 둘 완료 작업 수
+    # wait=true 요청이 작업 완료를 기다리는 최대 시간 (넘으면 202 + job_id 반환)
+    "WAIT_TIMEOUT_S": float(os.getenv("STORE_BUILD_WAIT_TIMEOUT_S", "60")),
+}
+
+# 모델 캐스케이드 설정: 소형 모델이 먼저 Y/N을 분류하고
+# 위반 의심(Y) 또는 확신이 낮은 문장만 대형 모델로 보냄
+CASCADE_CONFIG = {
+    "ENABLED": False,
+    "SMALL_MODEL": "openai/gpt-4o-mini",
+    "CONFIDENCE_THRESHOLD": 0.8,  # 이 값 이상의 확신으로 N이면 대형 모델 생략
+    "AUDIT_RATE": 0.05,  # 일치율 측정용으로 N 판정 중 대형 모델에 재확인하는 비율
+}
+
+# 거의 같은 조항 클러스터링: 대표 조항 하나만 LLM으로 분석하고
+# 나머지는 대표 판정을 projected=True 표시와 함께 적용
+CLUSTER_CONFIG = {
+    "ENABLED": False,
+    "THRESHOLD": 0.85,  # 대표와의 문자 3-gram 자카드 유사도 기준
+    "NUM_PERM": 64,  # MinHash 해시 수
+    "BANDS": 16,  # LSH 밴드 수 (NUM_PERM의 약수)
+    "MIN_CHARS": 20,  # 이보다 짧은 조항은 묶지 않음
+    "NORMALIZE_DIGITS": True,  # 번호만 다른 조항을 같은 조항으로 취급 (금액/비율/기간은 구분)
+    "SPOT_CHECK_RATE": 0.1,  # 구성원 중 직접 분석해 대표 판정과 비교하는 비율
+}
+
+# 의미 기반 판정 캐시: 이전에 분석한 조항과 임베딩 유사도가 높고
+# 검색된 컨텍스트 문서가 같으면 LLM 호출 없이 이전 판정을 cached=True 표시와 함께 재사용
+# (프롬프트/모델 설정이 바뀌면 자동으로 비워짐)
+SEMANTIC_CACHE_CONFIG = {
+    "ENABLED": False,
+    "THRESHOLD": 0.97,  # 최소 코사인 유사도
+    "MAX_ENTRIES": 10000,  # 벡터 스토어별 최대 항목 수 (LRU 제거)
+    "CANDIDATES": 4,  # 컨텍스트 일치 여부를 확인할 유사 조항 후보 수
+    "MIN_CONTEXT_OVERLAP": 1.0,  # 검색 문서 ID 집합 자카드 유사도 (1.0이면 완전 일치)
+}
+
+# 위험도 순 조항 분석: 위반 사례 최근접 유사도 + 키워드로 점수를 매겨 높은 조항부터 LLM으로 보냄
+# 마감 시간이 있으면 시간 안에 시작하지 못한 (위험도 낮은) 조항은 deferred_sections로 응답
+RISK_SCHEDULE_CONFIG = {
+    "ENABLED": True,
+    "SIMILARITY_WEIGHT": 0.7,
+    "KEYWORD_WEIGHT": 0.3,
+    "KEYWORD_SATURATION": 3,  # 키워드 점수가 최대가 되는 키워드 수
+    "KEYWORDS": [
+        "부담", "책임", "일체", "모든 비용", "무상", "포기", "이의를 제기할 수 없",
+        "청구할 수 없", "민원", "손해배상", "지체상금", "하자", "공제", "감액",
+        "정산하지 않", "일방적", "귀책", "추가 비용", "계약해지",
+    ],
+    # 조항 분석 전체 마감 시간(초), None이면 제한 없음 (요청별 deadline 파라미터로 지정 가능)
+    "ANALYSIS_DEADLINE": None,
+    "MAX_DEADLINE": 600.0,  # 요청별 deadline 상한
+    "SKIP_BELOW": 0.0,  # 마감이 있을 때 이 점수 미만 조항은 LLM으로 보내지 않음
+}
+
+# 비동기 LLM 클라이언트 설정 (OpenRouter)
+LLM_CLIENT_CONFIG = {
+    "max_connections": 64,
+    "max_keepalive_connections": 32,
+    "connect_timeout": 5.0,
+    "attempt_timeout": 30.0,  # 시도 1회당 타임아웃
+    "deadline": 60.0,  # 재시도를 포함한 요청 전체 마감 시간
+    "max_retries": 3,  # 429/5xx/타임아웃 재시도 횟수
+    "backoff_base": 0.5,
+    "backoff_max": 8.0,
+    "hedge_after": None,  # 초 단위, 설정 시 느린 요청에 헤지 요청을 추가로 보냄
+}
+
+# 프로세스 간 공유 LLM 호출 제한기 (SQLite 토큰 버킷 + 동시 호출 임대, 429 시 AIMD 조정)
+# 같은 db_path/key를 쓰는 모든 프로세스가 하나의 한도를 나눠 씀
+LLM_GOVERNOR_CONFIG = {
+    "db_path": os.getenv("LLM_GOVERNOR_DB", os.path.join("cache", "llm_governor.sqlite")),
+    "key": os.getenv("LLM_GOVERNOR_KEY", "openrouter"),
+    "initial_rate": 10.0,  # 초당 요청 수
+    "min_rate": 0.5,
+    "max_rate": 50.0,
+    "burst": 10.0,
+    "initial_concurrency": 16.0,  # 동시 호출 수
+    "min_concurrency": 2.0,
+    "max_concurrency": 64.0,
+    "increase": 1.0,  # 한도만큼 성공할 때마다 증가량
+    "decrease_factor": 0.5,  # 429 발생 시 곱할 값
+    "cooldown_s": 2.0,
+    "lease_ttl_s": 120.0,  # 반납되지 않은 임대(프로세스 종료 등) 만료 시간
+    "acquire_timeout_s": 60.0,
 }
 
 # 로깅 설정
-LOGGING_CONFIG = {
-    "version": 1,
-    "disable_existing_loggers": False,
-    "formatters": {
-        "standard": {"format": "%(asctime)s [%(levelname)s] %(name)s: %(message)s"},
-    },
-    "handlers": {
-        "console": {
-            "class": "logging.StreamHandler",
-            "formatter": "standard",
-            "level": "INFO",
-        },
-        "file": {
-            "class": "logging.FileHandler",
-            "filename": "app.log",
-            "formatter": "standard",
-            "level": "DEBUG",
-        },
-    },
-    "root": {
-        "handlers": ["console", "file"],
-        "level": "INFO",
-    },
-}
-
-# 로깅 설정 적용
-logging.config.dictConfig(LOGGING_CONFIG)
+LOG_CONFIG = {
+    "LEVEL": os.getenv("LOG_LEVEL", "INFO"),
+    "FILE": os.getenv("LOG_FILE", "app.log"),
+    "FILE_LEVEL": os.getenv("LOG_FILE_LEVEL", "INFO"),
+    "MAX_BYTES": 10 * 1024 * 1024,  # 파일 하나당 최대 크기 (초과 시 회전)
+    "BACKUP_COUNT": 5,
+    "JSON": os.getenv("LOG_JSON", "true").lower() == "true",  # 파일 로그를 JSON 레코드로 기록
+    # 조항별 디버그 로그(extra={"sampled": True})를 남길 비율
+    "SAMPLE_RATE": float(os.getenv("LOG_SAMPLE_RATE", "0.01")),
+    # True면 PDF 로드 등 상세 진행 로그 출력
+    "VERBOSE": os.getenv("LOG_VERBOSE", "false").lower() == "true",
+}
+
+# 현재 요청 ID (로그 레코드에 request_id로 포함)
+request_id_var = contextvars.ContextVar("request_id", default="-")
+
+
+class RequestIdFilter(logging.Filter):
+    """로그 레코드에 현재 요청 ID를 추가"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """extra={"sampled": True}로 표시된 반복 로그를 sample_rate 비율만 통과시킴"""
+
+    def __init__(self, sample_rate: float):
+        super().__init__()
+        self.sample_rate = sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "sampled", False):
+            return True
+        return random.random() < self.sample_rate
+
+
+class JsonFormatter(logging.Formatter):
+    """한 줄에 하나의 JSON 레코드"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False)
+
+
+_log_listener = None
+_log_lock = threading.Lock()
+
+
+def setup_logging(log_config: dict = None, log_file: bool = True) -> None:
+    """
+    QueueHandler로 로그를 큐에 넣고 별도 스레드(QueueListener)가 콘솔/회전 파일에 기록.
+    요청 처리 스레드는 파일 I/O를 기다리지 않습니다.
+
+    회전 파일(app.log)은 여러 프로세스가 함께 회전시키면 로그가 유실/중복되므로 단일 프로세스 서버 진입점
+    (python api/main.py, api/asgi.py, api/vector_store_api.py)에서만 log_file=True로 호출하고,
+    스크립트, 워커 프로세스, gunicorn 등 WSGI 워커는 log_file=False(콘솔만)로 호출합니다.
+    import 시에는 설정하지 않습니다.
+    """
+    global _log_listener
+    log_config = log_config or LOG_CONFIG
+
+    with _log_lock:
+        if _log_listener is not None:
+            _log_listener.stop()
+
+        console = logging.StreamHandler()
+        console.setLevel(log_config["LEVEL"])
+        console.setFormatter(
+            logging.Formatter("%(asctime)s [%(levelname)s] %(name)s [%(request_id)s]: %(message)s")
+        )
+        handlers = [console]
+
+        if log_file:
+            file_handler = logging.handlers.RotatingFileHandler(
+                log_config["FILE"],
+                maxBytes=log_config["MAX_BYTES"],
+                backupCount=log_config["BACKUP_COUNT"],
+                encoding="utf-8",
+            )
+            file_handler.setLevel(log_config["FILE_LEVEL"])
+            file_handler.setFormatter(
+                JsonFormatter()
+                if log_config["JSON"]
+                else logging.Formatter(
+                    "%(asctime)s [%(levelname)s] %(name)s [%(request_id)s]: %(message)s"
+                )
+            )
+            handlers.append(file_handler)
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        # 샘플링/요청 ID는 큐에 넣기 전에 처리 (버려질 레코드는 포맷하지 않음)
+        queue_handler.addFilter(SamplingFilter(log_config["SAMPLE_RATE"]))
+        queue_handler.addFilter(RequestIdFilter())
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(queue_handler)
+        root.setLevel(min(handler.level for handler in handlers))
+
+        _log_listener = logging.handlers.QueueListener(
+            log_queue, *handlers, respect_handler_level=True
+        )
+        _log_listener.start()
+
+
+def _stop_log_listener() -> None:
+    """종료 시 큐에 남은 로그를 기록 (setup_logging을 여러 번 불러도 훅은 하나)"""
+    with _log_lock:
+        if _log_listener is not None:
+            _log_listener.stop()
+
+
+atexit.register(_stop_log_listener)
 
 # API 설정
 API_CONFIG = {
@@ -50,6 +300,51 @@ API_CONFIG = {
     "PORT": 5003,
     "VECTOR_STORE_API_PORT": 5001,  # 벡터 스토어 API용 포트
     "DEBUG": False,
+    # 프로파일링 등 관리자 기능용 토큰 (X-Admin-Token 헤더). 미설정 시 관리자 기능 비활성화
+    "ADMIN_TOKEN": os.getenv("ADMIN_TOKEN"),
+    # 업로드 파일은 이 크기까지 메모리에서 처리하고 넘으면 이름 없는 임시 파일로 넘김
+    "UPLOAD_SPOOL_MAX_MB": 8,
+    "MAX_UPLOAD_MB": 20,
+}
+
+# ASGI 모드 설정 (python api/asgi.py 또는 uvicorn api.asgi:app)
+ASGI_CONFIG = {
+    "PORT": int(os.getenv("ASGI_PORT", "5003")),
+    # PDF 파싱용 프로세스 풀 크기 (0이면 스레드에서 파싱)
+    "PDF_WORKERS": int(os.getenv("ASGI_PDF_WORKERS", "2")),
+    # 한 요청 안에서 동시에 분석할 조항 수
+    "CLAUSE_CONCURRENCY": int(os.getenv("ASGI_CLAUSE_CONCURRENCY", "16")),
+    # 조항별 LLM 호출 마감 시간(초), None이면 LLM_CLIENT_CONFIG의 deadline 사용
+    "CLAUSE_DEADLINE": None,
+}
+
+# /analyze_contract 수락 제어: 예상 LLM 토큰(조항 수/페이지 수 기준)으로
+# 전체/클라이언트별 동시 처리와 토큰 예산을 제한하고, 넘는 요청은 잠시 대기 후 429로 거절
+ADMISSION_CONFIG = {
+    "ENABLED": True,
+    "MAX_CONCURRENT": int(os.getenv("ADMISSION_MAX_CONCURRENT", "4")),  # 동시에 분석하는 요청 수
+    "TOKEN_BUDGET": 400_000,  # 동시에 처리 중인 요청의 예상 토큰 합계 한도
+    "PER_CLIENT_CONCURRENT": 2,
+    "PER_CLIENT_TOKEN_BUDGET": 200_000,
+    "MAX_QUEUE": 16,  # 대기열 길이 (가득 차면 바로 429)
+    "PER_CLIENT_QUEUE": 4,
+    "MAX_WAIT_S": 30.0,  # 대기열 최대 대기 시간
+    "TOKENS_PER_CLAUSE": 2500,  # 조항당 예상 토큰 (프롬프트 + 컨텍스트 + 응답)
+    "TOKENS_PER_PAGE": 500,
+    # 클라이언트는 접속 주소로 구분. 접속 주소가 아래 프록시(IP/CIDR, 쉼표 구분)일 때만
+    # 프록시가 넣은 클라이언트 헤더(없으면 X-Forwarded-For)를 사용
+    "TRUSTED_PROXIES": [
+        p.strip() for p in os.getenv("ADMISSION_TRUSTED_PROXIES", "").split(",") if p.strip()
+    ],
+    "CLIENT_HEADER": "X-Client-ID",
+}
+
+# 요청 프로파일러 설정 (/analyze_contract?profile=true)
+PROFILER_CONFIG = {
+    "DIR": os.path.join("cache", "profiles"),
+    "MAX_PROFILES": 50,  # 보관할 최대 프로파일 수 (오래된 것부터 삭제)
+    "DEFAULT_MODE": "cprofile",  # cprofile | sampling
+    "SAMPLING_INTERVAL_MS": 5,
 }
 
 # LangSmith 설정
@@ -9,6 +9,14 @@ from datetime import datetime
 # python scripts/create_vector_store.py --csv_path /path/to/your/data.csv
 # python scripts/create_vector_store.py --csv_path hackerton/data/poc.cs --output_dir vector_stores --model_type huggingface --model_name BAAI/bge-m3
 # python scripts/create_vector_store.py --csv_path hackerton/data/poc.csv --output_dir vector_stores --model_type openai --model_name text-embedding-3-large
+# python scripts/create_vector_store.py --csv_path data/poc.csv --model_type openai --model_name text-embedding-3-large --dimensions 256 --quantization fp16
+# python scripts/create_vector_store.py --csv_path data/poc.csv --versioned   (버전 스토어, 바뀐 세그먼트만 임베딩)
+# python scripts/create_vector_store.py --csv_path data/statutes.csv --content_columns 조문 --shards 8   (샤드 스토어)
+# python scripts/create_vector_store.py --csv_path data/poc.csv --content_columns "*" --metadata_columns "" --no_dedup   (기존 방식: 모든 컬럼 임베딩)
+#
+# CSV는 --chunk_size 행씩 읽어 바로 임베딩하므로 메모리보다 큰 CSV도 처리할 수 있음.
+# 기본값(config.CSV_INGEST_CONFIG): "위반문장 원문"만 임베딩, "대안제시"/"부당특약 사유"는 메타데이터로 저장,
+# 같은 내용의 행은 한 번만 저장
 #
 # 생성된 벡터 저장소는 다음과 같은 구조로 저장
 # vector_stores/
@@ -16,8 +24,16 @@ from datetime import datetime
 #     ├── faiss_store/
 #     │   ├── index.faiss
 #     │   └── index.pkl
+#     ├── lexical_index.json   (하이브리드 검색용 문자 n-gram BM25 색인)
 #     └── metadata.json
 #
+# --shards N 사용 시 faiss_store/ 아래에 shards.json과 shard_00/ ... shard_N-1/ 로 저장되며
+# 서버는 모든 샤드를 검색해 top-k를 합침 (config.SHARD_CONFIG, src/sharded_store.py 참고).
+#
+# --versioned 사용 시에는 vector_stores/versioned/ 아래에 내용 해시 세그먼트와
+# 버전별 매니페스트로 저장되며 이전 버전과 같은 세그먼트는 공유됨 (src/segment_store.py 참고).
+# 오래된 버전 정리: python scripts/vector_store_versions.py gc --keep 3
+#
 # 이렇게 생성된 벡터 저장소는 나중에 API 서버에서 로드하여 사용할 수 있음.
 #########
 
@@ -25,94 +41,35 @@ from datetime import datetime
 project_root = str(Path(__file__).parents[1])
 sys.path.append(project_root)
 
-from src import DocumentProcessor, Embedder, VectorStore
-from config import DEFAULT_CONFIG
-import json
+from src.csv_ingest import CSVIngester
+from src.segment_store import VERSIONED_STORE_DIR
+from src.store_builder import VectorStoreCreator
+from config import CSV_INGEST_CONFIG, DEFAULT_CONFIG, RETRIEVAL_CONFIG, setup_logging
 
-# 로깅 설정
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
+# 로깅 설정 (콘솔만, 서버의 app.log는 건드리지 않음)
+setup_logging(log_file=False)
 logger = logging.getLogger(__name__)
 
 
-class VectorStoreCreator:
-    def __init__(
-        self, csv_path: str, output_dir: str, model_type: str, model_name: str = None
-    ):
-        self.csv_path = csv_path
-        self.output_dir = output_dir
-        self.model_type = model_type
-        self.model_name = model_name or DEFAULT_CONFIG["EMBEDDING_MODEL"]
-
-        # 컴포넌트 초기화
-        self.document_processor = DocumentProcessor()
-        self.embedder = Embedder(model_type=model_type, model_name=self.model_name)
-        self.vector_store = VectorStore(self.embedder.embeddings)
-
-        # 출력 디렉토리 생성
-        os.makedirs(output_dir, exist_ok=True)
-
-    def process(self):
-        """CSV 파일을 처리하고 벡터 저장소 생성"""
-        try:
-            # 1. CSV 파일 존재 확인
-            if not os.path.exists(self.csv_path):
-                raise FileNotFoundError(f"CSV 파일을 찾을 수 없습니다: {self.csv_path}")
-
-            # 2. CSV 파일 로드
-            logger.info(f"CSV 파일 로딩 시작: {self.csv_path}")
-            try:
-                documents = self.document_processor.load_csv(self.csv_path)
-                if not documents:
-                    raise ValueError(
-                        f"CSV 파일 '{self.csv_path}'에서 문서를 로드할 수 없습니다."
-                    )
-                logger.info(f"로드된 문서 수: {len(documents)}")
-
-                # 샘플 데이터 출력 (디버깅용)
-                if documents:
-                    logger.info("첫 번째 문서 샘플:")
-                    logger.info(f"Content: {documents[0].page_content[:200]}")
-                    logger.info(f"Metadata: {documents[0].metadata}")
-
-            except Exception as e:
-                logger.error(f"CSV 파일 로드 중 상세 오류: {str(e)}")
-                raise
-
-            # 3. 벡터 저장소 초기화 및 문서 임베딩
-            logger.info(
-                f"{self.model_type} 모델 ({self.model_name})을 사용하여 벡터 저장소 초기화 및 문서 임베딩 시작"
-            )
-            self.vector_store.initialize_store(documents)
-
-            # 4. 벡터 저장소 저장
-            store_path = os.path.join(self.output_dir, "faiss_store")
-            try:
-                self.vector_store.save_local(store_path)
-                logger.info(f"벡터 저장소 저장 완료: {store_path}")
-            except Exception as e:
-                logger.error(f"벡터 저장소 저장 중 오류 발생: {str(e)}")
-                raise
-
-            # 5. 메타데이터 저장
-            metadata = {
-                "document_count": len(documents),
-                "embedding_model": self.model_name,
-                "model_type": self.model_type,
-                "created_at": datetime.now().isoformat(),
-            }
-
-            metadata_path = os.path.join(self.output_dir, "metadata.json")
-            with open(metadata_path, "w", encoding="utf-8") as f:
-                json.dump(metadata, f, ensure_ascii=False, indent=2)
-            logger.info(f"메타데이터 저장 완료: {metadata_path}")
+def build_ingester(content_columns=None, metadata_columns=None, chunk_size=None, dedup=None):
+    """CSV 읽기 설정 (지정하지 않은 값은 config.CSV_INGEST_CONFIG 기본값)"""
+    return CSVIngester(
+        content_columns=(
+            CSV_INGEST_CONFIG["CONTENT_COLUMNS"] if content_columns is None else content_columns
+        ),
+        metadata_columns=(
+            CSV_INGEST_CONFIG["METADATA_COLUMNS"] if metadata_columns is None else metadata_columns
+        ),
+        chunk_size=chunk_size or CSV_INGEST_CONFIG["CHUNK_SIZE"],
+        dedup=CSV_INGEST_CONFIG["DEDUP"] if dedup is None else dedup,
+    )
 
-            return True
 
-        except Exception as e:
-            logger.error(f"처리 중 오류 발생: {str(e)}")
-            raise
+def parse_columns(value):
+    """쉼표 구분 컬럼 목록 (지정하지 않으면 None = config 기본값)"""
+    if value is None:
+        return None
+    return [c.strip() for c in value.split(",") if c.strip()]
 
 
 def main():
@@ -135,26 +92,105 @@ def main():
         help="사용할 임베딩 모델 이름 (huggingface: BAAI/bge-m3, openai: text-embedding-3-large)",
     )
 
+    parser.add_argument(
+        "--dimensions",
+        type=int,
+        help="임베딩 차원 축소 (예: openai 256/1024, bge-m3 512)",
+    )
+    parser.add_argument(
+        "--reduction",
+        choices=["api", "truncate", "pca"],
+        help="차원 축소 방식 (기본: openai는 api, huggingface는 truncate)",
+    )
+    parser.add_argument(
+        "--quantization",
+        choices=["fp16", "int8"],
+        help="벡터 저장 정밀도 (기본: float32)",
+    )
+
+    parser.add_argument(
+        "--versioned",
+        action="store_true",
+        help="버전 스토어(내용 해시 세그먼트 공유)로 저장",
+    )
+    parser.add_argument(
+        "--store_name",
+        help="버전 스토어 이름 (기본: 모델타입_모델이름)",
+    )
+    parser.add_argument(
+        "--no_activate",
+        action="store_true",
+        help="새 버전을 저장만 하고 활성 버전으로 지정하지 않음",
+    )
+
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=1,
+        help="샤드 수 (2 이상이면 샤드별 인덱스를 병렬로 생성하고 검색 시 결과를 합침)",
+    )
+    parser.add_argument(
+        "--content_columns",
+        help='임베딩할 CSV 컬럼 (쉼표 구분, "*"는 메타데이터 컬럼을 뺀 전체, 기본: 위반문장 원문)',
+    )
+    parser.add_argument(
+        "--metadata_columns",
+        help='메타데이터로만 저장할 CSV 컬럼 (쉼표 구분, ""는 없음, 기본: 대안제시,부당특약 사유)',
+    )
+    parser.add_argument(
+        "--chunk_size", type=int, help="한 번에 읽고 임베딩하는 행 수 (기본: 256)"
+    )
+    parser.add_argument(
+        "--no_dedup", action="store_true", help="같은 내용의 행도 모두 저장"
+    )
+
     args = parser.parse_args()
 
     try:
-        # 타임스탬프를 포함한 출력 디렉토리 생성
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         model_name_short = (
             args.model_name.split("/")[-1] if args.model_name else "default"
         )
-        output_dir = os.path.join(
-            args.output_dir, f"store_{args.model_type}_{model_name_short}_{timestamp}"
-        )
+        versioned_name = None
+        if args.versioned:
+            versioned_name = args.store_name or f"{args.model_type}_{model_name_short}"
+            output_dir = os.path.join(args.output_dir, VERSIONED_STORE_DIR)
+        else:
+            # 타임스탬프를 포함한 출력 디렉토리 생성
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            output_dir = os.path.join(
+                args.output_dir, f"store_{args.model_type}_{model_name_short}_{timestamp}"
+            )
 
         # 벡터 저장소 생성
         logger.info(f"{args.model_type} 모델을 사용하여 벡터 저장소 생성 시작")
         creator = VectorStoreCreator(
-            args.csv_path, output_dir, args.model_type, args.model_name
+            args.csv_path,
+            output_dir,
+            args.model_type,
+            args.model_name or DEFAULT_CONFIG["EMBEDDING_MODEL"],
+            dimensions=args.dimensions,
+            reduction=args.reduction,
+            quantization=args.quantization,
+            versioned_name=versioned_name,
+            activate=not args.no_activate,
+            ngram_sizes=RETRIEVAL_CONFIG["NGRAM_SIZES"],
+            shards=args.shards,
+            ingester=build_ingester(
+                content_columns=(
+                    [] if args.content_columns == "*" else parse_columns(args.content_columns)
+                ),
+                metadata_columns=parse_columns(args.metadata_columns),
+                chunk_size=args.chunk_size,
+                dedup=False if args.no_dedup else None,
+            ),
         )
-        creator.process()
+        result = creator.process()
 
-        logger.info("벡터 저장소 생성 완료")
+        stats = result["build_stats"]
+        logger.info(
+            f"벡터 저장소 생성 완료 (문서 {result['document_count']}개, "
+            f"{stats['rows_per_second']} 문서/초, {stats['tokens_per_second']} 토큰/초)"
+        )
 
     except Exception as e:
         logger.error(f"실행 중 오류 발생: {str(e)}")
@@ -0,0 +1,65 @@
+import sys
+import os
+import argparse
+import logging
+from pathlib import Path
+
+#######
+# 임베딩 모델 스냅샷 생성 (컨테이너 이미지 빌드 시 실행)
+# python scripts/prewarm_model.py --model_name BAAI/bge-m3 --output_dir models
+#
+# HuggingFace 허브에서 모델을 받아 로컬 디렉토리에 저장해 두면
+# API 서버가 시작할 때 허브 조회/다운로드 없이 바로 로드합니다.
+# (DEFAULT_CONFIG["EMBED_SNAPSHOT_DIR"] 또는 EMBED_SNAPSHOT_DIR 환경 변수로 경로 지정)
+#
+# models/
+# └── BAAI__bge-m3/
+#     ├── config.json
+#     ├── model.safetensors
+#     └── ...
+#########
+
+# 프로젝트 루트 경로를 Python 경로에 추가
+project_root = str(Path(__file__).parents[1])
+sys.path.append(project_root)
+
+from config import DEFAULT_CONFIG, setup_logging
+
+# 로깅 설정 (콘솔만, 서버의 app.log는 건드리지 않음)
+setup_logging(log_file=False)
+logger = logging.getLogger(__name__)
+
+
+def save_snapshot(model_name: str, output_dir: str) -> str:
+    """sentence-transformers 모델을 내려받아 스냅샷 디렉토리에 저장"""
+    from sentence_transformers import SentenceTransformer
+    from src.embedder import Embedder
+
+    snapshot_path = Embedder.snapshot_path(output_dir, model_name)
+    logger.info(f"모델 다운로드 시작: {model_name}")
+    model = SentenceTransformer(model_name, device="cpu")
+    model.save(snapshot_path)
+    logger.info(f"모델 스냅샷 저장 완료: {snapshot_path}")
+    return snapshot_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="임베딩 모델 스냅샷 생성")
+    parser.add_argument(
+        "--model_name",
+        default=DEFAULT_CONFIG["EMBEDDING_MODEL"],
+        help="HuggingFace 모델 이름",
+    )
+    parser.add_argument(
+        "--output_dir",
+        default=DEFAULT_CONFIG["EMBED_SNAPSHOT_DIR"],
+        help="스냅샷 저장 디렉토리",
+    )
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    save_snapshot(args.model_name, args.output_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import sys
+import os
+import argparse
+import logging
+from pathlib import Path
+
+#######
+# 버전 스토어 관리 (scripts/create_vector_store.py --versioned 로 생성한 스토어)
+# python scripts/vector_store_versions.py list
+# python scripts/vector_store_versions.py activate --name huggingface_bge-m3 --version 20240301_123456_ab12cd34
+# python scripts/vector_store_versions.py gc --keep 3 [--dry_run]
+#
+# gc는 이름별로 활성 버전과 최근 --keep개 버전의 매니페스트만 남기고,
+# 남은 매니페스트가 참조하지 않는 세그먼트 파일을 삭제합니다.
+#########
+
+# 프로젝트 루트 경로를 Python 경로에 추가
+project_root = str(Path(__file__).parents[1])
+sys.path.append(project_root)
+
+from src.segment_store import VERSIONED_STORE_DIR, SegmentStore
+
+# 로깅 설정
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+
+def list_versions(segment_store: SegmentStore) -> None:
+    for name in segment_store.names():
+        active = segment_store.active_version(name)
+        for version in segment_store.list_versions(name):
+            manifest = segment_store.read_manifest(name, version)
+            marker = "*" if version == active else " "
+            print(
+                f"{marker} {name}@{version}  문서 {manifest['document_count']}개, "
+                f"세그먼트 {len(manifest['segments'])}개 ({manifest['embedding_model']})"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="버전 스토어 목록 조회/활성화/정리")
+    parser.add_argument(
+        "--output_dir", default="vector_stores", help="벡터 저장소 디렉토리 경로"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("list", help="버전 목록 (* 활성 버전)")
+
+    activate_parser = subparsers.add_parser("activate", help="활성 버전 변경 (롤백)")
+    activate_parser.add_argument("--name", required=True, help="버전 스토어 이름")
+    activate_parser.add_argument("--version", required=True, help="활성화할 버전 ID")
+
+    gc_parser = subparsers.add_parser("gc", help="오래된 버전과 참조되지 않는 세그먼트 삭제")
+    gc_parser.add_argument(
+        "--keep", type=int, default=3, help="이름별로 남길 최근 버전 수 (활성 버전은 항상 유지)"
+    )
+    gc_parser.add_argument("--dry_run", action="store_true", help="삭제하지 않고 대상만 집계")
+
+    args = parser.parse_args()
+    segment_store = SegmentStore(os.path.join(args.output_dir, VERSIONED_STORE_DIR))
+
+    try:
+        if args.command == "list":
+            list_versions(segment_store)
+        elif args.command == "activate":
+            segment_store.activate(args.name, args.version)
+        elif args.command == "gc":
+            segment_store.gc(keep=args.keep, dry_run=args.dry_run)
+    except Exception as e:
+        logger.error(f"실행 중 오류 발생: {str(e)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,41 @@
-from .document_processor import DocumentProcessor
-from .embedder import Embedder
-from .vector_store import VectorStore
-from .text_splitter import KoreanSentenceSplitter
-from .rag_chain import RAGChain
-from .cache_manager import CacheManager
+import importlib
+from typing import TYPE_CHECKING
+
+# langchain/torch/faiss 등 무거운 의존성은 실제로 사용할 때 import 합니다.
+# (src.metrics 처럼 가벼운 모듈만 필요한 경우 서버 시작이 지연되지 않도록)
+_LAZY_IMPORTS = {
+    "DocumentProcessor": ".document_processor",
+    "Embedder": ".embedder",
+    "VectorStore": ".vector_store",
+    "KoreanSentenceSplitter": ".text_splitter",
+    "RAGChain": ".rag_chain",
+    "CacheManager": ".cache_manager",
+    "Clause": ".clause",
+    "split_into_clauses": ".clause",
+}
+
+if TYPE_CHECKING:
+    from .document_processor import DocumentProcessor
+    from .embedder import Embedder
+    from .vector_store import VectorStore
+    from .text_splitter import KoreanSentenceSplitter
+    from .rag_chain import RAGChain
+    from .cache_manager import CacheManager
+    from .clause import Clause, split_into_clauses
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_IMPORTS))
+
 
 __all__ = [
     "DocumentProcessor",
@@ -12,6 +44,8 @@ __all__ = [
     "KoreanSentenceSplitter",
     "RAGChain",
     "CacheManager",
+    "Clause",
+    "split_into_clauses",
 ]
 
 # 버전 정보
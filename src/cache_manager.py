@@ -3,6 +3,8 @@ import json
 from typing import Dict, Any
 import logging
 
+from .metrics import record_cache
+
 logger = logging.getLogger(__name__)
 
 class CacheManager:
@@ -30,7 +32,9 @@ class CacheManager:
 
     def get_result(self, sentence_number: int) -> Dict[str, Any]:
         """캐시에서 결과 조회"""
-        return self.cache.get(sentence_number)
+        result = self.cache.get(sentence_number)
+        record_cache("analysis_result", result is not None)
+        return result
 
     def export_results(self, file_path: str) -> None:
         """캐시 결과를 JSON 파일로 내보내기"""
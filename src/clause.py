@@ -0,0 +1,137 @@
+import hashlib
+import re
+from typing import Any, Dict, Iterable, List, Optional
+
+from langchain_core.documents import Document
+
+# split_by_numbering과 같은 번호 패턴: "1.", "2)", "3）"
+NUMBERING_RE = re.compile(r"(\d+[\)）\.])\s*")
+
+# 분석 전에 제거하는 따옴표 (조항마다가 아니라 페이지당 한 번 적용)
+_QUOTES = str.maketrans("", "", "\"'")
+
+
+class PageText:
+    """한 페이지의 본문과 메타데이터. 같은 페이지의 조항들이 참조를 공유합니다."""
+
+    __slots__ = ("text", "metadata")
+
+    def __init__(self, text: str, metadata: Dict[str, Any]):
+        self.text = text
+        self.metadata = metadata
+
+
+class Clause:
+    """
+    분석 단위 조항. 본문을 복사해 들고 있지 않고 페이지 본문의 [start, end) 위치만 보관하며
+    텍스트는 처음 접근할 때 잘라냅니다. JSON 변환은 응답 직전에 to_dict()로만 합니다.
+    """
+
+    __slots__ = ("id", "section_number", "page", "start", "end", "_page", "_text", "_hash")
+
+    def __init__(
+        self,
+        id: int,
+        section_number: int,
+        page: int,
+        start: int,
+        end: int,
+        page_text: PageText,
+    ):
+        self.id = id
+        self.section_number = section_number
+        self.page = page
+        self.start = start
+        self.end = end
+        self._page = page_text
+        self._text: Optional[str] = None
+        self._hash: Optional[str] = None
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = self._page.text[self.start : self.end]
+        return self._text
+
+    @property
+    def key(self) -> str:
+        """응답 결과 키 (section_number는 페이지마다 1부터 다시 매기므로 페이지 번호와 함께 사용)"""
+        return f"{self.page}-{self.section_number}"
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        """페이지 메타데이터 (복사하지 않은 공유 참조이므로 수정하지 말 것)"""
+        return self._page.metadata
+
+    @property
+    def content_hash(self) -> str:
+        """조항 본문 해시 (중복 조항/캐시 키용)"""
+        if self._hash is None:
+            self._hash = hashlib.blake2b(
+                self.text.encode("utf-8"), digest_size=16
+            ).hexdigest()
+        return self._hash
+
+    def to_document(self) -> Document:
+        """langchain Document가 필요한 곳(리트리버 등)을 위한 변환"""
+        return Document(
+            page_content=self.text,
+            metadata={
+                "section_number": self.section_number,
+                "page_number": self.page,
+                "source": self._page.metadata.get("source", ""),
+            },
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "key": self.key,
+            "section_number": self.section_number,
+            "page_number": self.page,
+            "content": self.text,
+        }
+
+    def __repr__(self) -> str:
+        return (
+            f"Clause(id={self.id}, section={self.section_number}, page={self.page}, "
+            f"span=({self.start}, {self.end}))"
+        )
+
+
+def _strip_span(text: str, start: int, end: int):
+    """text[start:end].strip()과 같은 구간을 새 문자열을 만들지 않고 계산"""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def split_into_clauses(
+    documents: Iterable[Document], strip_quotes: bool = True
+) -> List[Clause]:
+    """
+    페이지 Document들을 번호 매기기 기준으로 조항 분할 (split_by_numbering과 같은 규칙).
+    section_number는 split_by_numbering과 마찬가지로 페이지마다 1부터 다시 매깁니다.
+    Args:
+        strip_quotes: True면 페이지 본문에서 따옴표를 한 번에 제거한 뒤 분할
+    """
+    clauses: List[Clause] = []
+    for doc in documents:
+        text = doc.page_content.translate(_QUOTES) if strip_quotes else doc.page_content
+        page_text = PageText(text, doc.metadata)
+        page = doc.metadata.get("page", 1)
+
+        matches = list(NUMBERING_RE.finditer(text))
+        section_number = 0
+        for idx, match in enumerate(matches):
+            end = matches[idx + 1].start() if idx + 1 < len(matches) else len(text)
+            start, end = _strip_span(text, match.end(), end)
+            if start == end:
+                continue
+            section_number += 1
+            clauses.append(
+                Clause(len(clauses), section_number, page, start, end, page_text)
+            )
+    return clauses
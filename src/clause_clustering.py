@@ -0,0 +1,275 @@
+import hashlib
+import logging
+import random
+import re
+import threading
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from .clause import Clause
+
+logger = logging.getLogger(__name__)
+
+# 단위가 붙은 수치(금액/비율/기간/횟수)는 판정을 바꿀 수 있으므로 0으로 바꾸지 않음
+_NUMBER_RE = re.compile(
+    r"\d+(?:[.,]\d+)*(\s*(?:%|퍼센트|원|만|억|천|배|일|개월|년|주|시간|회|분의))?"
+)
+_SPACE_RE = re.compile(r"\s+")
+_MERSENNE_PRIME = (1 << 31) - 1
+
+
+def normalize_clause(text: str, normalize_digits: bool = True) -> str:
+    """
+    번호만 다른 조항이 같아지도록 숫자를 0으로 바꾸고 공백을 제거.
+    "위약금 10%"와 "위약금 100%"처럼 단위가 붙은 수치는 그대로 두어 서로 다른 조항으로 봄
+    """
+    if normalize_digits:
+        text = _NUMBER_RE.sub(lambda m: m.group(0) if m.group(1) else "0", text)
+    return _SPACE_RE.sub("", text)
+
+
+def quantities(text: str) -> Tuple[str, ...]:
+    """단위가 붙은 수치 목록 (공백 제거). 이 값이 다른 조항은 문장이 거의 같아도 묶지 않음"""
+    return tuple(
+        _SPACE_RE.sub("", m.group(0)) for m in _NUMBER_RE.finditer(text) if m.group(1)
+    )
+
+
+def shingles(text: str, size: int = 3) -> Set[str]:
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i : i + size] for i in range(len(text) - size + 1)}
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class ClauseCluster:
+    """대표 조항 하나와 그 판정을 그대로 적용할 유사 조항들"""
+
+    __slots__ = ("representative", "members", "similarities")
+
+    def __init__(self, representative: Clause):
+        self.representative = representative
+        self.members: List[Clause] = []  # 대표 제외
+        self.similarities: List[float] = []  # 대표와의 자카드 유사도
+
+    def __len__(self) -> int:
+        return 1 + len(self.members)
+
+
+class ClusterStats:
+    """중복 제거로 절약한 LLM 호출 수와 표본 재검증 결과"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clauses = 0
+        self.clusters = 0
+        self.projected = 0
+        self.spot_checks = 0
+        self.spot_check_disagreements = 0
+
+    def record_clustering(self, clauses: int, clusters: int) -> None:
+        with self._lock:
+            self.clauses += clauses
+            self.clusters += clusters
+
+    def record_projection(self, count: int = 1) -> None:
+        with self._lock:
+            self.projected += count
+
+    def record_spot_check(self, agreed: bool) -> None:
+        with self._lock:
+            self.spot_checks += 1
+            if not agreed:
+                self.spot_check_disagreements += 1
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "clauses": self.clauses,
+                "clusters": self.clusters,
+                "projected": self.projected,
+                "llm_calls_saved_rate": self.projected / self.clauses if self.clauses else 0.0,
+                "spot_checks": self.spot_checks,
+                "spot_check_disagreements": self.spot_check_disagreements,
+            }
+
+
+class ClauseClusterer:
+    """
+    MinHash + LSH로 거의 같은 조항을 묶습니다.
+    조항 순서대로 보면서 LSH 버킷에서 찾은 기존 대표와의 실제 자카드 유사도가 threshold 이상이면
+    그 클러스터에 넣고, 아니면 새 대표가 됩니다 (모든 구성원이 대표와 직접 비교됨).
+    단위가 붙은 수치(금액/비율/기간)가 대표와 다른 조항은 묶지 않습니다.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.85,
+        num_perm: int = 64,
+        bands: int = 16,
+        shingle_size: int = 3,
+        min_chars: int = 20,
+        normalize_digits: bool = True,
+        spot_check_rate: float = 0.0,
+        seed: int = 1,
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm은 bands의 배수여야 합니다")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.min_chars = min_chars
+        self.normalize_digits = normalize_digits
+        self.spot_check_rate = spot_check_rate
+        self.stats = ClusterStats()
+        self._random = random.Random(seed)
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+    def _signature(self, shingle_set: Set[str]) -> np.ndarray:
+        hashes = np.fromiter(
+            (
+                int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little")
+                & _MERSENNE_PRIME
+                for s in shingle_set
+            ),
+            dtype=np.uint64,
+            count=len(shingle_set),
+        )
+        permuted = (self._a[:, None] * hashes[None, :] + self._b[:, None]) % _MERSENNE_PRIME
+        return permuted.min(axis=1)
+
+    def _band_keys(self, signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        return [
+            (band, signature[band * self.rows : (band + 1) * self.rows].tobytes())
+            for band in range(self.bands)
+        ]
+
+    def cluster(self, clauses: Sequence[Clause]) -> List[ClauseCluster]:
+        clusters: List[ClauseCluster] = []
+        rep_shingles: List[Set[str]] = []
+        rep_quantities: List[Tuple[str, ...]] = []
+        buckets: Dict[Tuple[int, bytes], List[int]] = {}
+
+        for clause in clauses:
+            normalized = normalize_clause(clause.text, self.normalize_digits)
+            if len(normalized) < self.min_chars:
+                # 짧은 조항은 우연히 겹치기 쉬우므로 묶지 않음
+                clusters.append(ClauseCluster(clause))
+                rep_shingles.append(set())
+                rep_quantities.append(())
+                continue
+
+            amounts = quantities(clause.text)
+            shingle_set = shingles(normalized, self.shingle_size)
+            band_keys = self._band_keys(self._signature(shingle_set))
+
+            best, best_similarity = None, 0.0
+            seen = set()
+            for key in band_keys:
+                for cluster_idx in buckets.get(key, ()):
+                    if cluster_idx in seen:
+                        continue
+                    seen.add(cluster_idx)
+                    # 금액/비율/기간이 다르면 판정이 달라질 수 있으므로 유사도와 관계없이 제외
+                    if rep_quantities[cluster_idx] != amounts:
+                        continue
+                    similarity = jaccard(shingle_set, rep_shingles[cluster_idx])
+                    if similarity > best_similarity:
+                        best, best_similarity = cluster_idx, similarity
+
+            if best is not None and best_similarity >= self.threshold:
+                clusters[best].members.append(clause)
+                clusters[best].similarities.append(best_similarity)
+                continue
+
+            cluster_idx = len(clusters)
+            clusters.append(ClauseCluster(clause))
+            rep_shingles.append(shingle_set)
+            rep_quantities.append(amounts)
+            for key in band_keys:
+                buckets.setdefault(key, []).append(cluster_idx)
+
+        self.stats.record_clustering(len(clauses), len(clusters))
+        logger.info(f"조항 클러스터링: 조항 {len(clauses)}개 -> 대표 {len(clusters)}개")
+        return clusters
+
+    def plan(
+        self, clauses: Sequence[Clause]
+    ) -> Tuple[List[Clause], Dict[int, Tuple[Clause, float]]]:
+        """
+        LLM으로 분석할 조항 목록과 판정을 복사할 조항 매핑을 반환합니다.
+        Returns:
+            (분석할 조항, {조항 id: (대표 조항, 유사도)})
+            spot_check_rate 비율의 구성원은 분석 목록에도 포함되어 대표 판정과 비교됩니다.
+        """
+        to_analyze: List[Clause] = []
+        projections: Dict[int, Tuple[Clause, float]] = {}
+        for cluster in self.cluster(clauses):
+            to_analyze.append(cluster.representative)
+            for member, similarity in zip(cluster.members, cluster.similarities):
+                projections[member.id] = (cluster.representative, similarity)
+                if self.spot_check_rate and self._random.random() < self.spot_check_rate:
+                    to_analyze.append(member)
+        to_analyze.sort(key=lambda c: c.id)
+        return to_analyze, projections
+
+    def resolve(
+        self,
+        clauses: Sequence[Clause],
+        results: Dict[int, Dict],
+        projections: Dict[int, Tuple[Clause, float]],
+        record_stats: bool = True,
+    ) -> Dict[int, Dict]:
+        """
+        대표 판정을 나머지 구성원에게 적용합니다.
+        직접 분석한(표본 재검증) 구성원은 자기 판정을 쓰고 대표와 일치 여부만 기록합니다.
+        record_stats=False는 스트리밍 중간 결과처럼 나중에 전체를 다시 resolve할 때 사용합니다.
+        """
+        resolved: Dict[int, Dict] = {}
+        for clause in clauses:
+            projection = projections.get(clause.id)
+            own = results.get(clause.id)
+            if projection is None:
+                if own is not None:
+                    resolved[clause.id] = own
+                continue
+
+            representative, similarity = projection
+            rep_result = results.get(representative.id)
+            if own is not None:
+                if rep_result is not None and record_stats:
+                    self.stats.record_spot_check(_flag(own) == _flag(rep_result))
+                resolved[clause.id] = own
+                continue
+            if rep_result is None:
+                continue
+
+            response = rep_result.get("response")
+            if isinstance(response, dict):
+                response = {
+                    **response,
+                    "projected": True,
+                    "projected_from": representative.section_number,
+                    "projected_from_page": representative.page,
+                    "projection_similarity": round(similarity, 3),
+                }
+            resolved[clause.id] = {**rep_result, "query": clause.text, "response": response}
+            if record_stats:
+                self.stats.record_projection()
+        return resolved
+
+
+def _flag(result: Dict) -> Optional[str]:
+    response = result.get("response")
+    return response.get("detection_flag") if isinstance(response, dict) else None
@@ -0,0 +1,218 @@
+import logging
+import re
+import threading
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import tiktoken
+
+from .csv_ingest import document_text
+
+logger = logging.getLogger(__name__)
+
+_NORMALIZE_RE = re.compile(r"[\s\W\d_]+")
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model: str = "gpt-4o"):
+    """모델에 맞는 tiktoken 인코딩 (모델명이 등록되지 않은 경우 o200k_base)"""
+    try:
+        return tiktoken.encoding_for_model(model.split("/")[-1])
+    except KeyError:
+        try:
+            return tiktoken.get_encoding("o200k_base")
+        except ValueError:
+            return tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text: str, model: str = "gpt-4o") -> int:
+    return len(get_encoding(model).encode(text))
+
+
+def _shingles(text: str, size: int = 3) -> frozenset:
+    """공백/문장부호/숫자를 제거한 문자 n-gram 집합"""
+    normalized = _NORMALIZE_RE.sub("", text)
+    if len(normalized) <= size:
+        return frozenset([normalized])
+    return frozenset(normalized[i : i + size] for i in range(len(normalized) - size + 1))
+
+
+def _jaccard(a: frozenset, b: frozenset) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _parse_row(page_content: str) -> List[Tuple[str, str]]:
+    """CSVLoader 형식("열이름: 값" 줄 단위)을 (열, 값) 목록으로 분해"""
+    fields = []
+    for line in page_content.split("\n"):
+        key, sep, value = line.partition(": ")
+        if sep and key and "\n" not in key and len(key) <= 30:
+            fields.append((key.strip(), value.strip()))
+        elif fields:
+            # 값 안의 줄바꿈은 직전 값에 이어 붙임
+            k, v = fields[-1]
+            fields[-1] = (k, f"{v} {line.strip()}".strip())
+        else:
+            fields.append(("", line.strip()))
+    return fields
+
+
+class ContextBuilder:
+    """검색된 문서를 토큰 예산 안의 압축된 컨텍스트로 만들고 프롬프트 메시지를 구성합니다."""
+
+    def __init__(
+        self,
+        token_budget: int = 1500,
+        dedup_threshold: float = 0.9,
+        model: str = "gpt-4o",
+        cache_control: bool = False,
+        measure_raw_tokens: bool = False,
+    ):
+        """
+        Args:
+            token_budget: 컨텍스트에 허용하는 최대 토큰 수
+            dedup_threshold: 이 값 이상의 문자 3-gram 자카드 유사도면 중복으로 제거
+            model: 토큰 계산에 사용할 모델명
+            cache_control: 고정 프롬프트 접두부에 cache_control 표시 (Anthropic 계열)
+            measure_raw_tokens: 압축 전 원문 토큰 수(tokens_raw)도 집계할지.
+                원문 전체를 한 번 더 토큰화하므로 압축률을 확인할 때만 켬
+        """
+        self.token_budget = token_budget
+        self.dedup_threshold = dedup_threshold
+        self.model = model
+        self.cache_control = cache_control
+        self.measure_raw_tokens = measure_raw_tokens
+
+        self._lock = threading.Lock()
+        self._stats = {
+            "contexts": 0,
+            "rows_in": 0,
+            "rows_out": 0,
+            "tokens_raw": 0,
+            "tokens_out": 0,
+            "truncated": 0,
+        }
+
+    def deduplicate(self, docs: Sequence) -> List:
+        """거의 동일한 문서를 제거 (검색 순위가 높은 문서를 남김)"""
+        kept, kept_shingles = [], []
+        for doc in docs:
+            shingles = _shingles(doc.page_content)
+            if any(
+                _jaccard(shingles, other) >= self.dedup_threshold
+                for other in kept_shingles
+            ):
+                continue
+            kept.append(doc)
+            kept_shingles.append(shingles)
+        return kept
+
+    def _render_rows(self, docs: Sequence) -> Tuple[Optional[str], List[str]]:
+        """열 이름은 한 번만 쓰고 각 행은 값만 나열"""
+        rows = [_parse_row(document_text(doc)) for doc in docs]
+        columns = [key for key, _ in rows[0]] if rows else []
+        same_columns = all([key for key, _ in row] == columns for row in rows)
+
+        if same_columns and any(columns):
+            header = "열: " + " | ".join(columns)
+            lines = [
+                f"[{idx}] " + " | ".join(value for _, value in row)
+                for idx, row in enumerate(rows, 1)
+            ]
+            return header, lines
+
+        lines = [
+            f"[{idx}] " + " | ".join(f"{k}: {v}" if k else v for k, v in row)
+            for idx, row in enumerate(rows, 1)
+        ]
+        return None, lines
+
+    def build_context(self, docs: Sequence) -> str:
+        """중복 제거, 헤더 압축, 토큰 예산 적용을 거친 컨텍스트 문자열"""
+        unique_docs = self.deduplicate(docs)
+        header, lines = self._render_rows(unique_docs)
+        encoding = get_encoding(self.model)
+
+        parts = [header] if header else []
+        used = len(encoding.encode(header + "\n")) if header else 0
+        truncated = False
+        for line in lines:
+            tokens = encoding.encode(line + "\n")
+            if used + len(tokens) <= self.token_budget:
+                parts.append(line)
+                used += len(tokens)
+                continue
+
+            # 첫 행조차 들어가지 않으면 예산만큼 잘라서라도 포함
+            remaining = self.token_budget - used
+            if len(parts) <= (1 if header else 0) and remaining > 0:
+                parts.append(encoding.decode(tokens[:remaining]).rstrip())
+                used += remaining
+            truncated = True
+            break
+
+        context = "\n".join(parts)
+        # 통계용 토큰화는 잠금 밖에서 (동시에 분석하는 조항끼리 기다리지 않도록)
+        tokens_raw = (
+            len(encoding.encode("\n\n".join(document_text(doc) for doc in docs)))
+            if self.measure_raw_tokens
+            else 0
+        )
+
+        with self._lock:
+            self._stats["contexts"] += 1
+            self._stats["rows_in"] += len(docs)
+            self._stats["rows_out"] += len(parts) - (1 if header else 0)
+            self._stats["tokens_raw"] += tokens_raw
+            self._stats["tokens_out"] += used
+            self._stats["truncated"] += int(truncated)
+        return context
+
+    @staticmethod
+    @lru_cache(maxsize=8)
+    def split_template(template: str) -> Tuple[str, str]:
+        """
+        프롬프트 템플릿을 변수가 없는 고정 접두부와 나머지로 분리합니다.
+        고정 접두부는 요청마다 동일하므로 프로바이더 프롬프트 캐시에 재사용됩니다.
+        """
+        match = re.search(r"(?<!\{)\{[A-Za-z_][A-Za-z0-9_]*\}(?!\})", template)
+        if not match:
+            return template.replace("{{", "{").replace("}}", "}"), ""
+        cut = template.rfind("\n###", 0, match.start())
+        if cut < 0:
+            cut = template.rfind("\n", 0, match.start())
+        cut = max(cut, 0)
+        prefix = template[:cut].replace("{{", "{").replace("}}", "}")
+        return prefix, template[cut:]
+
+    def build_messages(self, template: str, **variables) -> List[Dict]:
+        """고정 접두부를 system 메시지로, 변수가 들어간 부분을 user 메시지로 구성"""
+        prefix, rest = self.split_template(template)
+        if not rest:
+            return [{"role": "user", "content": prefix}]
+
+        if self.cache_control:
+            system_content = [
+                {"type": "text", "text": prefix, "cache_control": {"type": "ephemeral"}}
+            ]
+        else:
+            system_content = prefix
+        return [
+            {"role": "system", "content": system_content},
+            {"role": "user", "content": rest.format(**variables).strip()},
+        ]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+        if not self.measure_raw_tokens:
+            # 원문 토큰 수를 세지 않으면 압축률도 알 수 없음
+            stats.pop("tokens_raw")
+            stats["token_reduction"] = None
+            return stats
+        stats["token_reduction"] = (
+            1 - stats["tokens_out"] / stats["tokens_raw"] if stats["tokens_raw"] else 0.0
+        )
+        return stats
@@ -0,0 +1,164 @@
+import csv
+import hashlib
+import io
+import logging
+import os
+from typing import BinaryIO, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from langchain_core.documents import Document
+
+logger = logging.getLogger(__name__)
+
+# 메타데이터로 저장한 CSV 컬럼 이름 목록을 기록하는 키
+# (검색 결과를 LLM 컨텍스트로 만들 때 임베딩하지 않은 컬럼도 함께 보여주기 위함)
+METADATA_COLUMNS_KEY = "csv_columns"
+
+CsvSource = Union[str, os.PathLike, bytes, BinaryIO]
+
+
+def _clean(value) -> str:
+    # 컬럼 수보다 값이 많은 행은 DictReader가 나머지를 리스트로 묶음
+    if isinstance(value, list):
+        return ",".join(v.strip() for v in value)
+    return value.strip() if isinstance(value, str) else ""
+
+
+def render_fields(fields: Sequence[Tuple[str, str]]) -> str:
+    """CSVLoader와 같은 "컬럼: 값" 줄 형식"""
+    return "\n".join(f"{column}: {value}" for column, value in fields)
+
+
+def document_text(doc: Document) -> str:
+    """임베딩한 본문 뒤에 메타데이터로 저장한 CSV 컬럼을 같은 형식으로 이어 붙인 전체 행"""
+    columns = doc.metadata.get(METADATA_COLUMNS_KEY)
+    if not columns:
+        return doc.page_content
+    extra = render_fields([(c, doc.metadata.get(c, "")) for c in columns])
+    return f"{doc.page_content}\n{extra}" if doc.page_content else extra
+
+
+class CSVIngester:
+    """
+    CSV를 한 번에 읽지 않고 chunk_size 행씩 Document 배치로 읽습니다.
+    - content_columns: 임베딩할 컬럼 (page_content, "컬럼: 값" 줄 형식)
+    - metadata_columns: 임베딩하지 않고 메타데이터로만 저장할 컬럼
+    - dedup: 선택한 컬럼 값이 모두 같은 행은 처음 한 번만 사용
+    """
+
+    def __init__(
+        self,
+        content_columns: Optional[Sequence[str]] = None,
+        metadata_columns: Optional[Sequence[str]] = None,
+        chunk_size: int = 256,
+        dedup: bool = True,
+        encoding: str = "utf-8-sig",
+    ):
+        """
+        Args:
+            content_columns: 임베딩할 컬럼 목록 (None이면 metadata_columns를 뺀 모든 컬럼)
+            metadata_columns: 메타데이터로 저장할 컬럼 목록
+            chunk_size: 배치당 문서 수
+            dedup: 중복 행 제거 여부
+            encoding: 파일 인코딩 (BOM이 있어도 첫 컬럼 이름이 깨지지 않도록 utf-8-sig)
+        """
+        self.content_columns = list(content_columns) if content_columns else None
+        self.metadata_columns = list(metadata_columns or [])
+        self.chunk_size = max(1, chunk_size)
+        self.dedup = dedup
+        self.encoding = encoding
+        # 마지막으로 읽은 CSV에서 실제로 사용한 컬럼 (metadata.json 기록용)
+        self.columns: Dict[str, List[str]] = {"content": [], "metadata": []}
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        self.stats = {"rows": 0, "documents": 0, "duplicates": 0, "empty": 0}
+
+    def resolve_columns(self, header: Sequence[str]) -> Tuple[List[str], List[str]]:
+        """헤더에 없는 컬럼을 지정하면 ValueError"""
+        header = [h.strip() for h in header if h is not None]
+        missing = [
+            c for c in (self.content_columns or []) + self.metadata_columns if c not in header
+        ]
+        if missing:
+            raise ValueError(f"CSV에 없는 컬럼입니다: {', '.join(missing)} (컬럼: {', '.join(header)})")
+        content = self.content_columns or [h for h in header if h not in self.metadata_columns]
+        if not content:
+            raise ValueError("임베딩할 컬럼이 없습니다")
+        return content, self.metadata_columns
+
+    def _open(self, source: CsvSource):
+        """(텍스트 스트림, 닫기 함수). 호출자의 업로드 스트림은 닫지 않고 분리만 함"""
+        if isinstance(source, (str, os.PathLike)):
+            if not os.path.exists(source):
+                raise FileNotFoundError(f"CSV 파일을 찾을 수 없습니다: {source}")
+            f = open(source, "r", encoding=self.encoding, newline="")
+            return f, f.close
+        stream = io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+        if stream.seekable():
+            stream.seek(0)
+        text = io.TextIOWrapper(stream, encoding=self.encoding, newline="")
+        return text, text.detach
+
+    def iter_batches(
+        self, source: CsvSource, source_name: Optional[str] = None
+    ) -> Iterator[List[Document]]:
+        """chunk_size개씩 Document 배치를 생성 (메모리에는 현재 배치와 중복 확인용 해시만 유지)"""
+        name = source_name or (str(source) if isinstance(source, (str, os.PathLike)) else "upload.csv")
+        text, close = self._open(source)
+        self.reset_stats()
+        # 중복 확인은 행 전체 대신 8바이트 해시로 (큰 코퍼스에서도 메모리 사용이 작음)
+        seen = set()
+        try:
+            reader = csv.DictReader(text)
+            content_columns, metadata_columns = self.resolve_columns(reader.fieldnames or [])
+            self.columns = {"content": content_columns, "metadata": metadata_columns}
+            batch: List[Document] = []
+            for i, row in enumerate(reader):
+                self.stats["rows"] += 1
+                row = {k.strip(): _clean(v) for k, v in row.items() if k is not None}
+                content = [(c, row.get(c, "")) for c in content_columns]
+                if not any(value for _, value in content):
+                    self.stats["empty"] += 1
+                    continue
+                extra = {c: row.get(c, "") for c in metadata_columns}
+
+                if self.dedup:
+                    key = hashlib.blake2b(
+                        "\x1f".join(
+                            [v for _, v in content] + [extra[c] for c in metadata_columns]
+                        ).encode("utf-8"),
+                        digest_size=8,
+                    ).digest()
+                    if key in seen:
+                        self.stats["duplicates"] += 1
+                        continue
+                    seen.add(key)
+
+                metadata: Dict = {"source": name, "row": i, **extra}
+                if metadata_columns:
+                    metadata[METADATA_COLUMNS_KEY] = list(metadata_columns)
+                batch.append(Document(page_content=render_fields(content), metadata=metadata))
+                self.stats["documents"] += 1
+                if len(batch) >= self.chunk_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+        finally:
+            close()
+        logger.info(
+            f"CSV 읽기 완료: {name} ({self.stats['rows']}행 -> 문서 {self.stats['documents']}개, "
+            f"중복 {self.stats['duplicates']}행, 빈 행 {self.stats['empty']}행 제외)"
+        )
+
+    def load(self, source: CsvSource, source_name: Optional[str] = None) -> List[Document]:
+        """모든 배치를 하나의 목록으로 (버전 스토어처럼 전체 문서가 필요한 경우)"""
+        return [doc for batch in self.iter_batches(source, source_name) for doc in batch]
+
+
+"""
+사용 방법
+ingester = CSVIngester(content_columns=["위반문장 원문"], metadata_columns=["대안제시", "부당특약 사유"])
+for batch in ingester.iter_batches("data/poc.csv"):
+    vector_store.add_documents(batch)
+"""
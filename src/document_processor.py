@@ -1,32 +1,91 @@
-from typing import List
+from typing import BinaryIO, List, Optional, Union
 from langchain_community.document_loaders import PDFPlumberLoader, CSVLoader
 from langchain_core.documents import Document
 
+import csv
+import io
 import logging
 import os
+import pdfplumber
 
-# 로깅 설정
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 파일 경로, 메모리의 bytes, 또는 업로드 스트림(파일 객체)
+FileSource = Union[str, os.PathLike, bytes, BinaryIO]
 
-class DocumentProcessor:
-    def __init__(self):
-        pass
 
-    def load_pdf(self, file_path: str) -> List[Document]:
-        """PDF 파일을 LlamaIndex를 사용하여 로드하고 특정 섹션만 추출합니다."""
-        # 파일 추출기 설정
+def _open_stream(source: Union[bytes, BinaryIO]) -> BinaryIO:
+    """bytes는 복사 없이 BytesIO로 감싸고, 파일 객체는 처음 위치로 되돌려 사용"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    if source.seekable():
+        source.seek(0)
+    return source
+
+
+def _csv_value(value) -> str:
+    # 컬럼 수보다 값이 많은 행은 DictReader가 나머지를 리스트로 묶음
+    if isinstance(value, list):
+        return ",".join(v.strip() for v in value)
+    return value.strip() if isinstance(value, str) else value
+
 
-        loader = PDFPlumberLoader(file_path)
-        docs = loader.load()
+class DocumentProcessor:
+    def __init__(self, verbose: bool = False):
+        """
+        Args:
+            verbose: True면 섹션 탐색 과정과 추출 결과 미리보기를 INFO로 기록
+        """
+        self.verbose = verbose
+        self._progress_level = logging.INFO if verbose else logging.DEBUG
+
+    def load_pdf(
+        self, source: FileSource, source_name: Optional[str] = None
+    ) -> List[Document]:
+        """
+        PDF를 로드하고 특정 섹션만 추출합니다.
+        Args:
+            source: 파일 경로, PDF bytes 또는 업로드 스트림 (임시 파일을 만들지 않음)
+            source_name: 스트림일 때 메타데이터 source에 기록할 이름
+        """
+        if isinstance(source, (str, os.PathLike)):
+            docs = PDFPlumberLoader(str(source)).load()
+        else:
+            docs = self._load_pdf_stream(source, source_name or "upload.pdf")
+        return self._extract_target_section(docs)
+
+    @staticmethod
+    def _load_pdf_stream(source: Union[bytes, BinaryIO], source_name: str) -> List[Document]:
+        """메모리/스트림의 PDF를 PDFPlumberLoader와 같은 형식의 페이지 Document로 로드"""
+        docs = []
+        with pdfplumber.open(_open_stream(source)) as pdf:
+            pdf_metadata = {
+                k: v for k, v in pdf.metadata.items() if type(v) in (str, int)
+            }
+            for page in pdf.pages:
+                docs.append(
+                    Document(
+                        page_content=page.extract_text() or "",
+                        metadata={
+                            "source": source_name,
+                            "file_path": source_name,
+                            "page": page.page_number - 1,
+                            "total_pages": len(pdf.pages),
+                            **pdf_metadata,
+                        },
+                    )
+                )
+                # 페이지별 파싱 캐시를 바로 해제해 큰 PDF의 메모리 사용을 줄임
+                page.close()
+        return docs
 
+    def _extract_target_section(self, docs: List[Document]) -> List[Document]:
+        """특기사항(6.0) ~ 7. 사이의 본문만 남깁니다."""
         filtered_docs = []
         is_target_section = False
         found_first_match = False  # 첫 번째 매칭(목차) 확인용 플래그
 
-        # 디버깅을 위한 출력 추가
-        print(f"총 {len(docs)}개의 페이지를 로드했습니다.")
+        logger.log(self._progress_level, "총 %d개의 페이지를 로드했습니다.", len(docs))
 
         for doc_idx, doc in enumerate(docs):
 
@@ -46,12 +105,12 @@ class DocumentProcessor:
                     if not found_first_match:
                         # 첫 번째 매칭(목차)는 건너뜀
                         found_first_match = True
-                        print(f">>> 목차 발견 (건너뜀): {clean_line}")
+                        logger.log(self._progress_level, "목차 발견 (건너뜀): %s", clean_line[:100])
                         continue
-                    print(f">>> 시작 지점 발견: {clean_line}")
+                    logger.log(self._progress_level, "시작 지점 발견: %s", clean_line[:100])
                     is_target_section = True
                 elif clean_line.startswith("7."):
-                    print(f">>> 종료 지점 발견: {clean_line}")
+                    logger.log(self._progress_level, "종료 지점 발견: %s", clean_line[:100])
                     is_target_section = False
                     break
 
@@ -71,19 +130,27 @@ class DocumentProcessor:
                 )
                 filtered_docs.append(filtered_doc)
 
-        # 결과 확인을 위한 출력
-        print(f"\n추출된 문서 수: {len(filtered_docs)}")
-        if filtered_docs:
-            print("\n첫 번째 추출 문서의 시작 부분:")
-            print(f"페이지 번호: {filtered_docs[0].metadata['page_number']}")
-            print(filtered_docs[0].page_content[:200])
+        # 결과 확인
+        if not filtered_docs:
+            logger.warning("추출된 문서가 없습니다!")
         else:
-            print("\n추출된 문서가 없습니다!")
+            logger.info(f"추출된 문서 수: {len(filtered_docs)}")
+            if self.verbose:
+                logger.info(
+                    f"첫 번째 추출 문서 (페이지 {filtered_docs[0].metadata['page_number']}): "
+                    f"{filtered_docs[0].page_content[:200]}"
+                )
 
         return filtered_docs
 
-    def load_csv(self, file_path: str) -> List[Document]:
-        """CSV 파일을 로드합니다."""
+    def load_csv(
+        self, source: FileSource, source_name: Optional[str] = None
+    ) -> List[Document]:
+        """CSV 파일 경로, bytes 또는 업로드 스트림을 로드합니다."""
+        if not isinstance(source, (str, os.PathLike)):
+            return self._load_csv_stream(source, source_name or "upload.csv")
+
+        file_path = str(source)
         try:
             if not os.path.exists(file_path):
                 raise FileNotFoundError(f"CSV 파일을 찾을 수 없습니다: {file_path}")
@@ -107,6 +174,27 @@ class DocumentProcessor:
             logger.error(f"스택 트레이스: {traceback.format_exc()}")
             raise
 
+    @staticmethod
+    def _load_csv_stream(source: Union[bytes, BinaryIO], source_name: str) -> List[Document]:
+        """CSVLoader와 같은 형식("컬럼: 값" 줄)으로 스트림의 CSV를 로드"""
+        stream = _open_stream(source)
+        text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+        try:
+            documents = []
+            for i, row in enumerate(csv.DictReader(text)):
+                content = "\n".join(
+                    f"{k.strip() if k is not None else k}: {_csv_value(v)}"
+                    for k, v in row.items()
+                )
+                documents.append(
+                    Document(page_content=content, metadata={"source": source_name, "row": i})
+                )
+            logger.info(f"CSV 스트림 로드 완료: {source_name} ({len(documents)}행)")
+            return documents
+        finally:
+            # 래퍼가 닫히면서 호출자의 업로드 스트림까지 닫지 않도록 분리
+            text.detach()
+
     def show_metadata(self, docs: List[Document]) -> None:
         """문서의 메타데이터를 출력합니다."""
         if not docs:
@@ -118,3 +206,13 @@ class DocumentProcessor:
         max_key_length = max(len(k) for k in docs[0].metadata.keys())
         for k, v in docs[0].metadata.items():
             print(f"{k:<{max_key_length}} : {v}")
+
+
+def load_pdf_bytes(
+    data: Union[bytes, BinaryIO], verbose: bool = False, source_name: Optional[str] = None
+) -> List[Document]:
+    """
+    업로드된 PDF 내용을 임시 파일 없이 로드합니다.
+    프로세스 풀 워커에서 실행할 수 있도록 모듈 수준 함수로 둡니다.
+    """
+    return DocumentProcessor(verbose=verbose).load_pdf(data, source_name)
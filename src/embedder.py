@@ -1,37 +1,289 @@
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_openai import OpenAIEmbeddings
-from typing import List, Any
+from langchain_core.embeddings import Embeddings
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, List, Any, Callable, Optional, Tuple
+import logging
+import math
+import os
+import queue
+import threading
+import time
 
+from .metrics import record_cache, timed
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingMicroBatcher:
+    """여러 스레드에서 동시에 들어온 쿼리 임베딩 요청을 모아 한 번에 처리합니다."""
 
-class Embedder:
     def __init__(
-        self, model_type: str = "huggingface", model_name: str = "BAAI/bge-m3"
+        self,
+        embed_fn: Callable[[List[str]], List[List[float]]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+    ):
+        self.embed_fn = embed_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+
+        self._queue: "queue.Queue[Optional[Tuple[str, Future]]]" = queue.Queue()
+        self._closed = False
+        self._stats_lock = threading.Lock()
+        self._batch_count = 0
+        self._item_count = 0
+
+        self._worker = threading.Thread(
+            target=self._run, name="embedding-micro-batcher", daemon=True
+        )
+        self._worker.start()
+        logger.info(
+            f"임베딩 마이크로 배처 시작 (max_batch_size={self.max_batch_size}, "
+            f"max_wait_ms={max_wait_ms})"
+        )
+
+    def submit(self, text: str) -> Future:
+        """임베딩 요청을 큐에 넣고 결과를 받을 Future를 반환합니다."""
+        if self._closed:
+            raise RuntimeError("종료된 마이크로 배처에는 요청할 수 없습니다")
+        future: Future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def embed(self, text: str) -> List[float]:
+        """요청이 속한 배치가 처리될 때까지 기다렸다가 임베딩을 반환합니다."""
+        return self.submit(text).result()
+
+    def close(self) -> None:
+        """워커 스레드를 종료합니다. 이미 큐에 들어온 요청은 처리됩니다."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._worker.join()
+
+    def stats(self) -> dict:
+        """처리한 배치 수와 평균 배치 크기를 반환합니다."""
+        with self._stats_lock:
+            batches, items = self._batch_count, self._item_count
+        return {
+            "batches": batches,
+            "items": items,
+            "avg_batch_size": items / batches if batches else 0.0,
+        }
+
+    def _collect_batch(self) -> Tuple[List[Tuple[str, Future]], bool]:
+        """첫 요청을 기다린 뒤 max_wait 동안 최대 max_batch_size개까지 모읍니다."""
+        first = self._queue.get()
+        if first is None:
+            return [], True
+
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = (
+                    self._queue.get(timeout=remaining)
+                    if remaining > 0
+                    else self._queue.get_nowait()
+                )
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            batch, stop = self._collect_batch()
+            # 취소된 요청은 연산에서 제외
+            batch = [(t, f) for t, f in batch if f.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            # 같은 배치 안의 중복 문장은 한 번만 임베딩
+            unique_texts = list(dict.fromkeys(text for text, _ in batch))
+            try:
+                vectors = self.embed_fn(unique_texts)
+                by_text = dict(zip(unique_texts, vectors))
+                for text, future in batch:
+                    future.set_result(by_text[text])
+            except Exception as e:
+                logger.error(f"배치 임베딩 중 오류: {str(e)}")
+                for _, future in batch:
+                    future.set_exception(e)
+
+            with self._stats_lock:
+                self._batch_count += 1
+                self._item_count += len(batch)
+
+
+# 차원 축소 방식
+# api: OpenAI dimensions 파라미터 (모델이 축소된 벡터를 반환)
+# truncate: 앞쪽 N차원만 남기고 다시 정규화 (Matryoshka 방식)
+# pca: FAISS 인덱스의 PCA 전처리 (쿼리도 인덱스 안에서 변환되므로 Embedder는 그대로)
+REDUCTION_METHODS = ("api", "truncate", "pca")
+
+
+class Embedder(Embeddings):
+    def __init__(
+        self,
+        model_type: str = "huggingface",
+        model_name: str = "BAAI/bge-m3",
+        enable_batching: bool = False,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        snapshot_dir: Optional[str] = None,
+        dimensions: Optional[int] = None,
+        reduction: Optional[str] = None,
+        query_cache_size: int = 0,
     ):
         self.model_type = model_type
         self.model_name = model_name
+        if dimensions and reduction is None:
+            reduction = "api" if model_type == "openai" else "truncate"
+        if reduction is not None and reduction not in REDUCTION_METHODS:
+            raise ValueError(f"지원하지 않는 차원 축소 방식입니다: {reduction}")
+        if reduction == "api" and model_type != "openai":
+            raise ValueError("dimensions 파라미터 축소(api)는 OpenAI 모델에서만 사용할 수 있습니다")
+        self.dimensions = dimensions
+        self.reduction = reduction
+        # 문서/쿼리 임베딩 모두 같은 방식으로 잘라야 하므로 Embedder에서 적용
+        self._truncate_to = dimensions if reduction == "truncate" else None
         self.model_kwargs = {"device": "mps"}
         self.encode_kwargs = {"normalize_embeddings": True}
 
         if self.model_type == "huggingface":
+            # 미리 저장해 둔 모델 스냅샷이 있으면 허브 조회/다운로드 없이 로컬에서 로드
+            model_path = self.model_name
+            local_path = self.snapshot_path(snapshot_dir, self.model_name)
+            if local_path and os.path.isdir(local_path):
+                logger.info(f"모델 스냅샷 사용: {local_path}")
+                model_path = local_path
             self.embeddings = HuggingFaceEmbeddings(
-                model_name=self.model_name,
+                model_name=model_path,
                 model_kwargs=self.model_kwargs,
                 encode_kwargs=self.encode_kwargs,
             )
         elif self.model_type == "openai":
-            self.embeddings = OpenAIEmbeddings(model=self.model_name)
+            if self.reduction == "api":
+                self.embeddings = OpenAIEmbeddings(
+                    model=self.model_name, dimensions=self.dimensions
+                )
+            else:
+                self.embeddings = OpenAIEmbeddings(model=self.model_name)
         else:
             raise ValueError(
                 "지원하지 않는 모델 타입입니다. 'huggingface' 또는 'openai'를 사용하세요."
             )
 
+        # 최근 쿼리 임베딩 LRU (검색과 의미 캐시 조회가 같은 조항을 두 번 임베딩하지 않도록)
+        self.query_cache_size = query_cache_size
+        self._query_cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._query_cache_lock = threading.Lock()
+
+        # bge-m3 / OpenAI 모두 쿼리와 문서 임베딩이 동일하므로
+        # 동시 쿼리를 embed_documents 한 번으로 묶어 처리할 수 있다
+        self.batcher: Optional[EmbeddingMicroBatcher] = None
+        if enable_batching:
+            self.batcher = EmbeddingMicroBatcher(
+                self.embed_documents,
+                max_batch_size=max_batch_size,
+                max_wait_ms=max_wait_ms,
+            )
+
+    @classmethod
+    def from_store_metadata(cls, metadata: Dict, **kwargs) -> "Embedder":
+        """벡터 스토어 metadata.json과 같은 설정(모델, 차원 축소)으로 쿼리용 Embedder 생성"""
+        reduction = metadata.get("dimension_reduction")
+        return cls(
+            model_type=metadata["model_type"],
+            model_name=metadata["embedding_model"],
+            dimensions=(
+                metadata.get("embedding_dimensions") if reduction in ("api", "truncate") else None
+            ),
+            reduction=reduction if reduction in ("api", "truncate") else None,
+            **kwargs,
+        )
+
+    def _reduce(self, vector: List[float]) -> List[float]:
+        """앞쪽 N차원만 남기고 단위 길이로 다시 정규화"""
+        vector = vector[: self._truncate_to]
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    @staticmethod
+    def snapshot_path(snapshot_dir: Optional[str], model_name: str) -> Optional[str]:
+        """모델 스냅샷 저장 경로 (scripts/prewarm_model.py로 생성)"""
+        if not snapshot_dir:
+            return None
+        return os.path.join(snapshot_dir, model_name.replace("/", "__"))
+
+    def warm_up(self) -> None:
+        """첫 요청 지연을 없애기 위해 더미 쿼리로 로컬 모델을 한 번 실행합니다."""
+        if self.model_type != "huggingface":
+            return
+        self.embeddings.embed_query("계약서 조항 워밍업")
+
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
         """문서 리스트를 임베딩합니다."""
-        return self.embeddings.embed_documents(texts)
+        vectors = self.embeddings.embed_documents(texts)
+        if self._truncate_to:
+            return [self._reduce(v) for v in vectors]
+        return vectors
 
     def embed_query(self, text: str) -> List[float]:
         """쿼리 텍스트를 임베딩합니다."""
-        return self.embeddings.embed_query(text)
+        if self.query_cache_size:
+            with self._query_cache_lock:
+                vector = self._query_cache.get(text)
+                if vector is not None:
+                    self._query_cache.move_to_end(text)
+            record_cache("query_embedding", vector is not None)
+            if vector is not None:
+                return vector
+
+        with timed("embed_query"):
+            if self.batcher is not None:
+                vector = self.batcher.embed(text)
+            else:
+                vector = self.embeddings.embed_query(text)
+                vector = self._reduce(vector) if self._truncate_to else vector
+
+        if self.query_cache_size:
+            with self._query_cache_lock:
+                self._query_cache[text] = vector
+                while len(self._query_cache) > self.query_cache_size:
+                    self._query_cache.popitem(last=False)
+        return vector
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """
+        여러 쿼리를 embed_documents 한 번으로 임베딩하고 쿼리 캐시에 넣어 둡니다.
+        (분석 전 조항 위험도 계산용. 이후 검색의 embed_query는 캐시에서 바로 반환)
+        """
+        vectors: Dict[str, List[float]] = {}
+        if self.query_cache_size:
+            with self._query_cache_lock:
+                for text in texts:
+                    if text in self._query_cache:
+                        vectors[text] = self._query_cache[text]
+        missing = list(dict.fromkeys(t for t in texts if t not in vectors))
+        if missing:
+            with timed("embed_queries"):
+                vectors.update(zip(missing, self.embed_documents(missing)))
+            if self.query_cache_size:
+                with self._query_cache_lock:
+                    for text in missing:
+                        self._query_cache[text] = vectors[text]
+                    while len(self._query_cache) > self.query_cache_size:
+                        self._query_cache.popitem(last=False)
+        return [vectors[text] for text in texts]
 
 
 """
@@ -43,4 +295,8 @@ document_embeddings = embedder.embed_documents(["문서 내용"])
 OpenAI 모델 사용:
 embedder = Embedder(model_type="openai", model_name="text-embedding-3-large")
 document_embeddings = embedder.embed_documents(["문서 내용"])
+
+동시 쿼리 마이크로 배칭 사용:
+embedder = Embedder(model_type="huggingface", enable_batching=True, max_batch_size=32, max_wait_ms=5)
+vector_store = VectorStore(embedder)  # retriever의 쿼리 임베딩이 배치로 묶여 처리됨
 """
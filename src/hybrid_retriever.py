@@ -0,0 +1,56 @@
+import logging
+from typing import Any, List
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from .lexical_index import LexicalIndex, reciprocal_rank_fusion
+from .metrics import timed
+
+logger = logging.getLogger(__name__)
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    FAISS 벡터 검색과 문자 n-gram BM25 검색 결과를 RRF로 합치는 리트리버.
+    조문 번호나 법령 문구처럼 정확히 일치해야 하는 표현을 벡터 검색만으로 놓치는 경우를 보완합니다.
+    """
+
+    store: Any  # langchain FAISS
+    embeddings: Any  # 쿼리 임베딩 (Embedder)
+    lexical_index: LexicalIndex
+    k: int = 4
+    fetch_k: int = 20  # 각 검색기에서 가져올 후보 수
+    rrf_k: int = 60
+    vector_weight: float = 1.0
+    lexical_weight: float = 1.0
+
+    def _vector_ranking(self, query: str) -> List[str]:
+        embedding = np.asarray([self.embeddings.embed_query(query)], dtype=np.float32)
+        _, indices = self.store.index.search(embedding, self.fetch_k)
+        return [
+            self.store.index_to_docstore_id[i] for i in indices[0] if i != -1
+        ]
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        vector_ids = self._vector_ranking(query)
+        with timed("lexical_search"):
+            lexical_ids = [
+                doc_id for doc_id, _ in self.lexical_index.search(query, self.fetch_k)
+            ]
+
+        fused = reciprocal_rank_fusion(
+            [vector_ids, lexical_ids],
+            weights=[self.vector_weight, self.lexical_weight],
+            rrf_k=self.rrf_k,
+        )
+        docs = []
+        for doc_id, _ in fused[: self.k]:
+            doc = self.store.docstore.search(doc_id)
+            if isinstance(doc, Document):
+                docs.append(doc)
+        return docs
@@ -0,0 +1,156 @@
+import json
+import logging
+import math
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+LEXICAL_INDEX_FILE = "lexical_index.json"
+_FORMAT_VERSION = 1
+_TOKEN_RE = re.compile(r"[0-9A-Za-z가-힣]+")
+
+
+def tokenize(text: str, ngram_sizes: Sequence[int] = (2, 3)) -> List[str]:
+    """
+    한국어 법률 문장용 토큰화: 어절 전체와 어절 내부 문자 n-gram.
+    조사/어미가 붙은 어절도 n-gram으로 매칭되고, '제3조' 같은 조문 표현은 어절 그대로 매칭됩니다.
+    """
+    text = unicodedata.normalize("NFKC", text).lower()
+    tokens = []
+    for word in _TOKEN_RE.findall(text):
+        tokens.append(word)
+        for n in ngram_sizes:
+            if len(word) > n:
+                tokens.extend(word[i : i + n] for i in range(len(word) - n + 1))
+    return tokens
+
+
+class LexicalIndex:
+    """
+    문자 n-gram BM25 역색인. FAISS 인덱스와 같은 순서로 문서를 넣고
+    docstore ID로 결과를 돌려주므로 HybridRetriever에서 벡터 검색 결과와 합칠 수 있습니다.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, ngram_sizes: Sequence[int] = (2, 3)):
+        self.k1 = k1
+        self.b = b
+        self.ngram_sizes = tuple(ngram_sizes)
+        self.doc_ids: List[str] = []
+        self.doc_lengths = np.zeros(0, dtype=np.float32)
+        # term -> (문서 번호 배열, 빈도 배열)
+        self._postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        # term -> (문서 번호 배열, BM25 가중치 배열) 검색 시 더하기만 하도록 미리 계산
+        self._weights: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    def build(self, documents: Iterable[Tuple[str, str]]) -> "LexicalIndex":
+        """(docstore ID, 본문) 목록으로 색인 생성"""
+        postings: Dict[str, Tuple[List[int], List[int]]] = {}
+        doc_ids, lengths = [], []
+        for idx, (doc_id, text) in enumerate(documents):
+            tokens = tokenize(text, self.ngram_sizes)
+            doc_ids.append(doc_id)
+            lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                docs, tfs = postings.setdefault(term, ([], []))
+                docs.append(idx)
+                tfs.append(tf)
+
+        self.doc_ids = doc_ids
+        self.doc_lengths = np.asarray(lengths, dtype=np.float32)
+        self._postings = {
+            term: (np.asarray(docs, dtype=np.int32), np.asarray(tfs, dtype=np.float32))
+            for term, (docs, tfs) in postings.items()
+        }
+        self._compute_weights()
+        logger.info(f"어휘 색인 생성 완료: 문서 {len(doc_ids)}개, 용어 {len(self._postings)}개")
+        return self
+
+    def _compute_weights(self) -> None:
+        n_docs = len(self.doc_ids)
+        avg_length = float(self.doc_lengths.mean()) if n_docs else 0.0
+        norm = self.k1 * (1 - self.b + self.b * self.doc_lengths / (avg_length or 1.0))
+        self._weights = {}
+        for term, (docs, tfs) in self._postings.items():
+            df = len(docs)
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            self._weights[term] = (
+                docs,
+                (idf * tfs * (self.k1 + 1) / (tfs + norm[docs])).astype(np.float32),
+            )
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[str, float]]:
+        """BM25 점수 상위 k개의 (docstore ID, 점수)"""
+        if not self.doc_ids:
+            return []
+        scores = np.zeros(len(self.doc_ids), dtype=np.float32)
+        for term in set(tokenize(query, self.ngram_sizes)):
+            entry = self._weights.get(term)
+            if entry is not None:
+                docs, weights = entry
+                scores[docs] += weights
+
+        candidates = np.flatnonzero(scores)
+        if not len(candidates):
+            return []
+        if len(candidates) > k:
+            top = np.argpartition(-scores[candidates], k - 1)[:k]
+            candidates = candidates[top]
+        ranked = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(self.doc_ids[i], float(scores[i])) for i in ranked]
+
+    def save(self, path: str) -> None:
+        payload = {
+            "version": _FORMAT_VERSION,
+            "k1": self.k1,
+            "b": self.b,
+            "ngram_sizes": list(self.ngram_sizes),
+            "doc_ids": self.doc_ids,
+            "doc_lengths": self.doc_lengths.astype(int).tolist(),
+            "postings": {
+                term: [docs.tolist(), tfs.astype(int).tolist()]
+                for term, (docs, tfs) in self._postings.items()
+            },
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, separators=(",", ":"))
+        logger.info(f"어휘 색인 저장 완료: {path}")
+
+    @classmethod
+    def load(cls, path: str) -> "LexicalIndex":
+        with open(path, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+        if payload.get("version") != _FORMAT_VERSION:
+            raise ValueError(f"지원하지 않는 어휘 색인 형식입니다: {payload.get('version')}")
+
+        index = cls(payload["k1"], payload["b"], payload["ngram_sizes"])
+        index.doc_ids = payload["doc_ids"]
+        index.doc_lengths = np.asarray(payload["doc_lengths"], dtype=np.float32)
+        index._postings = {
+            term: (np.asarray(docs, dtype=np.int32), np.asarray(tfs, dtype=np.float32))
+            for term, (docs, tfs) in payload["postings"].items()
+        }
+        index._compute_weights()
+        logger.info(f"어휘 색인 로드 완료: {path} (문서 {len(index)}개)")
+        return index
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[str]],
+    weights: Optional[Sequence[float]] = None,
+    rrf_k: int = 60,
+) -> List[Tuple[str, float]]:
+    """여러 순위 목록을 RRF 점수(sum w / (rrf_k + rank))로 합칩니다."""
+    weights = weights or [1.0] * len(rankings)
+    fused: Dict[str, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, doc_id in enumerate(ranking, start=1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + weight / (rrf_k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,283 @@
+import asyncio
+import inspect
+import logging
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+from openai import (
+    AsyncOpenAI,
+    APIConnectionError,
+    APIStatusError,
+    APITimeoutError,
+)
+from langsmith.wrappers import wrap_openai
+
+from .rate_governor import RateGovernor
+
+logger = logging.getLogger(__name__)
+
+
+class DeadlineExceeded(Exception):
+    """요청별 마감 시간 안에 응답을 받지 못한 경우"""
+
+
+def classify_error(exc: BaseException) -> Optional[str]:
+    """재시도 가능한 오류면 통계용 분류명을, 아니면 None을 반환 (동기/비동기 경로 공용)"""
+    if isinstance(exc, (APITimeoutError, asyncio.TimeoutError)):
+        return "timeouts"
+    if isinstance(exc, APIConnectionError):
+        return "server_errors"
+    if isinstance(exc, APIStatusError):
+        if exc.status_code == 429:
+            return "rate_limited"
+        if exc.status_code >= 500:
+            return "server_errors"
+    return None
+
+
+def backoff_delay(attempt: int, exc: BaseException, base: float, maximum: float) -> float:
+    """Full jitter 지수 백오프. 429의 Retry-After 헤더가 있으면 우선 사용"""
+    if isinstance(exc, APIStatusError) and exc.status_code == 429:
+        retry_after = exc.response.headers.get("retry-after")
+        try:
+            if retry_after is not None:
+                return min(float(retry_after), maximum)
+        except ValueError:
+            pass
+    cap = min(maximum, base * (2**attempt))
+    return random.uniform(0, cap)
+
+
+class LLMClientMetrics:
+    """LLM 호출 재시도/헤징 통계"""
+
+    FIELDS = (
+        "requests",
+        "attempts",
+        "retries",
+        "rate_limited",
+        "server_errors",
+        "timeouts",
+        "hedged",
+        "hedge_wins",
+        "deadline_exceeded",
+        "failures",
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {field: 0 for field in self.FIELDS}
+
+    def incr(self, field: str, value: int = 1) -> None:
+        with self._lock:
+            self._counts[field] += value
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+
+class AsyncLLMClient:
+    """커넥션 풀, 지수 백오프 재시도, 마감 시간, 헤지 요청을 지원하는 비동기 OpenRouter 클라이언트"""
+
+    def __init__(
+        self,
+        base_url: Optional[str],
+        api_key: str,
+        max_connections: int = 64,
+        max_keepalive_connections: int = 32,
+        keepalive_expiry: float = 30.0,
+        connect_timeout: float = 5.0,
+        attempt_timeout: float = 30.0,
+        deadline: float = 60.0,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        hedge_after: Optional[float] = None,
+        default_headers: Optional[Dict[str, str]] = None,
+        rate_governor: Optional[RateGovernor] = None,
+    ):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.connect_timeout = connect_timeout
+        self.attempt_timeout = attempt_timeout
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge_after = hedge_after
+        self.default_headers = default_headers or {}
+        # 프로세스 간 공유 호출 제한기: 재시도도 토큰을 받아 보내고 429는 한도 감소에 반영
+        self.rate_governor = rate_governor
+        self.metrics = LLMClientMetrics()
+
+        # httpx 커넥션 풀은 이벤트 루프에 묶이므로 루프별로 클라이언트를 만든다
+        self._client = None
+        self._client_loop = None
+
+    def _get_client(self):
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            http_client = httpx.AsyncClient(
+                limits=self.limits,
+                timeout=httpx.Timeout(self.attempt_timeout, connect=self.connect_timeout),
+            )
+            # 재시도는 직접 처리하므로 SDK 내장 재시도는 끔
+            self._client = wrap_openai(
+                AsyncOpenAI(
+                    base_url=self.base_url,
+                    api_key=self.api_key,
+                    http_client=http_client,
+                    max_retries=0,
+                    default_headers=self.default_headers,
+                )
+            )
+            self._client_loop = loop
+        return self._client
+
+    async def aclose(self) -> None:
+        """현재 루프의 HTTP 커넥션 풀을 닫습니다."""
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+            self._client_loop = None
+
+    async def _attempt(self, timeout: float, **kwargs) -> Any:
+        self.metrics.incr("attempts")
+        client = self._get_client()
+        return await asyncio.wait_for(
+            client.chat.completions.create(timeout=timeout, **kwargs), timeout
+        )
+
+    async def _hedged_attempt(self, timeout: float, **kwargs) -> Any:
+        """hedge_after 초 안에 응답이 없으면 같은 요청을 한 번 더 보내 먼저 끝난 쪽을 사용"""
+        started = time.monotonic()
+        primary = asyncio.ensure_future(self._attempt(timeout, **kwargs))
+        tasks = [primary]
+        winner = None
+        try:
+            if not self.hedge_after or self.hedge_after >= timeout:
+                winner = primary
+                return await primary
+
+            done, _ = await asyncio.wait({primary}, timeout=self.hedge_after)
+            if done:
+                winner = primary
+                return primary.result()
+
+            if self.rate_governor is not None:
+                # 헤지도 호출 한도 안에서 보냄 (토큰을 기다리는 동안 원래 요청이 끝나면 그 결과 사용)
+                permit = asyncio.ensure_future(
+                    self.rate_governor.aacquire(
+                        take_slot=False, timeout=max(timeout - self.hedge_after, 0.0)
+                    )
+                )
+                tasks.append(permit)
+                await asyncio.wait({primary, permit}, return_when=asyncio.FIRST_COMPLETED)
+                if primary.done() or permit.exception() is not None:
+                    winner = primary
+                    return await primary
+
+            self.metrics.incr("hedged")
+            hedge = asyncio.ensure_future(
+                self._attempt(max(timeout - (time.monotonic() - started), 0.001), **kwargs)
+            )
+            tasks.append(hedge)
+            pending = {primary, hedge}
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                # 둘이 같이 끝나도 원래 요청을 먼저 보고, 진 쪽 응답은 finally에서 닫음
+                for task in (primary, hedge):
+                    if task not in done or task.cancelled():
+                        continue
+                    if task.exception() is None:
+                        winner = task
+                        break
+                    error = task.exception()
+                if winner is not None:
+                    if winner is hedge:
+                        self.metrics.incr("hedge_wins")
+                    return winner.result()
+            raise error or asyncio.CancelledError()
+        finally:
+            # 호출자가 취소하거나 예외로 빠져나가도 남은 요청은 취소하고, 쓰지 않는 응답은 닫음
+            for task in tasks:
+                if task is winner:
+                    continue
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled() and task.exception() is None:
+                    await self._discard(task.result())
+
+    @staticmethod
+    async def _discard(result: Any) -> None:
+        """사용하지 않는 응답 정리 (스트리밍 응답은 연결을 잡고 있으므로 닫음)"""
+        close = getattr(result, "close", None)
+        if close is None:
+            return
+        try:
+            closed = close()
+            if inspect.isawaitable(closed):
+                await closed
+        except Exception as e:
+            logger.warning(f"사용하지 않는 LLM 응답을 닫지 못했습니다: {str(e)}")
+
+    async def create_chat_completion(
+        self, deadline: Optional[float] = None, **kwargs
+    ) -> Any:
+        """마감 시간 안에서 재시도/헤징을 적용해 chat completion을 요청합니다."""
+        self.metrics.incr("requests")
+        budget = deadline if deadline is not None else self.deadline
+        expires_at = time.monotonic() + budget
+
+        attempt = 0
+        while True:
+            remaining = expires_at - time.monotonic()
+            if remaining <= 0:
+                self.metrics.incr("deadline_exceeded")
+                self.metrics.incr("failures")
+                raise DeadlineExceeded(f"LLM 요청 마감 시간 초과 ({budget:.1f}s)")
+
+            try:
+                return await self._hedged_attempt(
+                    min(self.attempt_timeout, remaining), **kwargs
+                )
+            except Exception as e:
+                kind = classify_error(e)
+                if kind is None or attempt >= self.max_retries:
+                    self.metrics.incr("failures")
+                    raise
+                self.metrics.incr(kind)
+                if kind == "rate_limited" and self.rate_governor is not None:
+                    await asyncio.to_thread(self.rate_governor.record_rate_limited)
+
+                delay = backoff_delay(attempt, e, self.backoff_base, self.backoff_max)
+                if time.monotonic() + delay >= expires_at:
+                    self.metrics.incr("deadline_exceeded")
+                    self.metrics.incr("failures")
+                    raise DeadlineExceeded(
+                        f"LLM 요청 마감 시간 초과 ({budget:.1f}s): {str(e)}"
+                    ) from e
+
+                attempt += 1
+                self.metrics.incr("retries")
+                logger.warning(
+                    f"LLM 요청 재시도 {attempt}/{self.max_retries} "
+                    f"({kind}, {delay:.2f}s 후): {str(e)}"
+                )
+                await asyncio.sleep(delay)
+                if self.rate_governor is not None:
+                    await self.rate_governor.aacquire(
+                        take_slot=False, timeout=max(expires_at - time.monotonic(), 0.0)
+                    )
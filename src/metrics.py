@@ -0,0 +1,247 @@
+import contextvars
+import functools
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0,
+)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Optional[Dict[str, str]]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in (labels or {}).items()))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def _format_labels(key: LabelKey, extra: Optional[Dict[str, str]] = None) -> str:
+    items = list(key) + list((extra or {}).items())
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._lock = threading.Lock()
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, value: float = 1, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(_label_key(labels), 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._lock = threading.Lock()
+        # 라벨별 [버킷 누적 카운트..., 합계, 개수]
+        self._values: Dict[LabelKey, List[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for idx, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[idx] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, state in sorted(self._values.items()):
+                for idx, bound in enumerate(self.buckets):
+                    labels = _format_labels(key, {"le": _format_value(bound)})
+                    lines.append(f"{self.name}_bucket{labels} {state[idx]}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {state[-2]!r}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {state[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """Prometheus 텍스트 형식으로 노출되는 메트릭 모음"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, object] = {}
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, Dict, float]]]] = []
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Counter(name, help_text)
+            return self._metrics[name]
+
+    def histogram(
+        self, name: str, help_text: str, buckets: Iterable[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Histogram(name, help_text, buckets)
+            return self._metrics[name]
+
+    def register_collector(
+        self, collector: Callable[[], Iterable[Tuple[str, str, Dict, float]]]
+    ) -> None:
+        """
+        스크레이프 시점에 값을 읽어오는 수집기 등록.
+        collector는 (메트릭명, 설명, 라벨, 값) 튜플을 반환합니다 (gauge로 노출).
+        """
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+
+        gauges: Dict[str, Tuple[str, List[str]]] = {}
+        for collector in collectors:
+            try:
+                for name, help_text, labels, value in collector():
+                    if value is None:
+                        continue
+                    _, samples = gauges.setdefault(name, (help_text, []))
+                    samples.append(
+                        f"{name}{_format_labels(_label_key(labels))} {_format_value(value)}"
+                    )
+            except Exception as e:
+                logger.error(f"메트릭 수집기 오류: {str(e)}")
+        for name, (help_text, samples) in gauges.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.extend(samples)
+
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "contract_pipeline_stage_seconds", "파이프라인 단계별 소요 시간(초)"
+)
+LLM_REQUESTS = REGISTRY.counter("contract_llm_requests_total", "LLM 요청 수")
+LLM_TOKENS = REGISTRY.counter("contract_llm_tokens_total", "LLM 토큰 사용량")
+CACHE_REQUESTS = REGISTRY.counter("contract_cache_requests_total", "캐시 조회 수 (hit/miss)")
+
+# 요청별 단계 소요 시간 누적 (stage -> [합계 초, 횟수])
+_request_timings: contextvars.ContextVar[Optional[Dict[str, List[float]]]] = (
+    contextvars.ContextVar("request_timings", default=None)
+)
+_timings_lock = threading.Lock()
+
+
+@contextmanager
+def collect_request_timings():
+    """블록 안에서 측정된 단계별 시간을 모아 dict로 제공 (요청 단위 breakdown)"""
+    timings: Dict[str, List[float]] = {}
+    token = _request_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _request_timings.reset(token)
+
+
+def timings_breakdown(timings: Dict[str, List[float]]) -> Dict[str, Dict[str, float]]:
+    """collect_request_timings 결과를 응답용 ms 단위 dict로 변환"""
+    with _timings_lock:
+        return {
+            stage: {"total_ms": round(total * 1000, 2), "count": int(count)}
+            for stage, (total, count) in timings.items()
+        }
+
+
+def record_stage(stage: str, seconds: float) -> None:
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    timings = _request_timings.get()
+    if timings is not None:
+        with _timings_lock:
+            entry = timings.setdefault(stage, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += 1
+
+
+class timed:
+    """단계 소요 시간을 히스토그램과 요청별 breakdown에 기록하는 컨텍스트 매니저/데코레이터"""
+
+    __slots__ = ("stage", "_started")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self._started = 0.0
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record_stage(self.stage, time.perf_counter() - self._started)
+        return False
+
+    def __call__(self, fn):
+        stage = self.stage
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timed(stage):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+
+def record_llm_usage(
+    model: str,
+    tier: str,
+    status: str,
+    prompt_tokens: Optional[int] = None,
+    completion_tokens: Optional[int] = None,
+) -> None:
+    LLM_REQUESTS.inc(model=model, tier=tier, status=status)
+    if prompt_tokens:
+        LLM_TOKENS.inc(prompt_tokens, model=model, kind="prompt")
+    if completion_tokens:
+        LLM_TOKENS.inc(completion_tokens, model=model, kind="completion")
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
@@ -0,0 +1,150 @@
+import logging
+import random
+import threading
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# 1차(소형 모델) 분류용 프롬프트: 위반 여부와 확신도만 응답
+SCREEN_PROMPT = """당신은 하도급 계약서의 부당특약을 검토하는 법률 전문가입니다.
+아래 참고 자료(위반 사례)를 바탕으로 사용자 문장이 부당특약에 해당하는지만 판단하세요.
+다른 설명 없이 JSON 객체 하나만 출력하세요.
+형식: {{"detection_flag": "Y 또는 N", "confidence": 0.0~1.0 사이의 확신도}}
+
+# 사용자 문장
+{question}
+
+# 참고 자료
+{context}
+"""
+
+SCREEN_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "contract_screen",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "detection_flag": {"type": "string", "enum": ["Y", "N"]},
+                "confidence": {"type": "number"},
+            },
+            "required": ["detection_flag", "confidence"],
+            "additionalProperties": False,
+        },
+    },
+}
+
+
+class CascadeStats:
+    """모델 캐스케이드 티어별 응답 수와 소형/대형 모델 판정 일치율"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.total = 0
+        self.small_only = 0
+        self.escalated = {"flagged": 0, "unsure": 0, "audit": 0, "error": 0}
+        # (소형 판정, 대형 판정) 조합별 건수
+        self.pairs = {}
+
+    def record_small(self) -> None:
+        with self._lock:
+            self.total += 1
+            self.small_only += 1
+
+    def record_escalation(
+        self, reason: str, small_flag: Optional[str], large_flag: Optional[str]
+    ) -> None:
+        with self._lock:
+            self.total += 1
+            self.escalated[reason] += 1
+            if small_flag and large_flag:
+                key = f"{small_flag}->{large_flag}"
+                self.pairs[key] = self.pairs.get(key, 0) + 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            compared = sum(self.pairs.values())
+            agreed = sum(v for k, v in self.pairs.items() if k[0] == k[-1])
+            escalated = sum(self.escalated.values())
+            return {
+                "total": self.total,
+                "small_only": self.small_only,
+                "escalated": dict(self.escalated),
+                "escalation_rate": escalated / self.total if self.total else 0.0,
+                "pairs": dict(self.pairs),
+                "agreement_rate": agreed / compared if compared else None,
+            }
+
+
+class ModelCascade:
+    """소형 모델 1차 분류 결과로 대형 모델 호출 여부를 결정합니다."""
+
+    def __init__(
+        self,
+        small_model: str,
+        confidence_threshold: float = 0.8,
+        audit_rate: float = 0.0,
+    ):
+        """
+        Args:
+            small_model: 1차 분류 모델
+            confidence_threshold: 이 값 이상의 확신으로 N 판정 시 대형 모델 생략
+            audit_rate: 일치율 측정을 위해 N 판정도 대형 모델로 보내는 비율
+        """
+        self.small_model = small_model
+        self.confidence_threshold = confidence_threshold
+        self.audit_rate = audit_rate
+        self.stats = CascadeStats()
+
+    def screen_request(self, question: str, context: str) -> Dict:
+        """1차 분류 요청 파라미터"""
+        return {
+            "model": self.small_model,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": SCREEN_PROMPT.format(question=question, context=context),
+                }
+            ],
+            "temperature": 0,
+            "max_tokens": 30,
+            "response_format": SCREEN_RESPONSE_FORMAT,
+        }
+
+    def escalation_reason(self, screen: Dict) -> Optional[str]:
+        """대형 모델로 넘길 사유. None이면 1차 판정(N)을 그대로 사용"""
+        if "error" in screen or "detection_flag" not in screen:
+            return "error"
+
+        flag = str(screen.get("detection_flag", "")).strip().upper()[:1]
+        if flag == "Y":
+            return "flagged"
+
+        try:
+            confidence = float(screen.get("confidence", 0.0))
+        except (TypeError, ValueError):
+            confidence = 0.0
+        if flag != "N" or confidence < self.confidence_threshold:
+            return "unsure"
+
+        if self.audit_rate and random.random() < self.audit_rate:
+            return "audit"
+        return None
+
+    def small_verdict(self, question: str) -> Dict:
+        """소형 모델이 위반 아님으로 확정한 경우의 응답"""
+        self.stats.record_small()
+        return {
+            "asis_sentence": question,
+            "detection_flag": "N",
+            "comments": "",
+            "tobe_sentence": "",
+            "model_tier": "small",
+        }
+
+    def record_large(self, reason: str, screen: Dict, verdict: Dict) -> None:
+        """대형 모델 판정을 기록하고 1차 판정과의 일치 여부를 집계"""
+        small_flag = str(screen.get("detection_flag", "")).strip().upper()[:1] or None
+        large_flag = str(verdict.get("detection_flag", "")).strip().upper()[:1] or None
+        self.stats.record_escalation(reason, small_flag, large_flag)
@@ -0,0 +1,195 @@
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ("cprofile", "sampling")
+_SAFE_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,128}$")
+
+
+class SamplingProfiler:
+    """대상 스레드의 콜스택을 주기적으로 샘플링해 speedscope 형식으로 내보냅니다."""
+
+    def __init__(self, interval_ms: float = 5.0):
+        self.interval = interval_ms / 1000.0
+        self._frames: Dict[Tuple[str, str, int], int] = {}
+        self._frame_list: List[Dict[str, Any]] = []
+        self._samples: List[List[int]] = []
+        self._weights: List[float] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._target_id: Optional[int] = None
+        self._started = 0.0
+        self._elapsed = 0.0
+
+    def _frame_index(self, frame) -> int:
+        code = frame.f_code
+        key = (code.co_name, code.co_filename, code.co_firstlineno)
+        idx = self._frames.get(key)
+        if idx is None:
+            idx = self._frames[key] = len(self._frame_list)
+            self._frame_list.append(
+                {"name": code.co_name, "file": code.co_filename, "line": code.co_firstlineno}
+            )
+        return idx
+
+    def _run(self) -> None:
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target_id)
+            now = time.perf_counter()
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self._frame_index(frame))
+                frame = frame.f_back
+            # speedscope는 루트 -> 리프 순서
+            stack.reverse()
+            self._samples.append(stack)
+            self._weights.append(now - last)
+            last = now
+
+    def start(self, thread_id: Optional[int] = None) -> None:
+        self._target_id = thread_id or threading.get_ident()
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self._elapsed = time.perf_counter() - self._started
+
+    def to_speedscope(self, name: str) -> Dict[str, Any]:
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "contract-analyzer sampling profiler",
+            "activeProfileIndex": 0,
+            "shared": {"frames": self._frame_list},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": name,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": self._elapsed,
+                    "samples": self._samples,
+                    "weights": self._weights,
+                }
+            ],
+        }
+
+
+class ProfileStore:
+    """요청 ID별 프로파일 결과를 디스크에 보관합니다. 오래된 것부터 정리"""
+
+    def __init__(self, directory: str, max_profiles: int = 50):
+        self.directory = directory
+        self.max_profiles = max_profiles
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def validate_id(request_id: str) -> str:
+        if not _SAFE_ID_RE.match(request_id or ""):
+            raise ValueError(f"잘못된 요청 ID입니다: {request_id}")
+        return request_id
+
+    def _paths(self, request_id: str) -> Dict[str, str]:
+        base = os.path.join(self.directory, self.validate_id(request_id))
+        return {
+            "pstats": base + ".prof",
+            "speedscope": base + ".speedscope.json",
+            "text": base + ".txt",
+        }
+
+    def save_cprofile(self, request_id: str, profile: cProfile.Profile) -> None:
+        paths = self._paths(request_id)
+        profile.dump_stats(paths["pstats"])
+
+        # 바로 확인할 수 있도록 누적 시간 상위 함수 요약도 저장
+        buffer = io.StringIO()
+        stats = pstats.Stats(profile, stream=buffer)
+        stats.sort_stats("cumulative").print_stats(40)
+        with open(paths["text"], "w", encoding="utf-8") as f:
+            f.write(buffer.getvalue())
+        self._prune()
+
+    def save_speedscope(self, request_id: str, profile: Dict[str, Any]) -> None:
+        paths = self._paths(request_id)
+        with open(paths["speedscope"], "w", encoding="utf-8") as f:
+            json.dump(profile, f)
+        self._prune()
+
+    def get(self, request_id: str, fmt: str) -> Optional[str]:
+        """저장된 프로파일 파일 경로 (없으면 None)"""
+        path = self._paths(request_id).get(fmt)
+        if path and os.path.exists(path):
+            return path
+        return None
+
+    def list(self) -> List[Dict[str, Any]]:
+        profiles: Dict[str, Dict[str, Any]] = {}
+        for name in os.listdir(self.directory):
+            request_id, _, ext = name.partition(".")
+            fmt = {"prof": "pstats", "speedscope.json": "speedscope", "txt": "text"}.get(ext)
+            if not fmt:
+                continue
+            path = os.path.join(self.directory, name)
+            entry = profiles.setdefault(
+                request_id, {"request_id": request_id, "formats": [], "created_at": 0.0}
+            )
+            entry["formats"].append(fmt)
+            entry["created_at"] = max(entry["created_at"], os.path.getmtime(path))
+        return sorted(profiles.values(), key=lambda p: p["created_at"], reverse=True)
+
+    def _prune(self) -> None:
+        with self._lock:
+            for entry in self.list()[self.max_profiles :]:
+                for path in self._paths(entry["request_id"]).values():
+                    if os.path.exists(path):
+                        os.unlink(path)
+
+
+def run_profiled(
+    store: ProfileStore,
+    request_id: str,
+    mode: str,
+    fn: Callable,
+    *args,
+    sampling_interval_ms: float = 5.0,
+    **kwargs,
+):
+    """fn을 프로파일러 아래에서 실행하고 결과를 store에 저장합니다."""
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"지원하지 않는 프로파일 모드입니다: {mode} ({', '.join(PROFILE_MODES)})")
+    store.validate_id(request_id)
+
+    if mode == "cprofile":
+        profile = cProfile.Profile()
+        try:
+            return profile.runcall(fn, *args, **kwargs)
+        finally:
+            store.save_cprofile(request_id, profile)
+            logger.info(f"cProfile 저장 완료: {request_id}")
+
+    sampler = SamplingProfiler(sampling_interval_ms)
+    sampler.start()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        sampler.stop()
+        store.save_speedscope(request_id, sampler.to_speedscope(request_id))
+        logger.info(f"샘플링 프로파일 저장 완료: {request_id}")
@@ -3,22 +3,68 @@ from langchain_core.callbacks import CallbackManager
 from langchain.callbacks.streaming_stdout import StreamingStdOutCallbackHandler
 from langchain_core.runnables import RunnablePassthrough
 from langchain_core.output_parsers import StrOutputParser
-from typing import List, Dict
+from typing import List, Dict, Optional, Union
 import logging
 from langchain_teddynote import logging as langsmith_logging
-from openai import OpenAI
+from openai import OpenAI, BadRequestError
 from langsmith.wrappers import wrap_openai
-import json
+import contextlib
+import hashlib
+import inspect
+import time
 from dotenv import load_dotenv
 import os
 
+from .context_builder import ContextBuilder, count_tokens
+from .csv_ingest import document_text
+from .llm_client import AsyncLLMClient, backoff_delay, classify_error
+from .metrics import record_llm_usage, timed
+from .model_cascade import ModelCascade
+from .rate_governor import RateGovernor
+from .semantic_cache import SemanticVerdictCache, context_ids
+from .verdict_parser import (
+    JSONObjectStreamScanner,
+    VERDICT_RESPONSE_FORMAT,
+    parse_verdict,
+)
+
 
 logger = logging.getLogger(__name__)
 
 
 class RAGChain:
-    def __init__(self):
+    def __init__(
+        self,
+        async_client_config: Optional[Dict] = None,
+        structured_output: bool = True,
+        stream_verdicts: bool = True,
+        model: str = "openai/gpt-4o",
+        normalize_model: str = "openai/gpt-4o-mini",
+        cascade_config: Optional[Dict] = None,
+        context_config: Optional[Dict] = None,
+        rate_governor_config: Optional[Dict] = None,
+    ):
+        """
+        Args:
+            async_client_config: AsyncLLMClient 설정 (커넥션 풀, 재시도, 마감 시간, 헤징)
+            structured_output: response_format JSON 스키마 사용 여부 (미지원 시 자동 해제)
+            stream_verdicts: 스트리밍으로 받다가 판정 객체가 닫히면 생성을 중단
+            model: 최종 판정(comments, tobe_sentence)을 생성하는 대형 모델
+            normalize_model: 텍스트 정규화 모델
+            cascade_config: ModelCascade 설정. 주어지면 소형 모델이 1차 분류를 수행
+            context_config: ContextBuilder 설정. 주어지면 컨텍스트 압축/토큰 예산 적용
+            rate_governor_config: RateGovernor 설정. 주어지면 모든 LLM 호출이 프로세스 간 공유
+                호출 한도(토큰 버킷 + 동시 호출 수, 429 시 AIMD 조정)를 받은 뒤 실행됨
+        """
         logger.info("RAG Chain 초기화 시작")
+        self.structured_output = structured_output
+        self.stream_verdicts = stream_verdicts
+        self.model = model
+        self.normalize_model = normalize_model
+        self.cascade = ModelCascade(**cascade_config) if cascade_config else None
+        self.context_builder = (
+            ContextBuilder(model=model, **context_config) if context_config else None
+        )
         self.prompt = load_prompt("prompt.yaml", encoding="utf-8")
         self.callback_manager = CallbackManager([StreamingStdOutCallbackHandler()])
 
@@ -33,60 +79,304 @@ class RAGChain:
             raise ValueError("OPENROUTER_API_KEY가 환경 변수에 설정되지 않았습니다.")
 
         # OpenRouter 클라이언트 설정
+        # 재시도는 _create_chat_completion에서 제한기 토큰을 받아 처리하므로 SDK 내장 재시도는 끔
         self.client = wrap_openai(
             OpenAI(
                 base_url=openrouter_api_base,
                 api_key=openrouter_api_key,
+                max_retries=0,
             )
         )
 
+        # 같은 공급자를 쓰는 모든 프로세스가 공유하는 호출 제한기
+        self.rate_governor = (
+            RateGovernor(**rate_governor_config) if rate_governor_config else None
+        )
+
+        # 비동기 경로용 클라이언트 (커넥션 풀 + 재시도 + 헤징)
+        self.async_client = AsyncLLMClient(
+            base_url=openrouter_api_base,
+            api_key=openrouter_api_key,
+            default_headers={"X-Title": "hackerton"},
+            rate_governor=self.rate_governor,
+            **(async_client_config or {}),
+        )
+
         logger.info("RAG Chain 초기화 완료")
 
+    def _governed(self):
+        """LLM 호출 한 건의 호출 한도 임대 (제한기 미사용 시 아무것도 하지 않음)"""
+        if self.rate_governor is None:
+            return contextlib.nullcontext()
+        return self.rate_governor.lease()
+
+    def _agoverned(self, deadline: Optional[float] = None):
+        if self.rate_governor is None:
+            return contextlib.nullcontext()
+        return self.rate_governor.alease(timeout=deadline)
+
+    def _create_chat_completion(self, **kwargs):
+        """
+        동기 클라이언트로 chat completion 요청.
+        429/5xx/타임아웃은 비동기 클라이언트와 같은 횟수/백오프로 재시도하고,
+        429는 바로 제한기 한도 감소에 반영하며 재시도마다 제한기 토큰을 받아 보냄
+        """
+        policy = self.async_client
+        attempt = 0
+        while True:
+            try:
+                return self.client.chat.completions.create(**kwargs)
+            except Exception as e:
+                kind = classify_error(e)
+                if kind is None or attempt >= policy.max_retries:
+                    raise
+                policy.metrics.incr(kind)
+                if kind == "rate_limited" and self.rate_governor is not None:
+                    self.rate_governor.record_rate_limited()
+
+                delay = backoff_delay(attempt, e, policy.backoff_base, policy.backoff_max)
+                attempt += 1
+                policy.metrics.incr("retries")
+                logger.warning(
+                    f"LLM 요청 재시도 {attempt}/{policy.max_retries} "
+                    f"({kind}, {delay:.2f}s 후): {str(e)}"
+                )
+                time.sleep(delay)
+                if self.rate_governor is not None:
+                    self.rate_governor.acquire(take_slot=False)
+
     def format_docs(self, docs: List[Dict]) -> str:
         """검색된 문서들을 하나의 문자열로 포맷팅"""
-        return "\n\n".join(doc.page_content for doc in docs)
+        if self.context_builder:
+            return self.context_builder.build_context(docs)
+        return "\n\n".join(document_text(doc) for doc in docs)
 
-    def get_openrouter_response(self, prompt: str) -> dict:
-        """Get response through OpenRouter API"""
+    def build_prompt(self, question: str, context: str) -> Union[str, List[Dict]]:
+        """판정 프롬프트 구성. ContextBuilder 사용 시 고정 접두부를 분리한 메시지 목록"""
+        if self.context_builder:
+            return self.context_builder.build_messages(
+                self.prompt.template, context=context, question=question
+            )
+        return self.prompt.format(context=context, question=question)
+
+    def verdict_fingerprint(self) -> str:
+        """판정 결과에 영향을 주는 프롬프트/모델 설정의 지문 (의미 캐시 무효화 기준)"""
+        parts = [
+            self.prompt.template,
+            self.model,
+            str(self.structured_output),
+            self.cascade.small_model if self.cascade else "",
+            (
+                f"{self.context_builder.token_budget}:{self.context_builder.dedup_threshold}"
+                if self.context_builder
+                else ""
+            ),
+        ]
+        return hashlib.blake2b("\x00".join(parts).encode("utf-8"), digest_size=16).hexdigest()
+
+    def _parse_response(self, content: str) -> dict:
+        """LLM 응답 문자열을 딕셔너리로 파싱"""
+        return parse_verdict(content)
+
+    def _verdict_request(self, prompt: Union[str, List[Dict]]) -> Dict:
+        """판정 요청 파라미터 구성"""
+        if isinstance(prompt, str):
+            messages = [{"role": "user", "content": prompt}]
+        else:
+            messages = prompt
+        kwargs = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": 0,
+            "max_tokens": 500,
+        }
+        if self.structured_output:
+            kwargs["response_format"] = VERDICT_RESPONSE_FORMAT
+        return kwargs
+
+    def _disable_structured_output(self, error: Exception) -> None:
+        logger.warning(
+            f"response_format을 지원하지 않는 모델로 판단되어 structured output을 끕니다: {str(error)}"
+        )
+        self.structured_output = False
+
+    @staticmethod
+    def _delta_text(chunk) -> str:
+        if not chunk.choices:
+            return ""
+        return chunk.choices[0].delta.content or ""
+
+    def _record_usage(
+        self, tier: str, kwargs: Dict, content: Optional[str], usage=None, status="ok"
+    ) -> None:
+        """토큰 사용량 기록. 스트리밍을 중간에 끊어 usage가 없으면 tiktoken으로 추정"""
         try:
-            response = self.client.chat.completions.create(
-                model="openai/gpt-4o",
-                messages=[{"role": "user", "content": prompt}],
-                extra_headers={"X-Title": "hackerton"},
-                temperature=0,
-                timeout=30,
-                max_tokens=500,
+            if usage is not None:
+                prompt_tokens, completion_tokens = (
+                    usage.prompt_tokens,
+                    usage.completion_tokens,
+                )
+            else:
+                prompt_text = "".join(
+                    m["content"]
+                    if isinstance(m["content"], str)
+                    else "".join(part.get("text", "") for part in m["content"])
+                    for m in kwargs["messages"]
+                )
+                prompt_tokens = count_tokens(prompt_text, kwargs["model"])
+                completion_tokens = count_tokens(content or "", kwargs["model"])
+            record_llm_usage(
+                kwargs["model"], tier, status, prompt_tokens, completion_tokens
+            )
+        except Exception as e:
+            logger.debug(f"토큰 사용량 기록 실패: {str(e)}")
+
+    def _complete_verdict(self, prompt: Union[str, List[Dict]]) -> str:
+        """판정 응답 문자열 조회. 스트리밍 시 판정 객체가 닫히는 즉시 중단"""
+        kwargs = self._verdict_request(prompt)
+        if not self.stream_verdicts:
+            response = self._create_chat_completion(
+                extra_headers={"X-Title": "hackerton"}, timeout=30, **kwargs
             )
             content = response.choices[0].message.content
+            self._record_usage("large", kwargs, content, response.usage)
+            return content
 
-            try:
-                # 1. 작은따옴표를 큰따옴표로 변경
-                content = content.replace("'", '"')
+        scanner = JSONObjectStreamScanner()
+        chunks = []
+        verdict = None
+        stream = self._create_chat_completion(
+            extra_headers={"X-Title": "hackerton"}, timeout=30, stream=True, **kwargs
+        )
+        try:
+            for chunk in stream:
+                delta = self._delta_text(chunk)
+                chunks.append(delta)
+                verdict = scanner.feed(delta)
+                if verdict is not None:
+                    # 판정 객체 이후의 출처 설명 등은 받지 않고 연결을 끊음
+                    break
+        finally:
+            close = getattr(stream, "close", None)
+            if close:
+                close()
+        content = verdict if verdict is not None else "".join(chunks)
+        self._record_usage("large", kwargs, content)
+        return content
 
-                # 2. JSON 파싱 시도
-                json_data = json.loads(content)
-                return json_data
+    async def _acomplete_verdict(
+        self, prompt: Union[str, List[Dict]], deadline: Optional[float]
+    ) -> str:
+        """_complete_verdict의 비동기 버전"""
+        kwargs = self._verdict_request(prompt)
+        if not self.stream_verdicts:
+            response = await self.async_client.create_chat_completion(
+                deadline=deadline, **kwargs
+            )
+            content = response.choices[0].message.content
+            self._record_usage("large", kwargs, content, response.usage)
+            return content
+
+        stream = await self.async_client.create_chat_completion(
+            deadline=deadline, stream=True, **kwargs
+        )
+        scanner = JSONObjectStreamScanner()
+        chunks = []
+        verdict = None
+        try:
+            async for chunk in stream:
+                delta = self._delta_text(chunk)
+                chunks.append(delta)
+                verdict = scanner.feed(delta)
+                if verdict is not None:
+                    break
+        finally:
+            close = getattr(stream, "close", None)
+            if close:
+                result = close()
+                if inspect.isawaitable(result):
+                    await result
+        content = verdict if verdict is not None else "".join(chunks)
+        self._record_usage("large", kwargs, content)
+        return content
 
-            except json.JSONDecodeError as je:
-                # 3. 파싱 실패 시 문자열을 직접 파싱
+    def get_openrouter_response(self, prompt: Union[str, List[Dict]]) -> dict:
+        """Get response through OpenRouter API"""
+        try:
+            with timed("llm"):
                 try:
-                    # 문자열을 파이썬 딕셔너리로 변환
-                    import ast
+                    with self._governed():
+                        content = self._complete_verdict(prompt)
+                except BadRequestError as e:
+                    if not self.structured_output:
+                        raise
+                    self._disable_structured_output(e)
+                    with self._governed():
+                        content = self._complete_verdict(prompt)
+            return self._parse_response(content)
 
-                    dict_data = ast.literal_eval(content)
-                    return dict_data
+        except Exception as e:
+            logger.error(f"OpenRouter API error: {str(e)}")
+            record_llm_usage(self.model, "large", "error")
+            return {"error": f"Error occurred: {str(e)}"}
 
-                except Exception as e:
-                    logger.error(f"String parsing error: {str(e)}")
-                    return {
-                        "error": f"Parsing error: {str(e)}",
-                        "raw_response": content,
-                    }
+    async def aget_openrouter_response(
+        self, prompt: Union[str, List[Dict]], deadline: Optional[float] = None
+    ) -> dict:
+        """비동기 클라이언트로 OpenRouter 응답 조회 (재시도/마감 시간/헤징 적용)"""
+        try:
+            with timed("llm"):
+                try:
+                    async with self._agoverned(deadline):
+                        content = await self._acomplete_verdict(prompt, deadline)
+                except BadRequestError as e:
+                    if not self.structured_output:
+                        raise
+                    self._disable_structured_output(e)
+                    async with self._agoverned(deadline):
+                        content = await self._acomplete_verdict(prompt, deadline)
+            return self._parse_response(content)
 
         except Exception as e:
             logger.error(f"OpenRouter API error: {str(e)}")
+            record_llm_usage(self.model, "large", "error")
             return {"error": f"Error occurred: {str(e)}"}
 
+    def _screen(self, question: str, context: str) -> dict:
+        """소형 모델 1차 분류"""
+        kwargs = self.cascade.screen_request(question, context)
+        try:
+            with timed("llm_screen"), self._governed():
+                response = self._create_chat_completion(
+                    extra_headers={"X-Title": "hackerton"}, timeout=30, **kwargs
+                )
+            content = response.choices[0].message.content
+            self._record_usage("small", kwargs, content, response.usage)
+            return self._parse_response(content)
+        except Exception as e:
+            logger.error(f"1차 분류 오류: {str(e)}")
+            record_llm_usage(kwargs["model"], "small", "error")
+            return {"error": str(e)}
+
+    async def _ascreen(
+        self, question: str, context: str, deadline: Optional[float]
+    ) -> dict:
+        """소형 모델 1차 분류 (비동기)"""
+        kwargs = self.cascade.screen_request(question, context)
+        try:
+            with timed("llm_screen"):
+                async with self._agoverned(deadline):
+                    response = await self.async_client.create_chat_completion(
+                        deadline=deadline, **kwargs
+                    )
+            content = response.choices[0].message.content
+            self._record_usage("small", kwargs, content, response.usage)
+            return self._parse_response(content)
+        except Exception as e:
+            logger.error(f"1차 분류 오류: {str(e)}")
+            record_llm_usage(kwargs["model"], "small", "error")
+            return {"error": str(e)}
+
     def normalize_text(self, text: str) -> str:
         """GPT-4o mini를 사용하여 텍스트 정규화"""
         try:
@@ -97,18 +387,23 @@ class RAGChain:
 
                         입력 문장: {text}"""
 
-            response = self.client.chat.completions.create(
-                model="openai/gpt-4o",
-                messages=[{"role": "user", "content": prompt.format(text=text)}],
-                extra_headers={"X-Title": "hackerton"},
-                temperature=0,
-                timeout=30,
-                max_tokens=200,
-            )
+            with self._governed():
+                response = self._create_chat_completion(
+                    model=self.normalize_model,
+                    messages=[{"role": "user", "content": prompt.format(text=text)}],
+                    extra_headers={"X-Title": "hackerton"},
+                    temperature=0,
+                    timeout=30,
+                    max_tokens=200,
+                )
 
             normalized_text = response.choices[0].message.content.strip()
-            logger.info(f"원본 문장: {text}")
-            logger.info(f"정규화된 문장: {normalized_text}")
+            logger.debug(
+                "원본 문장: %s / 정규화된 문장: %s",
+                text,
+                normalized_text,
+                extra={"sampled": True},
+            )
 
             return normalized_text
 
@@ -116,11 +411,23 @@ class RAGChain:
             logger.error(f"텍스트 정규화 중 오류: {str(e)}")
             return text  # 오류 발생 시 원본 텍스트 반환
 
-    def run_rag_chain(self, question: str, retriever) -> str:
-        """RAG 체인 실행"""
+    def run_rag_chain(
+        self, question: str, retriever, verdict_cache: Optional[SemanticVerdictCache] = None
+    ) -> str:
+        """RAG 체인 실행 (verdict_cache가 있으면 LLM 호출 전에 유사 조항 판정을 조회)"""
         try:
-            context = self.format_docs(retriever.invoke(question))
-            prompt_value = self.prompt.format(context=context, question=question)
+            with timed("retrieve"):
+                docs = retriever.invoke(question)
+            cache_key = None
+            if verdict_cache is not None:
+                with timed("semantic_cache"):
+                    cache_key = (verdict_cache.embed(question), context_ids(docs))
+                    cached = verdict_cache.lookup(*cache_key, self.verdict_fingerprint())
+                if cached is not None:
+                    return cached
+            with timed("context"):
+                context = self.format_docs(docs)
+                prompt_value = self.build_prompt(question, context)
             # 질문 텍스트 정규화
             #normalized_question = self.normalize_text(question)
 
@@ -130,17 +437,94 @@ class RAGChain:
              #   context=context, question=normalized_question
             #)
 
-            return self.get_openrouter_response(prompt_value)
+            if not self.cascade:
+                verdict = self.get_openrouter_response(prompt_value)
+            else:
+                screen = self._screen(question, context)
+                reason = self.cascade.escalation_reason(screen)
+                if reason is None:
+                    verdict = self.cascade.small_verdict(question)
+                else:
+                    verdict = self.get_openrouter_response(prompt_value)
+                    self.cascade.record_large(reason, screen, verdict)
+                    verdict["model_tier"] = "large"
+
+            if cache_key is not None:
+                verdict_cache.add(question, *cache_key, verdict, self.verdict_fingerprint())
+            return verdict
         except Exception as e:
             logger.error(f"RAG 체인 오류: {str(e)}")
             return f"체인 실행 오류: {str(e)}"
 
-    def analyze_documents(self, query: str, retriever) -> Dict:
+    def analyze_documents(
+        self, query: str, retriever, verdict_cache: Optional[SemanticVerdictCache] = None
+    ) -> Dict:
         """문서 분석 실행"""
         try:
-            logger.info(f"문서 분석 시작: {query[:100]}...")
-            response = self.run_rag_chain(query, retriever)
-            logger.info("문서 분석 완료")
+            logger.debug("문서 분석 시작: %s...", query[:100], extra={"sampled": True})
+            response = self.run_rag_chain(query, retriever, verdict_cache=verdict_cache)
+            return {"query": query, "response": response, "status": "success"}
+        except Exception as e:
+            logger.error(f"문서 분석 중 오류 발생: {str(e)}")
+            return {"query": query, "error": str(e), "status": "error"}
+
+    async def arun_rag_chain(
+        self,
+        question: str,
+        retriever,
+        deadline: Optional[float] = None,
+        verdict_cache: Optional[SemanticVerdictCache] = None,
+    ) -> str:
+        """RAG 체인 비동기 실행"""
+        try:
+            with timed("retrieve"):
+                docs = await retriever.ainvoke(question)
+            cache_key = None
+            if verdict_cache is not None:
+                with timed("semantic_cache"):
+                    cache_key = (await verdict_cache.aembed(question), context_ids(docs))
+                    cached = verdict_cache.lookup(*cache_key, self.verdict_fingerprint())
+                if cached is not None:
+                    return cached
+            with timed("context"):
+                context = self.format_docs(docs)
+                prompt_value = self.build_prompt(question, context)
+            if not self.cascade:
+                verdict = await self.aget_openrouter_response(
+                    prompt_value, deadline=deadline
+                )
+            else:
+                screen = await self._ascreen(question, context, deadline)
+                reason = self.cascade.escalation_reason(screen)
+                if reason is None:
+                    verdict = self.cascade.small_verdict(question)
+                else:
+                    verdict = await self.aget_openrouter_response(
+                        prompt_value, deadline=deadline
+                    )
+                    self.cascade.record_large(reason, screen, verdict)
+                    verdict["model_tier"] = "large"
+
+            if cache_key is not None:
+                verdict_cache.add(question, *cache_key, verdict, self.verdict_fingerprint())
+            return verdict
+        except Exception as e:
+            logger.error(f"RAG 체인 오류: {str(e)}")
+            return f"체인 실행 오류: {str(e)}"
+
+    async def aanalyze_documents(
+        self,
+        query: str,
+        retriever,
+        deadline: Optional[float] = None,
+        verdict_cache: Optional[SemanticVerdictCache] = None,
+    ) -> Dict:
+        """문서 분석 비동기 실행"""
+        try:
+            logger.debug("문서 분석 시작: %s...", query[:100], extra={"sampled": True})
+            response = await self.arun_rag_chain(
+                query, retriever, deadline=deadline, verdict_cache=verdict_cache
+            )
             return {"query": query, "response": response, "status": "success"}
         except Exception as e:
             logger.error(f"문서 분석 중 오류 발생: {str(e)}")
@@ -0,0 +1,326 @@
+import asyncio
+import contextlib
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS governor (
+    key TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    rate REAL NOT NULL,
+    concurrency REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    last_decrease REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    id TEXT PRIMARY KEY,
+    key TEXT NOT NULL,
+    pid INTEGER NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS leases_key ON leases (key);
+"""
+
+
+class GovernorTimeout(Exception):
+    """제한 시간 안에 LLM 호출 허가를 받지 못한 경우"""
+
+
+def is_rate_limited(exc: BaseException) -> bool:
+    """공급자 429 응답 여부 (openai APIStatusError 등 status_code 속성 기준)"""
+    return getattr(exc, "status_code", None) == 429
+
+
+class RateGovernor:
+    """
+    여러 프로세스(API 워커, 스크립트)가 공유하는 LLM 호출 속도/동시성 제한기.
+    SQLite 파일 하나에 토큰 버킷과 동시 호출 임대(lease)를 두고 BEGIN IMMEDIATE 트랜잭션으로 조정합니다.
+
+    - 호출 전 토큰 1개와 동시 호출 슬롯 1개를 받고, 끝나면 슬롯을 반납합니다.
+    - 429가 오면 속도/동시성 한도를 곱셈 감소(cooldown_s에 한 번), 성공하면 덧셈 증가(AIMD)시켜
+      공급자 한도 근처에서 진동하지 않고 머물도록 합니다.
+    - 프로세스가 죽어 반납되지 않은 임대는 lease_ttl_s 후 만료됩니다.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        key: str = "default",
+        initial_rate: float = 10.0,
+        min_rate: float = 0.5,
+        max_rate: float = 50.0,
+        burst: float = 10.0,
+        initial_concurrency: float = 16.0,
+        min_concurrency: float = 2.0,
+        max_concurrency: float = 64.0,
+        increase: float = 1.0,
+        decrease_factor: float = 0.5,
+        cooldown_s: float = 2.0,
+        lease_ttl_s: float = 120.0,
+        acquire_timeout_s: float = 60.0,
+    ):
+        """
+        Args:
+            db_path: 프로세스 간 공유할 SQLite 파일 경로
+            key: 제한 단위 (같은 공급자/API 키를 쓰는 클라이언트끼리 같은 key 사용)
+            initial_rate/min_rate/max_rate: 초당 요청 수 한도
+            burst: 토큰 버킷 최대 크기
+            initial_concurrency/min_concurrency/max_concurrency: 동시 호출 수 한도
+            increase: 현재 한도만큼 성공할 때마다 늘릴 양 (덧셈 증가)
+            decrease_factor: 429 발생 시 한도에 곱할 값 (곱셈 감소)
+            cooldown_s: 한 번 줄인 뒤 다시 줄이기까지의 최소 간격 (같은 폭주로 여러 번 줄이지 않도록)
+            lease_ttl_s: 반납되지 않은 임대의 만료 시간
+            acquire_timeout_s: 허가를 기다리는 최대 시간
+        """
+        self.db_path = db_path
+        self.key = key
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.initial_concurrency = initial_concurrency
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.cooldown_s = cooldown_s
+        self.lease_ttl_s = lease_ttl_s
+        self.acquire_timeout_s = acquire_timeout_s
+
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._stats = {"acquired": 0, "waited": 0, "timeouts": 0, "rate_limited": 0, "decreases": 0}
+        self._wait_seconds = 0.0
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._connection()  # 스키마 생성
+        logger.info(f"LLM 호출 제한기 초기화: {db_path} (key={key})")
+
+    # SQLite
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 연결은 스레드 간 공유하지 않음 (asyncio.to_thread 워커마다 따로 연결)
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _load_state(self, conn: sqlite3.Connection, now: float):
+        row = conn.execute(
+            "SELECT tokens, rate, concurrency, updated_at, last_decrease "
+            "FROM governor WHERE key = ?",
+            (self.key,),
+        ).fetchone()
+        if row is None:
+            conn.execute(
+                "INSERT INTO governor VALUES (?, ?, ?, ?, ?, ?)",
+                (self.key, self.burst, self.initial_rate, self.initial_concurrency, now, 0.0),
+            )
+            return self.burst, self.initial_rate, self.initial_concurrency, now, 0.0
+        return row
+
+    # 허가/반납
+    def _try_acquire(self, take_slot: bool):
+        """(임대 ID 또는 None, 다시 시도할 때까지 기다릴 시간)"""
+        now = time.time()
+        with self._transaction() as conn:
+            tokens, rate, concurrency, updated_at, last_decrease = self._load_state(conn, now)
+            tokens = min(self.burst, tokens + max(0.0, now - updated_at) * rate)
+
+            if take_slot:
+                conn.execute("DELETE FROM leases WHERE expires_at < ?", (now,))
+                (active,) = conn.execute(
+                    "SELECT COUNT(*) FROM leases WHERE key = ?", (self.key,)
+                ).fetchone()
+                if active >= int(concurrency):
+                    conn.execute(
+                        "UPDATE governor SET tokens = ?, updated_at = ? WHERE key = ?",
+                        (tokens, now, self.key),
+                    )
+                    # 슬롯은 반납 시점을 알 수 없으므로 짧게 기다렸다가 다시 확인
+                    return None, 0.05
+
+            if tokens < 1.0:
+                conn.execute(
+                    "UPDATE governor SET tokens = ?, updated_at = ? WHERE key = ?",
+                    (tokens, now, self.key),
+                )
+                return None, (1.0 - tokens) / rate
+
+            conn.execute(
+                "UPDATE governor SET tokens = ?, updated_at = ? WHERE key = ?",
+                (tokens - 1.0, now, self.key),
+            )
+            lease_id = ""
+            if take_slot:
+                lease_id = uuid.uuid4().hex
+                conn.execute(
+                    "INSERT INTO leases VALUES (?, ?, ?, ?)",
+                    (lease_id, self.key, os.getpid(), now + self.lease_ttl_s),
+                )
+            return lease_id, 0.0
+
+    def _finish(self, lease_id: Optional[str], outcome: str) -> None:
+        """임대 반납과 AIMD 한도 조정 (outcome: ok | rate_limited | error)"""
+        now = time.time()
+        with self._transaction() as conn:
+            if lease_id:
+                conn.execute("DELETE FROM leases WHERE id = ?", (lease_id,))
+            if outcome == "error":
+                return
+            tokens, rate, concurrency, updated_at, last_decrease = self._load_state(conn, now)
+            if outcome == "rate_limited":
+                if now - last_decrease < self.cooldown_s:
+                    return
+                rate = max(self.min_rate, rate * self.decrease_factor)
+                concurrency = max(self.min_concurrency, concurrency * self.decrease_factor)
+                # 이미 쌓인 토큰으로 바로 다시 몰리지 않도록 버킷도 비움
+                conn.execute(
+                    "UPDATE governor SET tokens = 0, rate = ?, concurrency = ?, "
+                    "updated_at = ?, last_decrease = ? WHERE key = ?",
+                    (rate, concurrency, now, now, self.key),
+                )
+                self._record("decreases")
+                logger.warning(
+                    f"LLM 429 응답으로 호출 한도 감소: {rate:.2f}req/s, 동시 {concurrency:.1f}"
+                )
+                return
+            # 한도만큼 성공하면 increase만큼 증가
+            step = self.increase / max(concurrency, 1.0)
+            rate = min(self.max_rate, rate + step)
+            concurrency = min(self.max_concurrency, concurrency + step)
+            conn.execute(
+                "UPDATE governor SET rate = ?, concurrency = ? WHERE key = ?",
+                (rate, concurrency, self.key),
+            )
+
+    def _deadline(self, timeout: Optional[float]) -> float:
+        return time.monotonic() + (self.acquire_timeout_s if timeout is None else timeout)
+
+    def _wait_time(self, wait: float, deadline: float) -> float:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            self._record("timeouts")
+            raise GovernorTimeout("LLM 호출 허가 대기 시간 초과")
+        # 여러 프로세스가 동시에 깨어나지 않도록 약간의 지터
+        return min(remaining, wait * random.uniform(1.0, 1.2) + 0.001)
+
+    def acquire(self, take_slot: bool = True, timeout: Optional[float] = None) -> str:
+        """허가를 받을 때까지 대기 (스레드). take_slot=False면 토큰만 사용 (재시도용)"""
+        deadline = self._deadline(timeout)
+        started = time.monotonic()
+        while True:
+            lease_id, wait = self._try_acquire(take_slot)
+            if lease_id is not None:
+                self._record_acquired(time.monotonic() - started)
+                return lease_id
+            time.sleep(self._wait_time(wait, deadline))
+
+    async def aacquire(self, take_slot: bool = True, timeout: Optional[float] = None) -> str:
+        """acquire의 asyncio 버전 (SQLite 트랜잭션은 스레드에서 실행)"""
+        deadline = self._deadline(timeout)
+        started = time.monotonic()
+        while True:
+            lease_id, wait = await asyncio.to_thread(self._try_acquire, take_slot)
+            if lease_id is not None:
+                self._record_acquired(time.monotonic() - started)
+                return lease_id
+            await asyncio.sleep(self._wait_time(wait, deadline))
+
+    def record_rate_limited(self) -> None:
+        """재시도 중 관측한 429 (임대와 무관하게 한도 감소)"""
+        self._record("rate_limited")
+        self._finish(None, "rate_limited")
+
+    @staticmethod
+    def _outcome(exc: Optional[BaseException]) -> str:
+        if exc is None:
+            return "ok"
+        return "rate_limited" if is_rate_limited(exc) else "error"
+
+    @contextlib.contextmanager
+    def lease(self, timeout: Optional[float] = None):
+        """LLM 호출 한 건을 감싸는 임대 (스레드)"""
+        lease_id = self.acquire(timeout=timeout)
+        try:
+            yield
+        except BaseException as e:
+            if is_rate_limited(e):
+                self._record("rate_limited")
+            self._finish(lease_id, self._outcome(e))
+            raise
+        self._finish(lease_id, "ok")
+
+    @contextlib.asynccontextmanager
+    async def alease(self, timeout: Optional[float] = None):
+        """LLM 호출 한 건을 감싸는 임대 (asyncio)"""
+        lease_id = await self.aacquire(timeout=timeout)
+        try:
+            yield
+        except BaseException as e:
+            if is_rate_limited(e):
+                self._record("rate_limited")
+            await asyncio.to_thread(self._finish, lease_id, self._outcome(e))
+            raise
+        await asyncio.to_thread(self._finish, lease_id, "ok")
+
+    # 통계
+    def _record(self, field: str) -> None:
+        with self._stats_lock:
+            self._stats[field] += 1
+
+    def _record_acquired(self, waited: float) -> None:
+        with self._stats_lock:
+            self._stats["acquired"] += 1
+            if waited > 0.001:
+                self._stats["waited"] += 1
+            self._wait_seconds += waited
+
+    def state(self) -> Dict[str, float]:
+        """
+        공유 한도와 활성 임대 수 (모든 프로세스 합계).
+        /metrics 수집마다 호출되므로 쓰기 잠금(BEGIN IMMEDIATE) 없이 읽기 트랜잭션으로 읽음
+        (WAL 모드에서는 읽기가 허가 발급 트랜잭션과 서로 막지 않음)
+        """
+        now = time.time()
+        conn = self._connection()
+        conn.execute("BEGIN DEFERRED")
+        try:
+            row = conn.execute(
+                "SELECT rate, concurrency FROM governor WHERE key = ?", (self.key,)
+            ).fetchone()
+            (active,) = conn.execute(
+                "SELECT COUNT(*) FROM leases WHERE key = ? AND expires_at >= ?", (self.key, now)
+            ).fetchone()
+        finally:
+            conn.execute("COMMIT")
+        # 아직 아무도 허가를 받지 않았으면 초기 한도
+        rate, concurrency = row if row is not None else (self.initial_rate, self.initial_concurrency)
+        return {"rate": rate, "concurrency": concurrency, "active_leases": active}
+
+    def snapshot(self) -> Dict[str, float]:
+        """이 프로세스의 누적 통계"""
+        with self._stats_lock:
+            return {**self._stats, "wait_seconds": self._wait_seconds}
@@ -0,0 +1,188 @@
+import logging
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .clause import Clause
+from .metrics import REGISTRY, timed
+
+logger = logging.getLogger(__name__)
+
+SCHEDULED_CLAUSES = REGISTRY.counter(
+    "contract_clause_schedule_total", "위험도 순 조항 분석 결과 (analyzed/deferred)"
+)
+FIRST_VIOLATION_SECONDS = REGISTRY.histogram(
+    "contract_first_violation_seconds", "조항 분석 시작부터 첫 위반 판정까지 걸린 시간(초)"
+)
+
+
+class RiskScore:
+    __slots__ = ("score", "similarity", "keyword_hits")
+
+    def __init__(self, score: float, similarity: float, keyword_hits: int):
+        self.score = score
+        self.similarity = similarity
+        self.keyword_hits = keyword_hits
+
+    def to_dict(self) -> Dict:
+        return {
+            "score": round(self.score, 4),
+            "similarity": round(self.similarity, 4),
+            "keyword_hits": self.keyword_hits,
+        }
+
+
+class ClauseSchedule:
+    """
+    위험도 순으로 정렬한 분석 대상 조항과 요청 전체 마감 시간.
+    마감이 지나면 아직 시작하지 않은 조항(뒤쪽 = 위험도 낮은 조항)은 분석하지 않고 미룹니다.
+    """
+
+    def __init__(
+        self,
+        ordered: List[Clause],
+        scores: Optional[Dict[int, RiskScore]] = None,
+        deadline: Optional[float] = None,
+        skip_below: float = 0.0,
+    ):
+        """
+        Args:
+            ordered: 분석 순서대로 정렬된 조항
+            scores: 조항 id별 위험도 (점수 계산을 하지 않았으면 비어 있음)
+            deadline: 조항 분석 전체 마감 시간(초), None이면 제한 없음
+            skip_below: 마감이 있을 때 이 점수 미만 조항은 LLM으로 보내지 않음
+        """
+        self.ordered = ordered
+        self.scores = scores or {}
+        self.deadline = deadline
+        self.skip_below = skip_below
+        self._first_violation = False
+        self.start()
+
+    def start(self) -> None:
+        """마감 시간 기준 시각 (수락 제어 대기가 끝나고 조항 분석을 시작할 때 다시 호출)"""
+        self.started = time.monotonic()
+        self._expires_at = self.started + self.deadline if self.deadline is not None else None
+
+    def __len__(self) -> int:
+        return len(self.ordered)
+
+    def risk(self, clause: Clause) -> Optional[RiskScore]:
+        return self.scores.get(clause.id)
+
+    def remaining(self) -> Optional[float]:
+        if self._expires_at is None:
+            return None
+        return self._expires_at - time.monotonic()
+
+    def should_defer(self, clause: Clause) -> bool:
+        """마감이 지났거나 (마감이 있을 때) 위험도가 skip_below 미만이면 분석하지 않음"""
+        remaining = self.remaining()
+        if remaining is None:
+            return False
+        if remaining <= 0:
+            return True
+        risk = self.scores.get(clause.id)
+        return risk is not None and risk.score < self.skip_below
+
+    def clause_budget(self, clause_deadline: Optional[float]) -> Optional[float]:
+        """조항별 LLM 마감 시간을 요청 전체 남은 시간으로 제한"""
+        remaining = self.remaining()
+        if remaining is None:
+            return clause_deadline
+        remaining = max(remaining, 0.001)
+        return remaining if clause_deadline is None else min(clause_deadline, remaining)
+
+    def record(self, deferred: bool, violation: bool = False) -> None:
+        SCHEDULED_CLAUSES.inc(outcome="deferred" if deferred else "analyzed")
+        if violation and not self._first_violation:
+            self._first_violation = True
+            FIRST_VIOLATION_SECONDS.observe(time.monotonic() - self.started)
+
+
+class RiskScorer:
+    """
+    LLM 호출 전에 조항별 위반 가능성을 싸게 추정합니다.
+    - 위반 사례 벡터 스토어(poc.csv)에서 가장 가까운 문서와의 코사인 유사도
+    - 부당특약에 자주 나오는 키워드 포함 수
+    두 값을 가중합한 점수가 높은 조항부터 LLM으로 보내 위반 조항을 먼저 응답할 수 있게 합니다.
+    """
+
+    def __init__(
+        self,
+        keywords: Sequence[str] = (),
+        similarity_weight: float = 0.7,
+        keyword_weight: float = 0.3,
+        keyword_saturation: int = 3,
+    ):
+        """
+        Args:
+            keywords: 위험 키워드 목록
+            similarity_weight/keyword_weight: 점수 가중치
+            keyword_saturation: 키워드 점수가 1이 되는 키워드 수
+        """
+        self.keywords = tuple(keywords)
+        self.similarity_weight = similarity_weight
+        self.keyword_weight = keyword_weight
+        self.keyword_saturation = max(1, keyword_saturation)
+
+    def keyword_hits(self, text: str) -> int:
+        compact = text.replace(" ", "")
+        return sum(1 for keyword in self.keywords if keyword.replace(" ", "") in compact)
+
+    def nearest_similarity(self, clauses: Sequence[Clause], vector_store) -> np.ndarray:
+        """조항별 위반 사례 최근접 코사인 유사도 (정규화된 임베딩의 L2 거리로 계산, PCA 인덱스는 복원한 벡터로 계산)"""
+        texts = [clause.text for clause in clauses]
+        embeddings = vector_store.embeddings
+        # 검색 단계와 같은 쿼리 캐시를 채워 두면 LLM 분석 시 조항을 다시 임베딩하지 않음
+        embed = getattr(embeddings, "embed_queries", None) or embeddings.embed_documents
+        vectors = np.asarray(embed(texts), dtype=np.float32)
+        distances, ids = vector_store.search_vectors(vectors, 1)
+        if not getattr(vector_store, "reduced", False):
+            # faiss L2 거리는 제곱 거리: 단위 벡터에서 cos = 1 - d^2 / 2
+            return np.clip(1.0 - distances[:, 0] / 2.0, 0.0, 1.0)
+
+        # PCA 인덱스의 거리는 축소 공간(평균을 뺀 좌표)의 거리라 위 식이 맞지 않으므로
+        # 조항과 최근접 문서 벡터를 같은 PCA 변환으로 복원한 뒤 코사인을 직접 계산
+        try:
+            queries, stored = vector_store.reconstruct_pairs(vectors, ids[:, 0])
+        except ValueError as e:
+            logger.warning(f"PCA 인덱스 벡터를 복원할 수 없어 키워드 점수만 사용합니다: {str(e)}")
+            return np.zeros(len(texts), dtype=np.float32)
+        norms = np.linalg.norm(queries, axis=1) * np.linalg.norm(stored, axis=1)
+        cosine = np.einsum("ij,ij->i", queries, stored) / np.maximum(norms, 1e-12)
+        return np.clip(cosine, 0.0, 1.0)
+
+    def score(self, clauses: Sequence[Clause], vector_store) -> Dict[int, RiskScore]:
+        if not clauses:
+            return {}
+        with timed("risk_score"):
+            similarities = self.nearest_similarity(clauses, vector_store)
+            scores = {}
+            for clause, similarity in zip(clauses, similarities):
+                hits = self.keyword_hits(clause.text)
+                keyword_score = min(1.0, hits / self.keyword_saturation)
+                scores[clause.id] = RiskScore(
+                    self.similarity_weight * float(similarity)
+                    + self.keyword_weight * keyword_score,
+                    float(similarity),
+                    hits,
+                )
+        return scores
+
+    def schedule(
+        self,
+        clauses: Sequence[Clause],
+        vector_store,
+        deadline: Optional[float] = None,
+        skip_below: float = 0.0,
+    ) -> ClauseSchedule:
+        """위험도 내림차순(같으면 문서 순) 분석 순서. 점수 계산 실패 시 문서 순서 사용"""
+        try:
+            scores = self.score(clauses, vector_store)
+        except Exception as e:
+            logger.error(f"조항 위험도 계산 중 오류, 문서 순서로 분석합니다: {str(e)}")
+            return ClauseSchedule(list(clauses), deadline=deadline)
+        ordered = sorted(clauses, key=lambda c: (-scores[c.id].score, c.id))
+        return ClauseSchedule(ordered, scores, deadline=deadline, skip_below=skip_below)
@@ -0,0 +1,367 @@
+import fcntl
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FORMAT_VERSION = 1
+VERSIONED_STORE_DIR = "versioned"  # vector_stores/ 아래 버전 스토어 루트
+_SAFE_NAME_RE = re.compile(r"^[A-Za-z0-9_.-]{1,128}$")
+
+#######
+# 내용 주소 기반(content-addressed) 버전 관리 벡터 스토어
+#
+# vector_stores/versioned/
+# ├── segments/
+# │   ├── docs/ab/ab12...json      (문서 묶음, 내용 해시)
+# │   └── vectors/cd/cd34...npy    (임베딩 모델 + 문서 묶음 해시, float32 행렬)
+# ├── manifests/<name>/<version>.json   (버전별 세그먼트 목록과 메타데이터)
+# ├── refs/<name>                      (활성 버전 ID)
+# └── .lock                            (쓰기/GC 배타 잠금)
+#
+# 문서를 내용 기준으로 나눠 저장하므로 CSV가 일부만 바뀌면 바뀐 세그먼트만 새로 임베딩/저장되고
+# 나머지는 이전 버전과 공유합니다.
+#########
+
+
+def _atomic_write(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def _row_hash(doc: Document) -> int:
+    return int.from_bytes(
+        hashlib.blake2b(doc.page_content.encode("utf-8"), digest_size=8).digest(), "big"
+    )
+
+
+def chunk_documents(
+    documents: Sequence[Document], target_size: int = 64, min_size: int = 16, max_size: int = 256
+) -> List[List[Document]]:
+    """
+    내용 기반 분할(content-defined chunking): 행 내용 해시로 경계를 정하므로
+    중간에 행이 추가/삭제되어도 그 주변 세그먼트만 바뀝니다.
+    """
+    chunks: List[List[Document]] = []
+    current: List[Document] = []
+    for doc in documents:
+        current.append(doc)
+        at_boundary = _row_hash(doc) % target_size == 0 and len(current) >= min_size
+        if at_boundary or len(current) >= max_size:
+            chunks.append(current)
+            current = []
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _docs_payload(docs: Sequence[Document]) -> bytes:
+    # 행 번호(row)는 위치에 따라 바뀌므로 해시 대상에서 제외하고 로드 시 다시 매김
+    return json.dumps(
+        [
+            {
+                "page_content": doc.page_content,
+                "metadata": {k: v for k, v in doc.metadata.items() if k != "row"},
+            }
+            for doc in docs
+        ],
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def embedding_fingerprint(embedding: Dict[str, Any]) -> str:
+    """같은 문서라도 임베딩 설정이 다르면 벡터 세그먼트를 공유하지 않도록 하는 키"""
+    keys = ("model_type", "embedding_model", "embedding_dimensions", "dimension_reduction")
+    return json.dumps({k: embedding.get(k) for k in keys}, sort_keys=True)
+
+
+class SegmentStore:
+    """세그먼트/매니페스트/활성 버전 포인터를 관리합니다."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    # 경로
+    def _segment_path(self, kind: str, digest: str, ext: str) -> str:
+        return os.path.join(self.root, "segments", kind, digest[:2], f"{digest}.{ext}")
+
+    def _manifest_dir(self, name: str) -> str:
+        return os.path.join(self.root, "manifests", self.validate_name(name))
+
+    def _ref_path(self, name: str) -> str:
+        return os.path.join(self.root, "refs", self.validate_name(name))
+
+    @contextmanager
+    def lock(self) -> Iterator[None]:
+        """
+        루트 전체에 대한 배타 잠금 (다른 프로세스의 write_version/activate/gc와 직렬화).
+        write_version은 세그먼트 확인과 매니페스트/ref 쓰기만 잠금 안에서 하므로,
+        GC가 새 버전이 참조하는 세그먼트를 매니페스트가 써지기 전에 지우지 않음
+        """
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, ".lock"), "a") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    @staticmethod
+    def validate_name(name: str) -> str:
+        if not _SAFE_NAME_RE.match(name or ""):
+            raise ValueError(f"잘못된 이름입니다: {name}")
+        return name
+
+    # 쓰기
+    def write_version(
+        self,
+        name: str,
+        documents: Sequence[Document],
+        embed_fn,
+        embedding: Dict[str, Any],
+        index_options: Optional[Dict[str, Any]] = None,
+        activate: bool = True,
+        chunk_options: Optional[Dict[str, int]] = None,
+    ) -> Dict[str, Any]:
+        """
+        문서를 세그먼트로 저장하고 새 버전 매니페스트를 만듭니다.
+        이미 있는 세그먼트는 다시 쓰지 않고, 벡터 세그먼트가 있으면 임베딩도 생략합니다.
+        Args:
+            embed_fn: 텍스트 리스트 -> 벡터 리스트 (Embedder.embed_documents)
+            embedding: 임베딩 설정 (model_type, embedding_model, embedding_dimensions, dimension_reduction)
+            index_options: 로드 시 인덱스에 적용할 옵션 (pca_dimensions, quantization)
+        """
+        fingerprint = embedding_fingerprint(embedding)
+        chunks = chunk_documents(documents, **(chunk_options or {}))
+        stats = {"segments": 0, "reused_docs": 0, "reused_vectors": 0, "embedded_rows": 0}
+
+        # 임베딩은 잠금 밖에서 수행 (세그먼트는 내용 주소 + 원자적 쓰기라 동시에 써도 안전)
+        segments = [self._write_segment(chunk, fingerprint, embed_fn, stats) for chunk in chunks]
+        stats["segments"] = len(segments)
+
+        with self.lock():
+            # 잠금을 잡기 전에 GC가 (아직 매니페스트가 참조하지 않던) 세그먼트를 지웠을 수 있으므로 다시 확인
+            for chunk in chunks:
+                self._write_segment(chunk, fingerprint, embed_fn)
+
+            created_at = datetime.now()
+            content_digest = hashlib.sha256(
+                json.dumps([s["vectors"] for s in segments]).encode("utf-8")
+            ).hexdigest()
+            version = f"{created_at.strftime('%Y%m%d_%H%M%S')}_{content_digest[:8]}"
+            manifest = {
+                "format_version": MANIFEST_FORMAT_VERSION,
+                "name": name,
+                "version": version,
+                # 같은 초에 만든 버전도 생성 순서대로 정렬하기 위한 이름별 일련번호
+                "sequence": self._next_sequence(name),
+                "created_at": created_at.isoformat(),
+                "document_count": len(documents),
+                **embedding,
+                "index_options": index_options or {},
+                "segments": segments,
+            }
+            _atomic_write(
+                os.path.join(self._manifest_dir(name), f"{version}.json"),
+                json.dumps(manifest, ensure_ascii=False, indent=2).encode("utf-8"),
+            )
+            logger.info(
+                f"버전 저장 완료: {name}@{version} (세그먼트 {stats['segments']}개, "
+                f"재사용 벡터 {stats['reused_vectors']}개, 새로 임베딩한 행 {stats['embedded_rows']}개)"
+            )
+            if activate:
+                self._activate(name, version)
+        manifest["build_stats"] = stats
+        return manifest
+
+    def _write_segment(
+        self,
+        chunk: Sequence[Document],
+        fingerprint: str,
+        embed_fn,
+        stats: Optional[Dict[str, int]] = None,
+    ) -> Dict[str, Any]:
+        """문서/벡터 세그먼트 중 없는 것만 저장하고 매니페스트 항목 반환"""
+        payload = _docs_payload(chunk)
+        docs_digest = hashlib.sha256(payload).hexdigest()
+        docs_path = self._segment_path("docs", docs_digest, "json")
+        if os.path.exists(docs_path):
+            if stats is not None:
+                stats["reused_docs"] += 1
+        else:
+            _atomic_write(docs_path, payload)
+
+        vectors_digest = hashlib.sha256((fingerprint + docs_digest).encode("utf-8")).hexdigest()
+        vectors_path = self._segment_path("vectors", vectors_digest, "npy")
+        if os.path.exists(vectors_path):
+            if stats is not None:
+                stats["reused_vectors"] += 1
+        else:
+            vectors = np.asarray(embed_fn([doc.page_content for doc in chunk]), dtype=np.float32)
+            buffer = io.BytesIO()
+            np.save(buffer, vectors)
+            _atomic_write(vectors_path, buffer.getvalue())
+            if stats is not None:
+                stats["embedded_rows"] += len(chunk)
+
+        return {"docs": docs_digest, "vectors": vectors_digest, "count": len(chunk)}
+
+    def _next_sequence(self, name: str) -> int:
+        manifests = self._read_manifests(name)
+        return max((m.get("sequence", 0) for m in manifests.values()), default=0) + 1
+
+    def activate(self, name: str, version: str) -> None:
+        """활성 버전 포인터 변경 (원자적 교체)"""
+        with self.lock():
+            self._activate(name, version)
+
+    def _activate(self, name: str, version: str) -> None:
+        if version not in self.list_versions(name):
+            raise ValueError(f"버전을 찾을 수 없습니다: {name}@{version}")
+        _atomic_write(self._ref_path(name), version.encode("utf-8"))
+        logger.info(f"활성 버전 변경: {name}@{version}")
+
+    # 읽기
+    def names(self) -> List[str]:
+        refs_dir = os.path.join(self.root, "refs")
+        if not os.path.isdir(refs_dir):
+            return []
+        return sorted(n for n in os.listdir(refs_dir) if _SAFE_NAME_RE.match(n))
+
+    def active_version(self, name: str) -> Optional[str]:
+        path = self._ref_path(name)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read().strip()
+
+    def list_versions(self, name: str) -> List[str]:
+        """버전 ID 목록 (오래된 것부터, 매니페스트의 sequence/created_at 순)"""
+        manifests = self._read_manifests(name)
+        return sorted(
+            manifests,
+            key=lambda v: (manifests[v].get("sequence", 0), manifests[v].get("created_at", ""), v),
+        )
+
+    def _read_manifests(self, name: str) -> Dict[str, Dict[str, Any]]:
+        manifest_dir = self._manifest_dir(name)
+        if not os.path.isdir(manifest_dir):
+            return {}
+        manifests = {}
+        for filename in os.listdir(manifest_dir):
+            if not filename.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(manifest_dir, filename), "r", encoding="utf-8") as f:
+                    manifests[filename[: -len(".json")]] = json.load(f)
+            except FileNotFoundError:
+                continue  # 목록을 읽는 사이 GC가 지운 버전
+        return manifests
+
+    def read_manifest(self, name: str, version: Optional[str] = None) -> Dict[str, Any]:
+        version = version or self.active_version(name)
+        if not version:
+            raise ValueError(f"활성 버전이 없습니다: {name}")
+        path = os.path.join(self._manifest_dir(name), f"{self.validate_name(version)}.json")
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def load_version(
+        self, name: str, version: Optional[str] = None
+    ) -> Tuple[List[Document], np.ndarray, Dict[str, Any]]:
+        """매니페스트의 세그먼트를 읽어 (문서, 벡터 행렬, 매니페스트) 반환"""
+        manifest = self.read_manifest(name, version)
+        documents: List[Document] = []
+        vector_parts = []
+        for segment in manifest["segments"]:
+            with open(self._segment_path("docs", segment["docs"], "json"), "rb") as f:
+                for item in json.loads(f.read()):
+                    metadata = dict(item["metadata"], row=len(documents))
+                    documents.append(Document(page_content=item["page_content"], metadata=metadata))
+            vector_parts.append(np.load(self._segment_path("vectors", segment["vectors"], "npy")))
+        vectors = (
+            np.concatenate(vector_parts) if vector_parts else np.zeros((0, 0), dtype=np.float32)
+        )
+        return documents, vectors, manifest
+
+    # 정리
+    def gc(self, keep: int = 3, dry_run: bool = False) -> Dict[str, int]:
+        """
+        이름별로 활성 버전과 최근 keep개 버전만 남기고 오래된 매니페스트를 지운 뒤,
+        남은 매니페스트 어디에서도 참조하지 않는 세그먼트를 삭제합니다.
+        """
+        with self.lock():
+            return self._gc(keep, dry_run)
+
+    def _gc(self, keep: int, dry_run: bool) -> Dict[str, int]:
+        referenced: Set[str] = set()
+        removed_manifests = 0
+        manifests_root = os.path.join(self.root, "manifests")
+        names = sorted(os.listdir(manifests_root)) if os.path.isdir(manifests_root) else []
+        for name in names:
+            versions = self.list_versions(name)
+            active = self.active_version(name)
+            kept = set(versions[-keep:] if keep > 0 else []) | ({active} if active else set())
+            for version in versions:
+                if version in kept:
+                    manifest = self.read_manifest(name, version)
+                    for segment in manifest["segments"]:
+                        referenced.add(segment["docs"])
+                        referenced.add(segment["vectors"])
+                    continue
+                removed_manifests += 1
+                if not dry_run:
+                    os.unlink(os.path.join(self._manifest_dir(name), f"{version}.json"))
+
+        removed_segments, freed_bytes = 0, 0
+        for kind in ("docs", "vectors"):
+            for path in self._iter_segments(kind):
+                digest = os.path.basename(path).split(".", 1)[0]
+                if digest in referenced:
+                    continue
+                removed_segments += 1
+                freed_bytes += os.path.getsize(path)
+                if not dry_run:
+                    os.unlink(path)
+
+        logger.info(
+            f"GC {'(dry run) ' if dry_run else ''}완료: 매니페스트 {removed_manifests}개, "
+            f"세그먼트 {removed_segments}개 삭제 ({freed_bytes / 1024 / 1024:.1f}MB)"
+        )
+        return {
+            "removed_manifests": removed_manifests,
+            "removed_segments": removed_segments,
+            "freed_bytes": freed_bytes,
+        }
+
+    def _iter_segments(self, kind: str) -> Iterable[str]:
+        base = os.path.join(self.root, "segments", kind)
+        if not os.path.isdir(base):
+            return
+        for prefix in os.listdir(base):
+            prefix_dir = os.path.join(base, prefix)
+            for name in os.listdir(prefix_dir):
+                if not name.startswith(".tmp-"):
+                    yield os.path.join(prefix_dir, name)
+
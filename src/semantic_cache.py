@@ -0,0 +1,195 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Optional, Sequence
+
+import faiss
+import numpy as np
+
+from .csv_ingest import document_text
+from .metrics import record_cache
+
+logger = logging.getLogger(__name__)
+
+
+def context_ids(docs: Sequence) -> FrozenSet[str]:
+    """검색된 문서의 내용 해시 집합 (스토어를 다시 만들어도 같은 문서면 같은 ID)"""
+    # 메타데이터로 저장한 컬럼도 프롬프트에 들어가므로 함께 해시
+    return frozenset(
+        hashlib.blake2b(document_text(doc).encode("utf-8"), digest_size=8).hexdigest()
+        for doc in docs
+    )
+
+
+class CacheEntry:
+    __slots__ = ("question", "context_ids", "verdict")
+
+    def __init__(self, question: str, context_ids: FrozenSet[str], verdict: Dict):
+        self.question = question
+        self.context_ids = context_ids
+        self.verdict = verdict
+
+
+class SemanticCacheStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.context_mismatches = 0  # 유사 조항은 찾았지만 검색 문서가 달라 사용하지 않은 경우
+        self.evictions = 0
+        self.invalidations = 0
+
+    def record(self, field: str) -> None:
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "context_mismatches": self.context_mismatches,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+class SemanticVerdictCache:
+    """
+    이전에 분석한 조항 임베딩과 판정을 보관하는 의미 기반 캐시.
+    번호/띄어쓰기/현장명만 다른 조항은 정확 일치 캐시에 걸리지 않으므로
+    코사인 유사도가 threshold 이상이고 검색된 컨텍스트 문서가 같을 때 이전 판정을 재사용합니다.
+
+    - 임베딩 공간이 스토어(모델/차원)마다 다르므로 벡터 스토어마다 하나씩 만듭니다.
+    - max_entries를 넘으면 가장 오래 사용하지 않은 항목부터 제거(LRU)합니다.
+    - 프롬프트/모델 지문(fingerprint)이 바뀌면 전체를 비웁니다.
+    """
+
+    def __init__(
+        self,
+        embeddings,
+        threshold: float = 0.97,
+        max_entries: int = 10000,
+        candidates: int = 4,
+        min_context_overlap: float = 1.0,
+    ):
+        """
+        Args:
+            embeddings: 조항 임베딩에 사용할 Embedder (스토어의 쿼리 임베딩과 같은 것)
+            threshold: 캐시 판정을 사용할 최소 코사인 유사도
+            max_entries: 최대 항목 수 (초과 시 LRU 제거)
+            candidates: 유사도 상위 몇 개까지 컨텍스트 일치 여부를 확인할지
+            min_context_overlap: 검색 문서 ID 집합의 최소 자카드 유사도 (1.0이면 완전 일치)
+        """
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.max_entries = max(1, max_entries)
+        self.candidates = max(1, candidates)
+        self.min_context_overlap = min_context_overlap
+        self.stats = SemanticCacheStats()
+
+        self._lock = threading.Lock()
+        self._index: Optional[faiss.IndexIDMap2] = None
+        self._entries: "OrderedDict[int, CacheEntry]" = OrderedDict()
+        self._next_id = 0
+        self._fingerprint: Optional[str] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def embed(self, question: str) -> np.ndarray:
+        vector = np.asarray([self.embeddings.embed_query(question)], dtype=np.float32)
+        faiss.normalize_L2(vector)
+        return vector
+
+    async def aembed(self, question: str) -> np.ndarray:
+        vector = np.asarray([await self.embeddings.aembed_query(question)], dtype=np.float32)
+        faiss.normalize_L2(vector)
+        return vector
+
+    def _check_fingerprint(self, fingerprint: str) -> None:
+        # 호출 측에서 self._lock을 잡은 상태
+        if self._fingerprint == fingerprint:
+            return
+        if self._entries:
+            logger.info(f"프롬프트/모델 변경으로 의미 캐시 초기화 ({len(self._entries)}개 항목)")
+            self.stats.record("invalidations")
+        self._reset()
+        self._fingerprint = fingerprint
+
+    def _reset(self) -> None:
+        self._index = None
+        self._entries.clear()
+
+    def lookup(
+        self, vector: np.ndarray, docs_ids: FrozenSet[str], fingerprint: str
+    ) -> Optional[Dict]:
+        """유사도/컨텍스트 조건을 만족하는 이전 판정의 복사본 (없으면 None)"""
+        with self._lock:
+            self._check_fingerprint(fingerprint)
+            verdict = None
+            if self._index is not None and self._entries:
+                scores, ids = self._index.search(vector, min(self.candidates, len(self._entries)))
+                mismatched = False
+                for score, entry_id in zip(scores[0], ids[0]):
+                    if entry_id == -1 or score < self.threshold:
+                        break
+                    entry = self._entries[int(entry_id)]
+                    if _overlap(entry.context_ids, docs_ids) < self.min_context_overlap:
+                        mismatched = True
+                        continue
+                    self._entries.move_to_end(int(entry_id))
+                    verdict = {
+                        **entry.verdict,
+                        "cached": True,
+                        "cache_similarity": round(float(score), 4),
+                    }
+                    break
+                if verdict is None and mismatched:
+                    self.stats.record("context_mismatches")
+
+        self.stats.record("hits" if verdict is not None else "misses")
+        record_cache("semantic_verdict", verdict is not None)
+        return verdict
+
+    def add(
+        self,
+        question: str,
+        vector: np.ndarray,
+        docs_ids: FrozenSet[str],
+        verdict: Dict,
+        fingerprint: str,
+    ) -> None:
+        """정상 판정만 저장 (오류 응답은 저장하지 않음)"""
+        if not isinstance(verdict, dict) or "error" in verdict or verdict.get("cached"):
+            return
+        with self._lock:
+            self._check_fingerprint(fingerprint)
+            if self._index is None:
+                self._index = faiss.IndexIDMap2(faiss.IndexFlatIP(vector.shape[1]))
+
+            while len(self._entries) >= self.max_entries:
+                evicted_id, _ = self._entries.popitem(last=False)
+                self._index.remove_ids(np.asarray([evicted_id], dtype=np.int64))
+                self.stats.record("evictions")
+
+            entry_id = self._next_id
+            self._next_id += 1
+            self._index.add_with_ids(vector, np.asarray([entry_id], dtype=np.int64))
+            self._entries[entry_id] = CacheEntry(question, docs_ids, dict(verdict))
+
+    def invalidate(self) -> None:
+        """전체 항목 삭제 (벡터 스토어 교체 등)"""
+        with self._lock:
+            if self._entries:
+                self.stats.record("invalidations")
+            self._reset()
+
+
+def _overlap(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
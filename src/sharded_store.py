@@ -0,0 +1,424 @@
+import atexit
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import subprocess
+import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import faiss
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+
+from .metrics import timed
+from .vector_store import VectorStore, round_trip
+
+logger = logging.getLogger(__name__)
+
+SHARD_MANIFEST = "shards.json"
+SHARD_WORKER_MODES = ("thread", "process")
+
+#######
+# 샤딩된 벡터 스토어 (faiss_store/ 아래에 shards.json + shard_00/, shard_01/ ...)
+#
+# - 문서를 순서대로 돌아가며(round-robin) 샤드에 배정하므로 샤드 s의 i번째 문서는
+#   전체 순서 i * 샤드 수 + s 번째 문서이고, 이 값을 전역 ID로 사용
+# - 검색은 모든 샤드에 같은 쿼리를 보내고(scatter) 샤드별 top-k를 거리 순으로 합침(gather)
+# - thread: API 프로세스 안에서 스레드로 검색 (FAISS 검색은 GIL을 놓고 실행)
+#   process: 샤드마다 워커 프로세스가 인덱스를 들고 검색 (문서는 API 프로세스에만 있고 벡터/ID만 주고받음)
+#########
+
+
+def _shard_worker(index_path: str, conn) -> None:
+    """샤드 인덱스를 로드하고 (요청 ID, 쿼리 벡터, k) 요청에 (요청 ID, 거리, ID)로 응답"""
+    # 샤드 프로세스끼리 코어를 나눠 쓰므로 프로세스 안에서는 OpenMP 스레드를 늘리지 않음
+    faiss.omp_set_num_threads(1)
+    index = faiss.read_index(index_path)
+    conn.send(("ready", index.ntotal))
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+        request_id, vectors, k = message
+        try:
+            distances, ids = index.search(vectors, k)
+            conn.send((request_id, distances, ids))
+        except Exception as e:
+            conn.send((request_id, e, None))
+    conn.close()
+
+
+def _worker_main(fd: int, index_path: str) -> None:
+    """워커 프로세스 진입점 (부모에게 물려받은 파이프 fd로 통신)"""
+    from multiprocessing.connection import Connection
+
+    _shard_worker(index_path, Connection(fd))
+
+
+class _ShardProcess:
+    """
+    샤드 하나를 맡는 워커 프로세스. 동시에 여러 요청을 보낼 수 있도록 요청 ID로 응답을 구분.
+
+    multiprocessing의 spawn/forkserver는 워커에서 부모의 메인 스크립트(api/main.py 등)를
+    __mp_main__으로 다시 실행하므로, 이 모듈만 import하는 별도 인터프리터로 워커를 시작합니다.
+    """
+
+    def __init__(self, index_path: str, name: str):
+        self._send_lock = threading.Lock()
+        self._closed = False  # 워커가 종료되면 True (_send_lock 안에서만 변경)
+        self._conn, child_conn = multiprocessing.Pipe()
+        fd = child_conn.fileno()
+        # 워커에서 이 모듈을 같은 이름으로 import할 수 있도록 패키지 상위 디렉토리를 경로에 추가
+        package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [package_root, env.get("PYTHONPATH")]))
+        self.process = subprocess.Popen(
+            [
+                sys.executable,
+                "-c",
+                f"import sys; from {__name__} import _worker_main; "
+                "_worker_main(int(sys.argv[1]), sys.argv[2])",
+                str(fd),
+                index_path,
+            ],
+            pass_fds=(fd,),
+            stdin=subprocess.DEVNULL,
+            env=env,
+        )
+        child_conn.close()
+
+        try:
+            status, self.ntotal = self._conn.recv()
+        except EOFError:
+            status = None
+        if status != "ready":
+            self.close()
+            raise RuntimeError(f"샤드 워커 시작 실패: {name}")
+
+        self._pending: Dict[int, Future] = {}
+        self._ids = itertools.count()
+        self._reader = threading.Thread(target=self._read, name=f"{name}-reader", daemon=True)
+        self._reader.start()
+
+    def submit(self, vectors: np.ndarray, k: int) -> Future:
+        future: Future = Future()
+        with self._send_lock:
+            # 종료된 워커에 등록한 요청은 응답할 곳이 없으므로 바로 실패 처리
+            if self._closed:
+                future.set_exception(RuntimeError("샤드 워커 프로세스가 종료되었습니다"))
+                return future
+            request_id = next(self._ids)
+            self._pending[request_id] = future
+            try:
+                self._conn.send((request_id, vectors, k))
+            except (OSError, ValueError) as e:
+                self._pending.pop(request_id, None)
+                future.set_exception(RuntimeError(f"샤드 워커에 요청을 보내지 못했습니다: {e}"))
+        return future
+
+    def _read(self) -> None:
+        while True:
+            try:
+                request_id, distances, ids = self._conn.recv()
+            except (EOFError, OSError):
+                break
+            future = self._pending.pop(request_id, None)
+            if future is None:
+                continue
+            if isinstance(distances, Exception):
+                future.set_exception(distances)
+            else:
+                future.set_result((distances, ids))
+        # 워커가 종료되면 이후 요청을 막고 대기 중인 요청을 모두 실패 처리
+        # (submit과 같은 잠금 안에서 처리해야 그 사이에 등록된 요청이 남지 않음)
+        with self._send_lock:
+            self._closed = True
+            pending = list(self._pending.values())
+            self._pending.clear()
+        error = RuntimeError("샤드 워커 프로세스가 종료되었습니다")
+        for future in pending:
+            future.set_exception(error)
+
+    def close(self) -> None:
+        try:
+            with self._send_lock:
+                self._closed = True
+                self._conn.send(None)
+        except (OSError, ValueError):
+            pass
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.process.terminate()
+            self.process.wait()
+        self._conn.close()
+
+
+class ShardedVectorStore:
+    """여러 FAISS 샤드에 문서를 나눠 저장하고 검색 시 모든 샤드 결과를 합치는 벡터 스토어"""
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        num_shards: int = 4,
+        workers: str = "thread",
+        search_timeout: Optional[float] = 30.0,
+    ):
+        """
+        Args:
+            embeddings: 문서/쿼리 임베딩 (Embedder)
+            num_shards: 샤드 수 (load_local 시에는 저장된 샤드 수 사용)
+            workers: 검색 방식 (thread | process)
+            search_timeout: 샤드 하나의 검색 결과를 기다리는 최대 시간(초), None이면 무제한
+        """
+        if workers not in SHARD_WORKER_MODES:
+            raise ValueError(f"지원하지 않는 샤드 검색 방식입니다: {workers}")
+        self.embeddings = embeddings
+        self.num_shards = max(1, num_shards)
+        self.workers = workers
+        self.search_timeout = search_timeout
+        self.shards: List[VectorStore] = [VectorStore(embeddings) for _ in range(self.num_shards)]
+        self._processes: List[_ShardProcess] = []
+        self._reduced = False  # process 모드는 인덱스를 워커로 넘기므로 로드 시 PCA 여부를 기록
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._added = 0
+        logger.info(f"샤드 벡터 스토어 초기화 (샤드 {self.num_shards}개, {workers})")
+
+    @property
+    def store(self):
+        """단일 FAISS 스토어를 기대하는 경로(하이브리드 검색 등)와 구분하기 위해 None"""
+        return None
+
+    @property
+    def document_count(self) -> int:
+        return self._added
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.num_shards, thread_name_prefix="vector-shard"
+            )
+        return self._pool
+
+    def add_documents(
+        self,
+        documents: List[Document],
+        vectors: Optional[np.ndarray] = None,
+        pca_dimensions: Optional[int] = None,
+        quantization: Optional[str] = None,
+    ) -> np.ndarray:
+        """
+        배치를 한 번에 임베딩한 뒤 round-robin으로 나눠 샤드별 인덱스에 병렬로 추가
+        (각 샤드는 처음 받은 문서로 PCA/양자화를 학습하므로 첫 배치는 pca_dimensions * 샤드 수 이상 필요)
+        """
+        if vectors is None:
+            vectors = np.asarray(
+                self.embeddings.embed_documents([doc.page_content for doc in documents]),
+                dtype=np.float32,
+            )
+        # 이전 배치에서 이어서 배정해야 전역 ID(i * 샤드 수 + s)가 전체 순서와 일치
+        assignment = (self._added + np.arange(len(documents))) % self.num_shards
+        tasks = []
+        for s, shard in enumerate(self.shards):
+            positions = np.flatnonzero(assignment == s)
+            if len(positions):
+                tasks.append((shard, [documents[i] for i in positions], vectors[positions]))
+
+        with timed("shard_build"):
+            futures = [
+                self._executor().submit(
+                    shard.add_documents,
+                    docs,
+                    vectors=shard_vectors,
+                    pca_dimensions=pca_dimensions,
+                    quantization=quantization,
+                )
+                for shard, docs, shard_vectors in tasks
+            ]
+            for future in futures:
+                future.result()
+        self._added += len(documents)
+        return vectors
+
+    def save_local(self, path: str) -> None:
+        """샤드별 faiss 저장소와 샤드 매니페스트 저장"""
+        if any(shard.store is None for shard in self.shards):
+            raise ValueError("문서가 없는 샤드가 있습니다. 샤드 수를 문서 수 이하로 지정하세요")
+        os.makedirs(path, exist_ok=True)
+        paths = [self._shard_path(path, s) for s in range(self.num_shards)]
+        list(self._executor().map(lambda args: args[0].save_local(args[1]), zip(self.shards, paths)))
+        with open(os.path.join(path, SHARD_MANIFEST), "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "shards": self.num_shards,
+                    "documents": self._added,
+                    "shard_documents": [shard.store.index.ntotal for shard in self.shards],
+                },
+                f,
+                indent=2,
+            )
+        logger.info(f"샤드 벡터 스토어 저장 완료: {path} (샤드 {self.num_shards}개)")
+
+    @staticmethod
+    def _shard_path(path: str, shard: int) -> str:
+        return os.path.join(path, f"shard_{shard:02d}")
+
+    @staticmethod
+    def is_sharded(path: str) -> bool:
+        return os.path.exists(os.path.join(path, SHARD_MANIFEST))
+
+    def load_local(self, path: str) -> None:
+        """샤드를 병렬로 로드하고, process 모드면 샤드마다 워커 프로세스를 시작"""
+        with open(os.path.join(path, SHARD_MANIFEST), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        self.close()
+        self.num_shards = manifest["shards"]
+        self._added = manifest["documents"]
+        self.shards = [VectorStore(self.embeddings) for _ in range(self.num_shards)]
+        paths = [self._shard_path(path, s) for s in range(self.num_shards)]
+        list(self._executor().map(lambda args: args[0].load_local(args[1]), zip(self.shards, paths)))
+
+        if self.workers == "process":
+            self._reduced = any(shard.reduced for shard in self.shards)
+            self._processes = [
+                _ShardProcess(os.path.join(p, "index.faiss"), name=f"vector-shard-{s}")
+                for s, p in enumerate(paths)
+            ]
+            # 검색은 워커가 하므로 API 프로세스에는 문서(docstore)만 남기고 인덱스 메모리는 해제
+            for shard in self.shards:
+                shard.store.index = None
+            atexit.register(self.close)
+        logger.info(
+            f"샤드 벡터 스토어 로드 완료: {path} (샤드 {self.num_shards}개, 문서 {self._added}개, "
+            f"{self.workers})"
+        )
+
+    def _scatter(self, vectors: np.ndarray, k: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+        if self._processes:
+            futures = [worker.submit(vectors, k) for worker in self._processes]
+        else:
+            futures = [
+                self._executor().submit(shard.store.index.search, vectors, k)
+                for shard in self.shards
+            ]
+        # 응답이 오지 않는 샤드 때문에 검색 요청이 무한정 멈추지 않도록 제한 (TimeoutError)
+        return [future.result(timeout=self.search_timeout) for future in futures]
+
+    def search_vectors(self, vectors: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        faiss index.search와 같은 (거리, 전역 ID) 반환.
+        샤드별 top-k를 모아 거리 순으로 다시 k개를 고르므로 단일 인덱스(Flat) 검색과 결과가 같습니다.
+        """
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        with timed("shard_search"):
+            results = self._scatter(vectors, k)
+
+        n = self.num_shards
+        distances = np.concatenate([d for d, _ in results], axis=1)
+        ids = np.concatenate(
+            [np.where(i >= 0, i * n + s, -1) for s, (_, i) in enumerate(results)], axis=1
+        )
+        distances = np.where(ids >= 0, distances, np.inf)
+        order = np.argsort(distances, axis=1, kind="stable")[:, :k]
+        return (
+            np.take_along_axis(distances, order, axis=1),
+            np.take_along_axis(ids, order, axis=1),
+        )
+
+    @property
+    def reduced(self) -> bool:
+        if self._processes:
+            return self._reduced
+        return any(shard.reduced for shard in self.shards)
+
+    def reconstruct_pairs(
+        self, vectors: np.ndarray, ids: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """VectorStore.reconstruct_pairs와 같음 (PCA는 샤드마다 따로 학습하므로 검색된 샤드의 변환을 사용)"""
+        if self._processes:
+            raise ValueError("process 모드에서는 인덱스가 워커에 있어 벡터를 복원할 수 없습니다")
+        n = self.num_shards
+        queries = np.zeros((len(ids), self.shards[0].store.index.d), dtype=np.float32)
+        stored = np.zeros_like(queries)
+        for row, global_id in enumerate(ids):
+            if global_id >= 0:
+                index = self.shards[global_id % n].store.index
+                queries[row] = round_trip(index, vectors[row : row + 1])[0]
+                stored[row] = index.reconstruct(int(global_id // n))
+        return queries, stored
+
+    def document(self, global_id: int) -> Optional[Document]:
+        shard = self.shards[global_id % self.num_shards].store
+        doc_id = shard.index_to_docstore_id.get(global_id // self.num_shards)
+        doc = shard.docstore.search(doc_id) if doc_id is not None else None
+        return doc if isinstance(doc, Document) else None
+
+    def similarity_search_with_score(self, query: str, k: int = 4) -> List[Tuple[Document, float]]:
+        vector = np.asarray([self.embeddings.embed_query(query)], dtype=np.float32)
+        distances, ids = self.search_vectors(vector, k)
+        results = []
+        for distance, global_id in zip(distances[0], ids[0]):
+            if global_id < 0:
+                continue
+            doc = self.document(int(global_id))
+            if doc is not None:
+                results.append((doc, float(distance)))
+        return results
+
+    def similarity_search(self, query: str, k: int = 4) -> List[Document]:
+        """유사도 검색 수행"""
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    def get_retriever(
+        self, search_kwargs: Optional[Dict] = None, hybrid: bool = False, **hybrid_kwargs
+    ) -> BaseRetriever:
+        """샤드 리트리버 반환 (어휘 색인은 단일 스토어에만 있으므로 벡터 검색만 사용)"""
+        if hybrid:
+            logger.info("샤드 벡터 스토어는 하이브리드 검색을 지원하지 않아 벡터 검색만 사용합니다")
+        return ShardedRetriever(store=self, k=(search_kwargs or {}).get("k", 4))
+
+    def load_lexical_index(self, path: str) -> bool:
+        return False
+
+    def close(self) -> None:
+        """워커 프로세스 종료"""
+        for worker in self._processes:
+            worker.close()
+        self._processes = []
+
+
+class ShardedRetriever(BaseRetriever):
+    """모든 샤드를 검색해 합친 top-k 문서를 반환하는 리트리버"""
+
+    store: Any  # ShardedVectorStore
+    k: int = 4
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return self.store.similarity_search(query, self.k)
+
+
+"""
+사용 방법
+생성:
+store = ShardedVectorStore(embedder, num_shards=4)
+for batch in CSVIngester().iter_batches("data/poc.csv"):
+    store.add_documents(batch)
+store.save_local("vector_stores/store_x/faiss_store")
+
+로드/검색 (샤드마다 워커 프로세스):
+store = ShardedVectorStore(embedder, workers="process")
+store.load_local("vector_stores/store_x/faiss_store")
+retriever = store.get_retriever(search_kwargs={"k": 4})
+"""
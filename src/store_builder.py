@@ -0,0 +1,628 @@
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .csv_ingest import CSVIngester
+from .embedder import Embedder
+from .lexical_index import LEXICAL_INDEX_FILE
+from .metrics import REGISTRY
+from .segment_store import SegmentStore
+from .sharded_store import ShardedVectorStore
+from .vector_store import VectorStore
+
+logger = logging.getLogger(__name__)
+
+BUILD_ROWS = REGISTRY.counter("vector_store_build_rows_total", "벡터 스토어 생성 시 임베딩한 문서 수")
+BUILD_JOBS = REGISTRY.counter("vector_store_build_jobs_total", "벡터 스토어 생성 작업 결과")
+BUILD_SECONDS = REGISTRY.histogram(
+    "vector_store_build_seconds", "벡터 스토어 생성 작업 소요 시간(초)"
+)
+
+#######
+# 벡터 스토어 생성 (scripts/create_vector_store.py, api/vector_store_api.py 공용)
+#
+# - VectorStoreCreator: CSV를 배치 단위로 읽어 임베딩하고 store 디렉토리(또는 버전 스토어)에 저장
+# - EmbedderPool: 임베딩 모델을 작업마다 다시 로드하지 않도록 프로세스에 상주
+# - StoreBuildService: 생성 작업을 백그라운드에서 실행 (진행률/취소, 같은 스토어는 한 번에 하나씩)
+#########
+
+
+class BuildCancelled(Exception):
+    """작업이 취소되어 생성을 중단함"""
+
+
+def resolve_reduction(
+    model_type: str, dimensions: Optional[int], reduction: Optional[str]
+) -> Optional[str]:
+    """차원 축소 방식 기본값 (openai는 api, huggingface는 truncate)"""
+    if dimensions and reduction is None:
+        return "api" if model_type == "openai" else "truncate"
+    return reduction
+
+
+def token_counter(embedder: Embedder) -> Optional[Callable[[List[str]], int]]:
+    """임베딩 모델 토크나이저 기준 토큰 수 계산 함수 (토크나이저를 찾지 못하면 None)"""
+    try:
+        if embedder.model_type == "huggingface":
+            tokenizer = getattr(getattr(embedder.embeddings, "_client", None), "tokenizer", None)
+            if tokenizer is None:
+                return None
+            return lambda texts: sum(
+                len(ids) for ids in tokenizer(texts, add_special_tokens=False)["input_ids"]
+            )
+        from .context_builder import get_encoding
+
+        encoding = get_encoding(embedder.model_name)
+        return lambda texts: sum(len(ids) for ids in encoding.encode_batch(texts))
+    except Exception as e:
+        logger.warning(f"토큰 수 계산을 사용할 수 없습니다: {str(e)}")
+        return None
+
+
+class BuildProgress:
+    """생성 진행 상황과 처리량 (rows/s, tokens/s)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.monotonic()
+        self.rows = 0  # 읽은 CSV 행 (중복/빈 행 포함)
+        self.documents = 0  # 임베딩한 문서
+        self.tokens: Optional[int] = 0
+        self.chars = 0
+        self.phase = "queued"
+        self.finished: Optional[float] = None
+
+    def set_phase(self, phase: str) -> None:
+        with self._lock:
+            # 처리량은 모델 로드/대기 시간을 빼고 임베딩 시작부터 계산
+            if phase == "embedding":
+                self.started = time.monotonic()
+            elif phase == "done":
+                self.finished = time.monotonic()
+            self.phase = phase
+
+    def add(self, rows: int, documents: int, chars: int, tokens: Optional[int]) -> None:
+        with self._lock:
+            self.rows = rows
+            self.documents += documents
+            self.chars += chars
+            if tokens is None or self.tokens is None:
+                self.tokens = None
+            else:
+                self.tokens += tokens
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            elapsed = (
+                max((self.finished or time.monotonic()) - self.started, 1e-9)
+                if self.phase not in ("queued", "loading_model")
+                else 0.0
+            )
+            return {
+                "phase": self.phase,
+                "rows": self.rows,
+                "documents": self.documents,
+                "tokens": self.tokens,
+                "chars": self.chars,
+                "elapsed_seconds": round(elapsed, 3),
+                "rows_per_second": round(self.documents / elapsed, 2) if elapsed else 0.0,
+                "tokens_per_second": (
+                    round(self.tokens / elapsed, 1) if elapsed and self.tokens is not None else None
+                ),
+            }
+
+
+class EmbedderPool:
+    """모델 설정별 Embedder를 재사용 (가장 오래 쓰지 않은 모델부터 max_models를 넘으면 해제)"""
+
+    def __init__(self, max_models: int = 2, snapshot_dir: Optional[str] = None):
+        self.max_models = max(1, max_models)
+        self.snapshot_dir = snapshot_dir
+        self._lock = threading.Lock()
+        self._embedders: "OrderedDict[Tuple, Embedder]" = OrderedDict()
+        self._loads = 0
+        self._hits = 0
+
+    def get(
+        self,
+        model_type: str,
+        model_name: str,
+        dimensions: Optional[int] = None,
+        reduction: Optional[str] = None,
+    ) -> Embedder:
+        """
+        pca는 인덱스에서 적용하므로 Embedder에는 api/truncate 축소만 전달
+        (같은 모델의 pca 작업과 축소 없는 작업은 같은 Embedder를 공유)
+        """
+        reduction = resolve_reduction(model_type, dimensions, reduction)
+        embed_reduction = reduction if reduction != "pca" else None
+        key = (model_type, model_name, dimensions if embed_reduction else None, embed_reduction)
+        # 모델 로드가 오래 걸리므로 로드 중에는 다른 작업도 기다림 (같은 모델을 두 번 로드하지 않음)
+        with self._lock:
+            embedder = self._embedders.get(key)
+            if embedder is not None:
+                self._embedders.move_to_end(key)
+                self._hits += 1
+                return embedder
+            logger.info(f"임베딩 모델 로드: {model_type}/{model_name}")
+            embedder = Embedder(
+                model_type=model_type,
+                model_name=model_name,
+                snapshot_dir=self.snapshot_dir,
+                dimensions=key[2],
+                reduction=embed_reduction,
+            )
+            self._loads += 1
+            self._embedders[key] = embedder
+            while len(self._embedders) > self.max_models:
+                evicted, _ = self._embedders.popitem(last=False)
+                logger.info(f"임베딩 모델 해제: {evicted[0]}/{evicted[1]}")
+            return embedder
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "resident": [f"{k[0]}/{k[1]}" for k in self._embedders],
+                "loads": self._loads,
+                "hits": self._hits,
+            }
+
+
+class VectorStoreCreator:
+    def __init__(
+        self,
+        csv_path,
+        output_dir: str,
+        model_type: str,
+        model_name: str,
+        dimensions: Optional[int] = None,
+        reduction: Optional[str] = None,
+        quantization: Optional[str] = None,
+        versioned_name: Optional[str] = None,
+        activate: bool = True,
+        ngram_sizes=(2, 3),
+        shards: int = 1,
+        ingester: Optional[CSVIngester] = None,
+        source_name: Optional[str] = None,
+        embedder: Optional[Embedder] = None,
+        progress: Optional[BuildProgress] = None,
+        cancel_event: Optional[threading.Event] = None,
+    ):
+        """
+        Args:
+            csv_path: CSV 파일 경로, bytes 또는 업로드 스트림
+            output_dir: store 디렉토리 (versioned_name을 지정하면 버전 스토어 루트)
+            ngram_sizes: 하이브리드 검색용 어휘 색인의 문자 n-gram 크기
+            shards: 2 이상이면 문서를 나눠 샤드별 인덱스를 병렬로 생성 (어휘 색인은 만들지 않음)
+            ingester: CSV 읽기 설정 (None이면 모든 컬럼 임베딩)
+            source_name: 스트림일 때 문서 메타데이터 source에 기록할 이름
+            embedder: 상주 Embedder (None이면 새로 로드)
+            progress: 진행 상황을 기록할 객체 (작업 조회용)
+            cancel_event: 설정되면 다음 배치 전에 BuildCancelled로 중단
+        """
+        self.csv_path = csv_path
+        self.source_name = source_name
+        self.output_dir = output_dir
+        self.model_type = model_type
+        self.model_name = model_name
+        # 차원 축소(api/truncate/pca)와 저장 정밀도(fp16/int8)
+        self.dimensions = dimensions
+        self.reduction = resolve_reduction(model_type, dimensions, reduction)
+        self.quantization = quantization
+        # 지정하면 output_dir을 버전 스토어 루트로 사용 (store_ 디렉토리 대신)
+        self.versioned_name = versioned_name
+        self.activate = activate
+        self.ngram_sizes = ngram_sizes
+        self.shards = max(1, shards)
+        if self.shards > 1 and versioned_name:
+            raise ValueError("버전 스토어는 샤딩을 지원하지 않습니다")
+
+        self.ingester = ingester or CSVIngester()
+        self.progress = progress or BuildProgress()
+        self.cancel_event = cancel_event or threading.Event()
+
+        # 컴포넌트 초기화
+        if embedder is None:
+            embed_reduction = self.reduction if self.reduction != "pca" else None
+            embedder = Embedder(
+                model_type=model_type,
+                model_name=self.model_name,
+                dimensions=dimensions if embed_reduction else None,
+                reduction=embed_reduction,
+            )
+        self.embedder = embedder
+        self._count_tokens = token_counter(self.embedder)
+        # Embedder를 직접 넘겨 문서 임베딩에도 같은 차원 축소가 적용되도록 함
+        if self.shards > 1:
+            self.vector_store = ShardedVectorStore(self.embedder, num_shards=self.shards)
+        else:
+            self.vector_store = VectorStore(self.embedder)
+
+        # 버전 스토어는 루트를 공유하고, store 디렉토리는 임시 디렉토리에 만든 뒤 완료 시 옮김
+        if versioned_name:
+            os.makedirs(output_dir, exist_ok=True)
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(output_dir)), exist_ok=True)
+
+    def check_cancelled(self) -> None:
+        if self.cancel_event.is_set():
+            raise BuildCancelled("벡터 스토어 생성이 취소되었습니다")
+
+    def _record(self, texts: List[str]) -> None:
+        tokens = None
+        if self._count_tokens is not None:
+            try:
+                tokens = self._count_tokens(texts)
+            except Exception as e:
+                logger.warning(f"토큰 수 계산 실패, 이후 토큰 처리량은 보고하지 않습니다: {str(e)}")
+                self._count_tokens = None
+        self.progress.add(
+            self.ingester.stats["rows"], len(texts), sum(len(t) for t in texts), tokens
+        )
+        BUILD_ROWS.inc(len(texts))
+
+    def process(self) -> Dict:
+        """CSV 파일을 배치 단위로 읽어 임베딩하고 벡터 저장소 생성. 생성 통계 반환"""
+        try:
+            self.progress.set_phase("embedding")
+            if self.versioned_name:
+                # 버전 스토어는 내용 기준으로 세그먼트를 나누므로 전체 문서가 필요
+                documents = self.ingester.load(self.csv_path, self.source_name)
+                if not documents:
+                    raise ValueError("CSV에서 문서를 로드할 수 없습니다")
+                return self.process_versioned(documents)
+
+            if os.path.exists(self.output_dir) and os.listdir(self.output_dir):
+                raise FileExistsError(f"이미 존재하는 벡터 스토어 디렉토리입니다: {self.output_dir}")
+
+            # 같은 위치의 임시 디렉토리에 만들고 메타데이터까지 쓴 뒤 옮겨서,
+            # 로더가 만들다 만 store 디렉토리를 보지 않도록 함 (이름이 .으로 시작해 store_ 목록에서 제외)
+            parent, name = os.path.split(os.path.abspath(self.output_dir))
+            build_dir = os.path.join(parent, f".{name}.{uuid.uuid4().hex[:8]}.building")
+            os.makedirs(build_dir)
+            try:
+                metadata = self.build(build_dir)
+                os.replace(build_dir, self.output_dir)
+            except BaseException:
+                shutil.rmtree(build_dir, ignore_errors=True)
+                raise
+            build_stats = metadata["build_stats"]
+            logger.info(
+                f"벡터 스토어 생성 완료: {self.output_dir} (문서 {metadata['document_count']}개, "
+                f"{build_stats['rows_per_second']} 문서/초, {build_stats['tokens_per_second']} 토큰/초)"
+            )
+            return metadata
+
+        except BuildCancelled:
+            logger.info(f"벡터 스토어 생성 취소: {self.output_dir}")
+            raise
+        except Exception as e:
+            logger.error(f"처리 중 오류 발생: {str(e)}")
+            raise
+
+    def build(self, build_dir: str) -> Dict:
+        """CSV를 임베딩해 build_dir에 faiss_store, 어휘 색인, metadata.json을 저장하고 메타데이터 반환"""
+        # CSV를 chunk_size 행씩 읽어 바로 임베딩 후 스토어에 추가
+        logger.info(
+            f"{self.model_type} 모델 ({self.model_name})을 사용하여 CSV 스트리밍 임베딩 시작: "
+            f"{self.source_name or self.csv_path}"
+        )
+        document_count = self.ingest()
+        if not document_count:
+            raise ValueError("CSV에서 문서를 로드할 수 없습니다")
+
+        self.progress.set_phase("saving")
+        store_path = os.path.join(build_dir, "faiss_store")
+        self.vector_store.save_local(store_path)
+
+        # 하이브리드 검색용 어휘(BM25) 색인을 같은 store 디렉토리에 저장
+        if self.shards == 1:
+            lexical_path = os.path.join(build_dir, LEXICAL_INDEX_FILE)
+            self.vector_store.build_lexical_index(self.ngram_sizes)
+            self.vector_store.save_lexical_index(lexical_path)
+
+        build_stats = self.progress.to_dict()
+        build_stats.pop("phase")
+        metadata = {
+            "document_count": document_count,
+            "embedding_model": self.model_name,
+            "model_type": self.model_type,
+            # 쿼리 임베딩도 같은 방식으로 줄여야 하므로 기록 (Embedder.from_store_metadata)
+            "embedding_dimensions": self.dimensions or self.index_dimensions(),
+            "dimension_reduction": self.reduction,
+            "index_quantization": self.quantization,
+            "created_at": datetime.now().isoformat(),
+            "lexical_index": LEXICAL_INDEX_FILE if self.shards == 1 else None,
+            "shards": self.shards,
+            "content_columns": self.ingester.columns["content"],
+            "metadata_columns": self.ingester.columns["metadata"],
+            "ingest_stats": dict(self.ingester.stats),
+            "build_stats": build_stats,
+        }
+
+        metadata_path = os.path.join(build_dir, "metadata.json")
+        with open(metadata_path, "w", encoding="utf-8") as f:
+            json.dump(metadata, f, ensure_ascii=False, indent=2)
+        return metadata
+
+    def ingest(self) -> int:
+        """배치마다 임베딩해 스토어에 추가하고 추가한 문서 수 반환"""
+        pca_dimensions = self.dimensions if self.reduction == "pca" else None
+        # 인덱스(PCA/양자화) 학습은 첫 배치로 하므로 (샤드마다) PCA 차원 이상 모일 때까지 버퍼링
+        train_rows = max(self.ingester.chunk_size, (pca_dimensions or 0) * self.shards)
+        pending = []
+        added = 0
+
+        def flush():
+            nonlocal added
+            self.check_cancelled()
+            self.vector_store.add_documents(
+                pending, pca_dimensions=pca_dimensions, quantization=self.quantization
+            )
+            self._record([doc.page_content for doc in pending])
+            added += len(pending)
+            pending.clear()
+            progress = self.progress.to_dict()
+            logger.info(
+                f"임베딩 진행: 문서 {added}개 (읽은 행 {progress['rows']}, "
+                f"{progress['rows_per_second']} 문서/초)"
+            )
+
+        for batch in self.ingester.iter_batches(self.csv_path, self.source_name):
+            if added == 0 and not pending:
+                logger.info(f"첫 번째 문서 샘플: {batch[0].page_content[:200]}")
+            pending.extend(batch)
+            if added or len(pending) >= train_rows:
+                flush()
+        if pending:
+            flush()
+        return added
+
+    def index_dimensions(self) -> int:
+        if self.shards > 1:
+            return self.vector_store.shards[0].store.index.d
+        return self.vector_store.store.index.d
+
+    def process_versioned(self, documents) -> Dict:
+        """문서를 버전 스토어에 세그먼트로 저장 (이전 버전과 같은 세그먼트는 임베딩 생략)"""
+
+        def embed_fn(texts: List[str]):
+            # 세그먼트 단위로 취소 확인과 처리량 기록
+            self.check_cancelled()
+            vectors = self.embedder.embed_documents(texts)
+            self._record(texts)
+            return vectors
+
+        segment_store = SegmentStore(self.output_dir)
+        manifest = segment_store.write_version(
+            self.versioned_name,
+            documents,
+            embed_fn=embed_fn,
+            embedding={
+                "model_type": self.model_type,
+                "embedding_model": self.model_name,
+                "embedding_dimensions": self.dimensions if self.reduction != "pca" else None,
+                "dimension_reduction": self.reduction if self.reduction != "pca" else None,
+            },
+            index_options={
+                "pca_dimensions": self.dimensions if self.reduction == "pca" else None,
+                "quantization": self.quantization,
+            },
+            activate=self.activate,
+        )
+        stats = manifest["build_stats"]
+        logger.info(
+            f"버전 스토어 저장 완료: {self.versioned_name}@{manifest['version']} "
+            f"(임베딩 {stats['embedded_rows']}/{len(documents)}행, "
+            f"세그먼트 재사용 {stats['reused_vectors']}/{stats['segments']}개)"
+        )
+        return {
+            "store_name": self.versioned_name,
+            "version": manifest["version"],
+            "document_count": len(documents),
+            "build_stats": dict(stats, **self.progress.to_dict()),
+        }
+
+
+def new_job_id() -> str:
+    """생성 작업 ID (store 디렉토리 이름에도 넣어 같은 시각에 시작한 작업끼리 겹치지 않게 함)"""
+    return uuid.uuid4().hex[:12]
+
+
+class BuildJob:
+    """백그라운드 생성 작업 하나의 상태"""
+
+    def __init__(self, params: Dict, job_id: Optional[str] = None):
+        self.id = job_id or new_job_id()
+        self.params = params
+        self.status = "queued"  # queued | running | succeeded | failed | cancelled
+        self.created_at = datetime.now().isoformat()
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.progress = BuildProgress()
+        self.cancel_event = threading.Event()
+        self.done = threading.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("succeeded", "failed", "cancelled")
+
+    def to_dict(self) -> Dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "params": self.params,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "progress": self.progress.to_dict(),
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class StoreBuildService:
+    """
+    벡터 스토어 생성 작업을 워커 스레드에서 실행합니다.
+    임베딩 모델은 EmbedderPool에 상주하고, 같은 출력 스토어에 대한 작업은 순서대로 하나씩 실행합니다.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 1,
+        max_models: int = 2,
+        snapshot_dir: Optional[str] = None,
+        history: int = 100,
+    ):
+        """
+        Args:
+            max_workers: 동시에 실행할 생성 작업 수
+            max_models: 상주시킬 임베딩 모델 수
+            snapshot_dir: 모델 스냅샷 디렉토리 (scripts/prewarm_model.py)
+            history: 조회용으로 남겨 둘 완료 작업 수
+        """
+        self.embedders = EmbedderPool(max_models=max_models, snapshot_dir=snapshot_dir)
+        self.history = max(1, history)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, max_workers), thread_name_prefix="store-build"
+        )
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, BuildJob]" = OrderedDict()
+        self._store_locks: Dict[str, threading.Lock] = {}
+
+    def _store_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._store_locks.setdefault(key, threading.Lock())
+
+    def submit(
+        self,
+        source,
+        output_dir: str,
+        model_type: str,
+        model_name: str,
+        close_source: bool = False,
+        job_id: Optional[str] = None,
+        **creator_kwargs,
+    ) -> BuildJob:
+        """
+        생성 작업을 큐에 넣고 바로 반환합니다.
+        Args:
+            source: CSV 파일 경로, bytes 또는 스트림 (close_source=True면 작업이 끝난 뒤 닫음)
+            job_id: 작업 ID (output_dir 이름에 미리 넣은 경우 new_job_id()로 만든 값)
+            creator_kwargs: VectorStoreCreator 옵션 (dimensions, quantization, versioned_name, ingester 등)
+        """
+        params = {
+            "output_dir": output_dir,
+            "model_type": model_type,
+            "model_name": model_name,
+            "source": creator_kwargs.get("source_name")
+            or (str(source) if isinstance(source, (str, os.PathLike)) else None),
+            **{
+                k: v
+                for k, v in creator_kwargs.items()
+                if k in ("dimensions", "reduction", "quantization", "versioned_name", "shards")
+            },
+        }
+        job = BuildJob(params, job_id)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        self._executor.submit(
+            self._run, job, source, output_dir, model_type, model_name, close_source, creator_kwargs
+        )
+        logger.info(f"벡터 스토어 생성 작업 등록: {job.id} -> {output_dir}")
+        return job
+
+    def _prune(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[: max(0, len(finished) - self.history)]:
+            del self._jobs[job_id]
+
+    def _run(self, job, source, output_dir, model_type, model_name, close_source, creator_kwargs):
+        # 같은 store 디렉토리(버전 스토어는 루트+이름)에 동시에 쓰지 않도록 직렬화
+        store_key = os.path.abspath(output_dir) + "|" + (creator_kwargs.get("versioned_name") or "")
+        started = None
+        try:
+            with self._store_lock(store_key):
+                # store 디렉토리는 VectorStoreCreator가 임시 디렉토리에 만든 뒤 완료 시 옮기므로
+                # 실패/취소해도 불완전한 디렉토리가 남지 않음
+                try:
+                    if job.cancel_event.is_set():
+                        raise BuildCancelled("시작 전에 취소되었습니다")
+                    job.status = "running"
+                    job.started_at = datetime.now().isoformat()
+                    started = time.monotonic()
+                    job.progress.set_phase("loading_model")
+                    embedder = self.embedders.get(
+                        model_type,
+                        model_name,
+                        creator_kwargs.get("dimensions"),
+                        creator_kwargs.get("reduction"),
+                    )
+                    creator = VectorStoreCreator(
+                        source,
+                        output_dir,
+                        model_type,
+                        model_name,
+                        embedder=embedder,
+                        progress=job.progress,
+                        cancel_event=job.cancel_event,
+                        **creator_kwargs,
+                    )
+                    job.result = creator.process()
+                    job.status = "succeeded"
+                except BuildCancelled:
+                    job.status = "cancelled"
+                except Exception as e:
+                    logger.error(f"벡터 스토어 생성 작업 실패 ({job.id}): {str(e)}")
+                    job.status = "failed"
+                    job.error = str(e)
+        finally:
+            if close_source and hasattr(source, "close"):
+                source.close()
+            if job.progress.phase not in ("queued", "loading_model"):
+                job.progress.set_phase("done")
+            job.finished_at = datetime.now().isoformat()
+            BUILD_JOBS.inc(status=job.status)
+            if started is not None:
+                BUILD_SECONDS.observe(time.monotonic() - started)
+            job.done.set()
+
+    def get(self, job_id: str) -> Optional[BuildJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> List[BuildJob]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id: str) -> Optional[BuildJob]:
+        """작업 취소 요청 (실행 중이면 다음 배치 전에 중단). 없는 작업이면 None"""
+        job = self.get(job_id)
+        if job is not None and not job.finished:
+            job.cancel_event.set()
+            logger.info(f"벡터 스토어 생성 작업 취소 요청: {job_id}")
+        return job
+
+    def stats(self) -> Dict:
+        with self._lock:
+            statuses: Dict[str, int] = {}
+            for job in self._jobs.values():
+                statuses[job.status] = statuses.get(job.status, 0) + 1
+        return {"jobs": statuses, "embedders": self.embedders.stats()}
+
+    def shutdown(self, cancel: bool = True) -> None:
+        if cancel:
+            for job in self.jobs():
+                job.cancel_event.set()
+        self._executor.shutdown(wait=True)
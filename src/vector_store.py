@@ -7,6 +7,74 @@ from langchain.schema.embeddings import Embeddings
 from langchain.schema.retriever import BaseRetriever
 from typing import List, Dict, Optional
 import logging
+import os
+
+import numpy as np
+
+from .lexical_index import LexicalIndex
+
+# FAISS 스칼라 양자화 타입 (None이면 float32 IndexFlatL2)
+QUANTIZATION_TYPES = {
+    "fp16": faiss.ScalarQuantizer.QT_fp16,
+    "int8": faiss.ScalarQuantizer.QT_8bit,
+}
+
+
+def build_faiss_index(
+    vectors: np.ndarray, pca_dimensions: Optional[int] = None, quantization: Optional[str] = None
+) -> faiss.Index:
+    """
+    PCA 차원 축소/스칼라 양자화를 적용한 L2 인덱스 생성 및 학습.
+    PCA는 IndexPreTransform으로 인덱스에 포함되므로 쿼리도 검색 시 같은 변환을 거칩니다.
+    """
+    if quantization is not None and quantization not in QUANTIZATION_TYPES:
+        raise ValueError(f"지원하지 않는 양자화 방식입니다: {quantization}")
+
+    dim = vectors.shape[1]
+    out_dim = pca_dimensions or dim
+    if pca_dimensions:
+        if pca_dimensions >= dim:
+            raise ValueError(f"PCA 차원({pca_dimensions})은 원본 차원({dim})보다 작아야 합니다")
+        if len(vectors) < pca_dimensions:
+            raise ValueError(
+                f"PCA 학습에는 최소 {pca_dimensions}개 문서가 필요합니다 (현재 {len(vectors)}개). "
+                "문서가 적으면 truncate 방식을 사용하세요"
+            )
+
+    if quantization:
+        base = faiss.IndexScalarQuantizer(out_dim, QUANTIZATION_TYPES[quantization], faiss.METRIC_L2)
+    else:
+        base = faiss.IndexFlatL2(out_dim)
+
+    index = base
+    if pca_dimensions:
+        pca = faiss.PCAMatrix(dim, pca_dimensions)
+        index = faiss.IndexPreTransform(pca, base)
+    if not index.is_trained:
+        index.train(vectors)
+    return index
+
+def round_trip(index: faiss.Index, vectors: np.ndarray) -> np.ndarray:
+    """벡터를 인덱스 전처리(PCA) 변환 후 다시 임베딩 공간으로 되돌림 (변환이 없으면 그대로)"""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    if not isinstance(index, faiss.IndexPreTransform):
+        return vectors
+    transforms = [faiss.downcast_VectorTransform(index.chain.at(i)) for i in range(index.chain.size())]
+    for transform in transforms:
+        vectors = transform.apply(vectors)
+    for transform in reversed(transforms):
+        vectors = transform.reverse_transform(vectors)
+    return vectors
+
+
+def reconstruct(index: faiss.Index, ids: np.ndarray) -> np.ndarray:
+    """인덱스 위치의 저장 벡터를 임베딩 공간으로 복원 (PCA/양자화 인덱스는 근사값, 위치 -1은 0 벡터)"""
+    vectors = np.zeros((len(ids), index.d), dtype=np.float32)
+    for row, i in enumerate(ids):
+        if i >= 0:
+            vectors[row] = index.reconstruct(int(i))
+    return vectors
+
 
 logger = logging.getLogger(__name__)
 
@@ -15,17 +83,99 @@ class VectorStore:
     def __init__(self, embeddings: Embeddings):
         self.embeddings = embeddings
         self.store = None
+        self.lexical_index: Optional[LexicalIndex] = None
         logger.info("벡터 스토어 초기화")
 
-    def initialize_store(self, documents: List[Dict]):
-        """문서로 벡터 스토어 초기화"""
+    def initialize_store(
+        self,
+        documents: List[Dict],
+        pca_dimensions: Optional[int] = None,
+        quantization: Optional[str] = None,
+    ):
+        """
+        문서로 벡터 스토어 초기화
+        Args:
+            pca_dimensions: PCA로 줄일 차원 수 (인덱스 전처리)
+            quantization: 벡터 저장 정밀도 (fp16 | int8, None이면 float32)
+        """
         try:
-            self.store = FAISS.from_documents(documents, self.embeddings)
+            if not pca_dimensions and not quantization:
+                self.store = FAISS.from_documents(documents, self.embeddings)
+            else:
+                texts = [doc.page_content for doc in documents]
+                vectors = np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32)
+                self._build_store(documents, vectors, pca_dimensions, quantization)
             logger.info(f"{len(documents)}개 문서로 벡터 스토어 초기화 완료")
         except Exception as e:
             logger.error(f"벡터 스토어 초기화 중 오류: {str(e)}")
             raise
 
+    def initialize_from_vectors(
+        self,
+        documents: List[Document],
+        vectors: np.ndarray,
+        pca_dimensions: Optional[int] = None,
+        quantization: Optional[str] = None,
+    ):
+        """이미 계산된 임베딩으로 벡터 스토어 초기화 (버전 스토어 세그먼트 로드용)"""
+        try:
+            self._build_store(documents, vectors, pca_dimensions, quantization)
+            logger.info(f"{len(documents)}개 문서로 벡터 스토어 초기화 완료 (저장된 임베딩 사용)")
+        except Exception as e:
+            logger.error(f"벡터 스토어 초기화 중 오류: {str(e)}")
+            raise
+
+    def add_documents(
+        self,
+        documents: List[Document],
+        vectors: Optional[np.ndarray] = None,
+        pca_dimensions: Optional[int] = None,
+        quantization: Optional[str] = None,
+    ) -> np.ndarray:
+        """
+        문서 배치를 임베딩해 스토어에 추가 (CSV 스트리밍 적재용)
+        첫 배치로 인덱스를 만들고 PCA/양자화는 첫 배치로 학습하므로,
+        pca_dimensions를 쓸 때는 첫 배치가 그 이상이어야 합니다.
+        Returns:
+            추가한 배치의 임베딩 (호출자가 처리량 등을 계산할 때 사용)
+        """
+        if vectors is None:
+            vectors = np.asarray(
+                self.embeddings.embed_documents([doc.page_content for doc in documents]),
+                dtype=np.float32,
+            )
+        if self.store is None:
+            self._build_store(documents, vectors, pca_dimensions, quantization)
+        else:
+            if len(documents) != len(vectors):
+                raise ValueError(f"문서 수({len(documents)})와 벡터 수({len(vectors)})가 다릅니다")
+            self.store.add_embeddings(
+                zip([doc.page_content for doc in documents], vectors.tolist()),
+                metadatas=[doc.metadata for doc in documents],
+            )
+        return vectors
+
+    def _build_store(
+        self,
+        documents: List[Document],
+        vectors: np.ndarray,
+        pca_dimensions: Optional[int],
+        quantization: Optional[str],
+    ):
+        if len(documents) != len(vectors):
+            raise ValueError(f"문서 수({len(documents)})와 벡터 수({len(vectors)})가 다릅니다")
+        index = build_faiss_index(vectors, pca_dimensions, quantization)
+        self.store = FAISS(
+            embedding_function=self.embeddings,
+            index=index,
+            docstore=InMemoryDocstore(),
+            index_to_docstore_id={},
+        )
+        self.store.add_embeddings(
+            zip([doc.page_content for doc in documents], vectors.tolist()),
+            metadatas=[doc.metadata for doc in documents],
+        )
+
     def save_local(self, path: str):
         """로컬에 벡터 스토어 저장"""
         if self.store:
@@ -45,14 +195,77 @@ class VectorStore:
             logger.error(f"벡터 스토어 로드 중 오류: {str(e)}")
             raise
 
-    def get_retriever(self, search_kwargs: Optional[Dict] = None) -> BaseRetriever:
-        """벡터 스토어의 retriever 반환"""
+    def build_lexical_index(self, ngram_sizes=(2, 3)) -> LexicalIndex:
+        """FAISS docstore의 문서로 어휘(BM25) 색인 생성 (FAISS 인덱스와 같은 순서)"""
+        if not self.store:
+            raise ValueError("벡터 스토어가 초기화되지 않았습니다")
+        id_map = self.store.index_to_docstore_id
+        self.lexical_index = LexicalIndex(ngram_sizes=ngram_sizes).build(
+            (doc_id, self.store.docstore.search(doc_id).page_content)
+            for _, doc_id in sorted(id_map.items())
+        )
+        return self.lexical_index
+
+    def save_lexical_index(self, path: str):
+        """어휘 색인 저장 (store 디렉토리의 lexical_index.json)"""
+        if self.lexical_index is None:
+            raise ValueError("어휘 색인이 생성되지 않았습니다")
+        self.lexical_index.save(path)
+
+    def load_lexical_index(self, path: str) -> bool:
+        """어휘 색인이 있으면 로드. 없으면 False (벡터 검색만 사용)"""
+        if not os.path.exists(path):
+            logger.info(f"어휘 색인이 없어 벡터 검색만 사용합니다: {path}")
+            return False
+        self.lexical_index = LexicalIndex.load(path)
+        return True
+
+    def get_retriever(
+        self, search_kwargs: Optional[Dict] = None, hybrid: bool = False, **hybrid_kwargs
+    ) -> BaseRetriever:
+        """
+        벡터 스토어의 retriever 반환
+        hybrid=True이고 어휘 색인이 있으면 벡터+BM25 RRF 리트리버 반환
+        (hybrid_kwargs: fetch_k, rrf_k, vector_weight, lexical_weight)
+        """
         if not self.store:
             raise ValueError("벡터 스토어가 초기화되지 않았습니다")
 
         search_kwargs = search_kwargs or {"k": 4}
+        if hybrid and self.lexical_index is not None:
+            from .hybrid_retriever import HybridRetriever
+
+            return HybridRetriever(
+                store=self.store,
+                embeddings=self.embeddings,
+                lexical_index=self.lexical_index,
+                k=search_kwargs.get("k", 4),
+                **hybrid_kwargs,
+            )
         return self.store.as_retriever(search_kwargs=search_kwargs)
 
+    def search_vectors(self, vectors: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """임베딩으로 직접 검색해 (거리, 인덱스 위치) 반환 (ShardedVectorStore와 같은 형식)"""
+        if not self.store:
+            raise ValueError("벡터 스토어가 초기화되지 않았습니다")
+        return self.store.index.search(np.ascontiguousarray(vectors, dtype=np.float32), k)
+
+    @property
+    def reduced(self) -> bool:
+        """인덱스에 PCA 변환이 있어 검색 거리가 원래 임베딩 공간의 거리가 아닌지"""
+        return bool(self.store) and isinstance(self.store.index, faiss.IndexPreTransform)
+
+    def reconstruct_pairs(
+        self, vectors: np.ndarray, ids: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        쿼리 벡터와 검색된 저장 벡터(인덱스 위치, -1은 0 벡터)를 둘 다 인덱스의 PCA 변환을 거쳐
+        임베딩 공간으로 복원해 반환 (같은 축소 공간에서 코사인 유사도를 비교하기 위함)
+        """
+        if not self.store:
+            raise ValueError("벡터 스토어가 초기화되지 않았습니다")
+        return round_trip(self.store.index, vectors), reconstruct(self.store.index, ids)
+
     def similarity_search(self, query: str, k: int = 4) -> List[Dict]:
         """유사도 검색 수행"""
         if not self.store:
@@ -0,0 +1,244 @@
+import json
+import logging
+import re
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+VERDICT_KEYS = ("asis_sentence", "detection_flag", "comments", "tobe_sentence")
+
+# OpenAI 계열 모델의 structured output(response_format) 스키마
+VERDICT_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "contract_verdict",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "asis_sentence": {"type": "string"},
+                "detection_flag": {"type": "string", "enum": ["Y", "N"]},
+                "comments": {"type": "string"},
+                "tobe_sentence": {"type": "string"},
+            },
+            "required": list(VERDICT_KEYS),
+            "additionalProperties": False,
+        },
+    },
+}
+
+_FENCE_RE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$", re.IGNORECASE)
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+# 따옴표 없는 값 다음에 오는 ", 'key':" 형태의 다음 키
+_NEXT_KEY_RE = re.compile(r",\s*['\"]?[A-Za-z_][A-Za-z0-9_]*['\"]?\s*:")
+
+
+class JSONObjectStreamScanner:
+    """스트리밍 응답에서 최상위 JSON 객체가 닫히는 시점을 감지합니다."""
+
+    def __init__(self):
+        self.buffer = []
+        self.depth = 0
+        self.started = False
+        self.quote: Optional[str] = None
+        self.escaped = False
+        self.closed = False
+
+    def feed(self, chunk: str) -> Optional[str]:
+        """청크를 추가하고, 객체가 완성되면 객체 문자열을 반환합니다."""
+        if self.closed or not chunk:
+            return None
+
+        for ch in chunk:
+            if not self.started:
+                if ch != "{":
+                    continue
+                self.started = True
+
+            self.buffer.append(ch)
+            if self.quote:
+                if self.escaped:
+                    self.escaped = False
+                elif ch == "\\":
+                    self.escaped = True
+                elif ch == self.quote:
+                    self.quote = None
+            elif ch in "\"'":
+                self.quote = ch
+            elif ch == "{":
+                self.depth += 1
+            elif ch == "}":
+                self.depth -= 1
+                if self.depth == 0:
+                    self.closed = True
+                    return "".join(self.buffer)
+        return None
+
+    @property
+    def text(self) -> str:
+        return "".join(self.buffer)
+
+
+def _string_can_close(text: str, pos: int) -> bool:
+    """pos의 따옴표 다음에 구조 문자(, : } ])가 오면 문자열 종료로 판단"""
+    for ch in text[pos + 1 :]:
+        if ch.isspace():
+            continue
+        return ch in ",:}]"
+    return True
+
+
+def _normalize_quotes(text: str) -> str:
+    """
+    작은따옴표 문자열, 따옴표 없는 값, 이스케이프되지 않은 내부 따옴표/줄바꿈을
+    JSON 문자열로 바꿉니다. 문장 속 아포스트로피는 그대로 보존합니다.
+    """
+    out = []
+    i = 0
+    n = len(text)
+    expect_value = False
+
+    while i < n:
+        ch = text[i]
+
+        if ch in "\"'":
+            quote = ch
+            i += 1
+            buf = []
+            while i < n:
+                c = text[i]
+                if c == "\\" and i + 1 < n:
+                    nxt = text[i + 1]
+                    # \' 는 JSON에서 유효하지 않으므로 문자 그대로 사용
+                    buf.append("'" if nxt == "'" else c + nxt)
+                    i += 2
+                    continue
+                if c == quote and _string_can_close(text, i):
+                    i += 1
+                    break
+                if c == '"':
+                    buf.append('\\"')
+                elif c == "\n":
+                    buf.append("\\n")
+                elif c == "\t":
+                    buf.append("\\t")
+                else:
+                    buf.append(c)
+                i += 1
+            out.append('"' + "".join(buf) + '"')
+            expect_value = False
+            continue
+
+        if expect_value and not ch.isspace():
+            expect_value = False
+            if ch not in "{[-0123456789" and not text.startswith(
+                ("true", "false", "null"), i
+            ):
+                # 따옴표 없는 값: 다음 키 또는 객체 끝까지를 문자열로 취급
+                rest = text[i:]
+                match = _NEXT_KEY_RE.search(rest)
+                end = match.start() if match else rest.rfind("}")
+                if end < 0:
+                    end = len(rest)
+                value = rest[:end].strip()
+                out.append(json.dumps(value, ensure_ascii=False))
+                i += end
+                continue
+
+        if ch == ":":
+            expect_value = True
+        out.append(ch)
+        i += 1
+
+    return "".join(out)
+
+
+def _close_truncated(text: str) -> str:
+    """max_tokens 등으로 잘린 응답의 열린 문자열/괄호를 닫습니다."""
+    stack = []
+    in_string = False
+    escaped = False
+    for ch in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]" and stack:
+            stack.pop()
+
+    if in_string:
+        text += '"'
+    text = text.rstrip().rstrip(",")
+    return text + "".join(reversed(stack))
+
+
+def _extract_fields(text: str) -> Dict[str, str]:
+    """최후 수단: 알려진 키의 값을 정규식으로 추출"""
+    result = {}
+    for idx, key in enumerate(VERDICT_KEYS):
+        others = "|".join(k for k in VERDICT_KEYS if k != key)
+        pattern = (
+            rf"['\"]?{key}['\"]?\s*:\s*['\"]?(.*?)['\"]?\s*"
+            rf"(?=,\s*['\"]?(?:{others})['\"]?\s*:|\}}|$)"
+        )
+        match = re.search(pattern, text, re.DOTALL)
+        if match:
+            result[key] = match.group(1).strip()
+    return result
+
+
+def repair_json(text: str) -> Optional[dict]:
+    """형식이 깨진 LLM 출력을 최대한 딕셔너리로 복구합니다."""
+    text = _FENCE_RE.sub("", text.strip())
+    start = text.find("{")
+    if start < 0:
+        return None
+
+    scanner = JSONObjectStreamScanner()
+    candidate = scanner.feed(text[start:]) or scanner.text
+
+    attempts = (
+        lambda t: t,
+        _normalize_quotes,
+        lambda t: _close_truncated(_normalize_quotes(t)),
+    )
+    for transform in attempts:
+        try:
+            repaired = _TRAILING_COMMA_RE.sub(r"\1", transform(candidate))
+            data = json.loads(repaired)
+            if isinstance(data, dict):
+                return data
+        except (json.JSONDecodeError, ValueError):
+            continue
+
+    fields = _extract_fields(candidate)
+    return fields or None
+
+
+def parse_verdict(content: str) -> dict:
+    """LLM 응답 문자열을 판정 딕셔너리로 파싱합니다."""
+    if content is None:
+        return {"error": "Parsing error: empty response", "raw_response": content}
+
+    try:
+        data = json.loads(content)
+        if isinstance(data, dict):
+            return data
+    except json.JSONDecodeError:
+        pass
+
+    data = repair_json(content)
+    if data is None:
+        logger.error(f"String parsing error: {content[:200]}")
+        return {"error": "Parsing error: no JSON object found", "raw_response": content}
+
+    if "detection_flag" in data:
+        data["detection_flag"] = str(data["detection_flag"]).strip().upper()[:1]
+    return data
@@ -0,0 +1,37 @@
+import sys
+import zlib
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import pytest
+
+# 프로젝트 루트 경로를 Python 경로에 추가
+project_root = str(Path(__file__).parents[1])
+sys.path.insert(0, project_root)
+
+
+class HashEmbeddings:
+    """텍스트 해시로 정해지는 단위 벡터 (모델 없이 검색 결과를 재현하기 위한 임베딩)"""
+
+    def __init__(self, dim: int = 32):
+        self.dim = dim
+
+    def _embed(self, text: str) -> List[float]:
+        rng = np.random.default_rng(zlib.crc32(text.encode("utf-8")))
+        vector = rng.standard_normal(self.dim).astype(np.float32)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+    def __call__(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+@pytest.fixture
+def embeddings():
+    return HashEmbeddings()
@@ -0,0 +1,169 @@
+import asyncio
+import threading
+
+import pytest
+
+pytest.importorskip("flask")  # api 패키지(__init__)가 flask를 import함
+
+from api.admission import AdmissionController, AdmissionRejected, ClientIdentifier
+
+
+def make_controller(**kwargs) -> AdmissionController:
+    options = dict(
+        max_concurrent=1,
+        token_budget=1000,
+        per_client_concurrent=1,
+        per_client_token_budget=1000,
+        max_queue=1,
+        per_client_queue=1,
+        max_wait_s=5.0,
+    )
+    options.update(kwargs)
+    return AdmissionController(**options)
+
+
+def test_rejects_when_queue_is_full():
+    controller = make_controller()
+
+    async def scenario():
+        async with controller.aadmit("a", 100):
+            waiting = asyncio.ensure_future(controller.aadmit("b", 100).__aenter__())
+            await asyncio.sleep(0.01)
+            assert controller.snapshot()["queued"] == 1
+
+            with pytest.raises(AdmissionRejected) as rejected:
+                controller.check("c")
+            assert rejected.value.reason == "queue_full"
+            assert rejected.value.retry_after >= 1
+            with pytest.raises(AdmissionRejected):
+                async with controller.aadmit("c", 100):
+                    pass
+
+            waiting.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiting
+
+    asyncio.run(scenario())
+    assert controller.snapshot()["queued"] == 0
+
+
+def test_rejects_per_client_queue_before_global_queue():
+    controller = make_controller(max_queue=4)
+    ready = threading.Event()
+    done = threading.Event()
+
+    def hold():
+        with controller.admit("a", 100):
+            ready.set()
+            done.wait(5)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    ready.wait(5)
+
+    def wait():
+        with controller.admit("b", 100):
+            pass
+
+    waiter = threading.Thread(target=wait)
+    waiter.start()
+    try:
+        for _ in range(100):
+            if controller.snapshot()["queued"] == 1:
+                break
+            threading.Event().wait(0.01)
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            controller.check("b")
+        assert rejected.value.reason == "client_queue_full"
+        controller.check("c")  # 다른 클라이언트는 아직 대기열에 들어갈 수 있음
+    finally:
+        done.set()
+        holder.join()
+        waiter.join()
+
+
+def test_rejects_after_max_wait():
+    controller = make_controller(max_wait_s=0.05)
+
+    async def scenario():
+        async with controller.aadmit("a", 100):
+            with pytest.raises(AdmissionRejected) as rejected:
+                async with controller.aadmit("b", 100):
+                    pass
+            assert rejected.value.reason == "timeout"
+            assert controller.snapshot()["queued"] == 0
+
+    asyncio.run(scenario())
+    stats = controller.snapshot()
+    assert (stats["in_flight"], stats["tokens_in_flight"], stats["clients"]) == (0, 0, 0)
+
+
+def test_thread_admit_rejects_after_max_wait():
+    controller = make_controller(max_wait_s=0.05)
+    with controller.admit("a", 100):
+        with pytest.raises(AdmissionRejected) as rejected:
+            with controller.admit("b", 100):
+                pass
+        assert rejected.value.reason == "timeout"
+    stats = controller.snapshot()
+    assert (stats["in_flight"], stats["queued"], stats["clients"]) == (0, 0, 0)
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    controller = make_controller()
+
+    async def scenario():
+        async with controller.aadmit("a", 100):
+            waiting = asyncio.ensure_future(controller.aadmit("b", 100).__aenter__())
+            await asyncio.sleep(0.01)
+            waiting.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiting
+            stats = controller.snapshot()
+            assert (stats["queued"], stats["clients"]) == (0, 1)
+
+    asyncio.run(scenario())
+    stats = controller.snapshot()
+    assert (stats["in_flight"], stats["tokens_in_flight"], stats["clients"]) == (0, 0, 0)
+
+
+def test_waiter_cancelled_after_grant_releases_its_budget():
+    controller = make_controller()
+
+    async def scenario():
+        holder = controller.aadmit("a", 100)
+        await holder.__aenter__()
+        waiting = asyncio.ensure_future(controller.aadmit("b", 100).__aenter__())
+        await asyncio.sleep(0.01)
+
+        # 앞 요청이 끝나 b가 수락됐지만, 알림을 받기 전에 b의 요청이 취소됨
+        await holder.__aexit__(None, None, None)
+        assert controller.snapshot()["in_flight"] == 1
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+
+        async with controller.aadmit("c", 100):
+            assert controller.snapshot()["in_flight"] == 1
+
+    asyncio.run(scenario())
+    stats = controller.snapshot()
+    assert (stats["in_flight"], stats["tokens_in_flight"], stats["queued"]) == (0, 0, 0)
+    assert stats["clients"] == 0
+
+
+def test_client_header_ignored_from_untrusted_address():
+    identify = ClientIdentifier(trusted_proxies=["10.0.0.0/8"])
+    headers = {"X-Client-ID": "victim", "X-Forwarded-For": "1.2.3.4"}
+    assert identify("203.0.113.7", headers) == "203.0.113.7"
+    assert identify(None, headers) == "anonymous"
+
+
+def test_trusted_proxy_supplies_client_identity():
+    identify = ClientIdentifier(trusted_proxies=["10.0.0.0/8", "::1"])
+    assert identify("10.1.2.3", {"X-Client-ID": "team-a"}) == "team-a"
+    # 클라이언트가 직접 넣은 X-Forwarded-For 앞부분은 건너뛰고 프록시가 본 주소 사용
+    forwarded = {"X-Forwarded-For": "6.6.6.6, 198.51.100.9, 10.0.0.2"}
+    assert identify("10.1.2.3", forwarded) == "198.51.100.9"
+    assert identify("::1", {}) == "::1"
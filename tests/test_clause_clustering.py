@@ -0,0 +1,142 @@
+import pytest
+
+from src.clause import Clause, PageText
+from src.clause_clustering import (
+    ClauseClusterer,
+    jaccard,
+    normalize_clause,
+    quantities,
+    shingles,
+)
+
+PAYMENT = "원사업자는 수급사업자에게 목적물을 인수한 날부터 대금을 지급한다. 지연 시 이자를 가산한다."
+
+
+def make_clauses(texts, page=1):
+    """같은 페이지 본문을 공유하는 조항 목록 (id와 섹션 번호는 순서대로)"""
+    page_text = PageText("".join(texts), {"page": page})
+    clauses, start = [], 0
+    for i, text in enumerate(texts):
+        clauses.append(Clause(i, i + 1, page, start, start + len(text), page_text))
+        start += len(text)
+    return clauses
+
+
+def result(clause, flag):
+    return {"query": clause.text, "response": {"detection_flag": flag, "reason": clause.text}}
+
+
+def test_normalize_folds_numbering_but_keeps_quantities():
+    assert normalize_clause("제3조 1. 대금 지급") == normalize_clause("제12조 2. 대금 지급")
+    assert normalize_clause("위약금 10%") != normalize_clause("위약금 100%")
+    assert normalize_clause("30일 이내 1,000,000원") == "30일이내1,000,000원"
+    assert normalize_clause("60 일 이내") != normalize_clause("30 일 이내")
+    assert normalize_clause("제3조 위약금 10%", normalize_digits=False) == "제3조위약금10%"
+
+
+def test_clusters_clauses_that_differ_only_in_numbering():
+    clauses = make_clauses(
+        [
+            f"제1조 {PAYMENT} 위약금은 계약금액의 10%로 한다.",
+            f"제2조 {PAYMENT} 위약금은 계약금액의 10%로 한다.",
+            f"제3조 {PAYMENT} 위약금은 계약금액의 100%로 한다.",
+            "제4조 수급사업자는 하도급 대금의 직접 지급을 요청할 수 있다.",
+        ]
+    )
+    clusters = ClauseClusterer().cluster(clauses)
+    assert [[c.representative.id] + [m.id for m in c.members] for c in clusters] == [
+        [0, 1],
+        [2],
+        [3],
+    ]
+    assert clusters[0].similarities == [1.0]
+
+
+def test_plan_and_resolve_project_the_representative_verdict():
+    clauses = make_clauses([f"제{i}조 {PAYMENT}" for i in range(1, 4)], page=2)
+    clusterer = ClauseClusterer()
+    to_analyze, projections = clusterer.plan(clauses)
+    assert [c.id for c in to_analyze] == [0]
+    assert set(projections) == {1, 2}
+
+    resolved = clusterer.resolve(clauses, {0: result(clauses[0], "Y")}, projections)
+    assert set(resolved) == {0, 1, 2}
+    projected = resolved[2]
+    assert projected["query"] == clauses[2].text
+    assert projected["response"]["detection_flag"] == "Y"
+    assert projected["response"]["projected"] is True
+    assert projected["response"]["projected_from"] == 1
+    assert projected["response"]["projected_from_page"] == 2
+    assert projected["response"]["projection_similarity"] == 1.0
+    assert "projected" not in resolved[0]["response"]
+
+    stats = clusterer.stats.snapshot()
+    assert (stats["clauses"], stats["clusters"], stats["projected"]) == (3, 1, 2)
+    assert stats["llm_calls_saved_rate"] == pytest.approx(2 / 3)
+
+
+def test_members_of_a_deferred_representative_get_no_verdict():
+    clauses = make_clauses([f"제{i}조 {PAYMENT}" for i in range(1, 4)])
+    clusterer = ClauseClusterer()
+    _, projections = clusterer.plan(clauses)
+
+    # 대표가 마감 시간으로 분석되지 못하면 구성원에게 복사할 판정도 없음
+    assert clusterer.resolve(clauses, {}, projections) == {}
+    assert clusterer.stats.snapshot()["projected"] == 0
+
+    resolved = clusterer.resolve(clauses, {0: result(clauses[0], "N")}, projections)
+    assert set(resolved) == {0, 1, 2}
+
+
+def test_spot_checked_members_keep_their_own_verdict():
+    clauses = make_clauses([f"제{i}조 {PAYMENT}" for i in range(1, 4)])
+    clusterer = ClauseClusterer(spot_check_rate=1.0)
+    to_analyze, projections = clusterer.plan(clauses)
+    assert [c.id for c in to_analyze] == [0, 1, 2]
+
+    results = {
+        0: result(clauses[0], "Y"),
+        1: result(clauses[1], "Y"),
+        2: result(clauses[2], "N"),
+    }
+    # 스트리밍 중간 resolve는 통계를 기록하지 않음
+    clusterer.resolve(clauses, results, projections, record_stats=False)
+    assert clusterer.stats.snapshot()["spot_checks"] == 0
+
+    resolved = clusterer.resolve(clauses, results, projections)
+    assert resolved[2] is results[2]
+    assert "projected" not in resolved[1]["response"]
+    stats = clusterer.stats.snapshot()
+    assert (stats["spot_checks"], stats["spot_check_disagreements"], stats["projected"]) == (
+        2,
+        1,
+        0,
+    )
+
+
+def test_threshold_is_inclusive():
+    texts = [f"제1조 {PAYMENT} 서면으로 통지한다.", f"제2조 {PAYMENT} 구두로 통지한다."]
+    similarity = jaccard(*(shingles(normalize_clause(text)) for text in texts))
+    assert 0.8 < similarity < 1.0
+    clauses = make_clauses(texts)
+
+    assert len(ClauseClusterer(threshold=similarity).cluster(clauses)) == 1
+    assert len(ClauseClusterer(threshold=similarity + 1e-9).cluster(clauses)) == 2
+
+
+def test_clauses_shorter_than_min_chars_are_not_clustered():
+    texts = ["제1조 대금은 즉시 지급한다.", "제2조 대금은 즉시 지급한다."]
+    length = len(normalize_clause(texts[0]))
+    clauses = make_clauses(texts)
+
+    assert len(ClauseClusterer(min_chars=length).cluster(clauses)) == 1
+    assert len(ClauseClusterer(min_chars=length + 1).cluster(clauses)) == 2
+
+
+def test_quantities_must_match_the_representative():
+    assert quantities("위약금 10%, 30 일 이내, 제3조") == ("10%", "30일")
+    clauses = make_clauses(
+        [f"제1조 {PAYMENT} 60일 이내 지급한다.", f"제2조 {PAYMENT} 61일 이내 지급한다."]
+    )
+    # 문장 유사도는 기준을 넘지만 지급 기한이 다르므로 따로 분석
+    assert len(ClauseClusterer(threshold=0.5).cluster(clauses)) == 2
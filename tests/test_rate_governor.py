@@ -0,0 +1,113 @@
+import time
+
+import pytest
+
+from src.rate_governor import GovernorTimeout, RateGovernor
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+
+def make_governor(tmp_path, **kwargs) -> RateGovernor:
+    options = dict(
+        initial_rate=10.0,
+        min_rate=1.0,
+        burst=10.0,
+        initial_concurrency=8.0,
+        min_concurrency=1.0,
+        increase=1.0,
+        decrease_factor=0.5,
+        cooldown_s=60.0,
+    )
+    options.update(kwargs)
+    return RateGovernor(str(tmp_path / "governor.db"), **options)
+
+
+def rate_limited_call(governor: RateGovernor) -> None:
+    with pytest.raises(RateLimited):
+        with governor.lease(timeout=1.0):
+            raise RateLimited()
+
+
+def test_rate_limit_halves_limits_once_per_cooldown(tmp_path):
+    governor = make_governor(tmp_path)
+
+    rate_limited_call(governor)
+    state = governor.state()
+    assert (state["rate"], state["concurrency"]) == (5.0, 4.0)
+
+    # 같은 폭주에서 온 429는 cooldown 동안 한도를 더 줄이지 않음 (다른 프로세스에서 온 것도 마찬가지)
+    rate_limited_call(governor)
+    make_governor(tmp_path).record_rate_limited()
+    state = governor.state()
+    assert (state["rate"], state["concurrency"]) == (5.0, 4.0)
+    assert governor.snapshot()["decreases"] == 1
+    assert governor.snapshot()["rate_limited"] == 2
+    assert state["active_leases"] == 0
+
+
+def test_rate_limit_decreases_again_after_cooldown(tmp_path):
+    governor = make_governor(tmp_path, cooldown_s=0.1)
+
+    rate_limited_call(governor)
+    time.sleep(0.15)
+    governor.record_rate_limited()
+    state = governor.state()
+    assert (state["rate"], state["concurrency"]) == (2.5, 2.0)
+
+    time.sleep(0.15)
+    governor.record_rate_limited()
+    governor.record_rate_limited()
+    state = governor.state()
+    # 최소 한도 아래로는 줄이지 않음
+    assert (state["rate"], state["concurrency"]) == (1.25, 1.0)
+    assert governor.snapshot()["decreases"] == 3
+
+
+def test_success_increases_limits_additively(tmp_path):
+    governor = make_governor(tmp_path)
+    for _ in range(8):
+        with governor.lease(timeout=1.0):
+            pass
+    state = governor.state()
+    # 현재 동시성 한도만큼 성공하면 increase(1)만큼 늘어남
+    assert 10.9 < state["rate"] < 11.0
+    assert 8.9 < state["concurrency"] < 9.0
+
+
+def test_rate_limit_empties_token_bucket(tmp_path):
+    governor = make_governor(tmp_path, initial_rate=2.0)
+    governor.record_rate_limited()
+    with pytest.raises(GovernorTimeout):
+        governor.acquire(take_slot=False, timeout=0.1)
+    assert governor.snapshot()["timeouts"] == 1
+
+
+def test_abandoned_lease_expires(tmp_path):
+    governor = make_governor(tmp_path, initial_concurrency=1.0, lease_ttl_s=0.3)
+
+    # 반납하지 않고 죽은 프로세스의 임대
+    governor.acquire(timeout=1.0)
+    assert governor.state()["active_leases"] == 1
+    other = make_governor(tmp_path, initial_concurrency=1.0, lease_ttl_s=0.3)
+    with pytest.raises(GovernorTimeout):
+        other.acquire(timeout=0.1)
+
+    time.sleep(0.3)
+    assert other.state()["active_leases"] == 0
+    with other.lease(timeout=1.0):
+        assert other.state()["active_leases"] == 1
+    assert other.state()["active_leases"] == 0
+
+
+def test_state_reads_without_taking_the_write_lock(tmp_path):
+    governor = make_governor(tmp_path)
+    assert governor.state() == {"rate": 10.0, "concurrency": 8.0, "active_leases": 0}
+
+    # 다른 프로세스가 허가 발급 트랜잭션을 잡고 있어도 /metrics 수집은 기다리지 않음
+    writer = make_governor(tmp_path)
+    with writer._transaction():
+        started = time.monotonic()
+        assert governor.state()["active_leases"] == 0
+        assert time.monotonic() - started < 1.0
@@ -0,0 +1,88 @@
+import fcntl
+import os
+
+import numpy as np
+from langchain_core.documents import Document
+
+from conftest import HashEmbeddings
+from src.segment_store import SegmentStore
+
+EMBEDDING = {"model_type": "test", "embedding_model": "hash-32"}
+CHUNKS = {"target_size": 4, "min_size": 2, "max_size": 8}
+
+
+def documents(count: int, prefix: str = "조항") -> list:
+    return [Document(page_content=f"{prefix} {i}", metadata={"row": i}) for i in range(count)]
+
+
+def write(store: SegmentStore, docs, embed_fn=None, **kwargs):
+    return store.write_version(
+        "poc",
+        docs,
+        embed_fn or HashEmbeddings().embed_documents,
+        EMBEDDING,
+        chunk_options=CHUNKS,
+        **kwargs,
+    )
+
+
+def test_versions_from_the_same_second_keep_write_order(tmp_path):
+    store = SegmentStore(str(tmp_path))
+    # 해시 순서가 생성 순서와 달라도 sequence 순으로 정렬
+    written = [write(store, documents(10, prefix=f"v{i}"))["version"] for i in range(5)]
+    assert store.list_versions("poc") == written
+    assert store.active_version("poc") == written[-1]
+
+    store.activate("poc", written[0])
+    store.gc(keep=2)
+    assert store.list_versions("poc") == [written[0]] + written[-2:]
+    for version in store.list_versions("poc"):
+        docs, vectors, _ = store.load_version("poc", version)
+        assert len(docs) == len(vectors) == 10
+
+
+def test_embeds_outside_the_store_lock(tmp_path):
+    store = SegmentStore(str(tmp_path))
+    embeddings = HashEmbeddings()
+    calls = []
+
+    def embed(texts):
+        # 같은 프로세스라도 다른 fd의 flock은 충돌하므로, 잠금이 잡혀 있으면 바로 실패
+        with open(os.path.join(store.root, ".lock"), "a") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        calls.append(len(texts))
+        return embeddings.embed_documents(texts)
+
+    os.makedirs(store.root, exist_ok=True)
+    manifest = write(store, documents(20), embed_fn=embed)
+    assert sum(calls) == manifest["build_stats"]["embedded_rows"] == 20
+
+    # 같은 문서는 세그먼트를 재사용하고 다시 임베딩하지 않음
+    calls.clear()
+    manifest = write(store, documents(20), embed_fn=embed)
+    assert calls == [] and manifest["build_stats"]["reused_vectors"] == manifest["build_stats"]["segments"]
+
+
+def test_segments_removed_by_gc_during_embedding_are_rewritten(tmp_path):
+    store = SegmentStore(str(tmp_path))
+    embeddings = HashEmbeddings()
+
+    calls = []
+
+    def embed(texts):
+        # 두 번째 세그먼트를 임베딩하는 동안 다른 프로세스의 GC가 첫 세그먼트를 지움
+        # (아직 어떤 매니페스트도 참조하지 않으므로)
+        if len(calls) == 1:
+            store.gc(keep=0)
+        calls.append(len(texts))
+        return embeddings.embed_documents(texts)
+
+    manifest = write(store, documents(20), embed_fn=embed)
+    # 지워진 첫 세그먼트만 잠금 안에서 다시 임베딩
+    assert sum(calls) == 20 + calls[0]
+    docs, vectors, _ = store.load_version("poc", manifest["version"])
+    assert [doc.page_content for doc in docs] == [doc.page_content for doc in documents(20)]
+    np.testing.assert_allclose(
+        vectors, np.asarray(embeddings.embed_documents([doc.page_content for doc in docs]))
+    )
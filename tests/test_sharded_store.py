@@ -0,0 +1,123 @@
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+from conftest import HashEmbeddings, project_root
+from src.sharded_store import ShardedVectorStore
+from src.vector_store import VectorStore
+
+tests_dir = str(Path(__file__).parent)
+
+DOCUMENTS = [Document(page_content=f"조항 {i}", metadata={"row": i}) for i in range(50)]
+QUERIES = ["조항 7", "하도급 대금 지급", "조항 42", "계약 해지"]
+
+
+@pytest.fixture(scope="module")
+def stores(tmp_path_factory):
+    """같은 문서로 만든 단일 스토어와 (배치를 나눠 추가한) 3샤드 스토어 경로"""
+    embeddings = HashEmbeddings()
+    single = VectorStore(embeddings)
+    single.add_documents(DOCUMENTS)
+
+    path = tmp_path_factory.mktemp("sharded") / "faiss_store"
+    builder = ShardedVectorStore(embeddings, num_shards=3)
+    for start in range(0, len(DOCUMENTS), 20):
+        builder.add_documents(DOCUMENTS[start : start + 20])
+    builder.save_local(str(path))
+    return single, str(path)
+
+
+@pytest.mark.parametrize("workers", ["thread", "process"])
+def test_sharded_search_matches_single_store(stores, workers):
+    single, path = stores
+    store = ShardedVectorStore(HashEmbeddings(), workers=workers)
+    store.load_local(path)
+    try:
+        assert store.num_shards == 3 and store.document_count == len(DOCUMENTS)
+        vectors = np.asarray(single.embeddings.embed_documents(QUERIES), dtype=np.float32)
+        for k in (1, 5, 60):
+            expected_distances, expected_ids = single.search_vectors(vectors, k)
+            distances, ids = store.search_vectors(vectors, k)
+            # 전역 ID는 단일 스토어의 인덱스 위치와 같고, 문서보다 큰 k는 -1로 채움
+            np.testing.assert_array_equal(ids, expected_ids)
+            np.testing.assert_allclose(
+                distances[ids >= 0], expected_distances[expected_ids >= 0], rtol=1e-5
+            )
+
+        for query in QUERIES:
+            expected = single.store.similarity_search(query, k=5)
+            found = store.similarity_search(query, k=5)
+            assert [(doc.page_content, doc.metadata) for doc in found] == [
+                (doc.page_content, doc.metadata) for doc in expected
+            ]
+    finally:
+        store.close()
+
+
+def test_process_workers_do_not_rerun_main_script(tmp_path):
+    """메인 스크립트에서 process 모드로 로드해도 샤드 워커가 스크립트를 다시 실행하지 않음"""
+    marker = tmp_path / "main_runs.txt"
+    store_path = tmp_path / "store"
+    script = tmp_path / "serve.py"
+    script.write_text(
+        textwrap.dedent(
+            f"""
+            import sys
+            sys.path.insert(0, {project_root!r})
+            sys.path.insert(0, {tests_dir!r})
+
+            # api/main.py처럼 모듈 수준에서 실행되는 코드
+            with open({str(marker)!r}, "a") as f:
+                f.write("run\\n")
+
+            from langchain_core.documents import Document
+            from conftest import HashEmbeddings
+            from src.sharded_store import ShardedVectorStore
+
+            if __name__ == "__main__":
+                embeddings = HashEmbeddings()
+                docs = [Document(page_content=f"조항 {{i}}") for i in range(12)]
+                builder = ShardedVectorStore(embeddings, num_shards=3)
+                builder.add_documents(docs)
+                builder.save_local({str(store_path)!r})
+
+                store = ShardedVectorStore(embeddings, workers="process")
+                store.load_local({str(store_path)!r})
+                print(store.similarity_search("조항 5", k=1)[0].page_content)
+                store.close()
+            """
+        ),
+        encoding="utf-8",
+    )
+
+    result = subprocess.run(
+        [sys.executable, str(script)], capture_output=True, text=True, timeout=120
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "조항 5"
+    assert marker.read_text().splitlines() == ["run"]
+
+
+def test_search_fails_fast_after_worker_dies(stores):
+    single, path = stores
+    store = ShardedVectorStore(HashEmbeddings(), workers="process", search_timeout=5.0)
+    store.load_local(path)
+    try:
+        worker = store._processes[1]
+        worker.process.kill()
+        worker.process.wait()
+        worker._reader.join(5)
+
+        # 워커가 죽은 뒤에 보낸 요청도 응답을 기다리며 멈추지 않고 바로 실패
+        vectors = np.asarray(single.embeddings.embed_documents(QUERIES), dtype=np.float32)
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                store.search_vectors(vectors, 5)
+    finally:
+        store.close()